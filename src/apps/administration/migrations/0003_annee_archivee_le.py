@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='anneescolaire',
+            name='archivee_le',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='archivée le'),
+        ),
+    ]
@@ -1,9 +1,16 @@
 # apps/administration/models.py
-from django.db import models
+import copy
+
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
+from core.cache import LocalCache, bump_version
 from core.models import TimeStampedModel
 
+ANNEE_CACHE_NAMESPACE = 'annee_active'
+_annee_cache = LocalCache(ANNEE_CACHE_NAMESPACE)
+
 class AnneeScolaire(TimeStampedModel):
     """
     Année scolaire (ex: 2025-2026)
@@ -48,6 +55,10 @@ class AnneeScolaire(TimeStampedModel):
         help_text=_("Une seule année peut être active à la fois")
     )
     
+    # Renseigné quand les notes et présences de l'année sont archivées puis
+    # supprimées (core/archives.py) : ses résumés ne se reconstruisent plus.
+    archivee_le = models.DateTimeField(_('archivée le'), null=True, blank=True)
+    
     class Meta:
         verbose_name = _('année scolaire')
         verbose_name_plural = _('années scolaires')
@@ -62,11 +73,85 @@ class AnneeScolaire(TimeStampedModel):
             # Désactiver toutes les autres années
             AnneeScolaire.objects.filter(est_active=True).exclude(pk=self.pk).update(est_active=False)
         super().save(*args, **kwargs)
+        bump_version(ANNEE_CACHE_NAMESPACE)
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        bump_version(ANNEE_CACHE_NAMESPACE)
+        return result
     
     @classmethod
     def get_annee_active(cls):
-        """Retourne l'année scolaire active"""
-        return cls.objects.filter(est_active=True).first()
+        """
+        Retourne l'année scolaire active.
+        Servie depuis le cache (processus puis partagé), invalidé par save/delete.
+        L'instance en cache est partagée par tous les threads du processus :
+        chaque appel en reçoit une copie, modifiable sans effet sur les autres.
+        """
+        annee = _annee_cache.get('active', cls._charger_annee_active)
+        return copy.copy(annee) if annee is not None else None
+    
+    @classmethod
+    def _charger_annee_active(cls):
+        annee = cls.objects.filter(est_active=True).first()
+        if annee is not None:
+            # Index construit une fois, mis en cache avec l'instance
+            annee._index_periodes()
+        return annee
+    
+    # ─── Périodes ──────────────────────────────────────────────
+    
+    def _bornes_periodes(self, systeme):
+        if systeme == 'TRIMESTRE':
+            return [
+                ('T1', self.trimestre1_debut, self.trimestre1_fin),
+                ('T2', self.trimestre2_debut, self.trimestre2_fin),
+                ('T3', self.trimestre3_debut, self.trimestre3_fin),
+            ]
+        return [
+            ('S1', self.semestre1_debut, self.semestre1_fin),
+            ('S2', self.semestre2_debut, self.semestre2_fin),
+        ]
+    
+    def get_bornes_periode(self, periode):
+        """(début, fin) de la période `periode` ('T1'...'S2'), ou (None, None)"""
+        systeme = 'SEMESTRE' if periode.startswith('S') else 'TRIMESTRE'
+        for code, debut, fin in self._bornes_periodes(systeme):
+            if code == periode:
+                return debut, fin
+        return None, None
+    
+    def _index_periodes(self):
+        """
+        {systeme: {date.toordinal(): code}} : une entrée par jour de l'année,
+        la recherche d'une période est un simple accès de dictionnaire.
+        """
+        if getattr(self, '_periodes', None) is None:
+            index = {}
+            for systeme in ('TRIMESTRE', 'SEMESTRE'):
+                jours = index[systeme] = {}
+                for code, debut, fin in self._bornes_periodes(systeme):
+                    if debut and fin:
+                        for ordinal in range(debut.toordinal(), fin.toordinal() + 1):
+                            jours[ordinal] = code
+            self._periodes = index
+        return self._periodes
+    
+    def get_trimestre(self, jour):
+        """Code du trimestre ('T1', 'T2', 'T3') contenant `jour`, ou None"""
+        return self._index_periodes()['TRIMESTRE'].get(jour.toordinal())
+    
+    def get_semestre(self, jour):
+        """Code du semestre ('S1', 'S2') contenant `jour`, ou None"""
+        return self._index_periodes()['SEMESTRE'].get(jour.toordinal())
+    
+    def get_periode(self, jour):
+        """Période de `jour` selon le système d'évaluation de l'année"""
+        return self._index_periodes()[self.systeme_evaluation].get(jour.toordinal())
+    
+    def refresh_from_db(self, *args, **kwargs):
+        self._periodes = None
+        super().refresh_from_db(*args, **kwargs)
 
 
 class Inscription(TimeStampedModel):
@@ -150,6 +235,33 @@ class Inscription(TimeStampedModel):
     
     def __str__(self):
         return f"{self.eleve.user.get_full_name()} - {self.classe} ({self.annee_scolaire})"
+    
+    def clean(self):
+        """
+        Validation pour l'année active : l'élève doit pouvoir entrer dans la
+        classe (mêmes conditions que le signal post_save).
+        """
+        super().clean()
+        if self.statut != self.StatutChoices.VALIDEE or not (self.eleve_id and self.classe_id):
+            return
+        if not self._state.adding and Inscription.objects.filter(
+            pk=self.pk, statut=self.StatutChoices.VALIDEE,
+        ).exists():
+            return
+        annee = AnneeScolaire.get_annee_active()
+        if annee is None or self.annee_scolaire_id != annee.pk:
+            return
+        from pedagogie.services import effectifs
+        try:
+            effectifs.verifier_place(self.classe_id, self.eleve.classe_actuelle_id)
+        except effectifs.ClasseComplete as exc:
+            raise ValidationError({'classe': exc.messages}) from exc
+    
+    def save(self, *args, **kwargs):
+        # La validation place l'élève dans sa classe (signal post_save) dans la
+        # même transaction : une classe complète annule la validation
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class Salle(TimeStampedModel):
@@ -1,3 +1,55 @@
+from datetime import date
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from administration.models import AnneeScolaire, _annee_cache
+
+
+def annee(debut, **champs):
+    return AnneeScolaire.objects.create(
+        nom=f'{debut}-{debut + 1}',
+        date_debut=date(debut, 9, 1),
+        date_fin=date(debut + 1, 6, 30),
+        trimestre1_debut=date(debut, 9, 1),
+        trimestre1_fin=date(debut, 12, 20),
+        **champs,
+    )
+
+
+class AnneeActiveTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        _annee_cache.clear()
+
+    def test_servie_depuis_le_cache(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            active = annee(2030, est_active=True)
+        self.assertEqual(AnneeScolaire.get_annee_active(), active)
+        with self.assertNumQueries(0):
+            self.assertEqual(AnneeScolaire.get_annee_active().get_trimestre(date(2030, 10, 1)), 'T1')
+
+    def test_copie_par_appel(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            annee(2030, est_active=True)
+        modifiee = AnneeScolaire.get_annee_active()
+        modifiee.nom = 'modifiée'
+        self.assertEqual(AnneeScolaire.get_annee_active().nom, '2030-2031')
+
+    def test_invalidation_apres_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            ancienne = annee(2030, est_active=True)
+        self.assertEqual(AnneeScolaire.get_annee_active(), ancienne)
+
+        with self.captureOnCommitCallbacks(execute=False) as rappels:
+            nouvelle = annee(2031, est_active=True)
+        # Pas encore validée : l'ancienne valeur reste servie
+        self.assertEqual(AnneeScolaire.get_annee_active(), ancienne)
+        for rappel in rappels:
+            rappel()
+        self.assertEqual(AnneeScolaire.get_annee_active(), nouvelle)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            nouvelle.delete()
+        self.assertIsNone(AnneeScolaire.get_annee_active())
@@ -0,0 +1,22 @@
+"""
+Benchmarks des endpoints d'authentification (voir core.benchmarks).
+"""
+from core.benchmarks import benchmark
+
+
+@benchmark('authentication.me', rounds=50)
+def me(ctx):
+    client = ctx.client_for(ctx.eleve.user)
+    return lambda: client.get('/v1/users/me/')
+
+
+@benchmark('authentication.user_list', rounds=30)
+def user_list(ctx):
+    client = ctx.client_for(ctx.admin)
+    return lambda: client.get('/v1/users/', {'role': 'ELEVE'})
+
+
+@benchmark('authentication.user_search', rounds=30)
+def user_search(ctx):
+    client = ctx.client_for(ctx.admin)
+    return lambda: client.get('/v1/users/', {'search': ctx.eleve.user.last_name})
@@ -1,6 +1,7 @@
 # apps/authentication/models.py
 from django.contrib.auth.models import AbstractUser, Group, Permission
-from django.db import models
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from core.models import TimeStampedModel
 
@@ -152,6 +153,27 @@ class EleveProfile(TimeStampedModel):
     
     def __str__(self):
         return f"{self.user.get_full_name()} - {self.matricule}"
+    
+    def clean(self):
+        """Classe complète : erreur de champ plutôt qu'un échec à l'enregistrement."""
+        super().clean()
+        from pedagogie.services import effectifs
+        precedente = None
+        if not self._state.adding:
+            precedente = (
+                EleveProfile.objects.filter(pk=self.pk)
+                .values_list('classe_actuelle_id', flat=True).first()
+            )
+        try:
+            effectifs.verifier_place(self.classe_actuelle_id, precedente)
+        except effectifs.ClasseComplete as exc:
+            raise ValidationError({'classe_actuelle': exc.messages}) from exc
+    
+    def save(self, *args, **kwargs):
+        # Classe.effectif (signal post_save) est mis à jour dans la même
+        # transaction : une classe complète annule le changement de classe
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
 
 class EnseignantProfile(TimeStampedModel):
@@ -206,6 +228,18 @@ class EnseignantProfile(TimeStampedModel):
     
     def __str__(self):
         return f"Prof. {self.user.get_full_name()}"
+    
+    def enseigne_dans(self, classe, matiere=None):
+        """
+        Vrai si l'enseignant a un créneau d'emploi du temps dans `classe`
+        (pour `matiere` si précisée). Sans matière, le professeur principal
+        de la classe y a aussi accès.
+        """
+        classe_id = getattr(classe, 'pk', classe)
+        creneaux = self.creneaux.filter(classe_id=classe_id)
+        if matiere is not None:
+            return creneaux.filter(matiere_id=getattr(matiere, 'pk', matiere)).exists()
+        return creneaux.exists() or self.classes_principales.filter(pk=classe_id).exists()
 
 
 class ParentProfile(TimeStampedModel):
@@ -137,6 +137,23 @@ class EleveProfileSerializer(TimeStampedSerializer):
         ]
         read_only_fields = ['id', 'matricule', 'created_at', 'updated_at']
 
+    def validate_classe_actuelle(self, classe):
+        from pedagogie.services import effectifs
+        precedente = self.instance.classe_actuelle_id if self.instance else None
+        try:
+            effectifs.verifier_place(getattr(classe, 'pk', None), precedente)
+        except effectifs.ClasseComplete as exc:
+            raise serializers.ValidationError(exc.messages) from exc
+        return classe
+
+    def save(self, **kwargs):
+        # Place prise entre la validation et l'écriture (UPDATE conditionnel)
+        from pedagogie.services import effectifs
+        try:
+            return super().save(**kwargs)
+        except effectifs.ClasseComplete as exc:
+            raise serializers.ValidationError({'classe_actuelle': exc.messages}) from exc
+
 
 class EnseignantProfileSerializer(TimeStampedSerializer):
     matieres_display = serializers.SerializerMethodField()
@@ -0,0 +1,36 @@
+"""
+Envoie aux parents le récapitulatif des absences non notifiées.
+
+Usage:
+    python manage.py envoyer_digests_absences
+    python manage.py envoyer_digests_absences --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from communication.services import envoyer_digests_absences
+
+
+class Command(BaseCommand):
+    help = "Regroupe les absences non notifiées par parent et envoie un récapitulatif"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limite', type=int, default=5000,
+                            help='Nombre maximal de présences traitées')
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Affiche les récapitulatifs sans les envoyer")
+
+    def handle(self, *args, **options):
+        resultat = envoyer_digests_absences(limite=options['limite'], dry_run=options['dry_run'])
+        if resultat.get('verrouille'):
+            self.stdout.write(self.style.WARNING('Un envoi est déjà en cours.'))
+            return
+        if options['dry_run']:
+            for message in resultat['messages']:
+                self.stdout.write(f"── {message.email or message.telephone} — {message.sujet}")
+                self.stdout.write(message.corps)
+            self.stdout.write(self.style.SUCCESS(f"{resultat['envoyes']} récapitulatifs à envoyer."))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"{resultat['envoyes']} récapitulatifs envoyés, {resultat['echecs']} échecs, "
+            f"{resultat['presences']} présences marquées."
+        ))
@@ -0,0 +1,105 @@
+"""
+Fournisseurs d'envoi des notifications (email, SMS...).
+
+Un fournisseur s'utilise comme gestionnaire de contexte : la connexion
+est ouverte une fois puis réutilisée pour tous les messages d'un lot.
+
+    with get_provider() as provider:
+        for message in messages:
+            provider.envoyer(message)
+
+Le fournisseur est choisi par le réglage NOTIFICATIONS_PROVIDER
+(chemin pointé), FakeProvider en développement et pour les tests.
+"""
+import logging
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger('communication')
+
+
+@dataclass
+class Message:
+    sujet: str
+    corps: str
+    email: str = ''
+    telephone: str = ''
+    meta: dict = field(default_factory=dict)
+
+
+class ProviderError(Exception):
+    pass
+
+
+class BaseProvider:
+    """Interface commune : ouvrir(), envoyer(message), fermer()."""
+
+    def ouvrir(self):
+        pass
+
+    def fermer(self):
+        pass
+
+    def envoyer(self, message):
+        raise NotImplementedError
+
+    def __enter__(self):
+        self.ouvrir()
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+        return False
+
+
+class EmailProvider(BaseProvider):
+    """Envoi par email avec une seule connexion SMTP pour tout le lot."""
+
+    def __init__(self, from_email=None):
+        self.from_email = from_email or settings.DEFAULT_FROM_EMAIL
+        self.connection = None
+
+    def ouvrir(self):
+        self.connection = get_connection(fail_silently=False)
+        self.connection.open()
+
+    def fermer(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def envoyer(self, message):
+        if not message.email:
+            raise ProviderError('Aucune adresse email')
+        EmailMessage(
+            message.sujet, message.corps, self.from_email, [message.email],
+            connection=self.connection,
+        ).send()
+
+
+class FakeProvider(BaseProvider):
+    """
+    Fournisseur local : garde les messages en mémoire (`outbox`).
+    `echecs` : adresses/numéros pour lesquels simuler une erreur d'envoi.
+    """
+    def __init__(self, echecs=()):
+        self.echecs = set(echecs)
+        self.outbox = []
+        self.ouvertures = 0
+
+    def ouvrir(self):
+        self.ouvertures += 1
+
+    def envoyer(self, message):
+        if message.email in self.echecs or message.telephone in self.echecs:
+            raise ProviderError(f'Échec simulé pour {message.email or message.telephone}')
+        self.outbox.append(message)
+        logger.debug('Notification (fake) : %s', message.sujet)
+
+
+def get_provider():
+    path = getattr(settings, 'NOTIFICATIONS_PROVIDER', 'communication.providers.FakeProvider')
+    return import_string(path)()
@@ -0,0 +1,153 @@
+"""
+Envoi groupé des absences aux parents.
+
+Les présences ABSENT / RETARD non notifiées sont regroupées par parent
+(ParentProfile.eleves) : chaque parent reçoit un seul récapitulatif pour
+tous ses enfants, quel que soit le nombre d'absences. Un lot coûte cinq
+requêtes (présences, liens parents, parents, élèves, mise à jour) plus
+les envois, sur une connexion réutilisée.
+
+Une présence est marquée `notification_envoyee` quand tous les parents
+de l'élève ont été prévenus. En cas d'échec, son compteur de tentatives
+et la date de l'échec sont enregistrés : elle est reprise après
+DELAI_RELANCE, abandonnée après MAX_TENTATIVES, et les présences jamais
+tentées passent en premier. Des échecs permanents ne peuvent donc pas
+occuper tous les lots. Un verrou dans le cache empêche deux envois
+simultanés.
+"""
+import logging
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db.models import F, Q
+from django.utils import timezone
+
+from authentication.models import EleveProfile, ParentProfile
+from pedagogie.models import Presence
+from pedagogie import referentiel
+
+from .providers import Message, ProviderError, get_provider
+
+logger = logging.getLogger('communication')
+
+STATUTS_NOTIFIES = [Presence.StatutChoices.ABSENT, Presence.StatutChoices.RETARD]
+VERROU = 'communication:digests_absences'
+VERROU_TIMEOUT = 60 * 15
+TAILLE_LOT = 5000
+MAX_TENTATIVES = 5
+DELAI_RELANCE = timedelta(hours=1)
+
+
+def _ligne(presence):
+    matiere = referentiel.get_matiere(presence['matiere_id']) if presence['matiere_id'] else None
+    libelle = 'absent(e)' if presence['statut'] == Presence.StatutChoices.ABSENT else 'en retard'
+    suffixe = f" ({matiere.nom})" if matiere else ''
+    return f"  - {presence['date']:%d/%m/%Y} : {libelle}{suffixe}"
+
+
+def composer_digest(parent, enfants):
+    """`enfants` : [(nom, [présences])] → Message."""
+    lignes = [f"Bonjour {parent.user.get_full_name()},", ""]
+    lignes.append("Voici les absences et retards récemment enregistrés :")
+    for nom, presences in enfants:
+        lignes.append("")
+        lignes.append(f"{nom} :")
+        lignes.extend(_ligne(p) for p in sorted(presences, key=lambda p: p['date']))
+    lignes += ["", "Pour toute justification, merci de contacter l'établissement."]
+    total = sum(len(presences) for _, presences in enfants)
+    return Message(
+        sujet=f"Absences et retards ({total})",
+        corps="\n".join(lignes),
+        email=parent.user.email,
+        telephone=parent.user.phone,
+        meta={'parent': parent.pk},
+    )
+
+
+def preparer_digests(limite=TAILLE_LOT):
+    """
+    (messages, presences_par_parent, orphelines) :
+    un Message par parent, les présences couvertes par chaque message et
+    les présences d'élèves sans parent.
+    """
+    relance = timezone.now() - DELAI_RELANCE
+    presences = list(
+        Presence.objects
+        .filter(
+            Q(notification_echec_le__isnull=True) | Q(notification_echec_le__lte=relance),
+            notification_envoyee=False,
+            statut__in=STATUTS_NOTIFIES,
+            notification_tentatives__lt=MAX_TENTATIVES,
+        )
+        .order_by('notification_tentatives', 'date')
+        .values('pk', 'eleve_id', 'date', 'statut', 'matiere_id')[:limite]
+    )
+    par_eleve = defaultdict(list)
+    for presence in presences:
+        par_eleve[presence['eleve_id']].append(presence)
+
+    liens = ParentProfile.eleves.through.objects.filter(
+        eleveprofile_id__in=par_eleve
+    ).values_list('parentprofile_id', 'eleveprofile_id')
+    enfants_par_parent = defaultdict(list)
+    for parent_id, eleve_id in liens:
+        enfants_par_parent[parent_id].append(eleve_id)
+
+    parents = ParentProfile.objects.select_related('user').in_bulk(list(enfants_par_parent))
+    noms = {
+        e.pk: e.user.get_full_name()
+        for e in EleveProfile.objects.select_related('user').filter(pk__in=par_eleve)
+    }
+
+    messages, couvertes = [], {}
+    for parent_id, eleve_ids in enfants_par_parent.items():
+        parent = parents[parent_id]
+        enfants = [(noms[e], par_eleve[e]) for e in sorted(eleve_ids, key=noms.get)]
+        messages.append(composer_digest(parent, enfants))
+        couvertes[parent_id] = {p['pk'] for e in eleve_ids for p in par_eleve[e]}
+
+    avec_parent = {e for ids in enfants_par_parent.values() for e in ids}
+    orphelines = {p['pk'] for e, ps in par_eleve.items() if e not in avec_parent for p in ps}
+    return messages, couvertes, orphelines
+
+
+def envoyer_digests_absences(provider=None, limite=TAILLE_LOT, dry_run=False):
+    """Envoie un récapitulatif par parent et marque les présences notifiées."""
+    if not cache.add(VERROU, 1, VERROU_TIMEOUT):
+        logger.info('Envoi des récapitulatifs déjà en cours')
+        return {'envoyes': 0, 'echecs': 0, 'presences': 0, 'verrouille': True}
+    try:
+        messages, couvertes, orphelines = preparer_digests(limite)
+        if dry_run:
+            return {'envoyes': len(messages), 'echecs': 0, 'presences': 0, 'messages': messages}
+
+        envoyees, en_echec = set(orphelines), set()
+        echecs = 0
+        with (provider or get_provider()) as p:
+            for message in messages:
+                ids = couvertes[message.meta['parent']]
+                try:
+                    p.envoyer(message)
+                    envoyees |= ids
+                except (ProviderError, OSError) as exc:
+                    echecs += 1
+                    en_echec |= ids
+                    logger.warning('Récapitulatif non envoyé au parent %s : %s',
+                                   message.meta['parent'], exc)
+
+        # Un élève avec deux parents : notifié seulement si les deux envois ont réussi
+        a_marquer = list(envoyees - en_echec)
+        for i in range(0, len(a_marquer), 1000):
+            Presence.objects.filter(pk__in=a_marquer[i:i + 1000]).update(notification_envoyee=True)
+        a_reprendre, maintenant = list(en_echec), timezone.now()
+        for i in range(0, len(a_reprendre), 1000):
+            Presence.objects.filter(pk__in=a_reprendre[i:i + 1000]).update(
+                notification_tentatives=F('notification_tentatives') + 1,
+                notification_echec_le=maintenant,
+            )
+        logger.info('%s récapitulatifs envoyés, %s échecs, %s présences marquées',
+                    len(messages) - echecs, echecs, len(a_marquer))
+        return {'envoyes': len(messages) - echecs, 'echecs': echecs, 'presences': len(a_marquer)}
+    finally:
+        cache.delete(VERROU)
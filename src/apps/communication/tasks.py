@@ -0,0 +1,13 @@
+"""
+Tâches Celery de l'app communication.
+"""
+from celery import shared_task
+
+
+@shared_task
+def envoyer_digests_absences():
+    """Récapitulatif périodique des absences aux parents (voir CELERY_BEAT_SCHEDULE)."""
+    from .services import envoyer_digests_absences as envoyer
+    resultat = envoyer()
+    resultat.pop('messages', None)
+    return resultat
@@ -1,3 +1,98 @@
+from datetime import timedelta
+
+from django.core.cache import cache
 from django.test import TestCase
 
-# Create your tests here.
+from authentication.models import ParentProfile
+from core.seeding import SchoolSeeder, SeedConfig
+from pedagogie.models import Presence
+
+from communication.providers import FakeProvider
+from communication.services import DELAI_RELANCE, MAX_TENTATIVES, VERROU, envoyer_digests_absences
+
+
+class DigestsAbsencesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seeder = SchoolSeeder(SeedConfig(classes_par_niveau=1, eleves_par_classe=2, jours_presence=0))
+        seeder.run()
+        cls.premier, cls.second = seeder.eleves[:2]
+        # Un parent pour les deux enfants, seul parent de chacun
+        ParentProfile.eleves.through.objects.filter(
+            eleveprofile_id__in=[cls.premier.pk, cls.second.pk],
+        ).delete()
+        cls.parent = ParentProfile.objects.order_by('pk').first()
+        cls.parent.eleves.add(cls.premier, cls.second)
+        debut = seeder.annee.date_debut
+        cls.presences = [
+            Presence.objects.create(
+                eleve=eleve, classe_id=eleve.classe_actuelle_id,
+                date=debut + timedelta(days=jour), statut=statut,
+            )
+            for eleve, jour, statut in (
+                (cls.premier, 1, Presence.StatutChoices.ABSENT),
+                (cls.premier, 2, Presence.StatutChoices.RETARD),
+                (cls.second, 1, Presence.StatutChoices.ABSENT),
+                (cls.second, 3, Presence.StatutChoices.PRESENT),
+            )
+        ]
+
+    def setUp(self):
+        cache.clear()
+
+    def _en_attente(self):
+        return Presence.objects.filter(
+            pk__in=[p.pk for p in self.presences], notification_envoyee=False,
+        ).exclude(statut=Presence.StatutChoices.PRESENT)
+
+    def test_un_recapitulatif_par_parent(self):
+        provider = FakeProvider()
+        resultat = envoyer_digests_absences(provider=provider)
+
+        self.assertEqual(resultat, {'envoyes': 1, 'echecs': 0, 'presences': 3})
+        self.assertEqual(provider.ouvertures, 1)
+        [message] = provider.outbox
+        self.assertEqual(message.email, self.parent.user.email)
+        self.assertEqual(message.sujet, 'Absences et retards (3)')
+        for eleve in (self.premier, self.second):
+            self.assertIn(eleve.user.get_full_name(), message.corps)
+        self.assertFalse(self._en_attente().exists())
+        # Rien de plus au passage suivant
+        self.assertEqual(envoyer_digests_absences(provider=FakeProvider())['envoyes'], 0)
+
+    def test_echec_repris_apres_le_delai(self):
+        with self.assertLogs('communication', 'WARNING'):
+            resultat = envoyer_digests_absences(provider=FakeProvider(echecs=[self.parent.user.email]))
+        self.assertEqual((resultat['envoyes'], resultat['echecs']), (0, 1))
+        self.assertEqual(
+            set(self._en_attente().values_list('notification_tentatives', flat=True)), {1},
+        )
+
+        # Pas de nouvelle tentative avant DELAI_RELANCE
+        provider = FakeProvider()
+        self.assertEqual(envoyer_digests_absences(provider=provider)['envoyes'], 0)
+        self.assertEqual(provider.outbox, [])
+
+        echec_le = self._en_attente()[0].notification_echec_le
+        self._en_attente().update(notification_echec_le=echec_le - DELAI_RELANCE)
+        self.assertEqual(envoyer_digests_absences(provider=provider)['presences'], 3)
+        self.assertEqual(len(provider.outbox), 1)
+
+    def test_abandon_apres_max_tentatives(self):
+        self._en_attente().update(notification_tentatives=MAX_TENTATIVES)
+        provider = FakeProvider()
+        self.assertEqual(envoyer_digests_absences(provider=provider)['envoyes'], 0)
+        self.assertEqual(provider.outbox, [])
+
+    def test_verrou_bloque_un_second_envoi(self):
+        cache.add(VERROU, 1)
+        provider = FakeProvider()
+        self.assertTrue(envoyer_digests_absences(provider=provider)['verrouille'])
+        self.assertEqual(provider.outbox, [])
+        self.assertEqual(self._en_attente().count(), 3)
+
+        cache.delete(VERROU)
+        self.assertEqual(envoyer_digests_absences(provider=provider)['envoyes'], 1)
+        # Verrou libéré en fin d'envoi
+        self.assertIsNone(cache.get(VERROU))
@@ -1,6 +1,8 @@
 from django.contrib import admin
 
-from finances.models import FraisScolaire, Facture, Paiement, RapportFinancier
+from finances.models import (
+    FraisScolaire, Facture, Paiement, RapportFinancier, SequenceNumerotation,
+)
 
 
 @admin.register(FraisScolaire)
@@ -20,4 +22,8 @@ class PaiementAdmin(admin.ModelAdmin):
 
 @admin.register(RapportFinancier)
 class RapportFinancierAdmin(admin.ModelAdmin):
-    pass
\ No newline at end of file
+    pass
+
+@admin.register(SequenceNumerotation)
+class SequenceNumerotationAdmin(admin.ModelAdmin):
+    pass
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.1 on 2026-10-19 03:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='facture',
+            name='numero',
+            field=models.CharField(blank=True, help_text='Ex: FACT-2026-001 (attribué automatiquement si vide)', max_length=50, unique=True, verbose_name='numéro de facture'),
+        ),
+        migrations.AlterField(
+            model_name='paiement',
+            name='numero_recu',
+            field=models.CharField(blank=True, help_text='Ex: RECU-2026-001 (attribué automatiquement si vide)', max_length=50, unique=True, verbose_name='numéro de reçu'),
+        ),
+        migrations.CreateModel(
+            name='SequenceNumerotation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('prefixe', models.CharField(max_length=10, verbose_name='préfixe')),
+                ('annee', models.PositiveIntegerField(verbose_name='année')),
+                ('dernier_numero', models.PositiveIntegerField(default=0, verbose_name='dernier numéro attribué')),
+            ],
+            options={
+                'verbose_name': 'séquence de numérotation',
+                'verbose_name_plural': 'séquences de numérotation',
+                'unique_together': {('prefixe', 'annee')},
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 # apps/finances/models.py
-from django.db import models
+from django.db import models, transaction
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator
 from decimal import Decimal
@@ -104,11 +105,14 @@ class Facture(TimeStampedModel):
         PAYEE = 'PAYEE', _('Payée')
         ANNULEE = 'ANNULEE', _('Annulée')
     
+    PREFIXE_NUMERO = 'FACT'
+    
     numero = models.CharField(
         _('numéro de facture'),
         max_length=50,
         unique=True,
-        help_text=_("Ex: FACT-2026-001")
+        blank=True,
+        help_text=_("Ex: FACT-2026-001 (attribué automatiquement si vide)")
     )
     
     eleve = models.ForeignKey(
@@ -212,7 +216,17 @@ class Facture(TimeStampedModel):
         elif self.statut == self.StatutChoices.BROUILLON:
             self.statut = self.StatutChoices.EMISE
         
-        super().save(*args, **kwargs)
+        if self.numero:
+            super().save(*args, **kwargs)
+            return
+        
+        # Numéro et insertion dans la même transaction : pas de trou si l'insertion échoue
+        from .services import prochain_numero
+        with transaction.atomic():
+            self.numero = prochain_numero(
+                self.PREFIXE_NUMERO, self.date_emission.year, source=(Facture, 'numero')
+            )
+            super().save(*args, **kwargs)
 
 
 class Paiement(TimeStampedModel):
@@ -235,11 +249,14 @@ class Paiement(TimeStampedModel):
         ANNULE = 'ANNULE', _('Annulé')
         REMBOURSE = 'REMBOURSE', _('Remboursé')
     
+    PREFIXE_NUMERO = 'RECU'
+    
     numero_recu = models.CharField(
         _('numéro de reçu'),
         max_length=50,
         unique=True,
-        help_text=_("Ex: RECU-2026-001")
+        blank=True,
+        help_text=_("Ex: RECU-2026-001 (attribué automatiquement si vide)")
     )
     
     facture = models.ForeignKey(
@@ -337,7 +354,15 @@ class Paiement(TimeStampedModel):
     
     def save(self, *args, **kwargs):
         """Mise à jour du montant payé de la facture"""
-        super().save(*args, **kwargs)
+        if self.numero_recu:
+            super().save(*args, **kwargs)
+        else:
+            from .services import prochain_numero
+            with transaction.atomic():
+                self.numero_recu = prochain_numero(
+                    self.PREFIXE_NUMERO, timezone.now().year, source=(Paiement, 'numero_recu')
+                )
+                super().save(*args, **kwargs)
         
         if self.statut == self.StatutChoices.VALIDE:
             # Recalculer le montant payé de la facture
@@ -441,4 +466,22 @@ class RapportFinancier(TimeStampedModel):
         ordering = ['-date_generation']
     
     def __str__(self):
-        return f"{self.titre} ({self.date_debut} - {self.date_fin})"
\ No newline at end of file
+        return f"{self.titre} ({self.date_debut} - {self.date_fin})"
+
+
+class SequenceNumerotation(models.Model):
+    """
+    Compteur de numérotation séquentielle par préfixe et par année
+    (FACT-2026-001, RECU-2026-001...). Voir finances.services.
+    """
+    prefixe = models.CharField(_('préfixe'), max_length=10)
+    annee = models.PositiveIntegerField(_('année'))
+    dernier_numero = models.PositiveIntegerField(_('dernier numéro attribué'), default=0)
+    
+    class Meta:
+        verbose_name = _('séquence de numérotation')
+        verbose_name_plural = _('séquences de numérotation')
+        unique_together = [['prefixe', 'annee']]
+    
+    def __str__(self):
+        return f"{self.prefixe}-{self.annee} : {self.dernier_numero}"
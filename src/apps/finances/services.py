@@ -0,0 +1,70 @@
+"""
+Service de numérotation séquentielle des factures et reçus.
+
+Format : <PREFIXE>-<ANNEE>-<NNN>  (ex: FACT-2026-001, RECU-2026-042)
+
+Le compteur (SequenceNumerotation) est incrémenté par un UPDATE, qui
+verrouille la ligne (PostgreSQL) ou la base (SQLite) jusqu'à la fin de la
+transaction englobante. Deux allocations concurrentes sont donc
+sérialisées, et si la transaction est annulée l'incrément l'est aussi :
+la numérotation reste sans trou tant que l'allocation et l'insertion du
+document se font dans la même transaction.
+
+    with transaction.atomic():
+        numeros = allouer_numeros('FACT', 2026, len(factures))
+        for facture, numero in zip(factures, numeros):
+            facture.numero = numero
+        Facture.objects.bulk_create(factures)
+"""
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+
+from .models import SequenceNumerotation
+
+
+def formater_numero(prefixe, annee, numero):
+    return f"{prefixe}-{annee}-{numero:03d}"
+
+
+def _dernier_numero_existant(source, prefixe, annee):
+    """Plus grand numéro déjà attribué (données antérieures au compteur)."""
+    model, field = source
+    pattern = re.compile(rf'^{re.escape(prefixe)}-{annee}-(\d+)$')
+    numeros = model.objects.filter(
+        **{f'{field}__startswith': f'{prefixe}-{annee}-'}
+    ).values_list(field, flat=True)
+    return max(
+        (int(m.group(1)) for m in map(pattern.match, numeros) if m),
+        default=0,
+    )
+
+
+def allouer_numeros(prefixe, annee, nombre, source=None):
+    """
+    Réserve `nombre` numéros consécutifs et les retourne formatés.
+    `source` = (Model, 'champ') permet d'initialiser un nouveau compteur
+    à partir des numéros déjà présents en base.
+    """
+    if nombre < 1:
+        return []
+    with transaction.atomic():
+        compteurs = SequenceNumerotation.objects.filter(prefixe=prefixe, annee=annee)
+        if not compteurs.update(dernier_numero=F('dernier_numero') + nombre):
+            depart = _dernier_numero_existant(source, prefixe, annee) if source else 0
+            try:
+                with transaction.atomic():
+                    SequenceNumerotation.objects.create(
+                        prefixe=prefixe, annee=annee, dernier_numero=depart + nombre
+                    )
+            except IntegrityError:
+                # Compteur créé en parallèle : on incrémente celui-ci
+                compteurs.update(dernier_numero=F('dernier_numero') + nombre)
+        dernier = compteurs.values_list('dernier_numero', flat=True).get()
+    premier = dernier - nombre + 1
+    return [formater_numero(prefixe, annee, n) for n in range(premier, dernier + 1)]
+
+
+def prochain_numero(prefixe, annee, source=None):
+    return allouer_numeros(prefixe, annee, 1, source=source)[0]
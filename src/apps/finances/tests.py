@@ -1,3 +1,99 @@
-from django.test import TestCase
+import threading
 
-# Create your tests here.
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from core.seeding import SchoolSeeder, SeedConfig
+
+from finances.models import Facture, SequenceNumerotation
+from finances.services import allouer_numeros, formater_numero, prochain_numero
+
+
+class NumerotationTests(TestCase):
+
+    def test_numeros_consecutifs(self):
+        self.assertEqual(allouer_numeros('FACT', 2030, 3), ['FACT-2030-001', 'FACT-2030-002', 'FACT-2030-003'])
+        self.assertEqual(prochain_numero('FACT', 2030), 'FACT-2030-004')
+        # Compteur distinct par préfixe et par année
+        self.assertEqual(prochain_numero('RECU', 2030), 'RECU-2030-001')
+        self.assertEqual(prochain_numero('FACT', 2031), 'FACT-2031-001')
+
+    def test_annulation_libere_le_numero(self):
+        prochain_numero('FACT', 2030)
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                self.assertEqual(prochain_numero('FACT', 2030), 'FACT-2030-002')
+                raise RuntimeError('insertion échouée')
+        self.assertEqual(prochain_numero('FACT', 2030), 'FACT-2030-002')
+
+    def test_format_au_dela_de_999(self):
+        self.assertEqual(formater_numero('RECU', 2030, 1234), 'RECU-2030-1234')
+
+
+class NumerotationFacturesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolSeeder(SeedConfig(classes_par_niveau=1, eleves_par_classe=2, jours_presence=5)).run()
+
+    def _nouvelle_facture(self, **champs):
+        facture = Facture.objects.order_by('pk').last()
+        facture.pk, facture.numero = None, ''
+        for champ, valeur in champs.items():
+            setattr(facture, champ, valeur)
+        facture.save()
+        return facture
+
+    def test_compteur_initialise_depuis_les_numeros_existants(self):
+        annee = Facture.objects.order_by('pk').last().date_emission.year
+        dernier = max(
+            int(numero.rsplit('-', 1)[1])
+            for numero in Facture.objects.filter(numero__startswith=f'FACT-{annee}-').values_list('numero', flat=True)
+        )
+        SequenceNumerotation.objects.all().delete()
+        self.assertEqual(self._nouvelle_facture().numero, formater_numero('FACT', annee, dernier + 1))
+
+    def test_insertion_echouee_sans_trou(self):
+        premiere = self._nouvelle_facture()
+        with self.assertRaises(IntegrityError):
+            self._nouvelle_facture(eleve_id=None)
+        prefixe, annee, numero = premiere.numero.split('-')
+        self.assertEqual(self._nouvelle_facture().numero, formater_numero(prefixe, int(annee), int(numero) + 1))
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class NumerotationConcurrenceTests(TransactionTestCase):
+    """Allocations simultanées sur des connexions distinctes, dont certaines annulées."""
+
+    def test_sans_trou_ni_doublon(self):
+        fils_count, tours = 8, 10
+        depart = threading.Barrier(fils_count)
+        attribues, erreurs = [], []
+        verrou = threading.Lock()
+
+        def allouer(rang):
+            try:
+                depart.wait()
+                for tour in range(tours):
+                    try:
+                        with transaction.atomic():
+                            numero = prochain_numero('FACT', 2030)
+                            if (rang + tour) % 3 == 0:
+                                raise RuntimeError('annulée')
+                        with verrou:
+                            attribues.append(numero)
+                    except RuntimeError:
+                        pass
+            except Exception as exc:
+                erreurs.append(exc)
+            finally:
+                connection.close()
+
+        fils = [threading.Thread(target=allouer, args=(rang,)) for rang in range(fils_count)]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+
+        self.assertEqual(erreurs, [])
+        self.assertEqual(sorted(attribues), [formater_numero('FACT', 2030, n) for n in range(1, len(attribues) + 1)])
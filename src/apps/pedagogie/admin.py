@@ -1,5 +1,7 @@
 from django.contrib import admin
-from . models import Matiere, Classe, EmploiDuTemps, Note, Presence, Bulletin
+from . models import (
+    Matiere, Classe, EmploiDuTemps, VolumeHoraire, CreneauBloque, Note, MoyenneMatiere, Presence, AssiduiteMensuelle, Bulletin,
+)
 
 @admin.register(Matiere)
 class MatiereAdmin(admin.ModelAdmin):
@@ -14,14 +16,47 @@ class ClasseAdmin(admin.ModelAdmin):
 class EmploiDuTempsAdmin(admin.ModelAdmin):
     pass
 
+@admin.register(VolumeHoraire)
+class VolumeHoraireAdmin(admin.ModelAdmin):
+    pass
+
+@admin.register(CreneauBloque)
+class CreneauBloqueAdmin(admin.ModelAdmin):
+    pass
+
 @admin.register(Note)
 class Notedmin(admin.ModelAdmin):
     pass
 
+@admin.register(MoyenneMatiere)
+class MoyenneMatiereAdmin(admin.ModelAdmin):
+    pass
+
 @admin.register(Presence)
 class PresenceAdmin(admin.ModelAdmin):
     pass
 
+@admin.register(AssiduiteMensuelle)
+class AssiduiteMensuelleAdmin(admin.ModelAdmin):
+    pass
+
 @admin.register(Bulletin)
 class BulletinAdmin(admin.ModelAdmin):
-    pass
\ No newline at end of file
+    actions = ['regenerer_pdfs_obsoletes']
+
+    @admin.action(description="Régénérer les PDF obsolètes")
+    def regenerer_pdfs_obsoletes(self, request, queryset):
+        from collections import defaultdict
+        from .services.bulletins_pdf import generer_pdfs_classe
+
+        groupes = defaultdict(list)
+        for pk, classe_id, periode, annee_id in queryset.values_list(
+            'pk', 'classe_id', 'periode', 'annee_scolaire_id'
+        ):
+            groupes[classe_id, periode, annee_id].append(pk)
+        rendus = inchanges = 0
+        for (classe_id, periode, annee_id), ids in groupes.items():
+            resultat = generer_pdfs_classe(classe_id, periode, annee_id, bulletin_ids=ids)
+            rendus += resultat['pdfs']
+            inchanges += resultat['inchanges']
+        self.message_user(request, f"{rendus} PDF régénérés, {inchanges} déjà à jour.")
\ No newline at end of file
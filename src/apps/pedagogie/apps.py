@@ -3,3 +3,6 @@ from django.apps import AppConfig
 
 class PedagogieConfig(AppConfig):
     name = 'pedagogie'
+
+    def ready(self):
+        from . import signals  # noqa: F401
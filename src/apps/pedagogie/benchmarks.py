@@ -0,0 +1,227 @@
+"""
+Benchmarks de la pédagogie (voir core.benchmarks).
+"""
+from core.benchmarks import benchmark
+from pedagogie.services.bulletins import calculer_bulletins
+
+
+@benchmark('pedagogie.bulletins_classe', rounds=10)
+def bulletins_classe(ctx):
+    return lambda: calculer_bulletins('T1', annee=ctx.annee, classes=[ctx.classe])
+
+
+@benchmark('pedagogie.bulletins_etablissement', rounds=3, warmup=1)
+def bulletins_etablissement(ctx):
+    return lambda: calculer_bulletins('T1', annee=ctx.annee)
+
+
+@benchmark('pedagogie.bulletin_pdf', rounds=30)
+def bulletin_pdf(ctx):
+    """Rendu seul d'un bulletin : 60 / médiane = PDF/min par cœur."""
+    from pedagogie.services.bulletins_pdf import charger_classe, get_rendu
+
+    calculer_bulletins('T1', annee=ctx.annee, classes=[ctx.classe])
+    rendu = get_rendu()
+    _, donnees = charger_classe(ctx.classe.pk, 'T1', ctx.annee.pk)[0]
+    return lambda: rendu.rendre(donnees)
+
+
+@benchmark('pedagogie.statistiques', rounds=30)
+def statistiques(ctx):
+    client = ctx.client_for(ctx.admin)
+    return lambda: client.get('/v1/pedagogie/statistiques/', {'periode': 'T1'})
+
+
+@benchmark('pedagogie.feuille_notes', rounds=20)
+def feuille_notes(ctx):
+    """Correction d'une feuille de notes complète (mise à jour de toute la classe)."""
+    from authentication.models import EleveProfile
+
+    matiere = ctx.enseignant.matieres.first()
+    eleves = EleveProfile.objects.filter(classe_actuelle=ctx.classe).values_list('pk', flat=True)
+    client = ctx.client_for(ctx.enseignant.user)
+    feuille = {
+        'classe': ctx.classe.pk,
+        'matiere': matiere.pk,
+        'type_note': 'INTERRO',
+        'periode': 'T1',
+        'date_evaluation': f'{ctx.annee.date_debut:%Y}-11-15',
+        'notes': [{'eleve': pk, 'valeur': 8 + pk % 12} for pk in eleves],
+    }
+    return lambda: client.post('/v1/pedagogie/notes/feuille/', feuille, content_type='application/json')
+
+
+@benchmark('pedagogie.appel', rounds=20)
+def appel(ctx):
+    """Appel de la journée d'une classe avec quelques absents."""
+    from authentication.models import EleveProfile
+
+    eleves = list(EleveProfile.objects.filter(classe_actuelle=ctx.classe).values_list('pk', flat=True))
+    client = ctx.client_for(ctx.enseignant.user)
+    payload = {
+        'classe': ctx.classe.pk,
+        'date': f'{ctx.annee.date_debut:%Y}-10-06',
+        'exceptions': [{'eleve': pk, 'statut': 'ABSENT'} for pk in eleves[:3]],
+    }
+    return lambda: client.post('/v1/pedagogie/presences/appel/', payload, content_type='application/json')
+
+
+@benchmark('pedagogie.assiduite_etablissement', rounds=20)
+def assiduite_etablissement(ctx):
+    """Totaux d'absences et de retards du trimestre pour tous les élèves (popcount)."""
+    from authentication.models import EleveProfile
+    from pedagogie.services.assiduite import totaux
+
+    eleves = list(EleveProfile.objects.values_list('pk', flat=True))
+    debut, fin = ctx.annee.get_bornes_periode('T1')
+    return lambda: totaux(eleves, debut, fin)
+
+
+@benchmark('pedagogie.conflits_emploi_du_temps', rounds=20)
+def conflits_emploi_du_temps(ctx):
+    """Détection de tous les chevauchements de la semaine type (une requête + balayage)."""
+    from pedagogie.services.emploi_du_temps import conflits_annee
+
+    return lambda: conflits_annee(ctx.annee)
+
+
+@benchmark('pedagogie.validation_creneau', rounds=50)
+def validation_creneau(ctx):
+    """Vérification d'une édition de créneau, comme EmploiDuTemps.clean."""
+    from pedagogie.services.emploi_du_temps import conflits_creneau
+
+    creneau = ctx.enseignant.creneaux.first()
+    return lambda: conflits_creneau(creneau)
+
+
+def probleme_exemple(nb_classes=40, seed=0):
+    """
+    Instance générée : `nb_classes` classes de 28 h hebdomadaires dont SVT en
+    laboratoire, informatique et EPS en salles spécialisées, et juste assez
+    d'enseignants par matière (≈ 18 h chacun).
+    """
+    import math
+    import random
+    from pedagogie.services.generation import Besoin, Probleme
+
+    volumes = {
+        # matière: (heures, type de salle)
+        1: (5, ''), 2: (5, ''), 3: (3, ''), 4: (3, ''), 5: (3, ''),
+        6: (2, 'LABO'), 7: (2, 'SPORT'), 8: (1, 'INFO'), 9: (2, ''), 10: (2, ''),
+    }
+    hasard = random.Random(seed)
+    salles = {pk: ('CLASSE', 45) for pk in range(1, nb_classes + 1)}
+    for type_salle, nombre in (('LABO', 3), ('SPORT', 3), ('INFO', 2)):
+        for _ in range(math.ceil(nombre * nb_classes / 40)):
+            salles[len(salles) + 1] = (type_salle, 45)
+
+    competences, enseignant_id = {}, 0
+    for matiere_id, (heures, _) in volumes.items():
+        nombre = math.ceil(heures * nb_classes / 18)
+        competences[matiere_id] = list(range(enseignant_id + 1, enseignant_id + nombre + 1))
+        enseignant_id += nombre
+
+    return Probleme(
+        besoins=[
+            Besoin(classe_id, matiere_id, heures, type_salle, hasard.randint(25, 45))
+            for classe_id in range(1, nb_classes + 1)
+            for matiere_id, (heures, type_salle) in volumes.items()
+        ],
+        competences=competences,
+        salles=salles,
+        salle_classe={pk: pk for pk in range(1, nb_classes + 1)},
+        # Mercredi après-midi libéré pour tout l'établissement
+        bloques={(None, None, 'MER', h) for h in range(14, 17)},
+    )
+
+
+@benchmark('pedagogie.generation_emploi_du_temps', rounds=3, warmup=1)
+def generation_emploi_du_temps(ctx):
+    """Génération complète d'un établissement de 40 classes (sans base de données)."""
+    from pedagogie.services.generation import resoudre
+
+    probleme = probleme_exemple(40)
+    return lambda: resoudre(probleme)
+
+
+@benchmark('pedagogie.agenda_classe', rounds=50)
+def agenda_classe(ctx):
+    """Emploi du temps d'une classe servi depuis le cache."""
+    client = ctx.client_for(ctx.eleve.user)
+    return lambda: client.get(f'/v1/pedagogie/emploi-du-temps/classe/{ctx.classe.pk}/')
+
+
+@benchmark('pedagogie.agenda_304', rounds=50)
+def agenda_304(ctx):
+    """Revalidation d'un emploi du temps inchangé (If-None-Match → 304)."""
+    client = ctx.client_for(ctx.eleve.user)
+    url = f'/v1/pedagogie/emploi-du-temps/classe/{ctx.classe.pk}/'
+    etag = client.get(url)['ETag']
+    return lambda: client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+
+@benchmark('pedagogie.salles_disponibles', rounds=50)
+def salles_disponibles(ctx):
+    """Recherche de salles libres sur un créneau depuis la grille d'occupation."""
+    client = ctx.client_for(ctx.enseignant.user)
+    params = {'jour': 'LUN', 'debut': '10:00', 'fin': '12:00', 'capacite': 30}
+    return lambda: client.get('/v1/pedagogie/salles/disponibles/', params)
+
+
+@benchmark('pedagogie.tableau_enseignant', rounds=50)
+def tableau_enseignant(ctx):
+    """Tableau de bord d'un enseignant ; une classe invalidée à chaque tour (saisie en cours)."""
+    from .services import tableau_bord
+
+    client = ctx.client_for(ctx.enseignant.user)
+    classe_id = ctx.classe.pk
+
+    def run():
+        tableau_bord.invalider_classe(classe_id)
+        return client.get('/v1/pedagogie/tableau-de-bord/enseignant/')
+    return run
+
+
+@benchmark('pedagogie.tableau_parent', rounds=50)
+def tableau_parent(ctx):
+    """Vue d'ensemble d'un parent ; reconstruite à chaque tour (facture modifiée)."""
+    from .services import tableau_bord
+
+    client = ctx.client_for(ctx.parent.user)
+    enfants = list(ctx.parent.eleves.values_list('pk', flat=True))
+
+    def run():
+        for eleve_id in enfants:
+            tableau_bord.invalider_eleve(eleve_id)
+        return client.get('/v1/pedagogie/tableau-de-bord/parent/')
+    return run
+
+
+@benchmark('pedagogie.import_notes', rounds=10)
+def import_notes(ctx):
+    """Import CSV de 2 000 notes (cinq matières, tout l'établissement) ; notes modifiées à chaque tour."""
+    import io
+    import itertools
+
+    from authentication.models import EleveProfile
+
+    from . import referentiel
+    from .services.import_notes import importer_notes
+
+    classes = list(referentiel.get_classe_map(ctx.annee))
+    matricules = EleveProfile.objects.filter(
+        classe_actuelle_id__in=classes
+    ).values_list('matricule', flat=True)
+    codes = [m.code for m in referentiel.get_matieres(actives_seulement=True).values()][:5]
+    lignes = list(itertools.islice(itertools.product(codes, matricules), 2000))
+    defauts = {'type_note': 'DEVOIR', 'periode': 'T1', 'date_evaluation': f'{ctx.annee.date_debut:%Y}-12-01'}
+    tours = itertools.count()
+
+    def run():
+        tour = next(tours)
+        contenu = 'matricule;matiere;note\n' + ''.join(
+            f'{matricule};{code};{(i + tour) % 20},5\n' for i, (code, matricule) in enumerate(lignes)
+        )
+        fichier = io.BytesIO(contenu.encode('utf-8'))
+        return importer_notes(fichier, nom='notes.csv', defauts=dict(defauts), annee=ctx.annee)
+    return run
@@ -0,0 +1,41 @@
+"""
+Calcule les bulletins d'une période pour tout l'établissement (ou quelques classes).
+
+Usage:
+    python manage.py calculer_bulletins T1
+    python manage.py calculer_bulletins S2 --classe 12 --classe 13
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from pedagogie.models import Note
+from pedagogie.services.bulletins import calculer_bulletins
+
+
+class Command(BaseCommand):
+    help = "Calcule moyennes générales, rangs et absences des bulletins d'une période"
+
+    def add_arguments(self, parser):
+        parser.add_argument('periode', choices=Note.PeriodeChoices.values)
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (active par défaut)")
+        parser.add_argument('--classe', type=int, action='append', dest='classes',
+                            help='ID de classe (répétable)')
+
+    def handle(self, *args, **options):
+        annee = None
+        if options['annee']:
+            annee = AnneeScolaire.objects.filter(pk=options['annee']).first()
+            if annee is None:
+                raise CommandError(f"Année scolaire {options['annee']} introuvable.")
+        start = time.perf_counter()
+        try:
+            stats = calculer_bulletins(options['periode'], annee=annee, classes=options['classes'])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        duration = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['classes']} classes : {stats['crees']} bulletins créés, "
+            f"{stats['mis_a_jour']} mis à jour en {duration:.2f}s."
+        ))
@@ -0,0 +1,56 @@
+"""
+Génère les bulletins PDF d'une période, une classe par processus.
+
+Usage:
+    python manage.py generer_bulletins_pdf T1
+    python manage.py generer_bulletins_pdf T1 --workers 4 --classe 12
+    python manage.py generer_bulletins_pdf T1 --celery
+    python manage.py generer_bulletins_pdf T1 --force   # y compris les bulletins à jour
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from pedagogie.models import Note
+
+
+class Command(BaseCommand):
+    help = "Rend les bulletins PDF d'une période (pool de processus ou Celery)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('periode', choices=Note.PeriodeChoices.values)
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (active par défaut)")
+        parser.add_argument('--classe', type=int, action='append', dest='classes',
+                            help='ID de classe (répétable)')
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Nombre de processus (défaut : nombre de cœurs)')
+        parser.add_argument('--celery', action='store_true',
+                            help='Répartit les classes sur les workers Celery')
+        parser.add_argument('--force', action='store_true',
+                            help="Rend aussi les bulletins dont l'empreinte n'a pas changé")
+
+    def handle(self, *args, **options):
+        annee = AnneeScolaire.get_annee_active()
+        if options['annee']:
+            annee = AnneeScolaire.objects.filter(pk=options['annee']).first()
+        if annee is None:
+            raise CommandError("Année scolaire introuvable.")
+
+        if options['celery']:
+            from pedagogie.tasks import generer_pdfs_periode
+            result = generer_pdfs_periode.delay(
+                options['periode'], annee.pk, options['classes'], options['force'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'Tâche Celery envoyée : {result.id}'))
+            return
+
+        from pedagogie.services.bulletins_pdf import generer_pdfs
+        stats = generer_pdfs(
+            options['periode'], annee=annee, classes=options['classes'],
+            workers=options['workers'], forcer=options['force'],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"{stats['pdfs']} bulletins rendus, {stats['inchanges']} à jour "
+            f"({stats['classes']} classes) en {stats['secondes']:.1f}s "
+            f"sur {stats['processus']} processus — "
+            f"{stats['pdfs_par_minute_par_coeur']} PDF/min/cœur."
+        ))
@@ -0,0 +1,48 @@
+"""
+Génère l'emploi du temps depuis les volumes horaires (VolumeHoraire).
+
+Usage:
+    python manage.py generer_emploi_du_temps --dry-run
+    python manage.py generer_emploi_du_temps --classe 12 --classe 13 --seed 7
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from pedagogie.services.generation import generer
+
+
+class Command(BaseCommand):
+    help = "Construit un emploi du temps sans conflit et remplace celui des classes concernées"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (active par défaut)")
+        parser.add_argument('--classe', type=int, action='append', dest='classes',
+                            help='ID de classe (répétable ; toutes par défaut)')
+        parser.add_argument('--seed', type=int, default=0,
+                            help='Graine du départage aléatoire (autre solution équivalente)')
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Résout sans rien enregistrer")
+
+    def handle(self, *args, **options):
+        annee = None
+        if options['annee']:
+            annee = AnneeScolaire.objects.filter(pk=options['annee']).first()
+            if annee is None:
+                raise CommandError(f"Année scolaire {options['annee']} introuvable.")
+        solution = generer(
+            annee=annee, classes=options['classes'],
+            seed=options['seed'], dry_run=options['dry_run'],
+        )
+        for seance in solution.non_placees:
+            besoin = seance.besoin
+            motif = 'aucun enseignant disponible' if seance.enseignant_id is None else 'aucune position'
+            self.stdout.write(self.style.WARNING(
+                f'Non placée : classe {besoin.classe_id}, matière {besoin.matiere_id}, '
+                f'{seance.duree}h ({motif})'
+            ))
+        verbe = 'calculés' if options['dry_run'] else 'enregistrés'
+        style = self.style.SUCCESS if solution.complete else self.style.WARNING
+        self.stdout.write(style(
+            f'{len(solution.seances)} créneaux {verbe}, {len(solution.non_placees)} séances '
+            f'non placées ({solution.iterations} itérations, {solution.duree:.2f}s).'
+        ))
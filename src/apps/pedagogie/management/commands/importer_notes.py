@@ -0,0 +1,93 @@
+"""
+Import de notes depuis un tableur XLSX ou CSV (voir services/import_notes.py).
+
+Usage:
+    python manage.py importer_notes notes.xlsx
+    python manage.py importer_notes notes.csv --matiere MATH --type DEVOIR --periode T1 --date 2025-11-15
+    python manage.py importer_notes notes.csv --simulation
+    python manage.py importer_notes notes.csv --partiel      # enregistre les lignes valides
+
+Colonnes : matricule, note, puis facultativement appréciation, matière,
+type, période, date, sur, coefficient (défauts donnés par les options).
+"""
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from pedagogie import referentiel
+from pedagogie.services.import_notes import ImportNotesError, importer_notes
+
+
+class Command(BaseCommand):
+    help = "Importe des notes depuis un tableur (XLSX ou CSV), élèves identifiés par matricule"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fichier', help='Chemin du fichier .xlsx ou .csv')
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (active par défaut)")
+        parser.add_argument('--matiere', help='Code ou ID de la matière par défaut')
+        parser.add_argument('--type', dest='type_note', help='Type de note par défaut (DEVOIR, ...)')
+        parser.add_argument('--periode', help='Période par défaut (T1, ...)')
+        parser.add_argument('--date', dest='date_evaluation', help="Date d'évaluation par défaut (AAAA-MM-JJ)")
+        parser.add_argument('--sur', type=Decimal, default=Decimal('20'))
+        parser.add_argument('--coefficient', type=Decimal, default=Decimal('1'))
+        parser.add_argument('--partiel', action='store_true',
+                            help='Enregistrer les lignes valides malgré les erreurs')
+        parser.add_argument('--simulation', action='store_true', help='Valider sans enregistrer')
+
+    def handle(self, *args, **options):
+        annee = None
+        if options['annee']:
+            try:
+                annee = AnneeScolaire.objects.get(pk=options['annee'])
+            except AnneeScolaire.DoesNotExist as exc:
+                raise CommandError('Année scolaire introuvable') from exc
+
+        defauts = {
+            'type_note': options['type_note'],
+            'periode': options['periode'],
+            'date_evaluation': options['date_evaluation'],
+            'sur': options['sur'],
+            'coefficient': options['coefficient'],
+        }
+        if options['matiere']:
+            code = options['matiere'].strip().upper()
+            matiere = next(
+                (m for m in referentiel.get_matieres(actives_seulement=True).values()
+                 if m.code.upper() == code or str(m.pk) == code),
+                None,
+            )
+            if matiere is None:
+                raise CommandError(f'Matière introuvable : {options["matiere"]}')
+            defauts['matiere'] = matiere
+
+        try:
+            with open(options['fichier'], 'rb') as fichier:
+                rapport = importer_notes(
+                    fichier,
+                    defauts=defauts,
+                    annee=annee,
+                    partiel=options['partiel'],
+                    simulation=options['simulation'],
+                )
+        except OSError as exc:
+            raise CommandError(str(exc)) from exc
+        except ImportNotesError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for erreur in rapport['erreurs']:
+            self.stdout.write(self.style.ERROR(
+                f"Ligne {erreur['ligne']}, {erreur['colonne']} « {erreur['valeur']} » : {erreur['message']}"
+            ))
+        resume = (
+            f"{rapport['lignes']} lignes : {rapport['valides']} valides, {rapport['ignorees']} sans note, "
+            f"{len(rapport['erreurs'])} erreur(s)"
+        )
+        if rapport['enregistre']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{resume} ; {rapport['crees']} créées, {rapport['mis_a_jour']} mises à jour."
+            ))
+        elif rapport['erreurs']:
+            raise CommandError(f'{resume} ; rien enregistré.')
+        else:
+            self.stdout.write(f'{resume} ; rien enregistré.')
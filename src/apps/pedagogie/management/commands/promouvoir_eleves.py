@@ -0,0 +1,94 @@
+"""
+Passage de fin d'année : promotion, redoublement et réinscription des élèves.
+
+Usage:
+    python manage.py promouvoir_eleves --vers 2
+    python manage.py promouvoir_eleves --vers 2 --dry-run
+    python manage.py promouvoir_eleves --vers 2 --classe 5 --seuil 9.5
+    python manage.py promouvoir_eleves --vers 2 --derogations derogations.csv
+
+Fichier de dérogations (CSV, sans en-tête) : matricule,décision[,classe_id]
+avec décision parmi PASSAGE, REDOUBLEMENT, SORTIE.
+"""
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from authentication.models import EleveProfile
+from pedagogie.services.promotion import (
+    Decision, PromotionError, appliquer_promotion, preparer_promotion,
+)
+
+
+class Command(BaseCommand):
+    help = "Promeut les élèves vers l'année scolaire suivante d'après les moyennes des bulletins"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vers', type=int, required=True, help="ID de l'année de destination")
+        parser.add_argument('--annee', type=int, help="ID de l'année d'origine (active par défaut)")
+        parser.add_argument('--classe', type=int, action='append', dest='classes',
+                            help="ID de classe d'origine (répétable ; toutes par défaut)")
+        parser.add_argument('--seuil', type=float, help='Moyenne annuelle minimale de passage')
+        parser.add_argument('--derogations', help='CSV matricule,décision[,classe_id]')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='Affiche les changements sans les appliquer')
+
+    def _derogations(self, chemin):
+        if not chemin:
+            return {}
+        with open(chemin, newline='', encoding='utf-8') as fichier:
+            lignes = [ligne for ligne in csv.reader(fichier) if ligne]
+        ids = dict(EleveProfile.objects.filter(
+            matricule__in=[ligne[0].strip() for ligne in lignes],
+        ).values_list('matricule', 'pk'))
+        derogations = {}
+        for numero, ligne in enumerate(lignes, start=1):
+            matricule, decision = ligne[0].strip(), ligne[1].strip().upper()
+            if matricule not in ids:
+                raise CommandError(f'Ligne {numero} : matricule inconnu {matricule}')
+            if decision not in Decision.CHOIX:
+                raise CommandError(f'Ligne {numero} : décision inconnue {decision}')
+            classe = int(ligne[2]) if len(ligne) > 2 and ligne[2].strip() else None
+            derogations[ids[matricule]] = (decision, classe)
+        return derogations
+
+    def handle(self, *args, **options):
+        try:
+            annee_suivante = AnneeScolaire.objects.get(pk=options['vers'])
+            annee = AnneeScolaire.objects.get(pk=options['annee']) if options['annee'] else None
+        except AnneeScolaire.DoesNotExist as exc:
+            raise CommandError('Année scolaire introuvable') from exc
+
+        try:
+            plans = preparer_promotion(
+                annee_suivante,
+                annee=annee,
+                classes=options['classes'],
+                derogations=self._derogations(options['derogations']),
+                seuil=options['seuil'],
+            )
+        except PromotionError as exc:
+            raise CommandError(str(exc)) from exc
+
+        totaux = {decision: 0 for decision in Decision.CHOIX}
+        for plan in plans:
+            self.stdout.write(self.style.MIGRATE_HEADING(plan.classe.nom))
+            for ligne in plan.diff():
+                self.stdout.write(f'  {ligne}')
+            for ligne in plan.lignes:
+                totaux[ligne.decision] += 1
+            if plan.sans_decision:
+                self.stdout.write(self.style.WARNING(
+                    f"  Sans bulletin ni dérogation : {', '.join(plan.sans_decision)}"
+                ))
+        self.stdout.write(', '.join(f'{decision} : {n}' for decision, n in totaux.items()))
+
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Simulation : aucune modification.'))
+            return
+
+        resultat = appliquer_promotion(plans, annee_suivante)
+        for classe_id, message in resultat['erreurs'].items():
+            self.stdout.write(self.style.ERROR(f'Classe {classe_id} non traitée : {message}'))
+        self.stdout.write(self.style.SUCCESS(f"{resultat['eleves']} élève(s) traité(s)."))
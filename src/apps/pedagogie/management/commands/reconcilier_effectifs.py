@@ -0,0 +1,30 @@
+"""
+Recompte les élèves de chaque classe et corrige Classe.effectif.
+
+Usage:
+    python manage.py reconcilier_effectifs
+    python manage.py reconcilier_effectifs --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from pedagogie.services.effectifs import reconcilier
+
+
+class Command(BaseCommand):
+    help = "Corrige les compteurs d'effectifs des classes qui divergent du nombre réel d'élèves"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--classe', type=int, action='append', dest='classes',
+                            help='ID de classe (répétable ; toutes par défaut)')
+        parser.add_argument('--dry-run', action='store_true', help='Affiche les écarts sans corriger')
+
+    def handle(self, *args, **options):
+        ecarts = reconcilier(classes=options['classes'], dry_run=options['dry_run'])
+        for classe_id, compteur, reel in ecarts:
+            self.stdout.write(f'Classe {classe_id} : compteur {compteur}, effectif réel {reel}')
+        if not ecarts:
+            self.stdout.write(self.style.SUCCESS('Tous les compteurs sont exacts.'))
+        elif options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'{len(ecarts)} classe(s) à corriger.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{len(ecarts)} classe(s) corrigée(s).'))
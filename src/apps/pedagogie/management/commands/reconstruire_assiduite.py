@@ -0,0 +1,28 @@
+"""
+Reconstruit les bitmaps d'assiduité (AssiduiteMensuelle) depuis les présences.
+
+Usage:
+    python manage.py reconstruire_assiduite
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from pedagogie.services.assiduite import reconstruire
+
+
+class Command(BaseCommand):
+    help = "Recalcule en masse les bitmaps mensuelles d'absences et de retards"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--eleve', type=int, action='append', dest='eleves',
+                            help="ID d'élève (répétable ; tous par défaut)")
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filtres = {'eleve_id__in': options['eleves']} if options['eleves'] else {}
+        start = time.perf_counter()
+        lignes = reconstruire(batch_size=options['batch_size'], **filtres)
+        self.stdout.write(self.style.SUCCESS(
+            f'{lignes} mois élève recalculés en {time.perf_counter() - start:.2f}s.'
+        ))
@@ -0,0 +1,34 @@
+"""
+Reconstruit la table MoyenneMatiere depuis les notes.
+
+Usage:
+    python manage.py reconstruire_moyennes
+    python manage.py reconstruire_moyennes --annee 3 --periode T1
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from pedagogie.models import Note
+from pedagogie.services.moyennes import reconstruire
+
+
+class Command(BaseCommand):
+    help = "Recalcule en masse les moyennes par matière (MoyenneMatiere)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (toutes par défaut)")
+        parser.add_argument('--periode', choices=Note.PeriodeChoices.values)
+        parser.add_argument('--batch-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        filtres = {}
+        if options['annee']:
+            filtres['annee_scolaire_id'] = options['annee']
+        if options['periode']:
+            filtres['periode'] = options['periode']
+        start = time.perf_counter()
+        lignes = reconstruire(batch_size=options['batch_size'], **filtres)
+        self.stdout.write(self.style.SUCCESS(
+            f'{lignes} moyennes recalculées en {time.perf_counter() - start:.2f}s.'
+        ))
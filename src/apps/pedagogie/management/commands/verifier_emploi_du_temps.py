@@ -0,0 +1,40 @@
+"""
+Liste les chevauchements de l'emploi du temps (classe, enseignant, salle).
+
+Usage:
+    python manage.py verifier_emploi_du_temps
+    python manage.py verifier_emploi_du_temps --annee 3
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from pedagogie.services.emploi_du_temps import conflits_annee, format_heure
+
+
+class Command(BaseCommand):
+    help = "Détecte les créneaux qui se chevauchent pour une même classe, un même enseignant ou une même salle"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, help="ID de l'année scolaire (active par défaut)")
+
+    def handle(self, *args, **options):
+        annee = None
+        if options['annee']:
+            annee = AnneeScolaire.objects.filter(pk=options['annee']).first()
+            if annee is None:
+                raise CommandError(f"Année scolaire {options['annee']} introuvable.")
+        start = time.perf_counter()
+        conflits = conflits_annee(annee)
+        duration = time.perf_counter() - start
+
+        for conflit in conflits:
+            a, b = conflit.a, conflit.b
+            self.stdout.write(
+                f'{conflit.ressource} {conflit.ressource_id} {conflit.jour} : '
+                f'#{a.id} {format_heure(a.debut)}-{format_heure(a.fin)} / '
+                f'#{b.id} {format_heure(b.debut)}-{format_heure(b.fin)}'
+            )
+        style = self.style.WARNING if conflits else self.style.SUCCESS
+        self.stdout.write(style(f'{len(conflits)} conflit(s) détecté(s) en {duration:.3f}s.'))
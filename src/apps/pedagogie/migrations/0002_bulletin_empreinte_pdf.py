@@ -0,0 +1,18 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogie', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bulletin',
+            name='empreinte_pdf',
+            field=models.CharField(blank=True, help_text='SHA-256 des données rendues dans fichier_pdf (rendu ignoré si inchangé)', max_length=64, verbose_name='empreinte du PDF'),
+        ),
+    ]
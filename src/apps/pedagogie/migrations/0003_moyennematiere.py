@@ -0,0 +1,41 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:03
+
+import django.db.models.deletion
+import pedagogie.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_initial'),
+        ('authentication', '0002_initial'),
+        ('pedagogie', '0002_bulletin_empreinte_pdf'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MoyenneMatiere',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='date de modification')),
+                ('periode', models.CharField(choices=[('T1', '1er Trimestre'), ('T2', '2ème Trimestre'), ('T3', '3ème Trimestre'), ('S1', '1er Semestre'), ('S2', '2ème Semestre')], max_length=5, verbose_name='période')),
+                ('somme_points', models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='somme des points')),
+                ('somme_coefficients', models.DecimalField(decimal_places=4, default=0, max_digits=10, verbose_name='somme des coefficients')),
+                ('nombre_notes', models.PositiveIntegerField(default=0, verbose_name='nombre de notes')),
+                ('moyenne', models.DecimalField(decimal_places=2, default=0, max_digits=5, verbose_name='moyenne')),
+                ('annee_scolaire', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moyennes_matieres', to='administration.anneescolaire', verbose_name='année scolaire')),
+                ('classe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moyennes_matieres', to='pedagogie.classe', verbose_name='classe')),
+                ('eleve', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moyennes_matieres', to='authentication.eleveprofile', verbose_name='élève')),
+                ('matiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='moyennes', to='pedagogie.matiere', verbose_name='matière')),
+            ],
+            options={
+                'verbose_name': 'moyenne par matière',
+                'verbose_name_plural': 'moyennes par matière',
+                'indexes': [models.Index(fields=['classe', 'matiere', 'periode'], name='pedagogie_m_classe__5ce68a_idx')],
+                'unique_together': {('eleve', 'matiere', 'periode', 'annee_scolaire')},
+            },
+            bases=(pedagogie.models.ReferentielMixin, models.Model),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('pedagogie', '0003_moyennematiere'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssiduiteMensuelle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='date de modification')),
+                ('annee', models.PositiveSmallIntegerField(verbose_name='année')),
+                ('mois', models.PositiveSmallIntegerField(verbose_name='mois')),
+                ('absences', models.BinaryField(default=b'\x00\x00\x00\x00', max_length=4, verbose_name="jours d'absence")),
+                ('retards', models.BinaryField(default=b'\x00\x00\x00\x00', max_length=4, verbose_name='jours de retard')),
+                ('eleve', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assiduites', to='authentication.eleveprofile', verbose_name='élève')),
+            ],
+            options={
+                'verbose_name': 'assiduité mensuelle',
+                'verbose_name_plural': 'assiduités mensuelles',
+                'unique_together': {('eleve', 'annee', 'mois')},
+            },
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:15
+
+import django.core.validators
+import django.db.models.deletion
+import pedagogie.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_initial'),
+        ('authentication', '0002_initial'),
+        ('pedagogie', '0004_assiduitemensuelle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreneauBloque',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='date de modification')),
+                ('jour', models.CharField(choices=[('LUN', 'Lundi'), ('MAR', 'Mardi'), ('MER', 'Mercredi'), ('JEU', 'Jeudi'), ('VEN', 'Vendredi'), ('SAM', 'Samedi'), ('DIM', 'Dimanche')], max_length=3, verbose_name='jour')),
+                ('heure_debut', models.TimeField(verbose_name='heure de début')),
+                ('heure_fin', models.TimeField(verbose_name='heure de fin')),
+                ('motif', models.CharField(blank=True, max_length=200, verbose_name='motif')),
+                ('classe', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='creneaux_bloques', to='pedagogie.classe', verbose_name='classe')),
+                ('enseignant', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='creneaux_bloques', to='authentication.enseignantprofile', verbose_name='enseignant')),
+                ('salle', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='creneaux_bloques', to='administration.salle', verbose_name='salle')),
+            ],
+            options={
+                'verbose_name': 'créneau bloqué',
+                'verbose_name_plural': 'créneaux bloqués',
+                'ordering': ['jour', 'heure_debut'],
+            },
+        ),
+        migrations.CreateModel(
+            name='VolumeHoraire',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True, verbose_name='date de création')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='date de modification')),
+                ('heures_par_semaine', models.PositiveSmallIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(40)], verbose_name='heures par semaine')),
+                ('type_salle', models.CharField(blank=True, choices=[('CLASSE', 'Salle de classe'), ('LABO', 'Laboratoire'), ('INFO', 'Salle informatique'), ('BIBLIO', 'Bibliothèque'), ('CONF', 'Salle de conférence'), ('SPORT', 'Salle de sport')], help_text='Vide : salle de la classe', max_length=10, verbose_name='type de salle requis')),
+                ('classe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volumes_horaires', to='pedagogie.classe', verbose_name='classe')),
+                ('matiere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='volumes_horaires', to='pedagogie.matiere', verbose_name='matière')),
+            ],
+            options={
+                'verbose_name': 'volume horaire',
+                'verbose_name_plural': 'volumes horaires',
+                'unique_together': {('classe', 'matiere')},
+            },
+            bases=(pedagogie.models.ReferentielMixin, models.Model),
+        ),
+    ]
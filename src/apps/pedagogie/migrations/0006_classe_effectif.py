@@ -0,0 +1,32 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:22
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def compter_effectifs(apps, schema_editor):
+    Classe = apps.get_model('pedagogie', 'Classe')
+    EleveProfile = apps.get_model('authentication', 'EleveProfile')
+    compte = (
+        EleveProfile.objects.filter(classe_actuelle=OuterRef('pk'))
+        .order_by().values('classe_actuelle').annotate(n=Count('pk')).values('n')
+    )
+    Classe.objects.update(effectif=Coalesce(Subquery(compte), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('pedagogie', '0005_volumehoraire_creneaubloque'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classe',
+            name='effectif',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='effectif'),
+        ),
+        migrations.RunPython(compter_effectifs, migrations.RunPython.noop),
+    ]
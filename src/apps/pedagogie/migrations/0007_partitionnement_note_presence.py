@@ -0,0 +1,58 @@
+"""
+Partitionnement PostgreSQL de Note (par année scolaire) et de Presence (par
+plage de dates), voir core.partitions. Sans effet sur les autres moteurs ;
+l'état des modèles Django n'est pas modifié.
+
+La conversion recopie chaque table : sur une base volumineuse, prévoir la
+migration hors des heures de cours.
+"""
+from django.db import migrations
+from django.db.models import Max, Min
+
+from core import partitions
+
+
+def partitionner(apps, schema_editor):
+    connection = schema_editor.connection
+    if not partitions.est_disponible(connection):
+        return
+    Note = apps.get_model('pedagogie', 'Note')
+    Presence = apps.get_model('pedagogie', 'Presence')
+    AnneeScolaire = apps.get_model('administration', 'AnneeScolaire')
+    note, presence = Note._meta.db_table, Presence._meta.db_table
+
+    annees_note = set(AnneeScolaire.objects.values_list('pk', flat=True))
+    annees_note |= set(Note.objects.values_list('annee_scolaire_id', flat=True).distinct())
+    annees_presence = set()
+    for debut, fin in AnneeScolaire.objects.values_list('date_debut', 'date_fin'):
+        annees_presence |= {partitions.annee_civile(debut), partitions.annee_civile(fin)}
+    bornes = Presence.objects.aggregate(debut=Min('date'), fin=Max('date'))
+    if bornes['debut']:
+        annees_presence |= set(range(
+            partitions.annee_civile(bornes['debut']), partitions.annee_civile(bornes['fin']) + 1,
+        ))
+
+    partitions.partitionner(
+        Note, [partitions.partition_note(note, pk) for pk in sorted(annees_note)], connection,
+    )
+    partitions.partitionner(
+        Presence, [partitions.partition_presence(presence, a) for a in sorted(annees_presence)],
+        connection,
+    )
+
+
+def departitionner(apps, schema_editor):
+    for nom in ('Note', 'Presence'):
+        partitions.departitionner(apps.get_model('pedagogie', nom), schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0002_initial'),
+        ('pedagogie', '0006_classe_effectif'),
+    ]
+
+    operations = [
+        migrations.RunPython(partitionner, departitionner),
+    ]
@@ -0,0 +1,40 @@
+"""
+Unicité de l'appel de la journée (matière NULL) par élève et par jour.
+Les doublons déjà créés par des appels concurrents sont supprimés avant
+la création de l'index : la ligne la plus récemment modifiée est gardée.
+"""
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def supprimer_doublons(apps, schema_editor):
+    Presence = apps.get_model('pedagogie', 'Presence')
+    doublons = (
+        Presence.objects.filter(matiere__isnull=True)
+        .values('eleve_id', 'date').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('eleve_id', 'date')
+    )
+    for eleve_id, jour in doublons.iterator():
+        ids = list(
+            Presence.objects.filter(eleve_id=eleve_id, date=jour, matiere__isnull=True)
+            .order_by('-updated_at', '-id').values_list('id', flat=True)
+        )
+        Presence.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authentication', '0002_initial'),
+        ('pedagogie', '0007_partitionnement_note_presence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(supprimer_doublons, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='presence',
+            constraint=models.UniqueConstraint(condition=models.Q(('matiere__isnull', True)), fields=('eleve', 'date'), name='presence_unique_jour'),
+        ),
+    ]
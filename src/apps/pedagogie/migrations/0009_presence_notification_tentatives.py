@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-19 04:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogie', '0008_presence_unique_jour'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='presence',
+            name='notification_echec_le',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='dernier échec de notification'),
+        ),
+        migrations.AddField(
+            model_name='presence',
+            name='notification_tentatives',
+            field=models.PositiveSmallIntegerField(default=0, verbose_name='tentatives de notification'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-19 05:01
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('pedagogie', '0009_presence_notification_tentatives'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='bulletin',
+            name='moyenne_generale',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=5, null=True, validators=[django.core.validators.MinValueValidator(0), django.core.validators.MaxValueValidator(20)], verbose_name='moyenne générale'),
+        ),
+        migrations.AlterField(
+            model_name='bulletin',
+            name='rang',
+            field=models.PositiveIntegerField(blank=True, help_text='Classement dans la classe', null=True, verbose_name='rang'),
+        ),
+        migrations.AlterField(
+            model_name='bulletin',
+            name='total_eleves',
+            field=models.PositiveIntegerField(help_text="Nombre d'élèves classés dans la classe", verbose_name='total élèves'),
+        ),
+    ]
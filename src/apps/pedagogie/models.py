@@ -1,8 +1,29 @@
 # apps/pedagogie/models.py
-from django.db import models
+from django.db import models, transaction
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 from core.models import TimeStampedModel
+from administration.models import Salle
+
+
+class ReferentielMixin:
+    """
+    Résout les FK vers Matiere/Classe/Salle via le cache de référence
+    (pedagogie.referentiel) quand la relation n'est pas déjà chargée.
+    """
+    def _ref(self, field_name):
+        field = self._meta.get_field(field_name)
+        if not field.is_cached(self):
+            pk = getattr(self, field.attname)
+            if pk is None:
+                return None
+            from . import referentiel
+            getter = getattr(referentiel, f'get_{field.related_model._meta.model_name}')
+            obj = getter(pk)
+            if obj is not None:
+                return obj
+        return getattr(self, field_name)
+
 
 class Matiere(TimeStampedModel):
     """
@@ -44,6 +65,20 @@ class Matiere(TimeStampedModel):
         return f"{self.nom} (Coef: {self.coefficient})"
 
 
+class ClasseQuerySet(models.QuerySet):
+    def avec_effectif_reel(self):
+        """
+        Effectif recompté par la base (`effectif_reel`) et places restantes
+        (`places_restantes`) en une requête. Réservé à la réconciliation
+        (effectifs.reconcilier) : les listes et tableaux de bord lisent le
+        compteur Classe.effectif, sans jointure ni GROUP BY.
+        """
+        from django.db.models import Count, F
+        return self.annotate(effectif_reel=Count('eleves')).annotate(
+            places_restantes=F('capacite_max') - F('effectif_reel')
+        )
+
+
 class Classe(TimeStampedModel):
     """
     Classe scolaire (6ème A, Terminale S1, etc.)
@@ -121,6 +156,12 @@ class Classe(TimeStampedModel):
     
     is_active = models.BooleanField(_('active'), default=True)
     
+    # Compteur dénormalisé des élèves (EleveProfile.classe_actuelle),
+    # tenu à jour par pedagogie.services.effectifs
+    effectif = models.PositiveIntegerField(_('effectif'), default=0, editable=False)
+    
+    objects = ClasseQuerySet.as_manager()
+    
     class Meta:
         verbose_name = _('classe')
         verbose_name_plural = _('classes')
@@ -128,12 +169,27 @@ class Classe(TimeStampedModel):
         unique_together = [['nom', 'annee_scolaire']]
     
     def __str__(self):
-        return f"{self.nom} - {self.annee_scolaire}"
+        annee = None
+        if not self._meta.get_field('annee_scolaire').is_cached(self) and self.pk:
+            from . import referentiel
+            cached = referentiel.get_classe(self.pk)
+            annee = cached.annee_scolaire if cached else None
+        return f"{self.nom} - {annee or self.annee_scolaire}"
+    
+    def save(self, *args, **kwargs):
+        # Le compteur n'est écrit que par des UPDATE atomiques (F()) : une
+        # instance chargée plus tôt ne doit pas écraser sa valeur.
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                f.name for f in self._meta.concrete_fields
+                if not f.primary_key and f.name != 'effectif'
+            ]
+        super().save(*args, **kwargs)
     
     @property
     def nombre_eleves(self):
-        """Retourne le nombre d'élèves actuels"""
-        return self.eleves.count()
+        """Retourne le nombre d'élèves actuels (compteur dénormalisé)"""
+        return self.effectif
     
     @property
     def places_disponibles(self):
@@ -141,7 +197,7 @@ class Classe(TimeStampedModel):
         return self.capacite_max - self.nombre_eleves
 
 
-class EmploiDuTemps(TimeStampedModel):
+class EmploiDuTemps(ReferentielMixin, TimeStampedModel):
     """
     Créneau d'emploi du temps
     """
@@ -205,7 +261,7 @@ class EmploiDuTemps(TimeStampedModel):
         ]
     
     def __str__(self):
-        return f"{self.classe} - {self.matiere} ({self.jour} {self.heure_debut}-{self.heure_fin})"
+        return f"{self._ref('classe')} - {self._ref('matiere')} ({self.jour} {self.heure_debut}-{self.heure_fin})"
     
     def clean(self):
         """Validation personnalisée"""
@@ -214,14 +270,115 @@ class EmploiDuTemps(TimeStampedModel):
         if self.heure_debut >= self.heure_fin:
             raise ValidationError(_("L'heure de début doit être avant l'heure de fin"))
         
-        # Vérifier que l'enseignant enseigne bien cette matière
-        if self.matiere not in self.enseignant.matieres.all():
+        # Vérifier que l'enseignant enseigne bien cette matière (EXISTS sur la table M2M)
+        if not self.enseignant.matieres.filter(pk=self.matiere_id).exists():
             raise ValidationError(
-                _(f"{self.enseignant.user.get_full_name()} n'enseigne pas {self.matiere}")
+                _(f"{self.enseignant.user.get_full_name()} n'enseigne pas {self._ref('matiere')}")
             )
+        
+        # Chevauchements avec les créneaux de la classe, de l'enseignant et de la salle
+        from .services.emploi_du_temps import conflits_creneau
+        conflits = conflits_creneau(self)
+        if conflits:
+            raise ValidationError([conflit.message() for conflit in conflits])
+
+
+
+class VolumeHoraire(ReferentielMixin, TimeStampedModel):
+    """
+    Heures hebdomadaires d'une matière dans une classe (entrée du générateur
+    d'emploi du temps)
+    """
+    classe = models.ForeignKey(
+        Classe,
+        on_delete=models.CASCADE,
+        related_name='volumes_horaires',
+        verbose_name=_('classe')
+    )
+    
+    matiere = models.ForeignKey(
+        Matiere,
+        on_delete=models.CASCADE,
+        related_name='volumes_horaires',
+        verbose_name=_('matière')
+    )
+    
+    heures_par_semaine = models.PositiveSmallIntegerField(
+        _('heures par semaine'),
+        validators=[MinValueValidator(1), MaxValueValidator(40)]
+    )
+    
+    type_salle = models.CharField(
+        _('type de salle requis'),
+        max_length=10,
+        choices=Salle.TypeSalleChoices.choices,
+        blank=True,
+        help_text=_("Vide : salle de la classe")
+    )
+    
+    class Meta:
+        verbose_name = _('volume horaire')
+        verbose_name_plural = _('volumes horaires')
+        unique_together = [['classe', 'matiere']]
+    
+    def __str__(self):
+        return f"{self._ref('classe')} - {self._ref('matiere')} : {self.heures_par_semaine}h"
+
+
+class CreneauBloque(TimeStampedModel):
+    """
+    Plage interdite au générateur d'emploi du temps : pour tout
+    l'établissement si aucune ressource n'est renseignée, sinon pour une
+    classe, un enseignant ou une salle
+    """
+    jour = models.CharField(
+        _('jour'),
+        max_length=3,
+        choices=EmploiDuTemps.JourChoices.choices
+    )
+    
+    heure_debut = models.TimeField(_('heure de début'))
+    heure_fin = models.TimeField(_('heure de fin'))
+    
+    classe = models.ForeignKey(
+        Classe,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='creneaux_bloques',
+        verbose_name=_('classe')
+    )
+    
+    enseignant = models.ForeignKey(
+        'authentication.EnseignantProfile',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='creneaux_bloques',
+        verbose_name=_('enseignant')
+    )
+    
+    salle = models.ForeignKey(
+        Salle,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='creneaux_bloques',
+        verbose_name=_('salle')
+    )
+    
+    motif = models.CharField(_('motif'), max_length=200, blank=True)
+    
+    class Meta:
+        verbose_name = _('créneau bloqué')
+        verbose_name_plural = _('créneaux bloqués')
+        ordering = ['jour', 'heure_debut']
+    
+    def __str__(self):
+        return f"{self.jour} {self.heure_debut}-{self.heure_fin} {self.motif}".strip()
 
 
-class Note(TimeStampedModel):
+class Note(ReferentielMixin, TimeStampedModel):
     """
     Note d'un élève pour une matière
     """
@@ -324,7 +481,12 @@ class Note(TimeStampedModel):
         ]
     
     def __str__(self):
-        return f"{self.eleve.user.get_full_name()} - {self.matiere}: {self.valeur}/{self.sur}"
+        return f"{self.eleve.user.get_full_name()} - {self._ref('matiere')}: {self.valeur}/{self.sur}"
+    
+    def save(self, *args, **kwargs):
+        # MoyenneMatiere (signal post_save) est mise à jour dans la même transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
     
     @property
     def note_sur_20(self):
@@ -334,7 +496,67 @@ class Note(TimeStampedModel):
         return (self.valeur / self.sur) * 20
 
 
-class Presence(TimeStampedModel):
+class MoyenneMatiere(ReferentielMixin, TimeStampedModel):
+    """
+    Moyenne d'un élève dans une matière pour une période, tenue à jour à
+    chaque écriture de Note (voir pedagogie.services.moyennes).
+    
+    Les sommes pondérées permettent d'ajouter ou de retirer une note sans
+    relire les autres : moyenne = somme_points / somme_coefficients.
+    """
+    eleve = models.ForeignKey(
+        'authentication.EleveProfile',
+        on_delete=models.CASCADE,
+        related_name='moyennes_matieres',
+        verbose_name=_('élève')
+    )
+    matiere = models.ForeignKey(
+        Matiere,
+        on_delete=models.CASCADE,
+        related_name='moyennes',
+        verbose_name=_('matière')
+    )
+    classe = models.ForeignKey(
+        Classe,
+        on_delete=models.CASCADE,
+        related_name='moyennes_matieres',
+        verbose_name=_('classe')
+    )
+    annee_scolaire = models.ForeignKey(
+        'administration.AnneeScolaire',
+        on_delete=models.CASCADE,
+        related_name='moyennes_matieres',
+        verbose_name=_('année scolaire')
+    )
+    periode = models.CharField(
+        _('période'),
+        max_length=5,
+        choices=Note.PeriodeChoices.choices
+    )
+    
+    # Σ note_sur_20 × coefficient et Σ coefficient des notes de la période
+    somme_points = models.DecimalField(
+        _('somme des points'), max_digits=12, decimal_places=4, default=0
+    )
+    somme_coefficients = models.DecimalField(
+        _('somme des coefficients'), max_digits=10, decimal_places=4, default=0
+    )
+    nombre_notes = models.PositiveIntegerField(_('nombre de notes'), default=0)
+    moyenne = models.DecimalField(_('moyenne'), max_digits=5, decimal_places=2, default=0)
+    
+    class Meta:
+        verbose_name = _('moyenne par matière')
+        verbose_name_plural = _('moyennes par matière')
+        unique_together = [['eleve', 'matiere', 'periode', 'annee_scolaire']]
+        indexes = [
+            models.Index(fields=['classe', 'matiere', 'periode']),
+        ]
+    
+    def __str__(self):
+        return f"{self.eleve.user.get_full_name()} - {self._ref('matiere')} ({self.periode}) : {self.moyenne}"
+
+
+class Presence(ReferentielMixin, TimeStampedModel):
     """
     Présence/Absence d'un élève
     """
@@ -398,22 +620,74 @@ class Presence(TimeStampedModel):
         _('notification envoyée'),
         default=False
     )
+    # Échecs d'envoi : la présence est reprise après un délai, puis abandonnée
+    notification_tentatives = models.PositiveSmallIntegerField(
+        _('tentatives de notification'),
+        default=0
+    )
+    notification_echec_le = models.DateTimeField(
+        _('dernier échec de notification'),
+        null=True,
+        blank=True
+    )
     
     class Meta:
         verbose_name = _('présence')
         verbose_name_plural = _('présences')
         ordering = ['-date']
         unique_together = [['eleve', 'date', 'matiere']]
+        constraints = [
+            # unique_together ne couvre pas matiere NULL (NULL distincts en SQL) :
+            # un seul appel de la journée par élève et par jour.
+            models.UniqueConstraint(
+                fields=['eleve', 'date'],
+                condition=models.Q(matiere__isnull=True),
+                name='presence_unique_jour',
+            ),
+        ]
         indexes = [
             models.Index(fields=['eleve', 'date']),
             models.Index(fields=['classe', 'date']),
         ]
     
+    def save(self, *args, **kwargs):
+        # AssiduiteMensuelle (signal post_save) est mise à jour dans la même transaction
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+    
     def __str__(self):
-        matiere_str = f" - {self.matiere}" if self.matiere else ""
+        matiere = self._ref('matiere')
+        matiere_str = f" - {matiere}" if matiere else ""
         return f"{self.eleve.user.get_full_name()} - {self.date}{matiere_str}: {self.get_statut_display()}"
 
 
+class AssiduiteMensuelle(TimeStampedModel):
+    """
+    Absences et retards d'un élève sur un mois, un bit par jour
+    (bit 0 = le 1er). Représentation compacte de Presence tenue à jour à
+    chaque écriture (voir pedagogie.services.assiduite) : les totaux et
+    séries se calculent sans relire la table des présences.
+    """
+    eleve = models.ForeignKey(
+        'authentication.EleveProfile',
+        on_delete=models.CASCADE,
+        related_name='assiduites',
+        verbose_name=_('élève')
+    )
+    annee = models.PositiveSmallIntegerField(_('année'))
+    mois = models.PositiveSmallIntegerField(_('mois'))
+    absences = models.BinaryField(_('jours d\'absence'), max_length=4, default=bytes(4))
+    retards = models.BinaryField(_('jours de retard'), max_length=4, default=bytes(4))
+    
+    class Meta:
+        verbose_name = _('assiduité mensuelle')
+        verbose_name_plural = _('assiduités mensuelles')
+        unique_together = [['eleve', 'annee', 'mois']]
+    
+    def __str__(self):
+        return f"{self.eleve.user.get_full_name()} - {self.mois:02d}/{self.annee}"
+
+
 class Bulletin(TimeStampedModel):
     """
     Bulletin scolaire d'un élève pour une période
@@ -445,21 +719,26 @@ class Bulletin(TimeStampedModel):
         choices=Note.PeriodeChoices.choices
     )
     
+    # Vides pour un élève sans aucune note sur la période (non classé)
     moyenne_generale = models.DecimalField(
         _('moyenne générale'),
         max_digits=5,
         decimal_places=2,
+        null=True,
+        blank=True,
         validators=[MinValueValidator(0), MaxValueValidator(20)]
     )
     
     rang = models.PositiveIntegerField(
         _('rang'),
+        null=True,
+        blank=True,
         help_text=_("Classement dans la classe")
     )
     
     total_eleves = models.PositiveIntegerField(
         _('total élèves'),
-        help_text=_("Nombre total d'élèves dans la classe")
+        help_text=_("Nombre d'élèves classés dans la classe")
     )
     
     # Appréciations
@@ -484,6 +763,12 @@ class Bulletin(TimeStampedModel):
         blank=True,
         null=True
     )
+    empreinte_pdf = models.CharField(
+        _('empreinte du PDF'),
+        max_length=64,
+        blank=True,
+        help_text=_("SHA-256 des données rendues dans fichier_pdf (rendu ignoré si inchangé)")
+    )
     
     date_generation = models.DateTimeField(
         _('date de génération'),
@@ -507,4 +792,5 @@ class Bulletin(TimeStampedModel):
         unique_together = [['eleve', 'periode', 'annee_scolaire']]
     
     def __str__(self):
-        return f"Bulletin {self.eleve.user.get_full_name()} - {self.get_periode_display()} ({self.moyenne_generale}/20)"
\ No newline at end of file
+        moyenne = 'non classé' if self.moyenne_generale is None else f'{self.moyenne_generale}/20'
+        return f"Bulletin {self.eleve.user.get_full_name()} - {self.get_periode_display()} ({moyenne})"
\ No newline at end of file
@@ -0,0 +1,106 @@
+"""
+Cache des données de référence : Matiere, Classe et Salle.
+
+Ces tables changent quelques fois par an mais sont lues à chaque requête
+pédagogique. Chaque modèle est chargé en entier (une requête) puis servi
+depuis la mémoire du processus ; un compteur de génération par modèle,
+incrémenté par les signaux post_save/post_delete (voir signals.py),
+déclenche le rechargement dans tous les processus. Classe.effectif n'est
+écrit que par des UPDATE (services/effectifs.py), qui incrémentent aussi
+la génération 'classe'.
+
+    from pedagogie.referentiel import get_matiere, get_classe_map
+
+    matiere = get_matiere(note.matiere_id)        # au lieu de note.matiere
+    classes = get_classe_map(annee)               # {id: Classe}
+
+Les instances retournées sont partagées : ne pas les modifier.
+"""
+from core.cache import LocalCache, bump_version
+
+NAMESPACES = {
+    'matiere': 'referentiel:matiere',
+    'classe': 'referentiel:classe',
+    'salle': 'referentiel:salle',
+}
+_caches = {name: LocalCache(namespace) for name, namespace in NAMESPACES.items()}
+
+
+def _load_matieres():
+    from .models import Matiere
+    return {m.pk: m for m in Matiere.objects.all()}
+
+
+def _load_classes():
+    from .models import Classe
+    # annee_scolaire et salle jointes : Classe.__str__ ne déclenche pas de requête
+    return {
+        c.pk: c
+        for c in Classe.objects.select_related('annee_scolaire', 'salle')
+    }
+
+
+def _load_salles():
+    from administration.models import Salle
+    return {s.pk: s for s in Salle.objects.all()}
+
+
+_LOADERS = {
+    'matiere': _load_matieres,
+    'classe': _load_classes,
+    'salle': _load_salles,
+}
+
+
+def _table(name):
+    return _caches[name].get('all', _LOADERS[name])
+
+
+def invalidate(name):
+    """Incrémente la génération d'un modèle de référence ('matiere', 'classe', 'salle')."""
+    bump_version(NAMESPACES[name])
+
+
+def warm_up():
+    """Charge les trois tables (démarrage d'un worker)."""
+    for name in _LOADERS:
+        _table(name)
+
+
+# ─── API ──────────────────────────────────────────────────────────────────────
+
+def get_matiere(pk):
+    return _table('matiere').get(pk)
+
+
+def get_matieres(actives_seulement=False):
+    matieres = _table('matiere')
+    if actives_seulement:
+        return {pk: m for pk, m in matieres.items() if m.is_active}
+    return matieres
+
+
+def get_classe(pk):
+    return _table('classe').get(pk)
+
+
+def get_classe_map(annee=None):
+    """
+    {id: Classe} des classes d'une année scolaire (instance ou id).
+    Par défaut l'année active.
+    """
+    if annee is None:
+        from administration.models import AnneeScolaire
+        annee = AnneeScolaire.get_annee_active()
+        if annee is None:
+            return {}
+    annee_id = getattr(annee, 'pk', annee)
+    return {pk: c for pk, c in _table('classe').items() if c.annee_scolaire_id == annee_id}
+
+
+def get_salle(pk):
+    return _table('salle').get(pk)
+
+
+def get_salles():
+    return _table('salle')
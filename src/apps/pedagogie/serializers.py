@@ -0,0 +1,176 @@
+"""
+Serializers pour l'app pedagogie
+"""
+from django.utils.translation import gettext_lazy as _
+from rest_framework import serializers
+
+from administration.models import Salle
+from authentication.models import EleveProfile
+from core.validators import validate_file_size, validate_note
+
+from . import referentiel
+from .models import EmploiDuTemps, Note, Presence
+
+
+# ─── Saisie des notes ─────────────────────────────────────────────────────────
+
+class LigneNoteSerializer(serializers.Serializer):
+    eleve = serializers.IntegerField(label=_('élève'))
+    valeur = serializers.DecimalField(max_digits=5, decimal_places=2, validators=[validate_note])
+    appreciation = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class FeuilleNotesSerializer(serializers.Serializer):
+    """
+    Feuille de notes d'une évaluation : une ligne par élève.
+    L'inscription des élèves dans la classe est vérifiée en une requête.
+    """
+    classe = serializers.IntegerField(label=_('classe'))
+    matiere = serializers.IntegerField(label=_('matière'))
+    type_note = serializers.ChoiceField(choices=Note.TypeNoteChoices.choices)
+    periode = serializers.ChoiceField(choices=Note.PeriodeChoices.choices)
+    date_evaluation = serializers.DateField()
+    sur = serializers.DecimalField(max_digits=5, decimal_places=2, default=20, min_value=1)
+    coefficient = serializers.DecimalField(max_digits=4, decimal_places=2, default=1, min_value=0)
+    notes = LigneNoteSerializer(many=True, allow_empty=False)
+
+    def validate_classe(self, value):
+        classe = referentiel.get_classe(value)
+        if classe is None:
+            raise serializers.ValidationError(_('Classe introuvable.'))
+        return classe
+
+    def validate_matiere(self, value):
+        matiere = referentiel.get_matiere(value)
+        if matiere is None or not matiere.is_active:
+            raise serializers.ValidationError(_('Matière introuvable ou inactive.'))
+        return matiere
+
+    def validate(self, attrs):
+        lignes = attrs['notes']
+        erreurs = {}
+        vus = set()
+        for i, ligne in enumerate(lignes):
+            if ligne['eleve'] in vus:
+                erreurs[i] = [_('Élève présent plusieurs fois dans la feuille.')]
+            vus.add(ligne['eleve'])
+            if ligne['valeur'] > attrs['sur']:
+                erreurs.setdefault(i, []).append(_('La note dépasse la note maximale.'))
+
+        inscrits = set(
+            EleveProfile.objects.filter(
+                pk__in=vus, classe_actuelle_id=attrs['classe'].pk
+            ).values_list('pk', flat=True)
+        )
+        for i, ligne in enumerate(lignes):
+            if ligne['eleve'] not in inscrits:
+                erreurs.setdefault(i, []).append(_("Élève non inscrit dans cette classe."))
+
+        if erreurs:
+            raise serializers.ValidationError({'notes': erreurs})
+        return attrs
+
+
+class ImportNotesSerializer(serializers.Serializer):
+    """
+    Tableur de notes (XLSX ou CSV) et valeurs par défaut des colonnes
+    absentes du fichier (voir services/import_notes.py).
+    """
+    fichier = serializers.FileField(validators=[validate_file_size])
+    matiere = serializers.IntegerField(label=_('matière'), required=False)
+    type_note = serializers.ChoiceField(choices=Note.TypeNoteChoices.choices, required=False)
+    periode = serializers.ChoiceField(choices=Note.PeriodeChoices.choices, required=False)
+    date_evaluation = serializers.DateField(required=False)
+    sur = serializers.DecimalField(max_digits=5, decimal_places=2, default=20, min_value=1)
+    coefficient = serializers.DecimalField(max_digits=4, decimal_places=2, default=1, min_value=0)
+    partiel = serializers.BooleanField(default=False)
+    simulation = serializers.BooleanField(default=False)
+
+    def validate_matiere(self, value):
+        matiere = referentiel.get_matiere(value)
+        if matiere is None or not matiere.is_active:
+            raise serializers.ValidationError(_('Matière introuvable ou inactive.'))
+        return matiere
+
+
+# ─── Appel ────────────────────────────────────────────────────────────────────
+
+class ExceptionAppelSerializer(serializers.Serializer):
+    eleve = serializers.IntegerField(label=_('élève'))
+    statut = serializers.ChoiceField(choices=Presence.StatutChoices.choices)
+    justification = serializers.CharField(required=False, allow_blank=True, default='')
+
+
+class AppelSerializer(serializers.Serializer):
+    """
+    Appel d'une classe : tous les élèves sont présents sauf ceux listés
+    dans `exceptions` (absents, retards...).
+    """
+    classe = serializers.IntegerField(label=_('classe'))
+    date = serializers.DateField()
+    matiere = serializers.IntegerField(label=_('matière'), required=False, allow_null=True, default=None)
+    exceptions = ExceptionAppelSerializer(many=True, required=False, default=list)
+
+    def validate_classe(self, value):
+        classe = referentiel.get_classe(value)
+        if classe is None:
+            raise serializers.ValidationError(_('Classe introuvable.'))
+        return classe
+
+    def validate_matiere(self, value):
+        if value is None:
+            return None
+        matiere = referentiel.get_matiere(value)
+        if matiere is None:
+            raise serializers.ValidationError(_('Matière introuvable.'))
+        return matiere
+
+    def validate(self, attrs):
+        # Élèves de la classe, réutilisés par le service d'appel
+        attrs['eleves'] = list(
+            EleveProfile.objects.filter(classe_actuelle_id=attrs['classe'].pk)
+            .values_list('pk', flat=True)
+        )
+        inscrits = set(attrs['eleves'])
+        erreurs = {}
+        vus = set()
+        for i, exception in enumerate(attrs['exceptions']):
+            if exception['eleve'] in vus:
+                erreurs[i] = [_("Élève présent plusieurs fois dans l'appel.")]
+            elif exception['eleve'] not in inscrits:
+                erreurs[i] = [_('Élève non inscrit dans cette classe.')]
+            vus.add(exception['eleve'])
+        if erreurs:
+            raise serializers.ValidationError({'exceptions': erreurs})
+        return attrs
+
+
+# ─── Disponibilité des salles ─────────────────────────────────────────────────
+
+class RechercheSallesSerializer(serializers.Serializer):
+    """
+    Paramètres de recherche de salles libres : un jour de la semaine type
+    (ou une date, convertie en jour) et un créneau [debut, fin[.
+    """
+    jour = serializers.ChoiceField(choices=EmploiDuTemps.JourChoices.choices, required=False)
+    date = serializers.DateField(required=False)
+    debut = serializers.TimeField()
+    fin = serializers.TimeField()
+    type = serializers.ChoiceField(choices=Salle.TypeSalleChoices.choices, required=False)
+    capacite = serializers.IntegerField(min_value=0, default=0)
+    projecteur = serializers.BooleanField(default=False)
+    climatisation = serializers.BooleanField(default=False)
+    tableau_numerique = serializers.BooleanField(default=False)
+
+    def validate(self, attrs):
+        if 'jour' not in attrs:
+            if 'date' not in attrs:
+                raise serializers.ValidationError(_('Paramètre "jour" ou "date" requis.'))
+            attrs['jour'] = EmploiDuTemps.JourChoices.values[attrs['date'].weekday()]
+        if attrs['debut'] >= attrs['fin']:
+            raise serializers.ValidationError(_("L'heure de début doit être avant l'heure de fin"))
+        attrs['equipements'] = [
+            f'a_{equipement}' for equipement in ('projecteur', 'climatisation', 'tableau_numerique')
+            if attrs[equipement]
+        ]
+        return attrs
@@ -0,0 +1,3 @@
+"""
+Services métier de la pédagogie (calculs de masse hors des vues).
+"""
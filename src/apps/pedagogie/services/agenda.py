@@ -0,0 +1,277 @@
+"""
+Emplois du temps hebdomadaires prêts à servir : document JSON et flux
+iCalendar par classe, par enseignant et par salle.
+
+Chaque ressource a son espace de cache versionné ('agenda:classe:12', ...),
+incrémenté par les écritures d'EmploiDuTemps (pedagogie.signals). Un espace
+global ('agenda') couvre les changements de données de référence et les
+écritures en masse (génération). L'ETag est dérivé de ces deux versions :
+une requête conditionnelle inchangée coûte une lecture groupée du cache et
+aucune requête SQL.
+
+    etag = etag_agenda('classe', 12)                  # puis 304 si identique
+    document = document_agenda('classe', 12)          # dict, depuis le cache
+    ical = ical_agenda('classe', 12)                  # text/calendar
+
+Jeton d'abonnement iCalendar : signé, lié à l'utilisateur qui l'a obtenu,
+valable DUREE_JETON (réglage AGENDA_JETON_DUREE, en secondes). Il est
+révoqué quand l'utilisateur change de mot de passe, est désactivé ou perd
+l'accès à la ressource (`peut_s_abonner`).
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from core.cache import bump_version, get_versions, versioned_key
+
+from ..models import EmploiDuTemps
+from .. import referentiel
+
+TYPES = ('classe', 'enseignant', 'salle')
+NAMESPACE_GLOBAL = 'agenda'
+CACHE_TIMEOUT = 60 * 60 * 24
+ORDRE_JOURS = {jour: i for i, jour in enumerate(EmploiDuTemps.JourChoices.values)}
+SEL_JETON = 'pedagogie.agenda'
+DUREE_JETON = 60 * 60 * 24 * 90
+
+
+def namespace(type_, ressource_id):
+    return f'{NAMESPACE_GLOBAL}:{type_}:{ressource_id}'
+
+
+def invalider(type_, ressource_id):
+    bump_version(namespace(type_, ressource_id))
+
+
+def invalider_creneau(classe_id, enseignant_id, salle_id):
+    """Après l'écriture d'un créneau : les agendas de ses trois ressources."""
+    for type_, ressource_id in zip(TYPES, (classe_id, enseignant_id, salle_id)):
+        if ressource_id is not None:
+            invalider(type_, ressource_id)
+
+
+def invalider_tout():
+    """Écritures en masse, données de référence : tous les agendas."""
+    bump_version(NAMESPACE_GLOBAL)
+
+
+def _versions(type_, ressource_id):
+    espace = namespace(type_, ressource_id)
+    versions = get_versions([NAMESPACE_GLOBAL, espace])
+    return f'{versions[NAMESPACE_GLOBAL]}.{versions[espace]}'
+
+
+def etag_agenda(type_, ressource_id, format_='json'):
+    return f'"agenda-{type_}-{ressource_id}-{_versions(type_, ressource_id)}-{format_}"'
+
+
+def _en_cache(type_, ressource_id, format_, construire):
+    cle = versioned_key(
+        NAMESPACE_GLOBAL, type_, ressource_id, format_, version=_versions(type_, ressource_id),
+    )
+    valeur = cache.get(cle)
+    if valeur is None:
+        valeur = construire()
+        cache.set(cle, valeur, CACHE_TIMEOUT)
+    return valeur
+
+
+# ─── Document hebdomadaire ────────────────────────────────────────────────────
+
+def _nom_ressource(type_, ressource_id):
+    if type_ == 'classe':
+        classe = referentiel.get_classe(ressource_id)
+        return classe.nom if classe else None
+    if type_ == 'salle':
+        salle = referentiel.get_salle(ressource_id)
+        return salle.numero if salle else None
+    from authentication.models import EnseignantProfile
+    enseignant = EnseignantProfile.objects.select_related('user').filter(pk=ressource_id).first()
+    return enseignant.user.get_full_name() if enseignant else None
+
+
+def _creneaux(type_, ressource_id):
+    """Créneaux de la ressource en une requête ; matière, classe et salle depuis le référentiel."""
+    lignes = EmploiDuTemps.objects.filter(**{f'{type_}_id': ressource_id}).values_list(
+        'id', 'jour', 'heure_debut', 'heure_fin', 'classe_id', 'matiere_id', 'salle_id',
+        'enseignant_id', 'enseignant__user__first_name', 'enseignant__user__last_name',
+    )
+    creneaux = []
+    for (pk, jour, debut, fin, classe_id, matiere_id, salle_id,
+         enseignant_id, prenom, nom) in lignes:
+        classe = referentiel.get_classe(classe_id)
+        matiere = referentiel.get_matiere(matiere_id)
+        salle = referentiel.get_salle(salle_id) if salle_id else None
+        creneaux.append({
+            'id': pk,
+            'jour': jour,
+            'debut': debut.strftime('%H:%M'),
+            'fin': fin.strftime('%H:%M'),
+            'classe': {'id': classe_id, 'nom': classe.nom if classe else None},
+            'matiere': {
+                'id': matiere_id,
+                'code': matiere.code if matiere else None,
+                'nom': matiere.nom if matiere else None,
+                'couleur': matiere.couleur if matiere else None,
+            },
+            'enseignant': {'id': enseignant_id, 'nom': f'{prenom} {nom}'.strip()},
+            'salle': {'id': salle_id, 'numero': salle.numero} if salle else None,
+        })
+    creneaux.sort(key=lambda c: (ORDRE_JOURS.get(c['jour'], 99), c['debut']))
+    return creneaux
+
+
+def _construire_document(type_, ressource_id):
+    jours = {jour: [] for jour in EmploiDuTemps.JourChoices.values}
+    for creneau in _creneaux(type_, ressource_id):
+        jours[creneau['jour']].append(creneau)
+    return {
+        'type': type_,
+        'id': ressource_id,
+        'nom': _nom_ressource(type_, ressource_id),
+        'jours': {jour: creneaux for jour, creneaux in jours.items() if creneaux},
+        'genere_le': timezone.now().isoformat(),
+    }
+
+
+def document_agenda(type_, ressource_id):
+    return _en_cache(
+        type_, ressource_id, 'json', lambda: _construire_document(type_, ressource_id),
+    )
+
+
+# ─── iCalendar ────────────────────────────────────────────────────────────────
+
+def _echapper(texte):
+    return (
+        str(texte).replace('\\', '\\\\').replace(';', '\\;')
+        .replace(',', '\\,').replace('\n', '\\n')
+    )
+
+
+def _plier(ligne):
+    """Lignes de 75 octets au plus (RFC 5545 §3.1), continuation par une espace."""
+    octets = ligne.encode('utf-8')
+    if len(octets) <= 75:
+        return ligne
+    morceaux, courant = [], ''
+    for caractere in ligne:
+        limite = 75 if not morceaux else 74
+        if len((courant + caractere).encode('utf-8')) > limite:
+            morceaux.append(courant)
+            courant = ''
+        courant += caractere
+    morceaux.append(courant)
+    return '\r\n '.join(morceaux)
+
+
+def _premier_jour(debut_annee, jour):
+    """Première date >= debut_annee tombant le `jour` (LUN, MAR...)."""
+    decalage = (ORDRE_JOURS[jour] - debut_annee.weekday()) % 7
+    return debut_annee + timedelta(days=decalage)
+
+
+def _construire_ical(type_, ressource_id):
+    document = document_agenda(type_, ressource_id)
+    from administration.models import AnneeScolaire
+    annee = AnneeScolaire.get_annee_active()
+    maintenant = timezone.now().strftime('%Y%m%dT%H%M%SZ')
+    lignes = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//Lakoli//Emploi du temps//FR',
+        'CALSCALE:GREGORIAN',
+        f"X-WR-CALNAME:{_echapper(document['nom'] or f'{type_} {ressource_id}')}",
+    ]
+    if annee is not None:
+        fin_annee = annee.date_fin.strftime('%Y%m%dT235959')
+        for creneaux in document['jours'].values():
+            for creneau in creneaux:
+                jour = _premier_jour(annee.date_debut, creneau['jour'])
+                debut = datetime.combine(jour, datetime.strptime(creneau['debut'], '%H:%M').time())
+                fin = datetime.combine(jour, datetime.strptime(creneau['fin'], '%H:%M').time())
+                resume = creneau['matiere']['nom'] or ''
+                if type_ != 'classe':
+                    resume = f"{resume} - {creneau['classe']['nom']}"
+                lignes += [
+                    'BEGIN:VEVENT',
+                    f"UID:edt-{creneau['id']}-{annee.pk}@lakoli",
+                    f'DTSTAMP:{maintenant}',
+                    f"DTSTART:{debut:%Y%m%dT%H%M%S}",
+                    f"DTEND:{fin:%Y%m%dT%H%M%S}",
+                    f'RRULE:FREQ=WEEKLY;UNTIL={fin_annee}',
+                    f'SUMMARY:{_echapper(resume)}',
+                    f"DESCRIPTION:{_echapper(creneau['enseignant']['nom'])}",
+                ]
+                if creneau['salle']:
+                    lignes.append(f"LOCATION:{_echapper(creneau['salle']['numero'])}")
+                lignes.append('END:VEVENT')
+    lignes.append('END:VCALENDAR')
+    return '\r\n'.join(_plier(ligne) for ligne in lignes) + '\r\n'
+
+
+def ical_agenda(type_, ressource_id):
+    return _en_cache(
+        type_, ressource_id, 'ics', lambda: _construire_ical(type_, ressource_id),
+    )
+
+
+# ─── Jetons d'abonnement ──────────────────────────────────────────────────────
+
+def peut_s_abonner(user, type_, ressource_id):
+    """
+    Administration et surveillance : toutes les ressources. Enseignant :
+    les classes, les salles et son propre agenda. Élève : sa classe.
+    Parent : les classes de ses enfants.
+    """
+    from authentication.models import EnseignantProfile, EleveProfile, ParentProfile, User
+
+    Role = User.RoleChoices
+    if user.is_superuser or user.role in (Role.ADMIN, Role.SURVEILLANT):
+        return True
+    if user.role == Role.ENSEIGNANT:
+        if type_ == 'enseignant':
+            return EnseignantProfile.objects.filter(pk=ressource_id, user=user).exists()
+        return type_ in ('classe', 'salle')
+    if type_ != 'classe':
+        return False
+    if user.role == Role.ELEVE:
+        return EleveProfile.objects.filter(user=user, classe_actuelle_id=ressource_id).exists()
+    if user.role == Role.PARENT:
+        return ParentProfile.objects.filter(user=user, eleves__classe_actuelle_id=ressource_id).exists()
+    return False
+
+
+def _empreinte(user):
+    """Change avec le mot de passe : le modifier révoque les jetons de l'utilisateur."""
+    return salted_hmac(SEL_JETON, f'{user.pk}:{user.password}').hexdigest()[:16]
+
+
+def jeton_abonnement(user, type_, ressource_id):
+    """Jeton signé pour s'abonner au flux iCalendar sans cookie de session."""
+    return signing.dumps(
+        [type_, ressource_id, user.pk, _empreinte(user)], salt=SEL_JETON, compress=True,
+    )
+
+
+def verifier_jeton(jeton, type_, ressource_id):
+    from authentication.models import User
+
+    try:
+        type_jeton, id_jeton, user_id, empreinte = signing.loads(
+            jeton, salt=SEL_JETON, max_age=getattr(settings, 'AGENDA_JETON_DUREE', DUREE_JETON),
+        )
+    except (signing.BadSignature, TypeError, ValueError):
+        return False
+    if [type_jeton, id_jeton] != [type_, ressource_id]:
+        return False
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    return (
+        user is not None
+        and constant_time_compare(_empreinte(user), empreinte)
+        and peut_s_abonner(user, type_, ressource_id)
+    )
@@ -0,0 +1,102 @@
+"""
+Appel d'une classe : une écriture pour tous les élèves.
+
+Les élèves absents de la liste d'exceptions sont enregistrés présents.
+Avec une matière, l'appel est un seul INSERT ... ON CONFLICT
+(eleve, date, matiere) DO UPDATE. Pour l'appel de la journée (matière
+NULL), le conflit vise l'index unique partiel `presence_unique_jour`
+(eleve, date) WHERE matiere_id IS NULL : deux appels concurrents ne
+peuvent pas créer de doublon. Django ne sait pas écrire la clause WHERE
+de la cible ON CONFLICT, l'INSERT est donc écrit ici (PostgreSQL et
+SQLite acceptent la même syntaxe).
+Les bitmaps d'assiduité du jour sont ensuite recalculées et les tableaux
+de bord de la classe invalidés (pas de signaux).
+"""
+from django.db import connection, transaction
+from django.utils import timezone
+
+from ..models import Presence
+from . import assiduite, tableau_bord
+
+CHAMPS_MODIFIES = ['classe', 'statut', 'justification', 'enregistre_par', 'updated_at']
+
+
+def _upsert_journee(presences, batch_size):
+    """INSERT ... ON CONFLICT (eleve, date) WHERE matiere IS NULL DO UPDATE, par lots."""
+    meta = Presence._meta
+    champs = [f for f in meta.concrete_fields if not f.primary_key]
+    q = connection.ops.quote_name
+    colonnes = ', '.join(q(f.column) for f in champs)
+    maj = ', '.join(
+        f'{q(meta.get_field(nom).column)} = EXCLUDED.{q(meta.get_field(nom).column)}'
+        for nom in CHAMPS_MODIFIES
+    )
+    ligne = f'({", ".join(["%s"] * len(champs))})'
+    taille = min(batch_size, connection.ops.bulk_batch_size(champs, presences) or batch_size)
+    with connection.cursor() as cursor:
+        for debut in range(0, len(presences), taille):
+            lot = presences[debut:debut + taille]
+            cursor.execute(
+                f'INSERT INTO {q(meta.db_table)} ({colonnes}) VALUES {", ".join([ligne] * len(lot))} '
+                f'ON CONFLICT ({q("eleve_id")}, {q("date")}) WHERE {q("matiere_id")} IS NULL '
+                f'DO UPDATE SET {maj}',
+                [f.get_db_prep_save(getattr(p, f.attname), connection) for p in lot for f in champs],
+            )
+
+
+def enregistrer_appel(appel, utilisateur=None, batch_size=500):
+    """`appel` : données validées par AppelSerializer. Retourne le nombre de lignes écrites."""
+    classe, matiere, jour = appel['classe'], appel['matiere'], appel['date']
+    exceptions = {e['eleve']: e for e in appel['exceptions']}
+    maintenant = timezone.now()
+
+    presences = []
+    for eleve_id in appel['eleves']:
+        exception = exceptions.get(eleve_id)
+        presences.append(Presence(
+            eleve_id=eleve_id,
+            classe_id=classe.pk,
+            matiere=matiere,
+            date=jour,
+            statut=exception['statut'] if exception else Presence.StatutChoices.PRESENT,
+            justification=exception['justification'] if exception else '',
+            enregistre_par=utilisateur,
+            created_at=maintenant,
+            updated_at=maintenant,
+        ))
+
+    with transaction.atomic():
+        if matiere is not None:
+            Presence.objects.bulk_create(
+                presences,
+                batch_size=batch_size,
+                update_conflicts=True,
+                unique_fields=['eleve', 'date', 'matiere'],
+                update_fields=CHAMPS_MODIFIES,
+            )
+        else:
+            _upsert_journee(presences, batch_size)
+        assiduite.maj_jours((eleve_id, jour) for eleve_id in appel['eleves'])
+        tableau_bord.invalider_classe(classe.pk)
+    return len(presences)
+
+
+def presences_du_jour(classe, jour, matiere=None):
+    """Feuille de présence de la classe pour `jour` (une requête)."""
+    qs = (
+        Presence.objects
+        .filter(classe_id=getattr(classe, 'pk', classe), date=jour, matiere=matiere)
+        .select_related('eleve__user')
+        .order_by('eleve__user__last_name', 'eleve__user__first_name')
+    )
+    return [
+        {
+            'id': p.pk,
+            'eleve': p.eleve_id,
+            'matricule': p.eleve.matricule,
+            'nom': p.eleve.user.get_full_name(),
+            'statut': p.statut,
+            'justification': p.justification,
+        }
+        for p in qs
+    ]
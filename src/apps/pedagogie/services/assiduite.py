@@ -0,0 +1,268 @@
+"""
+Assiduité en bitmaps : un entier de 31 bits par élève et par mois pour
+les absences, un autre pour les retards (AssiduiteMensuelle).
+
+Un jour est marqué absent (resp. en retard) si au moins une présence de
+ce jour a le statut ABSENT/ABSENT_J (resp. RETARD), que l'appel soit fait
+à la journée ou par matière. Chaque écriture de Presence recalcule le bit
+des jours touchés à partir des lignes de ce jour (index eleve, date).
+
+Lectures sans toucher à Presence :
+    totaux()              → jours d'absence / de retard sur une période (popcount)
+    plus_longues_series() → plus longue suite de jours de classe d'absence
+    eleves_en_serie()     → élèves absents depuis au moins N jours de classe
+
+Les traitements en masse (appel) appellent `maj_jours()` eux-mêmes.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.archives import annees_archivees
+
+from ..models import AssiduiteMensuelle, Presence
+
+NB_OCTETS = 4
+STATUTS_ABSENCE = {Presence.StatutChoices.ABSENT, Presence.StatutChoices.ABSENT_JUSTIFIE}
+# Jours de classe pour la détection de séries (lundi = 0)
+JOURS_OUVRES = (0, 1, 2, 3, 4)
+
+
+def vers_entier(octets):
+    return int.from_bytes(bytes(octets or b''), 'little')
+
+
+def vers_octets(entier):
+    return entier.to_bytes(NB_OCTETS, 'little')
+
+
+def _mois(debut, fin):
+    """(année, mois) couverts par [debut, fin]."""
+    annee, mois = debut.year, debut.month
+    while (annee, mois) <= (fin.year, fin.month):
+        yield annee, mois
+        annee, mois = (annee + 1, 1) if mois == 12 else (annee, mois + 1)
+
+
+def _masque(annee, mois, debut, fin):
+    """Bits des jours du mois compris dans [debut, fin]."""
+    premier = debut.day if (annee, mois) == (debut.year, debut.month) else 1
+    dernier = fin.day if (annee, mois) == (fin.year, fin.month) else 31
+    return ((1 << dernier) - 1) ^ ((1 << (premier - 1)) - 1)
+
+
+def _filtre_periode(debut, fin):
+    """Lignes AssiduiteMensuelle couvrant [debut, fin] (au plus 12 mois par année)."""
+    mois = list(_mois(debut, fin))
+    return {
+        'annee__in': {a for a, _ in mois},
+        'mois__in': {m for _, m in mois},
+    }, set(mois)
+
+
+# ─── Écriture ─────────────────────────────────────────────────────────────────
+
+def maj_jours(couples):
+    """
+    Recalcule les bits des couples (eleve_id, jour) depuis Presence :
+    une lecture des présences de ces jours, une des bitmaps concernées,
+    puis bulk_update / bulk_create.
+
+    Le verrou ne couvre que les lignes existantes : si une autre
+    transaction crée la même ligne (première écriture du mois), l'écriture
+    est refaite une fois, la ligne existant alors.
+    """
+    couples = set(couples)
+    if not couples:
+        return
+    eleve_ids = {e for e, _ in couples}
+    jours = {j for _, j in couples}
+
+    statuts = defaultdict(set)
+    for eleve_id, jour, statut in Presence.objects.filter(
+        eleve_id__in=eleve_ids, date__in=jours
+    ).values_list('eleve_id', 'date', 'statut'):
+        statuts[eleve_id, jour].add(statut)
+
+    try:
+        with transaction.atomic():
+            _ecrire_jours(couples, statuts)
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre transaction
+        with transaction.atomic():
+            _ecrire_jours(couples, statuts)
+
+
+def _ecrire_jours(couples, statuts):
+    eleve_ids = {e for e, _ in couples}
+    jours = {j for _, j in couples}
+    lignes = {
+        (l.eleve_id, l.annee, l.mois): l
+        for l in AssiduiteMensuelle.objects.select_for_update().filter(
+            eleve_id__in=eleve_ids,
+            annee__in={j.year for j in jours},
+            mois__in={j.month for j in jours},
+        )
+    }
+    maintenant = timezone.now()
+    modifiees, nouvelles = {}, {}
+    for eleve_id, jour in couples:
+        cle = (eleve_id, jour.year, jour.month)
+        ligne = lignes.get(cle) or nouvelles.get(cle)
+        if ligne is None:
+            ligne = nouvelles[cle] = AssiduiteMensuelle(
+                eleve_id=eleve_id, annee=jour.year, mois=jour.month,
+                absences=bytes(NB_OCTETS), retards=bytes(NB_OCTETS),
+            )
+        bit = 1 << (jour.day - 1)
+        du_jour = statuts.get((eleve_id, jour), set())
+        absences, retards = vers_entier(ligne.absences), vers_entier(ligne.retards)
+        absences = absences | bit if du_jour & STATUTS_ABSENCE else absences & ~bit
+        retards = retards | bit if Presence.StatutChoices.RETARD in du_jour else retards & ~bit
+        ligne.absences, ligne.retards = vers_octets(absences), vers_octets(retards)
+        if cle in lignes:
+            ligne.updated_at = maintenant
+            modifiees[cle] = ligne
+
+    AssiduiteMensuelle.objects.bulk_update(
+        modifiees.values(), ['absences', 'retards', 'updated_at'],
+    )
+    AssiduiteMensuelle.objects.bulk_create(
+        [l for l in nouvelles.values() if vers_entier(l.absences) or vers_entier(l.retards)],
+    )
+
+
+def maj_jour(eleve_id, jour):
+    maj_jours([(eleve_id, jour)])
+
+
+def reconstruire(batch_size=2000, **filtres):
+    """
+    Recalcule les bitmaps depuis Presence pour le périmètre `filtres`
+    (champs communs : eleve_id, eleve_id__in). Parcours unique de la table.
+    Les mois des années archivées (présences supprimées) sont exclus : leurs
+    bitmaps sont conservées.
+    """
+    mois_archives = set()
+    for _pk, debut, fin in annees_archivees():
+        mois_archives.update(_mois(debut, fin))
+    exclus_presences, exclus_bitmaps = Q(pk__in=[]), Q(pk__in=[])
+    for annee, mois in mois_archives:
+        exclus_presences |= Q(date__year=annee, date__month=mois)
+        exclus_bitmaps |= Q(annee=annee, mois=mois)
+
+    bits = defaultdict(lambda: [0, 0])
+    presences = (
+        Presence.objects.filter(**filtres)
+        .exclude(exclus_presences)
+        .exclude(statut=Presence.StatutChoices.PRESENT)
+        .values_list('eleve_id', 'date', 'statut')
+    )
+    for eleve_id, jour, statut in presences.iterator(chunk_size=batch_size):
+        index = 0 if statut in STATUTS_ABSENCE else 1
+        bits[eleve_id, jour.year, jour.month][index] |= 1 << (jour.day - 1)
+
+    lignes = [
+        AssiduiteMensuelle(
+            eleve_id=eleve_id, annee=annee, mois=mois,
+            absences=vers_octets(absences), retards=vers_octets(retards),
+        )
+        for (eleve_id, annee, mois), (absences, retards) in bits.items()
+    ]
+    with transaction.atomic():
+        AssiduiteMensuelle.objects.filter(**filtres).exclude(exclus_bitmaps).delete()
+        AssiduiteMensuelle.objects.bulk_create(lignes, batch_size=batch_size)
+    return len(lignes)
+
+
+# ─── Lecture ──────────────────────────────────────────────────────────────────
+
+def totaux(eleve_ids, debut, fin):
+    """{eleve_id: (jours d'absence, jours de retard)} sur [debut, fin]."""
+    filtre, mois_couverts = _filtre_periode(debut, fin)
+    resultat = defaultdict(lambda: [0, 0])
+    for eleve_id, annee, mois, absences, retards in AssiduiteMensuelle.objects.filter(
+        eleve_id__in=eleve_ids, **filtre
+    ).values_list('eleve_id', 'annee', 'mois', 'absences', 'retards'):
+        if (annee, mois) not in mois_couverts:
+            continue
+        masque = _masque(annee, mois, debut, fin)
+        total = resultat[eleve_id]
+        total[0] += (vers_entier(absences) & masque).bit_count()
+        total[1] += (vers_entier(retards) & masque).bit_count()
+    return {eleve_id: tuple(t) for eleve_id, t in resultat.items()}
+
+
+def _plus_longue_suite(bits):
+    """Longueur de la plus longue suite de 1 : x &= x << 1 jusqu'à épuisement."""
+    longueur = 0
+    while bits:
+        bits &= bits << 1
+        longueur += 1
+    return longueur
+
+
+def _bitmaps_absences(eleve_ids, debut, fin):
+    """{eleve_id: {(année, mois): bitmap des absences}} sur [debut, fin]."""
+    filtre, mois_couverts = _filtre_periode(debut, fin)
+    par_eleve = defaultdict(dict)
+    for eleve_id, annee, mois, absences in AssiduiteMensuelle.objects.filter(
+        eleve_id__in=eleve_ids, **filtre
+    ).values_list('eleve_id', 'annee', 'mois', 'absences'):
+        if (annee, mois) in mois_couverts:
+            par_eleve[eleve_id][annee, mois] = vers_entier(absences)
+    return par_eleve
+
+
+def _jours_de_classe(debut, fin, jours_ouvres):
+    jours = (debut + timedelta(days=i) for i in range((fin - debut).days + 1))
+    return [jour for jour in jours if jour.weekday() in jours_ouvres]
+
+
+def _absent(bitmaps, jour):
+    return bitmaps.get((jour.year, jour.month), 0) >> (jour.day - 1) & 1
+
+
+def plus_longues_series(eleve_ids, debut, fin, jours_ouvres=JOURS_OUVRES):
+    """
+    {eleve_id: plus longue série de jours de classe consécutifs d'absence}.
+    Les jours non ouvrés sont retirés avant la recherche : une absence le
+    vendredi puis le lundi forme une série de 2.
+    """
+    par_eleve = _bitmaps_absences(eleve_ids, debut, fin)
+    jours = _jours_de_classe(debut, fin, jours_ouvres)
+    resultat = {}
+    for eleve_id in eleve_ids:
+        bitmaps = par_eleve.get(eleve_id)
+        compacte = 0
+        if bitmaps:
+            # Bitmap des seuls jours de classe, dans l'ordre chronologique
+            for position, jour in enumerate(jours):
+                if _absent(bitmaps, jour):
+                    compacte |= 1 << position
+        resultat[eleve_id] = _plus_longue_suite(compacte)
+    return resultat
+
+
+def eleves_en_serie(eleve_ids, jour=None, seuil=3, jours_ouvres=JOURS_OUVRES):
+    """
+    Élèves absents au moins `seuil` jours de classe consécutifs jusqu'à
+    `jour` inclus (aujourd'hui par défaut) : {eleve_id: longueur}.
+    La recherche remonte sur une fenêtre juste suffisante pour `seuil`.
+    """
+    jour = jour or date.today()
+    debut = jour - timedelta(days=seuil * 7 // max(len(jours_ouvres), 1) + 7)
+    jours = list(reversed(_jours_de_classe(debut, jour, jours_ouvres)))
+    series = {}
+    for eleve_id, bitmaps in _bitmaps_absences(eleve_ids, debut, jour).items():
+        longueur = 0
+        for j in jours:
+            if not _absent(bitmaps, j):
+                break
+            longueur += 1
+        if longueur >= seuil:
+            series[eleve_id] = longueur
+    return series
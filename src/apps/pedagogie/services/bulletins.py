@@ -0,0 +1,238 @@
+"""
+Calcul des bulletins (moyenne générale, rang, absences) par classe.
+
+Toutes les notes d'une période sont agrégées en base en une seule requête
+GROUP BY (élève, matière) :
+
+    moyenne matière  = Σ(note_sur_20 × coef. note) / Σ(coef. note)
+    moyenne générale = Σ(moyenne matière × coef. matière) / Σ(coef. matière)
+
+Le reste du calcul (pondération par matière, rangs) se fait en mémoire sur
+ces agrégats. Chaque élève est classé dans une seule classe, sa classe
+actuelle (à défaut, pour un élève sorti, celle de sa dernière note) : un
+élève qui change de classe en cours de période y emporte toutes ses notes
+de la période.
+
+Un élève sans aucune note sur la période est « non classé » : bulletin
+sans moyenne ni rang, hors du classement et du nombre d'élèves classés
+(total_eleves). Absences et retards (en jours) viennent des bitmaps
+d'AssiduiteMensuelle, puis les bulletins sont écrits par `bulk_create` /
+`bulk_update`. Le nombre de requêtes ne dépend ni du nombre de classes ni
+du nombre d'élèves.
+"""
+from collections import defaultdict
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import transaction
+from django.db.models import F, FloatField, Q, Sum, Value
+from django.utils import timezone
+
+from ..models import Bulletin, Note
+from .. import referentiel
+from . import assiduite
+
+DEUX_DECIMALES = Decimal('0.01')
+
+APPRECIATIONS = [
+    (16, "Excellent travail"),
+    (14, "Très bon travail"),
+    (12, "Bon travail"),
+    (10, "Travail assez bien, peut mieux faire"),
+    (8, "Résultats insuffisants, des efforts sont attendus"),
+    (0, "Résultats très insuffisants"),
+]
+NON_CLASSE = "Non classé : aucune note sur la période"
+TEXTES_PAR_DEFAUT = {texte for _seuil, texte in APPRECIATIONS} | {NON_CLASSE}
+
+
+def appreciation_par_defaut(moyenne):
+    """Appréciation générale proposée d'après la moyenne (modifiable ensuite)."""
+    if moyenne is None:
+        return NON_CLASSE
+    for seuil, texte in APPRECIATIONS:
+        if moyenne >= seuil:
+            return texte
+    return APPRECIATIONS[-1][1]
+
+
+def calculer_rangs(moyennes):
+    """
+    {eleve_id: moyenne} → {eleve_id: rang}, ex-aequo au même rang
+    (classement « 1, 2, 2, 4 »).
+    """
+    ordre = sorted(moyennes.items(), key=lambda item: item[1], reverse=True)
+    rangs = {}
+    precedente = None
+    for position, (eleve_id, moyenne) in enumerate(ordre, start=1):
+        if moyenne != precedente:
+            rang = position
+            precedente = moyenne
+        rangs[eleve_id] = rang
+    return rangs
+
+
+# ─── Agrégats ─────────────────────────────────────────────────────────────────
+
+def _rattachements(annee, periode, eleve_ids, classe_ids):
+    """
+    {eleve_id: classe_id} des élèves sortis (sans classe actuelle) : classe
+    de leur dernière note de la période parmi `classe_ids`.
+    """
+    if not eleve_ids:
+        return {}
+    rattachements = {}
+    for eleve_id, classe_id in (
+        Note.objects
+        .filter(annee_scolaire=annee, periode=periode, eleve_id__in=eleve_ids, classe_id__in=classe_ids)
+        .order_by('-date_evaluation', '-pk')
+        .values_list('eleve_id', 'classe_id')
+    ):
+        rattachements.setdefault(eleve_id, classe_id)
+    return rattachements
+
+
+def _moyennes_par_classe(annee, periode, classe_ids):
+    """
+    {classe_id: {eleve_id: moyenne générale (Decimal)}}, chaque élève dans
+    une seule classe (voir le docstring du module).
+    """
+    matieres = referentiel.get_matieres()
+    lignes = (
+        Note.objects
+        .filter(annee_scolaire=annee, periode=periode)
+        .filter(
+            Q(eleve__classe_actuelle_id__in=classe_ids)
+            | Q(eleve__classe_actuelle__isnull=True, classe_id__in=classe_ids)
+        )
+        .values('eleve_id', 'eleve__classe_actuelle_id', 'matiere_id')
+        .annotate(
+            points=Sum(
+                F('valeur') * Value(20) / F('sur') * F('coefficient'),
+                output_field=FloatField(),
+            ),
+            poids=Sum('coefficient', output_field=FloatField()),
+        )
+        .order_by()
+    )
+    # élève → [Σ moyenne × coef. matière, Σ coef. matière]
+    cumuls = defaultdict(lambda: [0.0, 0.0])
+    classes = {}
+    for ligne in lignes:
+        classes[ligne['eleve_id']] = ligne['eleve__classe_actuelle_id']
+        poids = float(ligne['poids'] or 0)
+        if not poids:
+            continue
+        matiere = matieres.get(ligne['matiere_id'])
+        coef = float(matiere.coefficient) if matiere else 1.0
+        cumul = cumuls[ligne['eleve_id']]
+        cumul[0] += float(ligne['points']) / poids * coef
+        cumul[1] += coef
+    sortis = [eleve_id for eleve_id, classe_id in classes.items() if classe_id is None]
+    classes.update(_rattachements(annee, periode, sortis, classe_ids))
+
+    resultat = defaultdict(dict)
+    for eleve_id, (points, coefs) in cumuls.items():
+        moyenne = Decimal(points / coefs).quantize(DEUX_DECIMALES, ROUND_HALF_UP)
+        resultat[classes[eleve_id]][eleve_id] = min(moyenne, Decimal(20))
+    return resultat
+
+
+def _assiduite(annee, periode, eleve_ids):
+    """{eleve_id: (jours d'absence, jours de retard)} sur les dates de la période."""
+    debut, fin = annee.get_bornes_periode(periode)
+    if not (debut and fin and eleve_ids):
+        return {}
+    return assiduite.totaux(eleve_ids, debut, fin)
+
+
+# ─── Calcul ───────────────────────────────────────────────────────────────────
+
+def calculer_bulletins(periode, annee=None, classes=None, batch_size=1000):
+    """
+    Calcule et enregistre les bulletins de `periode` pour `classes`
+    (toutes les classes de l'année par défaut).
+
+    Les élèves inscrits dans la classe sans aucune note reçoivent un
+    bulletin non classé (moyenne et rang vides). Les appréciations déjà
+    saisies sont conservées ; une appréciation par défaut est proposée sinon.
+    """
+    from administration.models import AnneeScolaire
+    from authentication.models import EleveProfile
+
+    annee = annee or AnneeScolaire.get_annee_active()
+    if annee is None:
+        raise ValueError("Aucune année scolaire active.")
+    if classes is None:
+        classe_ids = list(referentiel.get_classe_map(annee))
+    else:
+        classe_ids = [getattr(c, 'pk', c) for c in classes]
+
+    moyennes = _moyennes_par_classe(annee, periode, classe_ids)
+    # Élèves inscrits sans note : non classés, hors des rangs et des moyennes
+    non_classes = defaultdict(list)
+    for eleve_id, classe_id in EleveProfile.objects.filter(
+        classe_actuelle_id__in=classe_ids
+    ).values_list('pk', 'classe_actuelle_id'):
+        if eleve_id not in moyennes[classe_id]:
+            non_classes[classe_id].append(eleve_id)
+
+    eleve_ids = [e for par_eleve in moyennes.values() for e in par_eleve]
+    eleve_ids += [e for par_classe in non_classes.values() for e in par_classe]
+    assiduite = _assiduite(annee, periode, eleve_ids)
+    existants = {
+        b.eleve_id: b
+        for b in Bulletin.objects.filter(
+            annee_scolaire=annee, periode=periode, eleve_id__in=eleve_ids
+        )
+    }
+
+    maintenant = timezone.now()
+    a_creer, a_modifier = [], []
+    for classe_id in set(moyennes) | set(non_classes):
+        par_eleve = moyennes[classe_id]
+        rangs = calculer_rangs(par_eleve)
+        total = len(par_eleve)
+        eleves = list(par_eleve.items()) + [(e, None) for e in non_classes[classe_id]]
+        for eleve_id, moyenne in eleves:
+            absences, retards = assiduite.get(eleve_id, (0, 0))
+            valeurs = {
+                'classe_id': classe_id,
+                'moyenne_generale': moyenne,
+                'rang': rangs.get(eleve_id),
+                'total_eleves': total,
+                'total_absences': absences,
+                'total_retards': retards,
+            }
+            bulletin = existants.get(eleve_id)
+            if bulletin is None:
+                a_creer.append(Bulletin(
+                    eleve_id=eleve_id,
+                    annee_scolaire=annee,
+                    periode=periode,
+                    appreciation_generale=appreciation_par_defaut(moyenne),
+                    **valeurs,
+                ))
+                continue
+            for champ, valeur in valeurs.items():
+                setattr(bulletin, champ, valeur)
+            # bulk_update ne déclenche pas auto_now
+            bulletin.updated_at = maintenant
+            # Une appréciation par défaut suit le passage classé ↔ non classé
+            texte = bulletin.appreciation_generale
+            if not texte or (texte in TEXTES_PAR_DEFAUT and (texte == NON_CLASSE) != (moyenne is None)):
+                bulletin.appreciation_generale = appreciation_par_defaut(moyenne)
+            a_modifier.append(bulletin)
+
+    with transaction.atomic():
+        Bulletin.objects.bulk_create(a_creer, batch_size=batch_size)
+        Bulletin.objects.bulk_update(
+            a_modifier,
+            ['classe', 'moyenne_generale', 'rang', 'total_eleves',
+             'total_absences', 'total_retards', 'appreciation_generale', 'updated_at'],
+            batch_size=batch_size,
+        )
+    return {
+        'classes': len(moyennes),
+        'crees': len(a_creer),
+        'mis_a_jour': len(a_modifier),
+    }
@@ -0,0 +1,436 @@
+"""
+Rendu PDF des bulletins, en parallèle par classe.
+
+- Une classe = une tâche : ses données sont chargées en trois requêtes
+  (bulletins + élèves, moyennes par matière), puis chaque bulletin est rendu
+  et écrit directement dans le stockage (`Bulletin.fichier_pdf`).
+- Les tâches sont réparties sur un pool de processus (`generer_pdfs`) ou
+  sur les workers Celery (`pedagogie.tasks.generer_pdfs_periode`).
+- Chaque processus construit une seule fois son `RenduBulletin` (polices
+  enregistrées, styles et gabarit de tableau) et le réutilise pour toutes
+  ses classes.
+- L'avancement de chaque classe est publié dans le cache partagé
+  (`progression()`).
+- Chaque PDF est associé à l'empreinte SHA-256 de ses données, de la
+  version du gabarit et de la police (`Bulletin.empreinte_pdf`) : un
+  bulletin dont l'empreinte n'a pas changé garde son fichier et n'est pas
+  re-rendu.
+- Les nouveaux fichiers sont écrits sous de nouveaux noms ; les anciens ne
+  sont supprimés qu'après la validation de la transaction qui enregistre
+  les nouveaux. Si le rendu ou l'enregistrement échoue, les fichiers déjà
+  écrits sont supprimés : le stockage ne garde pas de fichiers orphelins.
+
+reportlab est importé à la demande : le reste de l'app n'en dépend pas.
+"""
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+from collections import defaultdict
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F, FloatField, Sum, Value
+from django.utils import timezone
+from django.utils.text import slugify
+
+from ..models import Bulletin, Note
+from .. import referentiel
+
+logger = logging.getLogger('pedagogie')
+
+PROGRESSION_TIMEOUT = 60 * 60 * 24
+# À incrémenter à chaque modification de la mise en page : tous les
+# bulletins deviennent obsolètes.
+GABARIT_VERSION = 1
+
+
+# ─── Rendu ────────────────────────────────────────────────────────────────────
+
+def _nombre(valeur):
+    return '-' if valeur is None else f'{valeur:.2f}'
+
+
+def cellules_matiere(m):
+    """Ligne du tableau des matières, telle qu'imprimée."""
+    return [
+        m['nom'],
+        f"{m['coefficient']:g}",
+        _nombre(m['moyenne']),
+        _nombre(m['moyenne_classe']),
+        f"{m['min']:.1f} / {m['max']:.1f}",
+        _nombre(m['moyenne'] * m['coefficient']),
+    ]
+
+
+class RenduBulletin:
+    """
+    Moteur de rendu d'un processus. Polices, styles et gabarits sont
+    préparés dans __init__ ; `rendre()` ne fait plus que la mise en page.
+    """
+
+    def __init__(self, etablissement=None, police=None):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4
+        from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+        from reportlab.lib.units import cm
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.ttfonts import TTFont
+        from reportlab import platypus
+
+        self.platypus = platypus
+        self.pagesize = A4
+        self.marge = 1.5 * cm
+        self.etablissement = etablissement or settings.BULLETIN_ETABLISSEMENT
+
+        police = police or settings.BULLETIN_POLICE
+        self.police, self.police_grasse = 'Helvetica', 'Helvetica-Bold'
+        if police:
+            pdfmetrics.registerFont(TTFont('BulletinPolice', police))
+            self.police = self.police_grasse = 'BulletinPolice'
+
+        base = getSampleStyleSheet()
+        self.styles = {
+            'titre': ParagraphStyle(
+                'titre', parent=base['Title'], fontName=self.police_grasse, fontSize=16,
+            ),
+            'entete': ParagraphStyle(
+                'entete', parent=base['Normal'], fontName=self.police, fontSize=10, leading=14,
+            ),
+            'texte': ParagraphStyle(
+                'texte', parent=base['Normal'], fontName=self.police, fontSize=10, leading=13,
+            ),
+        }
+        self.largeurs = [6.5 * cm, 1.6 * cm, 2.4 * cm, 2.4 * cm, 2.4 * cm, 2.4 * cm]
+        self.style_tableau = platypus.TableStyle([
+            ('FONTNAME', (0, 0), (-1, -1), self.police),
+            ('FONTNAME', (0, 0), (-1, 0), self.police_grasse),
+            ('FONTNAME', (0, -1), (-1, -1), self.police_grasse),
+            ('FONTSIZE', (0, 0), (-1, -1), 9),
+            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dfe7f2')),
+            ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+            ('ALIGN', (1, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+        ])
+        self.espace = platypus.Spacer(1, 0.4 * cm)
+
+    def rendre(self, donnees):
+        """`donnees` : dictionnaire produit par `charger_classe`. Retourne les octets du PDF."""
+        p = self.platypus
+        styles = self.styles
+        lignes = [['Matière', 'Coef.', 'Moyenne', 'Moy. classe', 'Min / Max', 'Points']]
+        for m in donnees['matieres']:
+            lignes.append(cellules_matiere(m))
+        lignes.append(['Moyenne générale', '', donnees['moyenne_generale'], '', '', ''])
+
+        histoire = [
+            p.Paragraph(escape(self.etablissement), styles['titre']),
+            p.Paragraph(
+                f"Bulletin {donnees['periode_libelle']} — Année {donnees['annee']}",
+                styles['entete'],
+            ),
+            p.Paragraph(
+                f"<b>{escape(donnees['nom'])}</b> — Matricule {escape(donnees['matricule'])} — "
+                f"Classe {escape(donnees['classe'])}",
+                styles['entete'],
+            ),
+            self.espace,
+            p.Table(lignes, colWidths=self.largeurs, style=self.style_tableau, repeatRows=1),
+            self.espace,
+            p.Paragraph(
+                f"Rang : <b>{donnees['rang'] or 'non classé'}</b> / {donnees['total_eleves']} — "
+                f"Absences : {donnees['total_absences']} — Retards : {donnees['total_retards']}",
+                styles['texte'],
+            ),
+            self.espace,
+            p.Paragraph(
+                f"<b>Appréciation :</b> {escape(donnees['appreciation_generale'])}",
+                styles['texte'],
+            ),
+        ]
+        if donnees['appreciation_prof_principal']:
+            histoire.append(p.Paragraph(
+                f"<b>Professeur principal :</b> {escape(donnees['appreciation_prof_principal'])}",
+                styles['texte'],
+            ))
+        if donnees['appreciation_directeur']:
+            histoire.append(p.Paragraph(
+                f"<b>Direction :</b> {escape(donnees['appreciation_directeur'])}", styles['texte'],
+            ))
+
+        buffer = io.BytesIO()
+        doc = p.SimpleDocTemplate(
+            buffer, pagesize=self.pagesize,
+            leftMargin=self.marge, rightMargin=self.marge,
+            topMargin=self.marge, bottomMargin=self.marge,
+            title=f"Bulletin {donnees['matricule']} {donnees['periode']}",
+            invariant=1,
+        )
+        doc.build(histoire)
+        return buffer.getvalue()
+
+
+_rendu = None
+
+
+def get_rendu():
+    """Moteur de rendu du processus courant (créé au premier appel)."""
+    global _rendu
+    if _rendu is None:
+        _rendu = RenduBulletin()
+    return _rendu
+
+
+# ─── Données ──────────────────────────────────────────────────────────────────
+
+def charger_classe(classe_id, periode, annee_id):
+    """
+    Bulletins d'une classe avec tout ce qu'il faut pour les rendre.
+    Retourne [(bulletin, donnees)].
+    """
+    classe = referentiel.get_classe(classe_id)
+    matieres = referentiel.get_matieres()
+    bulletins = list(
+        Bulletin.objects
+        .filter(classe_id=classe_id, periode=periode, annee_scolaire_id=annee_id)
+        .select_related('eleve__user')
+        .order_by(F('rang').asc(nulls_last=True), 'eleve__matricule')
+    )
+    if not bulletins:
+        return []
+
+    moyennes = defaultdict(dict)      # eleve_id → {matiere_id: moyenne}
+    par_matiere = defaultdict(list)   # matiere_id → [moyennes de la classe]
+    for ligne in (
+        Note.objects
+        .filter(classe_id=classe_id, periode=periode, annee_scolaire_id=annee_id)
+        .values('eleve_id', 'matiere_id')
+        .annotate(
+            points=Sum(
+                F('valeur') * Value(20) / F('sur') * F('coefficient'),
+                output_field=FloatField(),
+            ),
+            poids=Sum('coefficient', output_field=FloatField()),
+        )
+        .order_by()
+    ):
+        if ligne['poids']:
+            moyenne = float(ligne['points']) / float(ligne['poids'])
+            moyennes[ligne['eleve_id']][ligne['matiere_id']] = moyenne
+            par_matiere[ligne['matiere_id']].append(moyenne)
+
+    stats = {
+        matiere_id: (sum(valeurs) / len(valeurs), min(valeurs), max(valeurs))
+        for matiere_id, valeurs in par_matiere.items()
+    }
+    ordre = sorted(stats, key=lambda pk: matieres[pk].nom if pk in matieres else '')
+    periode_libelle = Note.PeriodeChoices(periode).label
+    annee = classe.annee_scolaire.nom if classe else ''
+
+    resultat = []
+    for bulletin in bulletins:
+        eleve = bulletin.eleve
+        notes = moyennes.get(bulletin.eleve_id, {})
+        resultat.append((bulletin, {
+            'nom': eleve.user.get_full_name() or eleve.user.username,
+            'matricule': eleve.matricule,
+            'classe': classe.nom if classe else '',
+            'annee': annee,
+            'periode': periode,
+            'periode_libelle': str(periode_libelle),
+            'matieres': [
+                {
+                    'nom': matieres[pk].nom,
+                    'coefficient': float(matieres[pk].coefficient),
+                    'moyenne': notes[pk],
+                    'moyenne_classe': stats[pk][0],
+                    'min': stats[pk][1],
+                    'max': stats[pk][2],
+                }
+                for pk in ordre if pk in notes and pk in matieres
+            ],
+            'moyenne_generale': _nombre(bulletin.moyenne_generale),
+            'rang': bulletin.rang,
+            'total_eleves': bulletin.total_eleves,
+            'total_absences': bulletin.total_absences,
+            'total_retards': bulletin.total_retards,
+            'appreciation_generale': bulletin.appreciation_generale,
+            'appreciation_prof_principal': bulletin.appreciation_prof_principal,
+            'appreciation_directeur': bulletin.appreciation_directeur,
+        }))
+    return resultat
+
+
+def empreinte(donnees):
+    """
+    SHA-256 des données d'un bulletin, du gabarit, de l'établissement et de
+    la police.
+    Les matières sont prises telles qu'imprimées (valeurs arrondies) : une
+    correction de note qui ne change pas les statistiques de classe affichées
+    ne rend pas obsolètes les bulletins des autres élèves.
+    """
+    imprime = {**donnees, 'matieres': [cellules_matiere(m) for m in donnees['matieres']]}
+    contenu = json.dumps(
+        [GABARIT_VERSION, settings.BULLETIN_ETABLISSEMENT, settings.BULLETIN_POLICE, imprime],
+        sort_keys=True, default=str, separators=(',', ':'),
+    )
+    return hashlib.sha256(contenu.encode('utf-8')).hexdigest()
+
+
+def est_a_jour(bulletin, empreinte_donnees):
+    return bool(bulletin.fichier_pdf) and bulletin.empreinte_pdf == empreinte_donnees
+
+
+def nom_fichier(bulletin, donnees):
+    return f"bulletin_{bulletin.periode}_{slugify(donnees['matricule'])}.pdf"
+
+
+def _supprimer_fichiers(noms):
+    stockage = Bulletin._meta.get_field('fichier_pdf').storage
+    for nom in noms:
+        stockage.delete(nom)
+
+
+# ─── Progression ──────────────────────────────────────────────────────────────
+
+def _cle_progression(annee_id, periode, classe_id):
+    return f'bulletins_pdf:{annee_id}:{periode}:{classe_id}'
+
+
+def _publier(annee_id, periode, classe_id, **etat):
+    cache.set(_cle_progression(annee_id, periode, classe_id), etat, PROGRESSION_TIMEOUT)
+
+
+def progression(periode, annee_id, classe_ids):
+    """{classe_id: {'statut', 'faits', 'total'}} pour un suivi en direct."""
+    cles = {_cle_progression(annee_id, periode, pk): pk for pk in classe_ids}
+    etats = cache.get_many(list(cles))
+    return {
+        pk: etats.get(cle, {'statut': 'en_attente', 'faits': 0, 'total': None})
+        for cle, pk in cles.items()
+    }
+
+
+# ─── Génération ───────────────────────────────────────────────────────────────
+
+def generer_pdfs_classe(classe_id, periode, annee_id, forcer=False, bulletin_ids=None):
+    """
+    Rend et enregistre les PDF obsolètes d'une classe (tous si `forcer`),
+    éventuellement limités à `bulletin_ids`. Retourne un résumé.
+    """
+    start = time.perf_counter()
+    rendu = get_rendu()
+    elements = charger_classe(classe_id, periode, annee_id)
+    if bulletin_ids is not None:
+        bulletin_ids = set(bulletin_ids)
+        elements = [(b, d) for b, d in elements if b.pk in bulletin_ids]
+    total = len(elements)
+    _publier(annee_id, periode, classe_id, statut='en_cours', faits=0, total=total)
+
+    maintenant = timezone.now()
+    bulletins, nouveaux, anciens = [], [], []
+    try:
+        for i, (bulletin, donnees) in enumerate(elements, start=1):
+            cle = empreinte(donnees)
+            if forcer or not est_a_jour(bulletin, cle):
+                pdf = rendu.rendre(donnees)
+                if bulletin.fichier_pdf:
+                    anciens.append(bulletin.fichier_pdf.name)
+                # Nouveau nom tant que l'ancien fichier existe (get_available_name)
+                bulletin.fichier_pdf.save(nom_fichier(bulletin, donnees), ContentFile(pdf), save=False)
+                nouveaux.append(bulletin.fichier_pdf.name)
+                bulletin.empreinte_pdf = cle
+                bulletin.updated_at = maintenant
+                bulletins.append(bulletin)
+            if i % 10 == 0:
+                _publier(annee_id, periode, classe_id, statut='en_cours', faits=i, total=total)
+
+        with transaction.atomic():
+            Bulletin.objects.bulk_update(bulletins, ['fichier_pdf', 'empreinte_pdf', 'updated_at'])
+            transaction.on_commit(lambda: _supprimer_fichiers(anciens))
+    except Exception:
+        _supprimer_fichiers(nouveaux)
+        _publier(annee_id, periode, classe_id, statut='echec', faits=0, total=total)
+        raise
+    _publier(annee_id, periode, classe_id, statut='termine', faits=total, total=total)
+    return {
+        'classe': classe_id,
+        'total': total,
+        'pdfs': len(bulletins),
+        'inchanges': total - len(bulletins),
+        'secondes': round(time.perf_counter() - start, 3),
+    }
+
+
+def _tache(args):
+    try:
+        return generer_pdfs_classe(*args)
+    finally:
+        connections.close_all()
+
+
+def _init_processus():
+    # Connexions propres au processus ; moteur de rendu créé une seule fois
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+    get_rendu()
+
+
+def generer_pdfs(periode, annee=None, classes=None, workers=None, forcer=False):
+    """
+    Rend les bulletins obsolètes de `periode` pour `classes` (toutes par
+    défaut), une classe par tâche, sur `workers` processus.
+    """
+    from administration.models import AnneeScolaire
+
+    annee = annee or AnneeScolaire.get_annee_active()
+    if annee is None:
+        raise ValueError("Aucune année scolaire active.")
+    if classes is None:
+        classe_ids = list(referentiel.get_classe_map(annee))
+    else:
+        classe_ids = [getattr(c, 'pk', c) for c in classes]
+
+    for pk in classe_ids:
+        _publier(annee.pk, periode, pk, statut='en_attente', faits=0, total=None)
+    taches = [(pk, periode, annee.pk, forcer) for pk in classe_ids]
+    workers = workers or min(len(taches), os.cpu_count() or 1) or 1
+
+    start = time.perf_counter()
+    if workers > 1:
+        # Les connexions ouvertes ne doivent pas être partagées avec les processus fils
+        connections.close_all()
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        ctx = multiprocessing.get_context(method)
+        with ctx.Pool(workers, initializer=_init_processus) as pool:
+            resultats = []
+            for resultat in pool.imap_unordered(_tache, taches):
+                # Le cache local (LocMem) n'est pas partagé avec les fils
+                _publier(annee.pk, periode, resultat['classe'], statut='termine',
+                         faits=resultat['total'], total=resultat['total'])
+                resultats.append(resultat)
+    else:
+        resultats = [generer_pdfs_classe(*tache) for tache in taches]
+    duree = time.perf_counter() - start
+
+    pdfs = sum(r['pdfs'] for r in resultats)
+    inchanges = sum(r['inchanges'] for r in resultats)
+    logger.info('%s bulletins PDF générés (%s inchangés) en %.1fs (%s processus)',
+                pdfs, inchanges, duree, workers)
+    return {
+        'classes': len(resultats),
+        'pdfs': pdfs,
+        'inchanges': inchanges,
+        'secondes': round(duree, 3),
+        'processus': workers,
+        'pdfs_par_minute_par_coeur': round(pdfs / duree * 60 / workers, 1) if duree else 0.0,
+    }
@@ -0,0 +1,147 @@
+"""
+Disponibilité des salles depuis une grille d'occupation en mémoire.
+
+La grille associe à chaque (salle, jour) un entier dont le bit i vaut 1 si
+la salle est occupée pendant la i-ème tranche de PAS minutes de la journée.
+Tester une salle sur un créneau revient à un ET binaire ; une recherche sur
+tout l'établissement ne lit pas la base.
+
+La grille du processus est actualisée à chaque lecture à partir des
+versions de cache des agendas (services.agenda) : seules les salles dont
+l'agenda a changé sont rechargées (une requête), la grille entière
+seulement après une invalidation globale (génération, données de référence).
+
+    salles_libres('LUN', time(10), time(12), type_salle='LABO', capacite_min=30)
+    creneaux_libres(salle_id)          # {jour: [(début, fin), ...]} de la semaine
+"""
+import threading
+from datetime import time
+
+from core.cache import get_versions
+
+from ..models import EmploiDuTemps
+from .. import referentiel
+from . import agenda
+from .emploi_du_temps import minutes
+from .generation import grille
+
+PAS = 5                         # minutes par bit
+EQUIPEMENTS = ('a_projecteur', 'a_climatisation', 'a_tableau_numerique')
+
+
+def masque(debut, fin):
+    """Bits des tranches recouvertes par [debut, fin[ (en minutes), arrondi vers l'extérieur."""
+    premier, dernier = debut // PAS, -(-fin // PAS)
+    return ((1 << dernier) - 1) ^ ((1 << premier) - 1)
+
+
+def _heure(minutes_):
+    return time(minutes_ // 60, minutes_ % 60)
+
+
+class GrilleOccupation:
+    """{salle_id: {jour: bits}} des créneaux de l'année active."""
+
+    def __init__(self):
+        self._occupation = {}
+        self._versions = {}
+        self._version_globale = None
+        self._lock = threading.Lock()
+
+    def _charger(self, salle_ids=None):
+        from administration.models import AnneeScolaire
+
+        annee = AnneeScolaire.get_annee_active()
+        creneaux = EmploiDuTemps.objects.filter(
+            salle__isnull=False, classe__annee_scolaire=annee,
+        )
+        if salle_ids is not None:
+            creneaux = creneaux.filter(salle_id__in=salle_ids)
+        occupation = {pk: {} for pk in salle_ids} if salle_ids is not None else {}
+        for salle_id, jour, debut, fin in creneaux.values_list(
+            'salle_id', 'jour', 'heure_debut', 'heure_fin'
+        ):
+            jours = occupation.setdefault(salle_id, {})
+            jours[jour] = jours.get(jour, 0) | masque(minutes(debut), minutes(fin))
+        return occupation
+
+    def actualiser(self):
+        """Recharge ce qui a changé depuis la dernière lecture ; une lecture groupée du cache."""
+        espaces = {agenda.namespace('salle', pk): pk for pk in referentiel.get_salles()}
+        # Versions lues avant les données : une écriture concurrente
+        # provoquera un rechargement de plus, jamais une grille périmée.
+        versions = get_versions([agenda.NAMESPACE_GLOBAL, *espaces])
+        with self._lock:
+            if versions[agenda.NAMESPACE_GLOBAL] != self._version_globale:
+                self._occupation = self._charger()
+                self._version_globale = versions[agenda.NAMESPACE_GLOBAL]
+                self._versions = {pk: versions[espace] for espace, pk in espaces.items()}
+                return
+            modifiees = [
+                pk for espace, pk in espaces.items() if self._versions.get(pk) != versions[espace]
+            ]
+            if modifiees:
+                self._occupation.update(self._charger(modifiees))
+                self._versions.update({pk: versions[agenda.namespace('salle', pk)] for pk in modifiees})
+
+    def occupation(self, salle_id, jour):
+        return self._occupation.get(salle_id, {}).get(jour, 0)
+
+
+_grille = GrilleOccupation()
+
+
+def get_grille():
+    _grille.actualiser()
+    return _grille
+
+
+# ─── Recherche ────────────────────────────────────────────────────────────────
+
+def salles_libres(jour, debut, fin, type_salle=None, capacite_min=0, equipements=()):
+    """Salles actives libres sur [debut, fin[ le `jour`, par capacité croissante."""
+    occupation = get_grille()
+    demande = masque(minutes(debut), minutes(fin))
+    libres = [
+        salle for pk, salle in referentiel.get_salles().items()
+        if salle.is_active
+        and (not type_salle or salle.type_salle == type_salle)
+        and salle.capacite >= capacite_min
+        and all(getattr(salle, equipement) for equipement in equipements)
+        and not occupation.occupation(pk, jour) & demande
+    ]
+    return sorted(libres, key=lambda s: (s.capacite, s.numero))
+
+
+def _plages_libres(bits, debut, fin):
+    """Suites de tranches libres dans [debut, fin[ (minutes) : [(début, fin)]."""
+    plages, depart = [], None
+    for tranche in range(debut // PAS, -(-fin // PAS)):
+        occupee = bits >> tranche & 1
+        if not occupee and depart is None:
+            depart = tranche
+        elif occupee and depart is not None:
+            plages.append((depart * PAS, tranche * PAS))
+            depart = None
+    if depart is not None:
+        plages.append((depart * PAS, fin))
+    return plages
+
+
+def creneaux_libres(salle_id, jours=None, duree_min=0):
+    """
+    {jour: [(début, fin)]} des plages libres de la salle pendant les
+    demi-journées de cours (EMPLOI_DU_TEMPS_PLAGES), d'au moins `duree_min` minutes.
+    """
+    occupation = get_grille()
+    jours_grille, plages = grille()
+    resultat = {}
+    for jour in jours or jours_grille:
+        bits = occupation.occupation(salle_id, jour)
+        resultat[jour] = [
+            (_heure(debut), _heure(fin))
+            for plage_debut, plage_fin in plages
+            for debut, fin in _plages_libres(bits, plage_debut * 60, plage_fin * 60)
+            if fin - debut >= duree_min
+        ]
+    return resultat
@@ -0,0 +1,122 @@
+"""
+Compteur dénormalisé des effectifs de classe (Classe.effectif).
+
+Le compteur suit EleveProfile.classe_actuelle ; il n'est modifié que par
+des UPDATE atomiques (F()), jamais par Classe.save() :
+
+    entrer(classe_id)             → +1 si une place reste (UPDATE conditionnel)
+    sortir(classe_id)             → -1
+    deplacer(ancienne, nouvelle)  → les deux dans la transaction courante
+
+Le test de capacité et l'incrément sont une seule requête
+`UPDATE ... SET effectif = effectif + 1 WHERE effectif < capacite_max` :
+deux inscriptions simultanées ne peuvent pas dépasser capacite_max, la
+seconde attend le verrou de ligne puis réévalue la condition.
+
+Les écritures unitaires passent par les signaux (pedagogie.signals) ; les
+écritures en masse (bulk_create, update) appellent `reconcilier()`. Chaque
+modification du compteur invalide le référentiel des classes (ces UPDATE
+n'envoient pas post_save), dont les instances portent l'effectif.
+`verifier_place()` est le contrôle des formulaires et serializers (clean,
+validate) : il donne une erreur de champ avant l'écriture, l'UPDATE
+conditionnel reste la garde contre les inscriptions simultanées.
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.translation import gettext as _
+
+from ..models import Classe
+from .. import referentiel
+
+
+class ClasseComplete(ValidationError):
+    def __init__(self, classe_id):
+        classe = Classe.objects.filter(pk=classe_id).values_list('nom', 'capacite_max').first()
+        nom, capacite = classe or (classe_id, '?')
+        super().__init__(
+            _('La classe %(nom)s est complète (%(capacite)s élèves).'),
+            code='classe_complete',
+            params={'nom': nom, 'capacite': capacite},
+        )
+        self.classe_id = classe_id
+
+
+def entrer(classe_id, verifier_capacite=True):
+    """Réserve une place ; lève ClasseComplete si la classe est pleine."""
+    classes = Classe.objects.filter(pk=classe_id)
+    if verifier_capacite:
+        classes = classes.filter(effectif__lt=F('capacite_max'))
+    if not classes.update(effectif=F('effectif') + 1, updated_at=timezone.now()):
+        raise ClasseComplete(classe_id)
+    referentiel.invalidate('classe')
+
+
+def verifier_place(classe_id, ancienne_id=None):
+    """Lève ClasseComplete si l'élève (venant de `ancienne_id`) ne peut entrer dans `classe_id`."""
+    if classe_id is None or classe_id == ancienne_id:
+        return
+    if not Classe.objects.filter(pk=classe_id, effectif__lt=F('capacite_max')).exists():
+        raise ClasseComplete(classe_id)
+
+
+def sortir(classe_id):
+    if Classe.objects.filter(pk=classe_id, effectif__gt=0).update(
+        effectif=F('effectif') - 1, updated_at=timezone.now(),
+    ):
+        referentiel.invalidate('classe')
+
+
+def deplacer(ancienne_id, nouvelle_id, verifier_capacite=True):
+    """Élève passé de `ancienne_id` à `nouvelle_id` (l'une ou l'autre peut être None)."""
+    if ancienne_id == nouvelle_id:
+        return
+    with transaction.atomic():
+        if nouvelle_id is not None:
+            entrer(nouvelle_id, verifier_capacite=verifier_capacite)
+        if ancienne_id is not None:
+            sortir(ancienne_id)
+
+
+def affecter(eleve, classe, verifier_capacite=True):
+    """
+    Place un élève dans une classe (None pour l'en retirer) en respectant
+    la capacité. Lève ClasseComplete sans rien modifier si la classe est pleine.
+    """
+    classe_id = getattr(classe, 'pk', classe)
+    eleve._verifier_capacite = verifier_capacite
+    try:
+        eleve.classe_actuelle_id = classe_id
+        eleve.save(update_fields=['classe_actuelle', 'updated_at'])
+    finally:
+        del eleve._verifier_capacite
+
+
+def reconcilier(classes=None, dry_run=False):
+    """
+    Recompte les élèves (une requête GROUP BY) et corrige les compteurs
+    divergents par un UPDATE qui recompte lui-même : un déplacement
+    concurrent n'est pas perdu. Retourne [(classe_id, compteur, effectif réel)].
+    """
+    from authentication.models import EleveProfile
+
+    queryset = Classe.objects.avec_effectif_reel()
+    if classes is not None:
+        queryset = queryset.filter(pk__in=[getattr(c, 'pk', c) for c in classes])
+    ecarts = [
+        (pk, effectif, reel)
+        for pk, effectif, reel in queryset.values_list('pk', 'effectif', 'effectif_reel')
+        if effectif != reel
+    ]
+    if ecarts and not dry_run:
+        compte = (
+            EleveProfile.objects.filter(classe_actuelle=OuterRef('pk'))
+            .order_by().values('classe_actuelle').annotate(n=Count('pk')).values('n')
+        )
+        Classe.objects.filter(pk__in=[pk for pk, _e, _r in ecarts]).update(
+            effectif=Coalesce(Subquery(compte), 0), updated_at=timezone.now(),
+        )
+        referentiel.invalidate('classe')
+    return ecarts
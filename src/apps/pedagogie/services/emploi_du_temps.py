@@ -0,0 +1,295 @@
+"""
+Détection des conflits d'emploi du temps.
+
+Un créneau occupe trois ressources : sa classe, son enseignant et sa salle.
+Deux créneaux du même jour qui partagent une ressource ne doivent pas se
+chevaucher. Les intervalles sont semi-ouverts : 08:00-10:00 puis
+10:00-12:00 ne sont pas en conflit.
+
+    detecter_conflits(creneaux) → tous les chevauchements, par balayage
+                                  trié : O(n log n + k) pour k conflits
+    Planning                    → index (ressource, id, jour) trié par début,
+                                  test d'un créneau en O(log n + k)
+    conflits_creneau(instance)  → vérification d'une édition (EmploiDuTemps.clean)
+    valider_lot(instances)      → vérification d'un import en un seul passage
+
+Les heures sont manipulées en minutes depuis minuit.
+"""
+from bisect import bisect_left
+from collections import defaultdict
+from typing import NamedTuple, Optional
+
+from django.db.models import Q
+from django.utils.translation import gettext as _
+
+from ..models import EmploiDuTemps
+from .. import referentiel
+
+RESSOURCES = (
+    ('classe', 'classe_id'),
+    ('enseignant', 'enseignant_id'),
+    ('salle', 'salle_id'),
+)
+CHAMPS = (
+    'id', 'classe_id', 'matiere_id', 'enseignant_id', 'salle_id',
+    'jour', 'heure_debut', 'heure_fin',
+)
+
+
+def minutes(heure):
+    return heure.hour * 60 + heure.minute
+
+
+def format_heure(minutes_):
+    return f'{minutes_ // 60:02d}:{minutes_ % 60:02d}'
+
+
+class Creneau(NamedTuple):
+    """Créneau réduit aux champs utiles à la détection (heures en minutes)."""
+    id: Optional[int]
+    classe_id: int
+    matiere_id: int
+    enseignant_id: int
+    salle_id: Optional[int]
+    jour: str
+    debut: int
+    fin: int
+    # Position dans un lot importé (None pour un créneau déjà en base)
+    ligne: Optional[int] = None
+
+    @classmethod
+    def depuis_ligne(cls, ligne):
+        """Depuis un tuple values_list(*CHAMPS)."""
+        *ids, jour, debut, fin = ligne
+        return cls(*ids, jour, minutes(debut), minutes(fin))
+
+    @classmethod
+    def depuis_instance(cls, creneau, ligne=None):
+        return cls(
+            creneau.pk, creneau.classe_id, creneau.matiere_id, creneau.enseignant_id,
+            creneau.salle_id, creneau.jour,
+            minutes(creneau.heure_debut), minutes(creneau.heure_fin), ligne,
+        )
+
+    def meme_creneau(self, autre):
+        if self.ligne is not None or autre.ligne is not None:
+            return self.ligne == autre.ligne and self.id == autre.id
+        return self.id is not None and self.id == autre.id
+
+
+class Conflit(NamedTuple):
+    ressource: str          # 'classe', 'enseignant' ou 'salle'
+    ressource_id: int
+    jour: str
+    a: Creneau
+    b: Creneau
+
+    def message(self, creneau=None):
+        """Description du conflit vue depuis `creneau` (par défaut a)."""
+        autre = self.b if creneau is None or creneau.meme_creneau(self.a) else self.a
+        if autre.ligne is not None:
+            reference = _('la ligne %(ligne)s') % {'ligne': autre.ligne + 1}
+        else:
+            reference = _('le créneau #%(id)s') % {'id': autre.id}
+        return _(
+            'Chevauchement (%(ressource)s) avec %(reference)s : %(jour)s %(debut)s-%(fin)s'
+        ) % {
+            'ressource': _libelle(self.ressource, self.ressource_id),
+            'reference': reference,
+            'jour': autre.jour,
+            'debut': format_heure(autre.debut),
+            'fin': format_heure(autre.fin),
+        }
+
+
+def _libelle(ressource, ressource_id):
+    if ressource == 'classe':
+        objet = referentiel.get_classe(ressource_id)
+        return _('classe %(nom)s') % {'nom': objet.nom if objet else ressource_id}
+    if ressource == 'salle':
+        objet = referentiel.get_salle(ressource_id)
+        return _('salle %(numero)s') % {'numero': objet.numero if objet else ressource_id}
+    return _('enseignant')
+
+
+def _cles(creneau):
+    for ressource, attribut in RESSOURCES:
+        ressource_id = getattr(creneau, attribut)
+        if ressource_id is not None:
+            yield ressource, ressource_id, creneau.jour
+
+
+# ─── Détection globale ────────────────────────────────────────────────────────
+
+def detecter_conflits(creneaux):
+    """
+    Tous les chevauchements entre `creneaux` : regroupement par
+    (ressource, id, jour), tri par heure de début puis balayage en ne
+    gardant que les créneaux encore en cours.
+    """
+    groupes = defaultdict(list)
+    for creneau in creneaux:
+        for cle in _cles(creneau):
+            groupes[cle].append(creneau)
+
+    conflits = []
+    for (ressource, ressource_id, jour), liste in groupes.items():
+        liste.sort(key=lambda c: (c.debut, c.fin))
+        en_cours = []
+        for creneau in liste:
+            en_cours = [c for c in en_cours if c.fin > creneau.debut]
+            conflits.extend(
+                Conflit(ressource, ressource_id, jour, c, creneau) for c in en_cours
+            )
+            en_cours.append(creneau)
+    return conflits
+
+
+# ─── Index pour les vérifications unitaires ───────────────────────────────────
+
+class Planning:
+    """
+    Occupation des ressources, triée par heure de début pour chaque
+    (ressource, id, jour). Les créneaux qui chevauchent [debut, fin[ sont
+    ceux qui commencent avant `fin` et au plus `duree_max` minutes avant
+    `debut` : une recherche dichotomique suivie d'un court parcours.
+    """
+
+    def __init__(self, creneaux=()):
+        self._debuts = defaultdict(list)
+        self._creneaux = defaultdict(list)
+        self._duree_max = defaultdict(int)
+        for creneau in creneaux:
+            self.ajouter(creneau)
+
+    def ajouter(self, creneau):
+        for cle in _cles(creneau):
+            debuts = self._debuts[cle]
+            position = bisect_left(debuts, creneau.debut)
+            debuts.insert(position, creneau.debut)
+            self._creneaux[cle].insert(position, creneau)
+            self._duree_max[cle] = max(self._duree_max[cle], creneau.fin - creneau.debut)
+
+    def retirer(self, creneau):
+        for cle in _cles(creneau):
+            liste = self._creneaux[cle]
+            for position, existant in enumerate(liste):
+                if existant.meme_creneau(creneau):
+                    del liste[position]
+                    del self._debuts[cle][position]
+                    break
+
+    def occupants(self, ressource, ressource_id, jour, debut, fin):
+        """Créneaux de la ressource qui chevauchent [debut, fin[."""
+        cle = (ressource, ressource_id, jour)
+        debuts = self._debuts.get(cle)
+        if not debuts:
+            return []
+        liste = self._creneaux[cle]
+        limite = debut - self._duree_max[cle]
+        trouves = []
+        position = bisect_left(debuts, fin) - 1
+        while position >= 0 and debuts[position] > limite:
+            if liste[position].fin > debut:
+                trouves.append(liste[position])
+            position -= 1
+        return trouves
+
+    def est_libre(self, ressource, ressource_id, jour, debut, fin):
+        return not self.occupants(ressource, ressource_id, jour, debut, fin)
+
+    def conflits(self, creneau):
+        """Conflits entre `creneau` et les créneaux indexés (hors lui-même)."""
+        return [
+            Conflit(ressource, ressource_id, jour, creneau, autre)
+            for ressource, ressource_id, jour in _cles(creneau)
+            for autre in self.occupants(ressource, ressource_id, jour, creneau.debut, creneau.fin)
+            if not autre.meme_creneau(creneau)
+        ]
+
+
+# ─── Chargement ───────────────────────────────────────────────────────────────
+
+def _annee_id(annee):
+    if annee is None:
+        from administration.models import AnneeScolaire
+        annee = AnneeScolaire.get_annee_active()
+    return getattr(annee, 'pk', annee)
+
+
+def creneaux_semaine(annee=None, queryset=None):
+    """Créneaux de la semaine type d'une année (active par défaut), en une requête."""
+    queryset = EmploiDuTemps.objects.all() if queryset is None else queryset
+    return [
+        Creneau.depuis_ligne(ligne)
+        for ligne in queryset.filter(
+            classe__annee_scolaire_id=_annee_id(annee)
+        ).values_list(*CHAMPS)
+    ]
+
+
+def charger_planning(annee=None):
+    return Planning(creneaux_semaine(annee))
+
+
+def conflits_annee(annee=None):
+    return detecter_conflits(creneaux_semaine(annee))
+
+
+# ─── Validation ───────────────────────────────────────────────────────────────
+
+def conflits_creneau(instance):
+    """
+    Conflits d'un créneau (enregistré ou non) avec la base : une requête
+    sur les seuls créneaux du même jour qui partagent une de ses ressources.
+    """
+    creneau = Creneau.depuis_instance(instance)
+    classe = referentiel.get_classe(creneau.classe_id)
+    ressources = Q(classe_id=creneau.classe_id) | Q(enseignant_id=creneau.enseignant_id)
+    if creneau.salle_id is not None:
+        ressources |= Q(salle_id=creneau.salle_id)
+    voisins = EmploiDuTemps.objects.filter(ressources, jour=creneau.jour)
+    if instance.pk is not None:
+        voisins = voisins.exclude(pk=instance.pk)
+    annee = classe.annee_scolaire_id if classe else instance.classe.annee_scolaire_id
+    return Planning(creneaux_semaine(annee, voisins)).conflits(creneau)
+
+
+def valider_lot(instances, annee=None, remplacer_classes=False):
+    """
+    Valide un lot de créneaux (import, génération) contre lui-même et contre
+    la base en un seul passage. Les créneaux du lot qui ont un id remplacent
+    leur version en base ; avec `remplacer_classes`, tout l'emploi du temps
+    actuel des classes du lot est ignoré.
+
+    Retourne {ligne: [messages]} (vide si le lot est valide).
+    """
+    lot = [Creneau.depuis_instance(instance, ligne) for ligne, instance in enumerate(instances)]
+    erreurs = defaultdict(list)
+    if not lot:
+        return {}
+    if annee is None:
+        classe = referentiel.get_classe(lot[0].classe_id)
+        annee = classe.annee_scolaire_id if classe else None
+
+    existants = EmploiDuTemps.objects.exclude(pk__in={c.id for c in lot if c.id is not None})
+    if remplacer_classes:
+        existants = existants.exclude(classe_id__in={c.classe_id for c in lot})
+
+    from authentication.models import EnseignantProfile
+    competences = set(
+        EnseignantProfile.matieres.through.objects.filter(
+            enseignantprofile_id__in={c.enseignant_id for c in lot}
+        ).values_list('enseignantprofile_id', 'matiere_id')
+    )
+    for creneau in lot:
+        if creneau.debut >= creneau.fin:
+            erreurs[creneau.ligne].append(_("L'heure de début doit être avant l'heure de fin"))
+        if (creneau.enseignant_id, creneau.matiere_id) not in competences:
+            erreurs[creneau.ligne].append(_("L'enseignant n'enseigne pas cette matière"))
+
+    for conflit in detecter_conflits(creneaux_semaine(annee, existants) + lot):
+        for creneau in (conflit.a, conflit.b):
+            if creneau.ligne is not None:
+                erreurs[creneau.ligne].append(conflit.message(creneau))
+    return dict(erreurs)
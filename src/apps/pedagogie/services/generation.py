@@ -0,0 +1,471 @@
+"""
+Génération automatique de l'emploi du temps.
+
+Entrées (voir `probleme_depuis_base`) :
+    VolumeHoraire      → heures hebdomadaires par (classe, matière) et type de salle
+    EnseignantProfile.matieres → enseignants compétents par matière
+    Salle              → type et capacité
+    CreneauBloque      → plages interdites (établissement, classe, enseignant, salle)
+
+Résolution sur une grille horaire (jours × heures par demi-journée) :
+
+1. Chaque volume est découpé en séances de `duree_seance` heures au plus et
+   confié à un seul enseignant, le moins chargé des enseignants compétents.
+2. Placement glouton des séances les plus contraintes d'abord (salle
+   spécialisée, séances longues, enseignant chargé), à la position libre de
+   moindre coût (même matière deux fois dans la journée, heures tardives).
+3. Recherche locale par éjection : une séance sans position libre prend la
+   position la moins conflictuelle, les séances qui la gênent retournent
+   dans la file. Une séance éjectée trop souvent n'est plus éjectable.
+
+Le résultat est vérifié par `emploi_du_temps.detecter_conflits` avant
+écriture (`ecrire`, bulk_create en une transaction). Une régénération
+partielle (`classes`) tient compte des créneaux conservés des autres
+classes : enseignants et salles déjà pris, charge des enseignants.
+"""
+import random
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from datetime import time as heure
+
+from django.conf import settings
+from django.db import transaction
+
+from ..models import EmploiDuTemps, VolumeHoraire, CreneauBloque
+from .. import referentiel
+from . import agenda
+from .emploi_du_temps import Creneau, creneaux_semaine, detecter_conflits
+
+JOURS = ('LUN', 'MAR', 'MER', 'JEU', 'VEN')
+# Demi-journées [début, fin[ en heures
+PLAGES = ((8, 12), (14, 17))
+DUREE_SEANCE = 2
+CHARGE_MAX_ENSEIGNANT = 24
+TYPE_SALLE_CLASSE = 'CLASSE'
+COUT_MEME_JOUR = 10
+COUT_HEURE_TARDIVE = 1
+MAX_EJECTIONS = 8
+
+
+def grille():
+    return (
+        tuple(getattr(settings, 'EMPLOI_DU_TEMPS_JOURS', JOURS)),
+        tuple(getattr(settings, 'EMPLOI_DU_TEMPS_PLAGES', PLAGES)),
+    )
+
+
+@dataclass
+class Besoin:
+    classe_id: int
+    matiere_id: int
+    heures: int
+    type_salle: str = ''
+    effectif: int = 0
+
+
+@dataclass
+class Probleme:
+    besoins: list
+    competences: dict                       # {matiere_id: [enseignant_id]}
+    salles: dict                            # {salle_id: (type, capacité)}
+    salle_classe: dict = field(default_factory=dict)   # {classe_id: salle_id}
+    # {(ressource | None, id | None, jour, heure)} ; ressource None = tout l'établissement
+    bloques: set = field(default_factory=set)
+    jours: tuple = JOURS
+    plages: tuple = PLAGES
+    duree_seance: int = DUREE_SEANCE
+    charge_max: int = CHARGE_MAX_ENSEIGNANT
+    # {enseignant_id: heures} déjà assurées dans des classes hors du problème
+    charge_initiale: dict = field(default_factory=dict)
+
+
+@dataclass(eq=False)
+class Seance:
+    besoin: Besoin
+    duree: int
+    enseignant_id: int = None
+    jour: str = None
+    debut: int = None
+    salle_id: int = None
+    ejections: int = 0
+
+    @property
+    def placee(self):
+        return self.jour is not None
+
+
+@dataclass
+class Solution:
+    seances: list
+    non_placees: list
+    iterations: int
+    duree: float
+
+    @property
+    def complete(self):
+        return not self.non_placees
+
+
+# ─── Solveur ──────────────────────────────────────────────────────────────────
+
+class Generateur:
+    def __init__(self, probleme, seed=0, max_iterations=None):
+        self.probleme = probleme
+        self.random = random.Random(seed)
+        self.positions = [
+            (jour, debut, fin)
+            for jour in probleme.jours
+            for debut, fin in probleme.plages
+        ]
+        self.heures = sorted({h for debut, fin in probleme.plages for h in range(debut, fin)})
+        self.occupation = {}            # (ressource, id, jour, heure) → Seance
+        self.seances = []
+        self.sans_enseignant = []
+        self._preparer()
+        self.max_iterations = max_iterations or 20 * len(self.seances) + 1000
+        self._salles = {}
+        self.salles_par_type = defaultdict(list)
+        for salle_id, (type_salle, capacite) in sorted(
+            probleme.salles.items(), key=lambda s: s[1][1]
+        ):
+            self.salles_par_type[type_salle].append((salle_id, capacite))
+
+    def _preparer(self):
+        """Découpe les volumes en séances et choisit l'enseignant de chaque (classe, matière)."""
+        charge = defaultdict(int, self.probleme.charge_initiale)
+        besoins = sorted(
+            self.probleme.besoins,
+            key=lambda b: len(self.probleme.competences.get(b.matiere_id, ())),
+        )
+        for besoin in besoins:
+            candidats = [
+                e for e in self.probleme.competences.get(besoin.matiere_id, ())
+                if charge[e] + besoin.heures <= self.probleme.charge_max
+            ]
+            durees = [self.probleme.duree_seance] * (besoin.heures // self.probleme.duree_seance)
+            if besoin.heures % self.probleme.duree_seance:
+                durees.append(besoin.heures % self.probleme.duree_seance)
+            seances = [Seance(besoin, duree) for duree in durees]
+            if not candidats:
+                self.sans_enseignant.extend(seances)
+                continue
+            enseignant_id = min(candidats, key=lambda e: (charge[e], e))
+            charge[enseignant_id] += besoin.heures
+            for seance in seances:
+                seance.enseignant_id = enseignant_id
+            self.seances.extend(seances)
+        self.charge = charge
+
+    def _difficulte(self, seance):
+        besoin = seance.besoin
+        return (
+            bool(besoin.type_salle and besoin.type_salle != TYPE_SALLE_CLASSE),
+            seance.duree,
+            self.charge[seance.enseignant_id],
+            besoin.heures,
+        )
+
+    # Occupation ---------------------------------------------------------------
+
+    def _ressources(self, seance, salle_id):
+        yield 'classe', seance.besoin.classe_id
+        yield 'enseignant', seance.enseignant_id
+        if salle_id is not None:
+            yield 'salle', salle_id
+
+    def _bloque(self, seance, salle_id, jour, h):
+        bloques = self.probleme.bloques
+        if (None, None, jour, h) in bloques:
+            return True
+        return any((r, i, jour, h) in bloques for r, i in self._ressources(seance, salle_id))
+
+    def _occupants(self, ressource, ressource_id, jour, debut, duree):
+        return {
+            self.occupation[cle]
+            for h in range(debut, debut + duree)
+            if (cle := (ressource, ressource_id, jour, h)) in self.occupation
+        }
+
+    def _poser(self, seance, jour, debut, salle_id):
+        seance.jour, seance.debut, seance.salle_id = jour, debut, salle_id
+        for ressource, ressource_id in self._ressources(seance, salle_id):
+            for h in range(debut, debut + seance.duree):
+                self.occupation[ressource, ressource_id, jour, h] = seance
+
+    def _retirer(self, seance):
+        for ressource, ressource_id in self._ressources(seance, seance.salle_id):
+            for h in range(seance.debut, seance.debut + seance.duree):
+                self.occupation.pop((ressource, ressource_id, seance.jour, h), None)
+        seance.jour = seance.debut = seance.salle_id = None
+
+    def _salles_possibles(self, seance):
+        """Salles acceptables, salle de la classe en premier (calculées une fois par besoin)."""
+        besoin = seance.besoin
+        cle = id(besoin)
+        if cle not in self._salles:
+            type_salle = besoin.type_salle or TYPE_SALLE_CLASSE
+            salles = []
+            salle_classe = self.probleme.salle_classe.get(besoin.classe_id)
+            if self.probleme.salles.get(salle_classe, ('',))[0] == type_salle:
+                salles.append(salle_classe)
+            salles.extend(
+                salle_id for salle_id, capacite in self.salles_par_type[type_salle]
+                if capacite >= besoin.effectif and salle_id != salle_classe
+            )
+            if not salles and not besoin.type_salle:
+                # Aucune salle de classe disponible : créneau sans salle
+                salles = [None]
+            self._salles[cle] = salles
+        return self._salles[cle]
+
+    # Placement ----------------------------------------------------------------
+
+    def _cout(self, seance, jour, debut):
+        """Même matière déjà placée ce jour-là, puis préférence pour le matin ; aléa pour départager."""
+        besoin = seance.besoin
+        meme_jour = any(
+            (autre := self.occupation.get(('classe', besoin.classe_id, jour, h))) is not None
+            and autre.besoin.matiere_id == besoin.matiere_id
+            for h in self.heures
+        )
+        return (
+            COUT_MEME_JOUR * meme_jour
+            + COUT_HEURE_TARDIVE * (debut - self.heures[0]) / len(self.heures)
+            + self.random.random()
+        )
+
+    def _candidats(self, seance):
+        """(jour, début) où la séance tient dans une demi-journée, hors plages bloquées."""
+        for jour, debut_plage, fin_plage in self.positions:
+            for debut in range(debut_plage, fin_plage - seance.duree + 1):
+                if not any(
+                    self._bloque(seance, None, jour, h) for h in range(debut, debut + seance.duree)
+                ):
+                    yield jour, debut
+
+    def _position_libre(self, seance):
+        meilleure, meilleur_cout = None, None
+        for jour, debut in self._candidats(seance):
+            if self._occupants('classe', seance.besoin.classe_id, jour, debut, seance.duree) \
+                    or self._occupants('enseignant', seance.enseignant_id, jour, debut, seance.duree):
+                continue
+            salle_id = self._salle_libre(seance, jour, debut)
+            if salle_id is False:
+                continue
+            cout = self._cout(seance, jour, debut)
+            if meilleur_cout is None or cout < meilleur_cout:
+                meilleure, meilleur_cout = (jour, debut, salle_id), cout
+        return meilleure
+
+    def _salle_libre(self, seance, jour, debut):
+        """Première salle libre et non bloquée, None si aucune salle n'est requise, False sinon."""
+        for salle_id in self._salles_possibles(seance):
+            if salle_id is None:
+                return None
+            if not self._occupants('salle', salle_id, jour, debut, seance.duree) and not any(
+                ('salle', salle_id, jour, h) in self.probleme.bloques
+                for h in range(debut, debut + seance.duree)
+            ):
+                return salle_id
+        return False
+
+    def _position_forcee(self, seance):
+        """Position qui éjecte le moins de séances (hors séances protégées)."""
+        meilleure, meilleur_cout = None, None
+        for jour, debut in self._candidats(seance):
+            genantes = (
+                self._occupants('classe', seance.besoin.classe_id, jour, debut, seance.duree)
+                | self._occupants('enseignant', seance.enseignant_id, jour, debut, seance.duree)
+            )
+            salle_choisie, genantes_salle = None, None
+            for salle_id in self._salles_possibles(seance):
+                if salle_id is None:
+                    salle_choisie, genantes_salle = None, set()
+                    break
+                if any(('salle', salle_id, jour, h) in self.probleme.bloques
+                       for h in range(debut, debut + seance.duree)):
+                    continue
+                occupants = self._occupants('salle', salle_id, jour, debut, seance.duree) - genantes
+                if genantes_salle is None or len(occupants) < len(genantes_salle):
+                    salle_choisie, genantes_salle = salle_id, occupants
+                    if not occupants:
+                        break
+            if genantes_salle is None:
+                continue
+            genantes |= genantes_salle
+            if any(g.ejections >= MAX_EJECTIONS for g in genantes):
+                continue
+            cout = len(genantes) + self.random.random()
+            if meilleur_cout is None or cout < meilleur_cout:
+                meilleure, meilleur_cout = (jour, debut, salle_choisie, genantes), cout
+        return meilleure
+
+    def resoudre(self):
+        start = time.perf_counter()
+        file = deque(sorted(self.seances, key=self._difficulte, reverse=True))
+        iterations = 0
+        abandonnees = []
+        while file and iterations < self.max_iterations:
+            iterations += 1
+            seance = file.popleft()
+            position = self._position_libre(seance)
+            if position is not None:
+                self._poser(seance, *position)
+                continue
+            forcee = self._position_forcee(seance)
+            if forcee is None:
+                abandonnees.append(seance)
+                continue
+            jour, debut, salle_id, genantes = forcee
+            for genante in genantes:
+                self._retirer(genante)
+                genante.ejections += 1
+                # Les séances éjectées sont replacées en priorité
+                file.appendleft(genante)
+            self._poser(seance, jour, debut, salle_id)
+
+        non_placees = self.sans_enseignant + abandonnees + list(file)
+        return Solution(
+            seances=[s for s in self.seances if s.placee],
+            non_placees=non_placees,
+            iterations=iterations,
+            duree=time.perf_counter() - start,
+        )
+
+
+def resoudre(probleme, seed=0, max_iterations=None):
+    return Generateur(probleme, seed=seed, max_iterations=max_iterations).resoudre()
+
+
+# ─── Base de données ──────────────────────────────────────────────────────────
+
+def probleme_depuis_base(annee=None, classes=None):
+    """
+    Construit le problème d'une année (active par défaut) : quatre requêtes,
+    classes et salles venant du cache de référence. Avec `classes`, les
+    créneaux conservés des autres classes (une requête de plus) bloquent
+    leurs enseignants et leurs salles et comptent dans la charge.
+    """
+    from authentication.models import EleveProfile, EnseignantProfile
+    from django.db.models import Count
+
+    classe_map = toutes = referentiel.get_classe_map(annee)
+    if classes is not None:
+        classe_ids = {getattr(c, 'pk', c) for c in classes}
+        classe_map = {pk: c for pk, c in classe_map.items() if pk in classe_ids}
+
+    effectifs = dict(
+        EleveProfile.objects.filter(classe_actuelle_id__in=classe_map)
+        .values('classe_actuelle_id').annotate(n=Count('pk'))
+        .values_list('classe_actuelle_id', 'n')
+    )
+    besoins = [
+        Besoin(classe_id, matiere_id, heures, type_salle, effectifs.get(classe_id, 0))
+        for classe_id, matiere_id, heures, type_salle in VolumeHoraire.objects.filter(
+            classe_id__in=classe_map
+        ).values_list('classe_id', 'matiere_id', 'heures_par_semaine', 'type_salle')
+    ]
+
+    competences = defaultdict(list)
+    for enseignant_id, matiere_id in EnseignantProfile.matieres.through.objects.filter(
+        matiere_id__in={b.matiere_id for b in besoins},
+        enseignantprofile__user__is_active=True,
+    ).values_list('enseignantprofile_id', 'matiere_id'):
+        competences[matiere_id].append(enseignant_id)
+
+    salles = {
+        pk: (salle.type_salle, salle.capacite)
+        for pk, salle in referentiel.get_salles().items()
+        if salle.is_active
+    }
+
+    jours, plages = grille()
+    bloques = set()
+    for jour, debut, fin, classe_id, enseignant_id, salle_id in CreneauBloque.objects.values_list(
+        'jour', 'heure_debut', 'heure_fin', 'classe_id', 'enseignant_id', 'salle_id'
+    ):
+        ressources = [
+            (r, i) for r, i in (('classe', classe_id), ('enseignant', enseignant_id), ('salle', salle_id))
+            if i is not None
+        ] or [(None, None)]
+        # Une heure de la grille est bloquée dès qu'elle recoupe la plage
+        heures = range(debut.hour, fin.hour + bool(fin.minute))
+        bloques.update((r, i, jour, h) for r, i in ressources for h in heures)
+
+    charge_initiale = defaultdict(int)
+    if classes is not None:
+        conserves = EmploiDuTemps.objects.filter(classe_id__in=set(toutes) - set(classe_map))
+        for creneau in creneaux_semaine(annee, conserves):
+            heures = range(creneau.debut // 60, -(-creneau.fin // 60))
+            for ressource, ressource_id in (('enseignant', creneau.enseignant_id), ('salle', creneau.salle_id)):
+                if ressource_id is not None:
+                    bloques.update((ressource, ressource_id, creneau.jour, h) for h in heures)
+            charge_initiale[creneau.enseignant_id] += (creneau.fin - creneau.debut) / 60
+
+    return Probleme(
+        besoins=besoins,
+        competences=dict(competences),
+        salles=salles,
+        salle_classe={pk: c.salle_id for pk, c in classe_map.items() if c.salle_id},
+        bloques=bloques,
+        jours=jours,
+        plages=plages,
+        charge_max=getattr(settings, 'EMPLOI_DU_TEMPS_CHARGE_MAX', CHARGE_MAX_ENSEIGNANT),
+        charge_initiale=dict(charge_initiale),
+    )
+
+
+def vers_creneaux(solution):
+    """EmploiDuTemps non enregistrés d'une solution."""
+    return [
+        EmploiDuTemps(
+            classe_id=s.besoin.classe_id,
+            matiere_id=s.besoin.matiere_id,
+            enseignant_id=s.enseignant_id,
+            jour=s.jour,
+            heure_debut=heure(s.debut),
+            heure_fin=heure(s.debut + s.duree),
+            salle_id=s.salle_id,
+        )
+        for s in solution.seances
+    ]
+
+
+def ecrire(solution, classes=None, annee=None, batch_size=500):
+    """
+    Remplace l'emploi du temps des classes de la solution (ou `classes`)
+    par les créneaux générés : une suppression et un bulk_create dans une
+    transaction. Refuse une solution en conflit avec elle-même ou avec les
+    créneaux conservés des autres classes de l'année.
+    """
+    creneaux = vers_creneaux(solution)
+    classe_ids = (
+        {getattr(c, 'pk', c) for c in classes} if classes is not None
+        else {c.classe_id for c in creneaux}
+    )
+    with transaction.atomic():
+        conserves = creneaux_semaine(
+            annee, EmploiDuTemps.objects.select_for_update().exclude(classe_id__in=classe_ids)
+        )
+        conflits = [
+            conflit for conflit in detecter_conflits(
+                conserves + [Creneau.depuis_instance(c, ligne) for ligne, c in enumerate(creneaux)]
+            )
+            if conflit.a.ligne is not None or conflit.b.ligne is not None
+        ]
+        if conflits:
+            raise ValueError(f'{len(conflits)} conflit(s) dans la solution générée')
+        EmploiDuTemps.objects.filter(classe_id__in=classe_ids).delete()
+        EmploiDuTemps.objects.bulk_create(creneaux, batch_size=batch_size)
+        # bulk_create n'envoie pas post_save : invalidation globale des agendas
+        agenda.invalider_tout()
+    return len(creneaux)
+
+
+def generer(annee=None, classes=None, seed=0, dry_run=False):
+    """Construit, résout et (sauf `dry_run`) enregistre l'emploi du temps."""
+    solution = resoudre(probleme_depuis_base(annee, classes), seed=seed)
+    if not dry_run and solution.seances:
+        ecrire(solution, classes=classes, annee=annee)
+    return solution
@@ -0,0 +1,464 @@
+"""
+Import de notes depuis un tableur (XLSX ou CSV).
+
+    rapport = importer_notes(fichier, defauts={'matiere': matiere, 'periode': 'T1'})
+
+Une ligne d'en-tête puis une note par ligne :
+    matricule | note | appréciation? | matière? | type? | période? | date? | sur? | coefficient?
+L'en-tête est insensible à la casse et aux accents ; une colonne facultative
+absente (ou une cellule vide) prend la valeur de `defauts`. Une ligne sans
+note est ignorée (élève non évalué).
+
+Lecture en flux : openpyxl en lecture seule (valeurs, pas de formules) pour
+le XLSX, csv.reader ligne à ligne pour le CSV (séparateur ; , ou tabulation,
+UTF-8 ou Windows-1252, virgule décimale acceptée). Les élèves sont retrouvés
+par matricule dans un dictionnaire chargé en une requête (élèves des classes
+de l'année).
+
+Chaque cellule invalide produit une erreur {ligne, colonne, valeur, message}.
+Par défaut rien n'est écrit si le fichier contient une erreur ; avec
+`partiel=True` les lignes valides sont enregistrées. L'écriture suit la
+feuille de notes (services/saisie.py) : les notes de la même évaluation
+(élève, classe, matière, type, période, date) sont mises à jour, les autres
+créées, par bulk_update / bulk_create dans une transaction, puis
+MoyenneMatiere est reconstruite et les tableaux de bord des classes invalidés.
+"""
+import csv
+import datetime
+import itertools
+import unicodedata
+from collections import defaultdict
+from decimal import Decimal, InvalidOperation
+from pathlib import PurePath
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from authentication.models import EleveProfile
+from core.validators import validate_note
+
+from .. import referentiel
+from ..models import Note
+from . import moyennes, tableau_bord
+
+SEPARATEURS = ';,\t'
+FORMATS_DATE = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d.%m.%Y')
+
+# Champ → en-têtes acceptés (normalisés : minuscules, sans accents, '_' pour les espaces).
+COLONNES = {
+    'matricule': ('matricule',),
+    'valeur': ('note', 'valeur'),
+    'appreciation': ('appreciation', 'commentaire'),
+    'matiere': ('matiere', 'code_matiere'),
+    'type_note': ('type', 'type_note', 'type_de_note'),
+    'periode': ('periode',),
+    'date_evaluation': ('date', 'date_evaluation', 'date_d_evaluation'),
+    'sur': ('sur', 'bareme'),
+    'coefficient': ('coefficient', 'coef'),
+}
+OBLIGATOIRES = ('matricule', 'valeur')
+# Colonnes qui, absentes du fichier, doivent avoir une valeur par défaut.
+EVALUATION = ('matiere', 'type_note', 'periode', 'date_evaluation')
+CHAMPS_MAJ = ['valeur', 'sur', 'coefficient', 'appreciation', 'enseignant', 'updated_at']
+
+
+class ImportNotesError(Exception):
+    """Fichier illisible ou en-tête inutilisable : aucune ligne n'est traitée."""
+
+
+def _normaliser(texte):
+    texte = unicodedata.normalize('NFKD', str(texte or ''))
+    texte = ''.join(c for c in texte if not unicodedata.combining(c)).strip().lower()
+    for separateur in (' ', '-', "'", '’', '.'):
+        texte = texte.replace(separateur, '_')
+    return texte
+
+
+# ─── Lecture ──────────────────────────────────────────────────────────────────
+
+def _lignes_csv(fichier):
+    """Lignes d'un CSV binaire, décodées une à une (UTF-8, sinon Windows-1252)."""
+    def decoder():
+        for brute in fichier:
+            try:
+                yield brute.decode('utf-8')
+            except UnicodeDecodeError:
+                yield brute.decode('cp1252', errors='replace')
+
+    textes = decoder()
+    premiere = next(textes, '').lstrip('\ufeff')
+    separateur = max(SEPARATEURS, key=premiere.count)
+    yield from csv.reader(itertools.chain([premiere], textes), delimiter=separateur)
+
+
+def _lignes_xlsx(fichier):
+    """Lignes de la feuille active, en lecture seule (le classeur n'est pas chargé)."""
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:  # dépendance de production (requirements/prod.txt)
+        raise ImportNotesError("Import XLSX indisponible : openpyxl n'est pas installé.") from exc
+    try:
+        classeur = load_workbook(fichier, read_only=True, data_only=True)
+    except Exception as exc:  # zip ou XML invalide : openpyxl n'a pas d'exception commune
+        raise ImportNotesError(f'Fichier XLSX illisible : {exc}') from exc
+    try:
+        yield from classeur.active.iter_rows(values_only=True)
+    finally:
+        classeur.close()
+
+
+def lire_lignes(fichier, nom=None):
+    """Itérateur de lignes (tuples de cellules) d'après l'extension du fichier."""
+    extension = PurePath(nom or getattr(fichier, 'name', '') or '').suffix.lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return _lignes_xlsx(fichier)
+    if extension in ('.csv', '.txt', ''):
+        return _lignes_csv(fichier)
+    raise ImportNotesError(f'Format non pris en charge : {extension} (XLSX ou CSV attendu).')
+
+
+# ─── Cellules ─────────────────────────────────────────────────────────────────
+
+def _texte(brut):
+    if brut is None:
+        return ''
+    if isinstance(brut, float) and brut.is_integer():
+        brut = int(brut)  # matricule ou code saisi comme nombre dans Excel
+    return str(brut).strip()
+
+
+def _decimal(brut):
+    if isinstance(brut, bool):
+        raise ValidationError('Nombre attendu.')
+    try:
+        texte = str(brut).strip().replace(',', '.')
+        for espace in (' ', '\xa0', '\u202f'):
+            texte = texte.replace(espace, '')
+        valeur = Decimal(texte)
+    except InvalidOperation:
+        raise ValidationError('Nombre attendu.')
+    if not valeur.is_finite():
+        raise ValidationError('Nombre attendu.')
+    if valeur.as_tuple().exponent < -2:
+        raise ValidationError('Deux décimales au plus.')
+    return valeur
+
+
+def _date(brut):
+    if isinstance(brut, datetime.datetime):
+        return brut.date()
+    if isinstance(brut, datetime.date):
+        return brut
+    texte = _texte(brut)
+    for format_ in FORMATS_DATE:
+        try:
+            return datetime.datetime.strptime(texte, format_).date()
+        except ValueError:
+            continue
+    raise ValidationError('Date attendue (AAAA-MM-JJ ou JJ/MM/AAAA).')
+
+
+def _choix(choices):
+    """{valeur ou libellé normalisé: valeur} d'un TextChoices."""
+    table = {}
+    for valeur, libelle in choices.choices:
+        table[_normaliser(valeur)] = valeur
+        table[_normaliser(libelle)] = valeur
+    return table
+
+
+def _entete(ligne):
+    """{champ: (index, libellé)} des colonnes reconnues ; les autres sont ignorées."""
+    alias = {a: champ for champ, noms in COLONNES.items() for a in noms}
+    colonnes = {}
+    for index, cellule in enumerate(ligne):
+        champ = alias.get(_normaliser(cellule))
+        if champ and champ not in colonnes:
+            colonnes[champ] = (index, _texte(cellule))
+    return colonnes
+
+
+# ─── Analyse ──────────────────────────────────────────────────────────────────
+
+class _Analyseur:
+    """Référentiels chargés une fois, puis validation ligne par ligne."""
+
+    def __init__(self, colonnes, defauts, annee, enseignant):
+        self.colonnes = colonnes
+        self.defauts = defauts
+        self.annee = annee
+        classes = referentiel.get_classe_map(annee)
+        self.eleves = {
+            matricule.strip().upper(): (pk, classe_id)
+            for matricule, pk, classe_id in EleveProfile.objects.filter(
+                classe_actuelle_id__in=list(classes)
+            ).values_list('matricule', 'pk', 'classe_actuelle_id')
+        }
+        self.matieres = {}
+        for matiere in referentiel.get_matieres(actives_seulement=True).values():
+            self.matieres[_normaliser(matiere.code)] = matiere
+            self.matieres[str(matiere.pk)] = matiere
+        self.autorisees = None
+        if enseignant is not None:
+            self.autorisees = set(enseignant.matieres.values_list('pk', flat=True))
+        self.lecteurs = {
+            'matiere': self._matiere,
+            'type_note': self._choix(_choix(Note.TypeNoteChoices)),
+            'periode': self._choix(_choix(Note.PeriodeChoices)),
+            'date_evaluation': _date,
+            'sur': _decimal,
+            'coefficient': _decimal,
+        }
+        # Défauts passés en texte (ligne de commande) : lus comme des cellules.
+        for champ, lire in self.lecteurs.items():
+            if isinstance(defauts.get(champ), str):
+                try:
+                    defauts[champ] = lire(defauts[champ])
+                except ValidationError as exc:
+                    messages = ' '.join(str(m) for m in exc.messages)
+                    raise ImportNotesError(f'Valeur par défaut invalide ({champ}) : {messages}') from exc
+
+    def _matiere(self, brut):
+        matiere = self.matieres.get(_normaliser(_texte(brut)))
+        if matiere is None:
+            raise ValidationError('Matière inconnue ou inactive.')
+        return matiere
+
+    @staticmethod
+    def _choix(table):
+        def lire(brut):
+            valeur = table.get(_normaliser(_texte(brut)))
+            if valeur is None:
+                attendues = ', '.join(sorted(set(table.values())))
+                raise ValidationError(f'Valeur attendue parmi : {attendues}.')
+            return valeur
+        return lire
+
+    def cellule(self, ligne, champ):
+        if champ not in self.colonnes:
+            return None
+        index = self.colonnes[champ][0]
+        return ligne[index] if index < len(ligne) else None
+
+    def analyser(self, numero, ligne):
+        """Retourne (clé d'évaluation, (valeur, sur, coefficient, appréciation)) et les erreurs."""
+        erreurs = []
+
+        def erreur(champ, message):
+            libelle = self.colonnes[champ][1] if champ in self.colonnes else champ
+            erreurs.append({
+                'ligne': numero,
+                'colonne': libelle,
+                'valeur': _texte(self.cellule(ligne, champ)),
+                'message': message,
+            })
+
+        valeurs = {}
+        for champ, lire in self.lecteurs.items():
+            brut = self.cellule(ligne, champ)
+            if not _texte(brut):
+                valeurs[champ] = self.defauts.get(champ)
+                if valeurs[champ] is None:
+                    erreur(champ, 'Valeur manquante.')
+                continue
+            try:
+                valeurs[champ] = lire(brut)
+            except ValidationError as exc:
+                valeurs[champ] = None
+                erreur(champ, ' '.join(str(m) for m in exc.messages))
+
+        matricule = _texte(self.cellule(ligne, 'matricule'))
+        eleve = self.eleves.get(matricule.upper())
+        if not matricule:
+            erreur('matricule', 'Matricule manquant.')
+        elif eleve is None:
+            erreur('matricule', 'Matricule inconnu ou élève sans classe cette année.')
+
+        sur, coefficient = valeurs['sur'], valeurs['coefficient']
+        valeur = None
+        try:
+            valeur = _decimal(self.cellule(ligne, 'valeur'))
+            validate_note(valeur)
+            if sur is not None and valeur > sur:
+                raise ValidationError('La note dépasse la note maximale.')
+        except ValidationError as exc:
+            erreur('valeur', ' '.join(str(m) for m in exc.messages))
+
+        if sur is not None and sur < 1:
+            erreur('sur', 'La note maximale doit être au moins 1.')
+        if coefficient is not None and coefficient < 0:
+            erreur('coefficient', 'Le coefficient doit être positif.')
+        matiere = valeurs['matiere']
+        if matiere is not None and self.autorisees is not None and matiere.pk not in self.autorisees:
+            erreur('matiere', "Vous n'enseignez pas cette matière.")
+        date = valeurs['date_evaluation']
+        if date is not None and not self.annee.date_debut <= date <= self.annee.date_fin:
+            erreur('date_evaluation', "Date hors de l'année scolaire.")
+        if erreurs:
+            return None, None, erreurs
+
+        eleve_id, classe_id = eleve
+        cle = (eleve_id, classe_id, matiere.pk, valeurs['type_note'], valeurs['periode'], date)
+        appreciation = _texte(self.cellule(ligne, 'appreciation'))
+        return cle, (valeur, sur, coefficient, appreciation), []
+
+
+# ─── Import ───────────────────────────────────────────────────────────────────
+
+def importer_notes(fichier, nom=None, defauts=None, annee=None, enseignant=None,
+                   partiel=False, simulation=False, batch_size=500):
+    """
+    Importe les notes du tableur `fichier` (binaire) dans l'année `annee`
+    (active par défaut). `defauts` : matiere (instance), type_note, periode,
+    date_evaluation, sur, coefficient. Un enseignant ne peut importer que
+    les matières qu'il enseigne ; `simulation` valide sans écrire.
+
+    Retourne {'lignes', 'valides', 'ignorees', 'crees', 'mis_a_jour',
+    'inchangees', 'enregistre', 'erreurs': [{'ligne', 'colonne', 'valeur', 'message'}]}.
+    """
+    defauts = {'sur': Decimal('20'), 'coefficient': Decimal('1'), **(defauts or {})}
+    if annee is None:
+        from administration.models import AnneeScolaire
+        annee = AnneeScolaire.get_annee_active()
+        if annee is None:
+            raise ImportNotesError('Aucune année scolaire active.')
+
+    lignes = enumerate(lire_lignes(fichier, nom), start=1)
+    for numero_entete, entete in lignes:
+        if any(_texte(c) for c in entete):
+            break
+    else:
+        raise ImportNotesError('Fichier vide.')
+    colonnes = _entete(entete)
+    manquantes = [c for c in OBLIGATOIRES if c not in colonnes]
+    manquantes += [c for c in EVALUATION if c not in colonnes and not defauts.get(c)]
+    if manquantes:
+        raise ImportNotesError(
+            f"Colonne(s) absente(s) sans valeur par défaut : {', '.join(manquantes)} "
+            f'(en-tête ligne {numero_entete}).'
+        )
+
+    analyseur = _Analyseur(colonnes, defauts, annee, enseignant)
+    erreurs, notes, premieres = [], {}, {}
+    total = ignorees = 0
+    for numero, ligne in lignes:
+        if not any(_texte(c) for c in ligne):
+            continue
+        total += 1
+        if not _texte(analyseur.cellule(ligne, 'valeur')):
+            ignorees += 1
+            continue
+        cle, note, erreurs_ligne = analyseur.analyser(numero, ligne)
+        if erreurs_ligne:
+            erreurs.extend(erreurs_ligne)
+        elif cle in notes:
+            erreurs.append({
+                'ligne': numero,
+                'colonne': colonnes['matricule'][1],
+                'valeur': _texte(analyseur.cellule(ligne, 'matricule')),
+                'message': f'Note déjà présente ligne {premieres[cle]} pour cette évaluation.',
+            })
+        else:
+            notes[cle], premieres[cle] = note, numero
+
+    rapport = {
+        'lignes': total,
+        'valides': len(notes),
+        'ignorees': ignorees,
+        'crees': 0,
+        'mis_a_jour': 0,
+        'inchangees': 0,
+        'enregistre': False,
+        'erreurs': erreurs,
+    }
+    if simulation or not notes or (erreurs and not partiel):
+        return rapport
+    rapport.update(_enregistrer(notes, annee.pk, enseignant, batch_size))
+    rapport['enregistre'] = True
+    return rapport
+
+
+def _mettre_a_jour(notes, batch_size):
+    """
+    Les notes d'un import partagent souvent les mêmes valeurs (barème commun,
+    appréciation vide) : un UPDATE ... WHERE id IN (...) par jeu de valeurs
+    coûte moins que le CASE WHEN par ligne de bulk_update, qui reste utilisé
+    quand les valeurs sont trop dispersées.
+    """
+    # attname : enseignant_id, sans charger l'enseignant de chaque note
+    attributs = [Note._meta.get_field(c).attname for c in CHAMPS_MAJ if c != 'updated_at']
+    groupes = defaultdict(list)
+    for note in notes:
+        valeurs = tuple(getattr(note, attribut) for attribut in attributs)
+        groupes[valeurs].append(note.pk)
+    if len(groupes) > len(notes) // 10:
+        Note.objects.bulk_update(notes, CHAMPS_MAJ, batch_size=batch_size)
+        return
+    maintenant = timezone.now()
+    for valeurs, ids in groupes.items():
+        champs = dict(zip(attributs, valeurs), updated_at=maintenant)
+        for debut in range(0, len(ids), batch_size):
+            Note.objects.filter(pk__in=ids[debut:debut + batch_size]).update(**champs)
+
+
+def _enregistrer(notes, annee_id, enseignant, batch_size):
+    """
+    Upsert des notes {(eleve, classe, matiere, type, periode, date): (valeur, sur, coef, appréciation)}.
+    Les notes déjà identiques ne sont pas réécrites (réimport d'un même fichier).
+    Sans `enseignant` (import administrateur), l'enseignant des notes
+    existantes est conservé et n'entre pas dans la comparaison.
+    """
+    _eleves, classe_ids, matiere_ids, _types, periodes, dates = (set(c) for c in zip(*notes))
+    enseignant_id = getattr(enseignant, 'pk', None)
+    with transaction.atomic():
+        existantes = {
+            (n.eleve_id, n.classe_id, n.matiere_id, n.type_note, n.periode, n.date_evaluation): n
+            for n in Note.objects.select_for_update().filter(
+                annee_scolaire_id=annee_id,
+                classe_id__in=classe_ids,
+                matiere_id__in=matiere_ids,
+                periode__in=periodes,
+                date_evaluation__in=dates,
+            )
+        }
+        maintenant = timezone.now()
+        a_creer, a_modifier = [], []
+        for cle, donnees in notes.items():
+            note = existantes.get(cle)
+            if note is None:
+                eleve_id, classe_id, matiere_id, type_note, periode, date = cle
+                note = Note(
+                    eleve_id=eleve_id, classe_id=classe_id, matiere_id=matiere_id,
+                    annee_scolaire_id=annee_id, type_note=type_note, periode=periode,
+                    date_evaluation=date,
+                )
+                a_creer.append(note)
+            elif (note.valeur, note.sur, note.coefficient, note.appreciation) == donnees \
+                    and enseignant_id in (None, note.enseignant_id):
+                continue
+            else:
+                note.updated_at = maintenant
+                a_modifier.append(note)
+            note.valeur, note.sur, note.coefficient, note.appreciation = donnees
+            if enseignant is not None:
+                note.enseignant = enseignant
+
+        touchees = a_creer + a_modifier
+        if touchees:
+            Note.objects.bulk_create(a_creer, batch_size=batch_size)
+            _mettre_a_jour(a_modifier, batch_size)
+            moyennes.reconstruire(
+                eleve_id__in=list({n.eleve_id for n in touchees}),
+                matiere_id__in=list({n.matiere_id for n in touchees}),
+                periode__in=list({n.periode for n in touchees}),
+                annee_scolaire_id=annee_id,
+            )
+            for classe_id in {n.classe_id for n in touchees}:
+                tableau_bord.invalider_classe(classe_id)
+
+    return {
+        'crees': len(a_creer),
+        'mis_a_jour': len(a_modifier),
+        'inchangees': len(notes) - len(touchees),
+    }
@@ -0,0 +1,157 @@
+"""
+Maintenance de la table matérialisée MoyenneMatiere.
+
+Chaque Note contribue (note_sur_20 × coefficient, coefficient, 1) à la ligne
+(élève, matière, période, année). Une écriture de note applique la
+différence par un UPDATE relatif (F()), sans relire les autres notes :
+
+    création     → + contribution
+    modification → − ancienne contribution, + nouvelle (la clé peut changer)
+    suppression  → − contribution (la ligne disparaît à 0 note)
+
+Les signaux de pedagogie.signals appellent ces fonctions dans la
+transaction de l'écriture. Les traitements en masse (bulk_create,
+bulk_update, update()) ne déclenchent pas de signaux : ils appellent
+`reconstruire()` sur les élèves touchés, qui invalide aussi les
+statistiques de classe concernées.
+"""
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, DecimalField, F, Max, Sum, Count, Value, When
+from django.db.models.functions import Cast
+from django.utils import timezone
+
+from core.archives import annees_archivees
+
+from ..models import MoyenneMatiere, Note
+from . import statistiques
+
+PRECISION = Decimal('0.0001')
+
+
+def contribution(valeur, sur, coefficient):
+    """(points, coefficient) d'une note : points = note sur 20 × coefficient."""
+    valeur, sur, coefficient = Decimal(valeur), Decimal(sur), Decimal(coefficient)
+    sur_20 = valeur if sur == 20 else valeur / sur * 20
+    return (sur_20 * coefficient).quantize(PRECISION), coefficient.quantize(PRECISION)
+
+
+def cle(note):
+    return (note['eleve_id'], note['matiere_id'], note['periode'], note['annee_scolaire_id'])
+
+
+def etat(note):
+    """Champs d'une Note utiles au calcul (pour mémoriser l'état avant modification)."""
+    return {
+        'eleve_id': note.eleve_id,
+        'matiere_id': note.matiere_id,
+        'classe_id': note.classe_id,
+        'periode': note.periode,
+        'annee_scolaire_id': note.annee_scolaire_id,
+        'valeur': note.valeur,
+        'sur': note.sur,
+        'coefficient': note.coefficient,
+    }
+
+
+def _appliquer(note, signe):
+    points, coefficient = contribution(note['valeur'], note['sur'], note['coefficient'])
+    points, coefficient, nombre = signe * points, signe * coefficient, signe
+    eleve_id, matiere_id, periode, annee_id = cle(note)
+    lignes = MoyenneMatiere.objects.filter(
+        eleve_id=eleve_id, matiere_id=matiere_id, periode=periode, annee_scolaire_id=annee_id,
+    )
+    nouvelle_somme = F('somme_points') + Value(points)
+    nouveaux_coefs = F('somme_coefficients') + Value(coefficient)
+    valeurs = {
+        'somme_points': nouvelle_somme,
+        'somme_coefficients': nouveaux_coefs,
+        'nombre_notes': F('nombre_notes') + nombre,
+        'moyenne': Case(
+            When(somme_coefficients__gt=-coefficient, then=nouvelle_somme / nouveaux_coefs),
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=5, decimal_places=2),
+        ),
+        'updated_at': timezone.now(),
+    }
+    if signe > 0:
+        valeurs['classe_id'] = note['classe_id']
+    if lignes.update(**valeurs):
+        if signe < 0:
+            lignes.filter(nombre_notes=0).delete()
+        return
+    if signe < 0:
+        return
+    try:
+        with transaction.atomic():
+            MoyenneMatiere.objects.create(
+                eleve_id=eleve_id, matiere_id=matiere_id, periode=periode,
+                annee_scolaire_id=annee_id, classe_id=note['classe_id'],
+                somme_points=points, somme_coefficients=coefficient, nombre_notes=1,
+                moyenne=(points / coefficient).quantize(Decimal('0.01')) if coefficient else 0,
+            )
+    except IntegrityError:
+        # Ligne créée entre-temps par une autre transaction
+        lignes.update(**valeurs)
+
+
+def ajouter(note):
+    _appliquer(note, 1)
+
+
+def retirer(note):
+    _appliquer(note, -1)
+
+
+def remplacer(ancienne, nouvelle):
+    if ancienne == nouvelle:
+        return
+    retirer(ancienne)
+    ajouter(nouvelle)
+
+
+# ─── Reconstruction ───────────────────────────────────────────────────────────
+
+def reconstruire(batch_size=2000, **filtres):
+    """
+    Recalcule MoyenneMatiere depuis Note pour le périmètre `filtres`
+    (ex: annee_scolaire_id=3, periode='T1', eleve_id__in=[...]).
+    Une agrégation GROUP BY, une suppression et un bulk_create. Les années
+    archivées (notes supprimées) sont exclues : leurs moyennes sont conservées.
+    """
+    archivees = [pk for pk, _debut, _fin in annees_archivees()]
+    points = Sum(
+        F('valeur') * Value(20) / F('sur') * F('coefficient'),
+        output_field=DecimalField(max_digits=12, decimal_places=4),
+    )
+    agregats = (
+        Note.objects.filter(**filtres).exclude(annee_scolaire_id__in=archivees)
+        .values('eleve_id', 'matiere_id', 'periode', 'annee_scolaire_id')
+        .annotate(
+            points=points,
+            coefficients=Cast(Sum('coefficient'), DecimalField(max_digits=10, decimal_places=4)),
+            nombre=Count('id'),
+            classe=Max('classe_id'),
+        )
+        .order_by()
+    )
+    lignes = []
+    for a in agregats.iterator(chunk_size=batch_size):
+        somme = Decimal(a['points']).quantize(PRECISION)
+        coefs = Decimal(a['coefficients']).quantize(PRECISION)
+        lignes.append(MoyenneMatiere(
+            eleve_id=a['eleve_id'], matiere_id=a['matiere_id'], periode=a['periode'],
+            annee_scolaire_id=a['annee_scolaire_id'], classe_id=a['classe'],
+            somme_points=somme, somme_coefficients=coefs, nombre_notes=a['nombre'],
+            moyenne=(somme / coefs).quantize(Decimal('0.01')) if coefs else Decimal('0'),
+        ))
+    with transaction.atomic():
+        anciennes = MoyenneMatiere.objects.filter(**filtres).exclude(annee_scolaire_id__in=archivees)
+        touches = set(anciennes.values_list('classe_id', 'matiere_id', 'periode').distinct())
+        touches.update((l.classe_id, l.matiere_id, l.periode) for l in lignes)
+        anciennes.delete()
+        MoyenneMatiere.objects.bulk_create(lignes, batch_size=batch_size)
+        for couple in touches:
+            statistiques.invalider(*couple)
+    return len(lignes)
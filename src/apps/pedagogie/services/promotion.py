@@ -0,0 +1,298 @@
+"""
+Passage de fin d'année : promotion, redoublement et réinscription en masse.
+
+    plans = preparer_promotion(annee_suivante)                  # décisions, sans écriture
+    for plan in plans: print('\n'.join(plan.diff()))           # dry-run
+    appliquer_promotion(plans, annee_suivante, utilisateur)     # une transaction par classe
+
+Décision par élève : moyenne annuelle (moyenne des bulletins de l'année
+écoulée) >= SEUIL_PASSAGE → passage au niveau suivant, sinon redoublement.
+Une décision forcée (`derogations`) remplace la décision calculée ; un
+élève sans bulletin ni dérogation n'est pas traité.
+
+Classe de destination dans l'année suivante : même suffixe de nom
+(« 6ème B » → « 5ème B ») au niveau visé tant qu'elle a des places (élèves
+déjà prévus compris), sinon la classe de ce niveau qui a le plus de places.
+Les élèves de Terminale admis sortent de l'établissement (classe_actuelle
+vide, pas de réinscription).
+
+Application par classe d'origine, dans une transaction : capacité des
+classes de destination verrouillée et vérifiée, bulk_update des
+EleveProfile, bulk_create / bulk_update des Inscription, puis
+recomptage des effectifs (les écritures en masse n'envoient pas de signaux).
+"""
+from collections import defaultdict
+from dataclasses import dataclass, field
+from decimal import Decimal
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg
+from django.utils import timezone
+
+from ..models import Bulletin, Classe
+from . import effectifs
+
+SEUIL_PASSAGE = Decimal('10')
+
+
+class Decision:
+    PASSAGE = 'PASSAGE'
+    REDOUBLEMENT = 'REDOUBLEMENT'
+    SORTIE = 'SORTIE'
+    CHOIX = (PASSAGE, REDOUBLEMENT, SORTIE)
+
+
+class PromotionError(Exception):
+    pass
+
+
+@dataclass
+class LignePromotion:
+    eleve_id: int
+    matricule: str
+    moyenne: Decimal
+    decision: str
+    classe_avant: int
+    classe_apres: int = None
+    derogation: bool = False
+
+
+@dataclass
+class PlanClasse:
+    classe: Classe
+    lignes: list = field(default_factory=list)
+    sans_decision: list = field(default_factory=list)    # matricules
+    noms: dict = field(default_factory=dict, repr=False)  # {classe_id: nom} pour diff()
+
+    def diff(self):
+        """Lignes lisibles « matricule : classe avant → classe après (décision) »."""
+        noms = self.noms
+        return [
+            f'{l.matricule} : {noms.get(l.classe_avant, l.classe_avant)} → '
+            f'{noms.get(l.classe_apres, "-") if l.classe_apres else "sortie"} '
+            f'({l.decision}{", dérogation" if l.derogation else ""}'
+            f'{f", moyenne {l.moyenne}" if l.moyenne is not None else ""})'
+            for l in self.lignes
+        ]
+
+
+# ─── Correspondance des classes ───────────────────────────────────────────────
+
+NIVEAUX = Classe.NiveauChoices.values
+
+
+def niveau_suivant(niveau):
+    index = NIVEAUX.index(niveau)
+    return NIVEAUX[index + 1] if index + 1 < len(NIVEAUX) else None
+
+
+def _suffixe(classe):
+    """« 6ème B » → « B », « Terminale S1 » → « S1 »."""
+    libelle = str(Classe.NiveauChoices(classe.niveau).label)
+    nom = classe.nom.strip()
+    if nom.lower().startswith(libelle.lower()):
+        nom = nom[len(libelle):]
+    return nom.strip(' -').lower()
+
+
+class Correspondance:
+    """Classe de destination dans l'année suivante, par niveau et suffixe."""
+
+    def __init__(self, classes_suivantes):
+        self.par_niveau = defaultdict(list)
+        for classe in classes_suivantes:
+            self.par_niveau[classe.niveau].append(classe)
+        self.prevus = defaultdict(int)
+
+    def places(self, classe):
+        return classe.capacite_max - classe.effectif - self.prevus[classe.pk]
+
+    def destination(self, classe, niveau):
+        """Même suffixe s'il reste une place, sinon la classe du niveau la moins remplie."""
+        candidates = self.par_niveau.get(niveau)
+        if not candidates:
+            return None
+        suffixe = _suffixe(classe)
+        for candidate in candidates:
+            if _suffixe(candidate) == suffixe and self.places(candidate) > 0:
+                return candidate
+        return max(candidates, key=self.places)
+
+    def reserver(self, classe):
+        self.prevus[classe.pk] += 1
+
+
+# ─── Préparation ──────────────────────────────────────────────────────────────
+
+def moyennes_annuelles(annee, classe_ids):
+    """{eleve_id: moyenne des bulletins de l'année} en une requête."""
+    return {
+        eleve_id: round(moyenne, 2)
+        for eleve_id, moyenne in Bulletin.objects.filter(
+            annee_scolaire=annee, classe_id__in=classe_ids,
+        ).values('eleve_id').annotate(m=Avg('moyenne_generale')).values_list('eleve_id', 'm')
+        if moyenne is not None
+    }
+
+
+def preparer_promotion(annee_suivante, annee=None, classes=None, derogations=None, seuil=None):
+    """
+    Plan de passage des classes de `annee` (active par défaut) vers
+    `annee_suivante`. `derogations` : {eleve_id: décision} ou
+    {eleve_id: (décision, classe_id)}. Aucune écriture.
+    """
+    from administration.models import AnneeScolaire
+    from authentication.models import EleveProfile
+
+    annee = annee or AnneeScolaire.get_annee_active()
+    if annee is None or annee.pk == annee_suivante.pk:
+        raise PromotionError("L'année suivante doit différer de l'année en cours.")
+    seuil = Decimal(str(seuil if seuil is not None else getattr(settings, 'SEUIL_PASSAGE', SEUIL_PASSAGE)))
+    derogations = derogations or {}
+
+    classes_origine = Classe.objects.filter(annee_scolaire=annee).order_by('niveau', 'nom')
+    if classes is not None:
+        classes_origine = classes_origine.filter(pk__in=[getattr(c, 'pk', c) for c in classes])
+    classes_origine = list(classes_origine)
+    classes_suivantes = list(
+        Classe.objects.filter(annee_scolaire=annee_suivante, is_active=True).order_by('nom')
+    )
+    par_id = {c.pk: c for c in classes_suivantes}
+    correspondance = Correspondance(classes_suivantes)
+    moyennes = moyennes_annuelles(annee, [c.pk for c in classes_origine])
+
+    eleves = defaultdict(list)
+    for eleve_id, matricule, classe_id in EleveProfile.objects.filter(
+        classe_actuelle__in=classes_origine,
+    ).order_by('matricule').values_list('pk', 'matricule', 'classe_actuelle_id'):
+        eleves[classe_id].append((eleve_id, matricule))
+
+    noms = {c.pk: c.nom for c in classes_origine + classes_suivantes}
+    plans = []
+    for classe in classes_origine:
+        plan = PlanClasse(classe, noms=noms)
+        for eleve_id, matricule in eleves[classe.pk]:
+            moyenne = moyennes.get(eleve_id)
+            derogation = derogations.get(eleve_id)
+            cible = None
+            if isinstance(derogation, (tuple, list)):
+                derogation, cible = derogation
+            if derogation is not None and derogation not in Decision.CHOIX:
+                raise PromotionError(f'Décision inconnue pour {matricule} : {derogation}')
+            if derogation is None and moyenne is None:
+                plan.sans_decision.append(matricule)
+                continue
+            decision = derogation or (Decision.PASSAGE if moyenne >= seuil else Decision.REDOUBLEMENT)
+
+            if decision == Decision.PASSAGE:
+                niveau = niveau_suivant(classe.niveau)
+                if niveau is None:
+                    decision = Decision.SORTIE
+            else:
+                niveau = classe.niveau
+
+            destination = None
+            if decision != Decision.SORTIE:
+                destination = par_id.get(cible) if cible else correspondance.destination(classe, niveau)
+                if destination is None:
+                    raise PromotionError(
+                        f'Aucune classe de niveau {niveau} dans {annee_suivante} pour {matricule}.'
+                    )
+                correspondance.reserver(destination)
+            plan.lignes.append(LignePromotion(
+                eleve_id=eleve_id,
+                matricule=matricule,
+                moyenne=moyenne,
+                decision=decision,
+                classe_avant=classe.pk,
+                classe_apres=destination.pk if destination else None,
+                derogation=derogation is not None,
+            ))
+        plans.append(plan)
+    return plans
+
+
+# ─── Application ──────────────────────────────────────────────────────────────
+
+def _verifier_capacites(plan):
+    """Verrouille les classes de destination et vérifie qu'elles peuvent accueillir le plan."""
+    arrivees = defaultdict(int)
+    for ligne in plan.lignes:
+        if ligne.classe_apres:
+            arrivees[ligne.classe_apres] += 1
+    if not arrivees:
+        return
+    for classe in Classe.objects.select_for_update().filter(pk__in=arrivees):
+        if classe.effectif + arrivees[classe.pk] > classe.capacite_max:
+            raise effectifs.ClasseComplete(classe.pk)
+
+
+def appliquer_classe(plan, annee_suivante, utilisateur=None, batch_size=500):
+    """Applique le plan d'une classe dans une transaction ; retourne le nombre d'élèves traités."""
+    from administration.models import Inscription
+    from authentication.models import EleveProfile
+
+    if not plan.lignes:
+        return 0
+    maintenant = timezone.now()
+    lignes = {ligne.eleve_id: ligne for ligne in plan.lignes}
+
+    with transaction.atomic():
+        _verifier_capacites(plan)
+
+        eleves = list(EleveProfile.objects.select_for_update().filter(pk__in=lignes))
+        for eleve in eleves:
+            ligne = lignes[eleve.pk]
+            eleve.classe_actuelle_id = ligne.classe_apres
+            eleve.is_redoublant = ligne.decision == Decision.REDOUBLEMENT
+            eleve.updated_at = maintenant
+        EleveProfile.objects.bulk_update(
+            eleves, ['classe_actuelle', 'is_redoublant', 'updated_at'], batch_size=batch_size,
+        )
+
+        existantes = {
+            i.eleve_id: i for i in Inscription.objects.filter(
+                annee_scolaire=annee_suivante, eleve_id__in=lignes,
+            )
+        }
+        nouvelles, modifiees = [], []
+        for ligne in plan.lignes:
+            if ligne.classe_apres is None:
+                continue
+            inscription = existantes.get(ligne.eleve_id)
+            if inscription is None:
+                inscription = Inscription(eleve_id=ligne.eleve_id, annee_scolaire=annee_suivante)
+                nouvelles.append(inscription)
+            else:
+                inscription.updated_at = maintenant
+                modifiees.append(inscription)
+            inscription.classe_id = ligne.classe_apres
+            inscription.statut = Inscription.StatutChoices.VALIDEE
+            inscription.validee_par = utilisateur
+            inscription.date_validation = maintenant
+        Inscription.objects.bulk_create(nouvelles, batch_size=batch_size)
+        Inscription.objects.bulk_update(
+            modifiees,
+            ['classe', 'statut', 'validee_par', 'date_validation', 'updated_at'],
+            batch_size=batch_size,
+        )
+
+        effectifs.reconcilier(
+            classes={plan.classe.pk} | {l.classe_apres for l in plan.lignes if l.classe_apres},
+        )
+    return len(plan.lignes)
+
+
+def appliquer_promotion(plans, annee_suivante, utilisateur=None):
+    """
+    Applique les plans classe par classe. Une classe en échec (capacité)
+    est annulée seule ; retourne {'eleves': n, 'erreurs': {classe_id: message}}.
+    """
+    traites, erreurs = 0, {}
+    for plan in plans:
+        try:
+            traites += appliquer_classe(plan, annee_suivante, utilisateur=utilisateur)
+        except effectifs.ClasseComplete as exc:
+            erreurs[plan.classe.pk] = exc.messages[0]
+    return {'eleves': traites, 'erreurs': erreurs}
@@ -0,0 +1,77 @@
+"""
+Saisie en masse : feuille de notes d'une évaluation.
+
+Une évaluation est identifiée par (classe, matière, type, période, date).
+Les notes déjà saisies pour ces élèves sont mises à jour, les autres
+créées, le tout par bulk_update / bulk_create dans une transaction.
+Ces écritures ne déclenchent pas les signaux de Note : MoyenneMatiere et
+les statistiques sont recalculées ensuite pour les seuls élèves touchés,
+et les tableaux de bord de la classe invalidés.
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from ..models import Note
+from . import moyennes, tableau_bord
+
+
+def enregistrer_feuille(feuille, enseignant=None, batch_size=500):
+    """
+    `feuille` : données validées par FeuilleNotesSerializer.
+    Retourne {'crees', 'mis_a_jour', 'notes': {eleve_id: note_id}}.
+    """
+    classe, matiere = feuille['classe'], feuille['matiere']
+    lignes = {ligne['eleve']: ligne for ligne in feuille['notes']}
+    evaluation = {
+        'classe_id': classe.pk,
+        'matiere_id': matiere.pk,
+        'annee_scolaire_id': classe.annee_scolaire_id,
+        'type_note': feuille['type_note'],
+        'periode': feuille['periode'],
+        'date_evaluation': feuille['date_evaluation'],
+    }
+
+    with transaction.atomic():
+        existantes = {
+            note.eleve_id: note
+            for note in Note.objects.select_for_update().filter(
+                eleve_id__in=lignes, **evaluation
+            )
+        }
+        maintenant = timezone.now()
+        a_creer, a_modifier = [], []
+        for eleve_id, ligne in lignes.items():
+            note = existantes.get(eleve_id)
+            if note is None:
+                note = Note(eleve_id=eleve_id, **evaluation)
+                a_creer.append(note)
+            else:
+                note.updated_at = maintenant
+                a_modifier.append(note)
+            note.valeur = ligne['valeur']
+            note.sur = feuille['sur']
+            note.coefficient = feuille['coefficient']
+            note.appreciation = ligne['appreciation']
+            # Correction par un administrateur : l'enseignant des notes est conservé
+            if enseignant is not None:
+                note.enseignant = enseignant
+
+        Note.objects.bulk_create(a_creer, batch_size=batch_size)
+        Note.objects.bulk_update(
+            a_modifier,
+            ['valeur', 'sur', 'coefficient', 'appreciation', 'enseignant', 'updated_at'],
+            batch_size=batch_size,
+        )
+        moyennes.reconstruire(
+            eleve_id__in=list(lignes),
+            matiere_id=matiere.pk,
+            periode=feuille['periode'],
+            annee_scolaire_id=classe.annee_scolaire_id,
+        )
+        tableau_bord.invalider_classe(classe.pk)
+
+    return {
+        'crees': len(a_creer),
+        'mis_a_jour': len(a_modifier),
+        'notes': {note.eleve_id: note.pk for note in a_creer + a_modifier},
+    }
@@ -0,0 +1,154 @@
+"""
+Statistiques par classe et par matière pour une période.
+
+Calculées sur les moyennes des élèves (MoyenneMatiere) :
+effectif, moyenne, écart-type, min/max, taux de réussite et histogramme
+par SQL (GROUP BY) ; médiane et quartiles avec NumPy si disponible
+(module `statistics` sinon).
+
+Chaque couple (classe, matière, période) a son propre espace de cache
+versionné, invalidé par les écritures de Note (pedagogie.signals).
+Une lecture pour tout l'établissement coûte deux lectures groupées du
+cache et ne calcule que les couples invalidés.
+"""
+import statistics as stats_py
+from collections import defaultdict
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, IntegerField, Max, Min, Q, StdDev, Value
+from django.db.models.functions import Floor, Least
+
+from core.cache import bump_version, get_versions, versioned_key
+
+from ..models import MoyenneMatiere
+from .. import referentiel
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépendance optionnelle
+    np = None
+
+SEUIL_REUSSITE = Decimal('10')
+TRANCHE = 2                     # histogramme : [0-2[, [2-4[, ... [18-20]
+NB_TRANCHES = 20 // TRANCHE
+CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _namespace(classe_id, matiere_id, periode):
+    return f'statistiques:{classe_id}:{matiere_id}:{periode}'
+
+
+def invalider(classe_id, matiere_id, periode):
+    """À appeler après toute écriture de notes de ce couple (fait par les signaux)."""
+    bump_version(_namespace(classe_id, matiere_id, periode))
+
+
+def _arrondi(valeur):
+    return None if valeur is None else round(float(valeur), 2)
+
+
+def _quartiles(valeurs):
+    """(q1, médiane, q3) d'une liste de moyennes."""
+    if not valeurs:
+        return None, None, None
+    if np is not None:
+        q1, mediane, q3 = np.percentile(np.asarray(valeurs, dtype=float), [25, 50, 75])
+        return float(q1), float(mediane), float(q3)
+    if len(valeurs) == 1:
+        return valeurs[0], valeurs[0], valeurs[0]
+    q1, mediane, q3 = stats_py.quantiles(valeurs, n=4, method='inclusive')
+    return q1, mediane, q3
+
+
+def _vide(classe_id, matiere_id, periode):
+    return {
+        'classe': classe_id, 'matiere': matiere_id, 'periode': periode,
+        'effectif': 0, 'moyenne': None, 'mediane': None, 'ecart_type': None,
+        'min': None, 'max': None, 'q1': None, 'q3': None,
+        'taux_reussite': None, 'histogramme': [0] * NB_TRANCHES,
+    }
+
+
+def _calculer(periode, couples):
+    """{(classe_id, matiere_id): statistiques} en trois requêtes."""
+    base = MoyenneMatiere.objects.filter(
+        periode=periode,
+        classe_id__in={c for c, _ in couples},
+        matiere_id__in={m for _, m in couples},
+    )
+    resultats = {c: _vide(*c, periode) for c in couples}
+
+    for a in base.values('classe_id', 'matiere_id').annotate(
+        effectif=Count('id'),
+        moy=Avg('moyenne'),
+        ecart=StdDev('moyenne'),
+        mini=Min('moyenne'),
+        maxi=Max('moyenne'),
+        reussis=Count('id', filter=Q(moyenne__gte=SEUIL_REUSSITE)),
+    ).order_by():
+        r = resultats.get((a['classe_id'], a['matiere_id']))
+        if r is None:
+            continue
+        r.update(
+            effectif=a['effectif'],
+            moyenne=_arrondi(a['moy']),
+            ecart_type=_arrondi(a['ecart']),
+            min=_arrondi(a['mini']),
+            max=_arrondi(a['maxi']),
+            taux_reussite=round(100 * a['reussis'] / a['effectif'], 1),
+        )
+
+    for h in base.annotate(
+        tranche=Least(
+            Floor(F('moyenne') / Value(Decimal(TRANCHE))),
+            Value(NB_TRANCHES - 1),
+            output_field=IntegerField(),
+        ),
+    ).values('classe_id', 'matiere_id', 'tranche').annotate(n=Count('id')).order_by():
+        r = resultats.get((h['classe_id'], h['matiere_id']))
+        if r is not None:
+            r['histogramme'][int(h['tranche'])] = h['n']
+
+    valeurs = defaultdict(list)
+    for classe_id, matiere_id, moyenne in base.values_list('classe_id', 'matiere_id', 'moyenne'):
+        valeurs[classe_id, matiere_id].append(float(moyenne))
+    for couple, liste in valeurs.items():
+        if couple in resultats:
+            q1, mediane, q3 = _quartiles(liste)
+            resultats[couple].update(q1=_arrondi(q1), mediane=_arrondi(mediane), q3=_arrondi(q3))
+    return resultats
+
+
+def statistiques(periode, couples):
+    """
+    Statistiques des couples (classe_id, matiere_id) pour `periode`,
+    servies depuis le cache et complétées en un seul calcul groupé.
+    """
+    couples = list(dict.fromkeys(couples))
+    namespaces = {c: _namespace(*c, periode) for c in couples}
+    versions = get_versions(namespaces.values())
+    cles = {c: versioned_key(ns, 'stats', version=versions[ns]) for c, ns in namespaces.items()}
+    en_cache = cache.get_many(list(cles.values()))
+
+    manquants = [c for c in couples if cles[c] not in en_cache]
+    if manquants:
+        calcules = _calculer(periode, manquants)
+        cache.set_many({cles[c]: calcules[c] for c in manquants}, CACHE_TIMEOUT)
+        en_cache.update({cles[c]: calcules[c] for c in manquants})
+    return [en_cache[cles[c]] for c in couples]
+
+
+def statistiques_etablissement(periode, annee=None, classe_ids=None, matiere_ids=None):
+    """
+    Statistiques de toutes les classes de l'année (ou `classe_ids`) pour les
+    matières actives (ou `matiere_ids`). Les couples sans note sont omis.
+    """
+    classes = referentiel.get_classe_map(annee)
+    if classe_ids:
+        classes = {pk: c for pk, c in classes.items() if pk in set(classe_ids)}
+    matieres = referentiel.get_matieres(actives_seulement=True)
+    if matiere_ids:
+        matieres = {pk: m for pk, m in matieres.items() if pk in set(matiere_ids)}
+    couples = [(c, m) for c in sorted(classes) for m in sorted(matieres)]
+    return [s for s in statistiques(periode, couples) if s['effectif']]
@@ -0,0 +1,378 @@
+"""
+Tableaux de bord : tout l'écran d'accueil en une réponse.
+
+Enseignant : créneaux du jour (et appel fait ou non), classes de la
+semaine, dernières évaluations saisies et moyennes de ses couples
+(classe, matière) sur la période en cours.
+
+Parent : pour tous ses enfants à la fois, dernières notes, absences et
+retards du mois, reste à payer des factures de l'année et prochaines
+échéances. Le nombre de requêtes ne dépend pas du nombre d'enfants.
+
+Le document est construit en quelques requêtes de taille fixe (les
+agendas et statistiques viennent de leurs propres caches) puis gardé
+TABLEAU_BORD_TTL secondes. Il enregistre les versions de cache dont il
+dépend (agenda de l'enseignant, espaces 'tableau:classe:<id>' incrémentés
+par les écritures de notes et de présences, 'tableau:eleve:<id>' par les
+factures et paiements, 'tableau:parent:<id>' par les liens parent-enfant) :
+une lecture compare ces versions en une lecture groupée et reconstruit le
+document s'il est périmé.
+
+    document = tableau_enseignant(enseignant_id)
+    document = tableau_parent(parent_id)
+    invalider_classe(classe_id)         # après une écriture en masse
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Max, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from core.cache import bump_version, get_versions
+
+from ..models import EmploiDuTemps, Note, Presence
+from .. import referentiel
+from . import agenda, assiduite, statistiques
+
+TTL = 60
+NB_EVALUATIONS = 10
+NB_NOTES_ENFANT = 5
+NB_ECHEANCES = 3
+JOURS = EmploiDuTemps.JourChoices.values         # index = weekday()
+
+
+def _ttl():
+    return getattr(settings, 'TABLEAU_BORD_TTL', TTL)
+
+
+def namespace_classe(classe_id):
+    return f'tableau:classe:{classe_id}'
+
+
+def invalider_classe(classe_id):
+    """Après une écriture de notes ou de présences de la classe (fait par les signaux)."""
+    bump_version(namespace_classe(classe_id))
+
+
+def namespace_eleve(eleve_id):
+    return f'tableau:eleve:{eleve_id}'
+
+
+def invalider_eleve(eleve_id):
+    """Après une écriture de facture ou de paiement de l'élève (fait par les signaux)."""
+    bump_version(namespace_eleve(eleve_id))
+
+
+def namespace_parent(parent_id):
+    return f'tableau:parent:{parent_id}'
+
+
+def invalider_parent(parent_id):
+    bump_version(namespace_parent(parent_id))
+
+
+def _en_cache(cle, dependances, construire):
+    """
+    Document `cle` s'il est à jour des versions de `dependances()`, sinon
+    reconstruit. Les versions sont lues avant les données : une écriture
+    concurrente provoque une reconstruction de plus, jamais un document périmé.
+    """
+    document = cache.get(cle)
+    if document is not None:
+        if get_versions(document['_versions']) == document['_versions']:
+            return document
+    espaces = dependances()
+    versions = get_versions(espaces)
+    document = construire()
+    document['_versions'] = versions
+    cache.set(cle, document, _ttl())
+    return document
+
+
+def _public(document):
+    return {cle: valeur for cle, valeur in document.items() if not cle.startswith('_')}
+
+
+# ─── Enseignant ───────────────────────────────────────────────────────────────
+
+def _semaine(enseignant_id):
+    """Créneaux de la semaine depuis l'agenda en cache : {jour: [créneau]}."""
+    return agenda.document_agenda('enseignant', enseignant_id)['jours']
+
+
+def _espaces_enseignant(enseignant_id):
+    classes = {c['classe']['id'] for creneaux in _semaine(enseignant_id).values() for c in creneaux}
+    return [
+        agenda.NAMESPACE_GLOBAL,
+        agenda.namespace('enseignant', enseignant_id),
+        *(namespace_classe(pk) for pk in sorted(classes)),
+    ]
+
+
+def _construire_enseignant(enseignant_id, jour):
+    from administration.models import AnneeScolaire
+
+    semaine = _semaine(enseignant_id)
+    creneaux_jour = semaine.get(JOURS[jour.weekday()], [])
+    couples = sorted({
+        (c['classe']['id'], c['matiere']['id']) for creneaux in semaine.values() for c in creneaux
+    })
+    classe_ids = sorted({classe_id for classe_id, _m in couples})
+
+    # 1. Effectifs (compteur du référentiel)
+    classes = {pk: referentiel.get_classe(pk) for pk in classe_ids}
+    effectifs = {pk: classe.effectif for pk, classe in classes.items() if classe is not None}
+
+    # 2. Appels du jour déjà faits : (classe, matière) ou appel de la journée (matière NULL)
+    appels = set(
+        Presence.objects.filter(date=jour, classe_id__in=classe_ids)
+        .values_list('classe_id', 'matiere_id').distinct().order_by()
+    )
+
+    # 3. Dernières évaluations saisies, une ligne par évaluation
+    annee = AnneeScolaire.get_annee_active()
+    evaluations = (
+        Note.objects.filter(enseignant_id=enseignant_id, annee_scolaire=annee)
+        .values('classe_id', 'matiere_id', 'type_note', 'periode', 'date_evaluation')
+        .annotate(
+            nombre=Count('pk'),
+            moyenne=Avg(F('valeur') * 20 / F('sur')),
+            saisie_le=Max('updated_at'),
+        )
+        .order_by('-date_evaluation', '-saisie_le')[:NB_EVALUATIONS]
+    )
+
+    # 4. Moyennes de la période en cours (cache des statistiques)
+    periode = annee.get_periode(jour) if annee else None
+    moyennes = statistiques.statistiques(periode, couples) if periode else []
+
+    def nom_classe(pk):
+        classe = referentiel.get_classe(pk)
+        return classe.nom if classe else None
+
+    def nom_matiere(pk):
+        matiere = referentiel.get_matiere(pk)
+        return matiere.nom if matiere else None
+
+    return {
+        'enseignant': enseignant_id,
+        'date': jour.isoformat(),
+        'periode': periode,
+        'creneaux': [
+            {
+                **creneau,
+                'appel_fait': (creneau['classe']['id'], creneau['matiere']['id']) in appels
+                or (creneau['classe']['id'], None) in appels,
+            }
+            for creneau in creneaux_jour
+        ],
+        'classes': [
+            {
+                'id': pk,
+                'nom': nom_classe(pk),
+                'effectif': effectifs.get(pk, 0),
+                'matieres': [
+                    {'id': m, 'nom': nom_matiere(m)} for c, m in couples if c == pk
+                ],
+            }
+            for pk in classe_ids
+        ],
+        'evaluations': [
+            {
+                'classe': e['classe_id'],
+                'classe_nom': nom_classe(e['classe_id']),
+                'matiere': e['matiere_id'],
+                'matiere_nom': nom_matiere(e['matiere_id']),
+                'type_note': e['type_note'],
+                'periode': e['periode'],
+                'date_evaluation': e['date_evaluation'].isoformat(),
+                'nombre': e['nombre'],
+                'moyenne': round(float(e['moyenne']), 2) if e['moyenne'] is not None else None,
+            }
+            for e in evaluations
+        ],
+        'moyennes': [
+            {
+                'classe': s['classe'],
+                'classe_nom': nom_classe(s['classe']),
+                'matiere': s['matiere'],
+                'matiere_nom': nom_matiere(s['matiere']),
+                'effectif': s['effectif'],
+                'moyenne': s['moyenne'],
+                'taux_reussite': s['taux_reussite'],
+            }
+            for s in moyennes if s['effectif']
+        ],
+    }
+
+
+def tableau_enseignant(enseignant_id, maintenant=None):
+    maintenant = timezone.localtime(maintenant)
+    jour = maintenant.date()
+    document = _en_cache(
+        f'tableau:enseignant:{enseignant_id}:{jour.isoformat()}',
+        lambda: _espaces_enseignant(enseignant_id),
+        lambda: _construire_enseignant(enseignant_id, jour),
+    )
+    document = _public(document)
+    # Dépend de l'heure : calculé à chaque lecture, sans requête
+    heure = maintenant.strftime('%H:%M')
+    document['appels_en_attente'] = sum(
+        1 for c in document['creneaux'] if not c['appel_fait'] and c['debut'] <= heure
+    )
+    return document
+
+
+# ─── Parent ───────────────────────────────────────────────────────────────────
+
+def _enfants(parent_id):
+    from authentication.models import EleveProfile
+
+    return list(
+        EleveProfile.objects.filter(parents=parent_id)
+        .order_by('user__last_name', 'user__first_name')
+        .values('pk', 'matricule', 'classe_actuelle_id', 'user__first_name', 'user__last_name')
+    )
+
+
+def _tranches(annee):
+    """[(date limite, frais, numéro de tranche)] des frais obligatoires de l'année, par date."""
+    from finances.models import FraisScolaire
+
+    tranches = []
+    for frais in FraisScolaire.objects.filter(annee_scolaire=annee, is_active=True, is_obligatoire=True):
+        nombre = frais.nombre_tranches if frais.est_payable_en_tranches else 1
+        dates = [frais.date_limite_1ere_tranche, frais.date_limite_2eme_tranche,
+                 frais.date_limite_3eme_tranche][:nombre]
+        tranches += [(limite, frais, numero) for numero, limite in enumerate(dates, start=1) if limite]
+    return sorted(tranches, key=lambda t: (t[0], t[2]))
+
+
+def _echeances(tranches, niveau, deja_paye, jour):
+    """
+    Tranches à venir non couvertes par `deja_paye` : le montant cumulé dû
+    à chaque date limite est comparé au total déjà payé.
+    """
+    echeances, cumul = [], Decimal('0')
+    for limite, frais, numero in tranches:
+        montant = frais.get_montant_pour_niveau(niveau)
+        if frais.est_payable_en_tranches:
+            montant = montant / frais.nombre_tranches
+        cumul += montant
+        if limite >= jour and cumul > deja_paye:
+            echeances.append({
+                'date': limite.isoformat(),
+                'libelle': f'{frais.nom} - tranche {numero}',
+                'montant': min(montant, cumul - deja_paye),
+            })
+    return echeances
+
+
+def _construire_parent(parent_id, enfants, jour):
+    from administration.models import AnneeScolaire
+    from finances.models import Facture
+
+    annee = AnneeScolaire.get_annee_active()
+    ids = [enfant['pk'] for enfant in enfants]
+
+    # 1. Dernières notes de chaque enfant (fenêtre par élève)
+    notes = {}
+    if annee is not None:
+        dernieres = (
+            Note.objects.filter(eleve_id__in=ids, annee_scolaire=annee)
+            .annotate(rang=Window(
+                RowNumber(), partition_by=[F('eleve_id')],
+                order_by=[F('date_evaluation').desc(), F('pk').desc()],
+            ))
+            .filter(rang__lte=NB_NOTES_ENFANT)
+            .values('eleve_id', 'matiere_id', 'type_note', 'valeur', 'sur', 'date_evaluation')
+        )
+        for note in dernieres:
+            matiere = referentiel.get_matiere(note['matiere_id'])
+            notes.setdefault(note['eleve_id'], []).append({
+                'matiere': note['matiere_id'],
+                'matiere_nom': matiere.nom if matiere else None,
+                'type_note': note['type_note'],
+                'valeur': note['valeur'],
+                'sur': note['sur'],
+                'date_evaluation': note['date_evaluation'].isoformat(),
+            })
+
+    # 2. Absences et retards du mois (bitmaps d'assiduité)
+    absences = assiduite.totaux(ids, jour.replace(day=1), jour) if ids else {}
+
+    # 3. Factures de l'année, 4. tranches des frais de l'année
+    factures = {}
+    tranches = []
+    if annee is not None and ids:
+        for facture in (
+            Facture.objects.filter(eleve_id__in=ids, annee_scolaire=annee)
+            .exclude(statut__in=[Facture.StatutChoices.ANNULEE, Facture.StatutChoices.BROUILLON])
+            .order_by('date_echeance')
+            .values('eleve_id', 'numero', 'montant_total', 'montant_paye',
+                    'montant_restant', 'statut', 'date_echeance')
+        ):
+            factures.setdefault(facture['eleve_id'], []).append(facture)
+        tranches = _tranches(annee)
+
+    resultat = []
+    for enfant in enfants:
+        classe = referentiel.get_classe(enfant['classe_actuelle_id'])
+        factures_enfant = factures.get(enfant['pk'], [])
+        reste = sum((f['montant_restant'] for f in factures_enfant), Decimal('0'))
+        echeances = []
+        if reste > 0:
+            deja_paye = sum((f['montant_paye'] for f in factures_enfant), Decimal('0'))
+            echeances = _echeances(tranches, classe.niveau if classe else None, deja_paye, jour) or [
+                {'date': f['date_echeance'].isoformat(), 'libelle': f['numero'], 'montant': f['montant_restant']}
+                for f in factures_enfant if f['montant_restant'] > 0 and f['date_echeance'] >= jour
+            ]
+            echeances = echeances[:NB_ECHEANCES]
+        absences_mois, retards_mois = absences.get(enfant['pk'], (0, 0))
+        resultat.append({
+            'id': enfant['pk'],
+            'matricule': enfant['matricule'],
+            'nom': f"{enfant['user__first_name']} {enfant['user__last_name']}".strip(),
+            'classe': {'id': classe.pk, 'nom': classe.nom} if classe else None,
+            'dernieres_notes': notes.get(enfant['pk'], []),
+            'absences_mois': absences_mois,
+            'retards_mois': retards_mois,
+            'factures': [
+                {
+                    'numero': f['numero'],
+                    'montant_total': f['montant_total'],
+                    'montant_paye': f['montant_paye'],
+                    'montant_restant': f['montant_restant'],
+                    'statut': f['statut'],
+                    'date_echeance': f['date_echeance'].isoformat(),
+                }
+                for f in factures_enfant
+            ],
+            'montant_restant': reste,
+            'prochaines_echeances': echeances,
+        })
+    return {'parent': parent_id, 'date': jour.isoformat(), 'enfants': resultat}
+
+
+def tableau_parent(parent_id, jour=None):
+    jour = jour or timezone.localdate()
+    enfants = []
+
+    def dependances():
+        enfants[:] = _enfants(parent_id)
+        return [
+            namespace_parent(parent_id),
+            *(namespace_eleve(e['pk']) for e in enfants),
+            *(namespace_classe(pk) for pk in sorted({
+                e['classe_actuelle_id'] for e in enfants if e['classe_actuelle_id']
+            })),
+        ]
+
+    document = _en_cache(
+        f'tableau:parent:{parent_id}:{jour.isoformat()}',
+        dependances,
+        lambda: _construire_parent(parent_id, enfants, jour),
+    )
+    return _public(document)
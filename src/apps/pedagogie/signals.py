@@ -0,0 +1,228 @@
+"""
+Signaux Django pour l'app pedagogie.
+- Invalide le cache des données de référence (Matiere, Classe, Salle).
+- Tient à jour MoyenneMatiere à chaque écriture de Note et invalide les
+  statistiques de classe correspondantes.
+- Tient à jour AssiduiteMensuelle à chaque écriture de Presence.
+- Invalide les tableaux de bord des classes dont les notes ou les
+  présences changent, des élèves dont les factures ou paiements changent
+  et des parents dont les enfants changent.
+- Invalide les agendas (emplois du temps en cache) à chaque écriture
+  d'EmploiDuTemps.
+- Tient à jour Classe.effectif quand un élève change de classe, y compris
+  par la validation ou l'annulation de son inscription de l'année active.
+"""
+from django.db.models.signals import m2m_changed, pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from authentication.models import ParentProfile
+
+from . import referentiel
+from .models import EmploiDuTemps, Note, Presence
+from .services import agenda, assiduite, effectifs, moyennes, statistiques, tableau_bord
+
+
+# ─── Données de référence ─────────────────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender='pedagogie.Matiere')
+def invalider_matieres(sender, **kwargs):
+    referentiel.invalidate('matiere')
+    agenda.invalider_tout()
+
+
+@receiver([post_save, post_delete], sender='pedagogie.Classe')
+def invalider_classes(sender, **kwargs):
+    referentiel.invalidate('classe')
+    agenda.invalider_tout()
+
+
+@receiver([post_save, post_delete], sender='administration.Salle')
+def invalider_salles(sender, **kwargs):
+    referentiel.invalidate('salle')
+    # Les classes en cache embarquent leur salle
+    referentiel.invalidate('classe')
+    agenda.invalider_tout()
+
+
+@receiver([post_save, post_delete], sender='administration.AnneeScolaire')
+def invalider_classes_annee(sender, **kwargs):
+    # Les classes en cache embarquent leur année scolaire ; les flux
+    # iCalendar sont bornés par l'année active
+    referentiel.invalidate('classe')
+    agenda.invalider_tout()
+
+
+# ─── Moyennes par matière ─────────────────────────────────────────────────────
+
+@receiver(pre_save, sender=Note)
+def memoriser_note(sender, instance, raw=False, **kwargs):
+    """Contribution de la note avant modification (relue en base)."""
+    instance._etat_precedent = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    ancienne = Note.objects.filter(pk=instance.pk).first()
+    if ancienne is not None:
+        instance._etat_precedent = moyennes.etat(ancienne)
+
+
+@receiver(post_save, sender=Note)
+def maj_moyenne_note(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    ancienne = getattr(instance, '_etat_precedent', None)
+    nouvelle = moyennes.etat(instance)
+    if ancienne is None:
+        moyennes.ajouter(nouvelle)
+    else:
+        moyennes.remplacer(ancienne, nouvelle)
+        _invalider_statistiques(ancienne)
+    _invalider_statistiques(nouvelle)
+
+
+@receiver(post_delete, sender=Note)
+def retirer_moyenne_note(sender, instance, **kwargs):
+    etat = moyennes.etat(instance)
+    moyennes.retirer(etat)
+    _invalider_statistiques(etat)
+
+
+def _invalider_statistiques(etat):
+    statistiques.invalider(etat['classe_id'], etat['matiere_id'], etat['periode'])
+    tableau_bord.invalider_classe(etat['classe_id'])
+
+
+# ─── Assiduité ────────────────────────────────────────────────────────────────
+
+@receiver(pre_save, sender=Presence)
+def memoriser_presence(sender, instance, raw=False, **kwargs):
+    """Élève et jour avant modification : le bit de l'ancien jour est aussi recalculé."""
+    instance._jour_precedent = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._jour_precedent = (
+        Presence.objects.filter(pk=instance.pk).values_list('eleve_id', 'date').first()
+    )
+
+
+@receiver(post_save, sender=Presence)
+def maj_assiduite_presence(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    jours = {(instance.eleve_id, instance.date)}
+    precedent = getattr(instance, '_jour_precedent', None)
+    if precedent is not None:
+        jours.add(precedent)
+    assiduite.maj_jours(jours)
+    tableau_bord.invalider_classe(instance.classe_id)
+
+
+@receiver(post_delete, sender=Presence)
+def retirer_assiduite_presence(sender, instance, **kwargs):
+    assiduite.maj_jour(instance.eleve_id, instance.date)
+    tableau_bord.invalider_classe(instance.classe_id)
+
+
+# ─── Tableaux de bord ─────────────────────────────────────────────────────────
+
+@receiver([post_save, post_delete], sender='finances.Facture')
+@receiver([post_save, post_delete], sender='finances.Paiement')
+def invalider_tableau_eleve(sender, instance, **kwargs):
+    tableau_bord.invalider_eleve(instance.eleve_id)
+
+
+@receiver(m2m_changed, sender=ParentProfile.eleves.through)
+def invalider_tableau_parent(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        parents = [instance.pk]
+    elif pk_set is not None:
+        parents = pk_set
+    else:
+        parents = instance.parents.values_list('pk', flat=True)
+    for parent_id in parents:
+        tableau_bord.invalider_parent(parent_id)
+
+
+# ─── Agendas ──────────────────────────────────────────────────────────────────
+
+@receiver(pre_save, sender=EmploiDuTemps)
+def memoriser_creneau(sender, instance, raw=False, **kwargs):
+    """Ressources avant modification : un créneau déplacé quitte aussi l'ancien agenda."""
+    instance._ressources_precedentes = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._ressources_precedentes = (
+        EmploiDuTemps.objects.filter(pk=instance.pk)
+        .values_list('classe_id', 'enseignant_id', 'salle_id').first()
+    )
+
+
+@receiver(post_save, sender=EmploiDuTemps)
+def invalider_agendas_creneau(sender, instance, **kwargs):
+    agenda.invalider_creneau(instance.classe_id, instance.enseignant_id, instance.salle_id)
+    precedentes = getattr(instance, '_ressources_precedentes', None)
+    if precedentes is not None:
+        agenda.invalider_creneau(*precedentes)
+
+
+@receiver(post_delete, sender=EmploiDuTemps)
+def invalider_agendas_suppression(sender, instance, **kwargs):
+    agenda.invalider_creneau(instance.classe_id, instance.enseignant_id, instance.salle_id)
+
+
+# ─── Effectifs ────────────────────────────────────────────────────────────────
+
+@receiver(pre_save, sender='authentication.EleveProfile')
+def memoriser_classe_eleve(sender, instance, raw=False, **kwargs):
+    instance._classe_precedente = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._classe_precedente = (
+        sender.objects.filter(pk=instance.pk).values_list('classe_actuelle_id', flat=True).first()
+    )
+
+
+@receiver(post_save, sender='authentication.EleveProfile')
+def maj_effectif_eleve(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    precedente = None if created else getattr(instance, '_classe_precedente', None)
+    verifier = getattr(instance, '_verifier_capacite', True)
+    effectifs.deplacer(precedente, instance.classe_actuelle_id, verifier_capacite=verifier)
+
+
+@receiver(post_delete, sender='authentication.EleveProfile')
+def retirer_effectif_eleve(sender, instance, **kwargs):
+    if instance.classe_actuelle_id is not None:
+        effectifs.sortir(instance.classe_actuelle_id)
+
+
+@receiver(pre_save, sender='administration.Inscription')
+def memoriser_statut_inscription(sender, instance, raw=False, **kwargs):
+    instance._statut_precedent = None
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    instance._statut_precedent = (
+        sender.objects.filter(pk=instance.pk).values_list('statut', flat=True).first()
+    )
+
+
+@receiver(post_save, sender='administration.Inscription')
+def appliquer_statut_inscription(sender, instance, raw=False, **kwargs):
+    """Validée : l'élève rejoint la classe ; annulée/rejetée après validation : il la quitte."""
+    precedent = getattr(instance, '_statut_precedent', None)
+    if raw or instance.statut == precedent:
+        return
+    from administration.models import AnneeScolaire
+    annee = AnneeScolaire.get_annee_active()
+    if annee is None or instance.annee_scolaire_id != annee.pk:
+        return
+
+    Statut = sender.StatutChoices
+    eleve = instance.eleve
+    if instance.statut == Statut.VALIDEE:
+        if eleve.classe_actuelle_id != instance.classe_id:
+            effectifs.affecter(eleve, instance.classe_id)
+    elif precedent == Statut.VALIDEE and eleve.classe_actuelle_id == instance.classe_id:
+        effectifs.affecter(eleve, None)
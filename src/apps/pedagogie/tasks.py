@@ -0,0 +1,41 @@
+"""
+Tâches Celery de l'app pedagogie.
+"""
+from celery import group, shared_task
+from celery.signals import worker_process_init
+
+
+@worker_process_init.connect
+def prechauffer_referentiel(**kwargs):
+    """
+    Charge Matiere, Classe et Salle en mémoire au démarrage de chaque worker,
+    ainsi que le moteur de rendu des bulletins (polices, styles).
+    """
+    from .referentiel import warm_up
+    warm_up()
+    try:
+        from .services.bulletins_pdf import get_rendu
+        get_rendu()
+    except ImportError:
+        # reportlab absent : les workers sans rendu PDF démarrent quand même
+        pass
+
+
+@shared_task
+def generer_pdfs_classe(classe_id, periode, annee_id, forcer=False, bulletin_ids=None):
+    """Rend les bulletins PDF obsolètes d'une classe (une tâche par classe)."""
+    from .services.bulletins_pdf import generer_pdfs_classe as generer
+    return generer(classe_id, periode, annee_id, forcer=forcer, bulletin_ids=bulletin_ids)
+
+
+@shared_task
+def generer_pdfs_periode(periode, annee_id=None, classe_ids=None, forcer=False):
+    """Répartit le rendu des bulletins d'une période sur les workers, classe par classe."""
+    from administration.models import AnneeScolaire
+    from .referentiel import get_classe_map
+
+    annee_id = annee_id or AnneeScolaire.get_annee_active().pk
+    classe_ids = classe_ids or list(get_classe_map(annee_id))
+    return group(
+        generer_pdfs_classe.s(pk, periode, annee_id, forcer) for pk in classe_ids
+    ).apply_async().id
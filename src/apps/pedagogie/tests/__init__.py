@@ -0,0 +1,12 @@
+from core.seeding import SchoolSeeder, SeedConfig
+
+
+def etablissement(**options):
+    """Petit établissement généré (7 classes de 3 élèves) ; retourne le seeder."""
+    config = {
+        'classes_par_niveau': 1, 'eleves_par_classe': 3, 'notes_par_matiere': 1,
+        'jours_presence': 10, 'batch_size': 500, **options,
+    }
+    seeder = SchoolSeeder(SeedConfig(**config))
+    seeder.run()
+    return seeder
@@ -0,0 +1,76 @@
+from datetime import time
+from urllib.parse import parse_qs, urlparse
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authentication.models import User
+from pedagogie import referentiel
+from pedagogie.models import EmploiDuTemps
+
+from . import etablissement
+
+
+class AgendaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.classe = cls.seeder.classes[0]
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@test.local', password='x', role=User.RoleChoices.ADMIN,
+        )
+
+    def setUp(self):
+        cache.clear()
+        for cache_local in referentiel._caches.values():
+            cache_local.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse('pedagogie:agenda', args=['classe', self.classe.pk])
+
+    def test_etag_inchange_304_sans_requete(self):
+        reponse = self.client.get(self.url)
+        self.assertEqual(reponse.status_code, 200)
+        etag = reponse['ETag']
+
+        with self.assertNumQueries(0):
+            reponse = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 304)
+
+    def test_modification_d_un_creneau_change_l_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        creneau = EmploiDuTemps.objects.filter(classe=self.classe).first()
+        with self.captureOnCommitCallbacks(execute=True):
+            creneau.heure_fin = time(creneau.heure_fin.hour, 30)
+            creneau.save()
+
+        reponse = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertNotEqual(reponse['ETag'], etag)
+        fins = [
+            c['fin'] for creneaux in reponse.data['jours'].values() for c in creneaux if c['id'] == creneau.pk
+        ]
+        self.assertEqual(fins, [f'{creneau.heure_fin.hour:02d}:30'])
+
+    def _lien_ical(self):
+        lien = urlparse(self.client.get(self.url).data['ical'])
+        return lien.path, parse_qs(lien.query)['jeton'][0]
+
+    def test_jeton_ical_revoque_au_changement_de_mot_de_passe(self):
+        chemin, jeton = self._lien_ical()
+        anonyme = APIClient()
+        reponse = anonyme.get(chemin, {'jeton': jeton})
+        self.assertEqual(reponse.status_code, 200)
+        self.assertTrue(reponse['Content-Type'].startswith('text/calendar'))
+
+        self.admin.set_password('nouveau')
+        self.admin.save()
+        self.assertEqual(anonyme.get(chemin, {'jeton': jeton}).status_code, 401)
+
+    def test_jeton_ical_lie_a_la_ressource(self):
+        _chemin, jeton = self._lien_ical()
+        autre = reverse('pedagogie:agenda-ical', args=['classe', self.seeder.classes[1].pk])
+        self.assertEqual(APIClient().get(autre, {'jeton': jeton}).status_code, 401)
@@ -0,0 +1,134 @@
+from datetime import timedelta
+
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from authentication.models import EnseignantProfile
+from pedagogie.models import Presence
+from pedagogie.services import assiduite
+from pedagogie.services.appel import enregistrer_appel
+
+from . import etablissement
+
+
+class AppelTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.classe = cls.seeder.classes[0]
+        cls.eleves = [e.pk for e in cls.seeder.eleves if e.classe_actuelle_id == cls.classe.pk]
+        cls.jour = cls.seeder.annee.date_debut + timedelta(days=14)
+        cls.creneau = cls.seeder.slots_par_classe[cls.classe.pk][0]
+
+    def _appel(self, exceptions=(), matiere=None):
+        return enregistrer_appel({
+            'classe': self.classe, 'date': self.jour, 'matiere': matiere, 'eleves': self.eleves,
+            'exceptions': [{'eleve': e, 'statut': s, 'justification': ''} for e, s in exceptions],
+        })
+
+    def _statuts(self, matiere=None):
+        return dict(
+            Presence.objects.filter(date=self.jour, matiere=matiere).values_list('eleve_id', 'statut')
+        )
+
+    def test_appel_de_la_journee_refait(self):
+        absent = self.eleves[0]
+        self._appel([(absent, Presence.StatutChoices.ABSENT)])
+        self._appel([(absent, Presence.StatutChoices.RETARD)])
+
+        # Une seule ligne par élève : le second appel a mis à jour la première
+        self.assertEqual(Presence.objects.filter(date=self.jour, matiere=None).count(), len(self.eleves))
+        statuts = self._statuts()
+        self.assertEqual(statuts.pop(absent), Presence.StatutChoices.RETARD)
+        self.assertEqual(set(statuts.values()), {Presence.StatutChoices.PRESENT})
+        self.assertEqual(assiduite.totaux([absent], self.jour, self.jour), {absent: (0, 1)})
+
+    def test_appel_par_matiere_distinct_de_la_journee(self):
+        self._appel([(self.eleves[0], Presence.StatutChoices.ABSENT)])
+        self._appel(matiere=self.creneau.matiere)
+        self._appel([(self.eleves[1], Presence.StatutChoices.ABSENT)], matiere=self.creneau.matiere)
+
+        self.assertEqual(Presence.objects.filter(date=self.jour).count(), 2 * len(self.eleves))
+        self.assertEqual(self._statuts()[self.eleves[0]], Presence.StatutChoices.ABSENT)
+        self.assertEqual(self._statuts(self.creneau.matiere)[self.eleves[1]], Presence.StatutChoices.ABSENT)
+
+
+class AppelViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.classe = cls.seeder.classes[0]
+        cls.creneau = cls.seeder.slots_par_classe[cls.classe.pk][0]
+        cls.enseignant = EnseignantProfile.objects.get(pk=cls.creneau.enseignant_id)
+        cls.etranger = EnseignantProfile.objects.exclude(creneaux__classe=cls.classe) \
+            .exclude(classes_principales=cls.classe).first()
+
+    def _poster(self, enseignant, matiere=None):
+        client = APIClient()
+        client.force_authenticate(user=enseignant.user)
+        return client.post(reverse('pedagogie:appel'), {
+            'classe': self.classe.pk,
+            'date': str(self.seeder.annee.date_debut + timedelta(days=14)),
+            'matiere': getattr(matiere, 'pk', None),
+        }, format='json')
+
+    def test_enseignant_de_la_classe(self):
+        reponse = self._poster(self.enseignant, self.creneau.matiere)
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(sum(reponse.data['resume'].values()), self.classe.eleves.count())
+
+    def test_enseignant_hors_de_la_classe(self):
+        for matiere in (None, self.creneau.matiere):
+            self.assertEqual(self._poster(self.etranger, matiere).status_code, 403)
+        self.assertFalse(Presence.objects.filter(classe=self.classe).exists())
+
+    def test_professeur_principal_appel_de_la_journee(self):
+        principal = EnseignantProfile.objects.get(pk=self.classe.professeur_principal_id)
+        self.assertEqual(self._poster(principal).status_code, 200)
+
+
+class MigrationDoublonsTests(TransactionTestCase):
+    """0008 : les doublons d'appel de la journée sont supprimés avant l'index unique."""
+
+    avant = [('pedagogie', '0007_partitionnement_note_presence')]
+    apres = [('pedagogie', '0008_presence_unique_jour')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_ligne_la_plus_recente_gardee(self):
+        seeder = etablissement(classes_par_niveau=1, eleves_par_classe=1, jours_presence=0)
+        eleve = seeder.eleves[0]
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.avant)
+        Presence = executor.loader.project_state(self.avant).apps.get_model('pedagogie', 'Presence')
+
+        jour = seeder.annee.date_debut + timedelta(days=14)
+        maintenant = timezone.now()
+        for minutes, statut in ((0, 'PRESENT'), (5, 'ABSENT'), (2, 'RETARD')):
+            presence = Presence.objects.create(
+                eleve_id=eleve.pk, classe_id=eleve.classe_actuelle_id, date=jour, statut=statut,
+            )
+            # updated_at est en auto_now : fixé après coup
+            Presence.objects.filter(pk=presence.pk).update(updated_at=maintenant + timedelta(minutes=minutes))
+        # Appels par matière : non concernés
+        Presence.objects.create(
+            eleve_id=eleve.pk, classe_id=eleve.classe_actuelle_id, date=jour, statut='PRESENT',
+            matiere_id=seeder.matieres[0].pk,
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.apres)
+        Presence = executor.loader.project_state(self.apres).apps.get_model('pedagogie', 'Presence')
+        self.assertEqual(
+            list(Presence.objects.filter(date=jour, matiere__isnull=True).values_list('statut', flat=True)),
+            ['ABSENT'],
+        )
+        self.assertEqual(Presence.objects.filter(date=jour).count(), 2)
@@ -0,0 +1,92 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from django.db.models.query import QuerySet
+from django.test import SimpleTestCase, TestCase
+
+from pedagogie.models import AssiduiteMensuelle, Presence
+from pedagogie.services import assiduite
+
+from . import etablissement
+
+
+class BitmapTests(SimpleTestCase):
+
+    def test_aller_retour_octets(self):
+        for entier in (0, 1, 1 << 30, (1 << 31) - 1, 0b1010_0110):
+            self.assertEqual(assiduite.vers_entier(assiduite.vers_octets(entier)), entier)
+        self.assertEqual(assiduite.vers_entier(None), 0)
+
+
+class AssiduiteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.eleve = cls.seeder.eleves[0]
+        # Mois sans présence générée
+        cls.debut = date(cls.seeder.annee.date_fin.year, 5, 1)
+
+    def _appel(self, jour, statut):
+        return Presence.objects.create(
+            eleve=self.eleve, classe_id=self.eleve.classe_actuelle_id, date=jour, statut=statut,
+        )
+
+    def test_ecritures_et_totaux(self):
+        jours = [self.debut + timedelta(days=n) for n in (0, 3, 31)]
+        for jour in jours:
+            self._appel(jour, Presence.StatutChoices.ABSENT)
+        self._appel(self.debut + timedelta(days=1), Presence.StatutChoices.RETARD)
+
+        ligne = AssiduiteMensuelle.objects.get(eleve=self.eleve, annee=self.debut.year, mois=5)
+        self.assertEqual(assiduite.vers_entier(ligne.absences), 0b1001)
+        self.assertEqual(assiduite.vers_entier(ligne.retards), 0b10)
+        self.assertEqual(
+            assiduite.totaux([self.eleve.pk], self.debut, self.debut + timedelta(days=31))[self.eleve.pk],
+            (3, 1),
+        )
+        # Borne incluse, mois suivant exclu
+        self.assertEqual(
+            assiduite.totaux(
+                [self.eleve.pk], self.debut + timedelta(days=1), self.debut + timedelta(days=29),
+            ),
+            {self.eleve.pk: (1, 1)},
+        )
+
+    def test_correction_efface_le_bit(self):
+        presence = self._appel(self.debut, Presence.StatutChoices.ABSENT)
+        presence.statut = Presence.StatutChoices.PRESENT
+        presence.save()
+        self.assertEqual(assiduite.totaux([self.eleve.pk], self.debut, self.debut), {self.eleve.pk: (0, 0)})
+
+    def test_reconstruction_identique(self):
+        for n in (0, 2, 5):
+            self._appel(self.debut + timedelta(days=n), Presence.StatutChoices.ABSENT)
+        avant = dict(AssiduiteMensuelle.objects.filter(eleve=self.eleve).values_list('mois', 'absences'))
+        assiduite.reconstruire(eleve_id=self.eleve.pk)
+        apres = dict(AssiduiteMensuelle.objects.filter(eleve=self.eleve).values_list('mois', 'absences'))
+        self.assertEqual(
+            {m: assiduite.vers_entier(b) for m, b in apres.items()},
+            {m: assiduite.vers_entier(b) for m, b in avant.items()},
+        )
+
+    def test_premiere_ecriture_concurrente(self):
+        presence = self._appel(self.debut, Presence.StatutChoices.ABSENT)
+        AssiduiteMensuelle.objects.filter(eleve=self.eleve).delete()
+        vrai_bulk_create = QuerySet.bulk_create
+        concurrente = [True]
+
+        def bulk_create(queryset, objets, *args, **kwargs):
+            if queryset.model is AssiduiteMensuelle and objets and concurrente:
+                # Une autre transaction crée la ligne du mois entre le verrou et l'INSERT
+                concurrente.clear()
+                AssiduiteMensuelle.objects.create(
+                    eleve_id=self.eleve.pk, annee=self.debut.year, mois=self.debut.month,
+                    absences=bytes(assiduite.NB_OCTETS), retards=bytes(assiduite.NB_OCTETS),
+                )
+            return vrai_bulk_create(queryset, objets, *args, **kwargs)
+
+        with mock.patch.object(QuerySet, 'bulk_create', bulk_create):
+            assiduite.maj_jour(self.eleve.pk, presence.date)
+        self.assertFalse(concurrente)
+        self.assertEqual(assiduite.totaux([self.eleve.pk], self.debut, self.debut), {self.eleve.pk: (1, 0)})
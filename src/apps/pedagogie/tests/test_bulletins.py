@@ -0,0 +1,116 @@
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+
+from authentication.models import EleveProfile
+from pedagogie.models import Bulletin, Note
+from pedagogie.services.bulletins import NON_CLASSE, calculer_bulletins, calculer_rangs
+
+from . import etablissement
+
+class CalculerRangsTests(SimpleTestCase):
+
+    def test_ex_aequo_au_meme_rang(self):
+        moyennes = {1: Decimal('15.00'), 2: Decimal('12.50'), 3: Decimal('12.50'), 4: Decimal('9.00')}
+        self.assertEqual(calculer_rangs(moyennes), {1: 1, 2: 2, 3: 2, 4: 4})
+
+    def test_tous_ex_aequo(self):
+        self.assertEqual(calculer_rangs({1: Decimal(10), 2: Decimal(10)}), {1: 1, 2: 1})
+
+    def test_classe_vide(self):
+        self.assertEqual(calculer_rangs({}), {})
+
+
+class BulletinsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.classe = cls.seeder.classes[0]
+        cls.eleves = list(EleveProfile.objects.filter(classe_actuelle=cls.classe).order_by('pk'))
+
+    def test_eleve_sans_note_non_classe(self):
+        sans_note = self.eleves[0]
+        Note.objects.filter(eleve=sans_note, periode='T1').delete()
+        calculer_bulletins('T1', annee=self.seeder.annee, classes=[self.classe])
+
+        bulletin = Bulletin.objects.get(eleve=sans_note, periode='T1')
+        self.assertIsNone(bulletin.moyenne_generale)
+        self.assertIsNone(bulletin.rang)
+        self.assertEqual(bulletin.appreciation_generale, NON_CLASSE)
+        rangs = Bulletin.objects.filter(classe=self.classe, periode='T1').exclude(pk=bulletin.pk) \
+            .values_list('rang', flat=True)
+        self.assertNotIn(None, rangs)
+        self.assertLessEqual(max(rangs), len(self.eleves) - 1)
+        self.assertEqual(bulletin.total_eleves, len(self.eleves) - 1)
+
+    def test_ex_aequo_enregistres(self):
+        # Mêmes notes pour les deux premiers élèves : même moyenne, même rang
+        premier, second = self.eleves[:2]
+        for note in Note.objects.filter(eleve=second, periode='T1'):
+            note.delete()
+        Note.objects.bulk_create([
+            Note(
+                eleve=second, classe=note.classe, matiere=note.matiere,
+                annee_scolaire=note.annee_scolaire, type_note=note.type_note,
+                periode=note.periode, date_evaluation=note.date_evaluation,
+                valeur=note.valeur, sur=note.sur, coefficient=note.coefficient,
+            )
+            for note in Note.objects.filter(eleve=premier, periode='T1')
+        ])
+        calculer_bulletins('T1', annee=self.seeder.annee, classes=[self.classe])
+
+        a, b = (Bulletin.objects.get(eleve=e, periode='T1') for e in (premier, second))
+        self.assertEqual(a.moyenne_generale, b.moyenne_generale)
+        self.assertEqual(a.rang, b.rang)
+
+
+class ChangementDeClasseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.annee = cls.seeder.annee
+        cls.depart, cls.arrivee = cls.seeder.classes[:2]
+        cls.eleve = EleveProfile.objects.filter(classe_actuelle=cls.depart).order_by('pk').first()
+
+    def _calculer(self):
+        calculer_bulletins('T1', annee=self.annee, classes=[self.depart, self.arrivee])
+
+    def test_un_seul_bulletin_dans_la_classe_actuelle(self):
+        self._calculer()
+        moyenne = Bulletin.objects.get(eleve=self.eleve, periode='T1').moyenne_generale
+
+        # Changement de classe en cours de trimestre, puis une note dans la nouvelle classe
+        EleveProfile.objects.filter(pk=self.eleve.pk).update(classe_actuelle=self.arrivee)
+        self._calculer()
+        bulletin = Bulletin.objects.get(eleve=self.eleve, periode='T1')
+        self.assertEqual(bulletin.classe_id, self.arrivee.pk)
+        # Les notes de l'ancienne classe suivent l'élève
+        self.assertEqual(bulletin.moyenne_generale, moyenne)
+
+        note = Note.objects.filter(eleve=self.eleve, periode='T1').first()
+        note.pk, note.classe, note.valeur = None, self.arrivee, note.sur
+        note.save()
+        self._calculer()
+        bulletin = Bulletin.objects.get(eleve=self.eleve, periode='T1')
+        self.assertEqual(bulletin.classe_id, self.arrivee.pk)
+        self.assertGreater(bulletin.moyenne_generale, moyenne)
+
+        totaux = dict(
+            Bulletin.objects.filter(periode='T1', classe__in=[self.depart, self.arrivee])
+            .values_list('classe_id', 'total_eleves').distinct()
+        )
+        self.assertEqual(totaux, {
+            classe.pk: EleveProfile.objects.filter(classe_actuelle=classe).count()
+            for classe in (self.depart, self.arrivee)
+        })
+        rangs = Bulletin.objects.filter(periode='T1', classe=self.arrivee).values_list('rang', flat=True)
+        self.assertLessEqual(max(rangs), len(rangs))
+
+    def test_eleve_sorti_classe_avec_ses_notes(self):
+        EleveProfile.objects.filter(pk=self.eleve.pk).update(classe_actuelle=None)
+        self._calculer()
+        bulletin = Bulletin.objects.get(eleve=self.eleve, periode='T1')
+        self.assertEqual(bulletin.classe_id, self.depart.pk)
+        self.assertIsNotNone(bulletin.rang)
@@ -0,0 +1,127 @@
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+
+from pedagogie.models import Bulletin
+from pedagogie.services import bulletins_pdf
+from pedagogie.services.bulletins import calculer_bulletins
+from pedagogie.tasks import generer_pdfs_periode
+
+from . import etablissement
+
+
+class BulletinsPdfTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.annee = cls.seeder.annee
+        cls.classe = cls.seeder.classes[0]
+        calculer_bulletins('T1', annee=cls.annee, classes=[cls.classe])
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglage = override_settings(MEDIA_ROOT=self.media)
+        reglage.enable()
+        self.addCleanup(reglage.disable)
+
+    def _generer(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            return bulletins_pdf.generer_pdfs_classe(self.classe.pk, 'T1', self.annee.pk, **options)
+
+    def _fichiers(self):
+        return sorted(str(p.relative_to(self.media)) for p in Path(self.media).rglob('*.pdf'))
+
+    def _enregistres(self):
+        return sorted(
+            Bulletin.objects.filter(classe=self.classe, periode='T1').values_list('fichier_pdf', flat=True)
+        )
+
+    def test_bulletin_inchange_non_rendu(self):
+        premier = self._generer()
+        self.assertEqual(premier['pdfs'], premier['total'])
+        self.assertEqual(self._fichiers(), self._enregistres())
+
+        second = self._generer()
+        self.assertEqual(second['pdfs'], 0)
+        self.assertEqual(second['inchanges'], premier['total'])
+
+    def test_police_dans_l_empreinte(self):
+        _bulletin, donnees = bulletins_pdf.charger_classe(self.classe.pk, 'T1', self.annee.pk)[0]
+        avant = bulletins_pdf.empreinte(donnees)
+        with override_settings(BULLETIN_POLICE='/polices/autre.ttf'):
+            self.assertNotEqual(bulletins_pdf.empreinte(donnees), avant)
+
+    def test_anciens_fichiers_supprimes_apres_validation(self):
+        self._generer()
+        anciens = self._fichiers()
+
+        self._generer(forcer=True)
+
+        self.assertEqual(self._fichiers(), self._enregistres())
+        self.assertFalse(set(anciens) & set(self._fichiers()))
+
+    def test_echec_de_l_enregistrement_sans_fichier_orphelin(self):
+        self._generer()
+        anciens = self._fichiers()
+
+        with mock.patch.object(Bulletin.objects, 'bulk_update', side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                self._generer(forcer=True)
+
+        self.assertEqual(self._fichiers(), anciens)
+        self.assertEqual(self._enregistres(), anciens)
+        etat = bulletins_pdf.progression('T1', self.annee.pk, [self.classe.pk])[self.classe.pk]
+        self.assertEqual(etat['statut'], 'echec')
+
+
+class GenerationParClasseTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.annee = cls.seeder.annee
+        cls.classes = cls.seeder.classes[:2]
+        calculer_bulletins('T1', annee=cls.annee, classes=cls.classes)
+
+    def setUp(self):
+        cache.clear()
+        self.media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media, ignore_errors=True)
+        reglage = override_settings(MEDIA_ROOT=self.media)
+        reglage.enable()
+        self.addCleanup(reglage.disable)
+
+    def test_progression_par_classe(self):
+        ids = [classe.pk for classe in self.classes]
+        self.assertEqual(
+            {etat['statut'] for etat in bulletins_pdf.progression('T1', self.annee.pk, ids).values()},
+            {'en_attente'},
+        )
+
+        resultat = bulletins_pdf.generer_pdfs('T1', annee=self.annee, classes=self.classes, workers=1)
+
+        self.assertEqual(resultat['classes'], len(ids))
+        self.assertEqual(resultat['pdfs'], Bulletin.objects.filter(classe_id__in=ids, periode='T1').count())
+        for classe_id, etat in bulletins_pdf.progression('T1', self.annee.pk, ids).items():
+            total = Bulletin.objects.filter(classe_id=classe_id, periode='T1').count()
+            self.assertEqual(etat, {'statut': 'termine', 'faits': total, 'total': total})
+
+    def test_une_tache_par_classe(self):
+        ids = [classe.pk for classe in self.classes]
+        with mock.patch('pedagogie.tasks.group') as groupe:
+            generer_pdfs_periode('T1', annee_id=self.annee.pk, classe_ids=ids, forcer=True)
+
+        taches = list(groupe.call_args.args[0])
+        self.assertEqual([tache.task for tache in taches], ['pedagogie.tasks.generer_pdfs_classe'] * len(ids))
+        self.assertEqual(
+            [tuple(tache.args) for tache in taches], [(pk, 'T1', self.annee.pk, True) for pk in ids],
+        )
+        groupe.return_value.apply_async.assert_called_once_with()
@@ -0,0 +1,92 @@
+from datetime import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase
+
+from administration.models import Salle
+from pedagogie import referentiel
+from pedagogie.models import EmploiDuTemps
+from pedagogie.services import agenda, disponibilites
+
+from . import etablissement
+
+
+class MasqueTests(SimpleTestCase):
+
+    def test_tranches_arrondies_vers_l_exterieur(self):
+        self.assertEqual(disponibilites.masque(0, 5), 0b1)
+        self.assertEqual(disponibilites.masque(3, 7), 0b11)
+        self.assertEqual(disponibilites.masque(10, 20), 0b1100)
+
+    def test_creneaux_contigus_disjoints(self):
+        self.assertFalse(disponibilites.masque(480, 600) & disponibilites.masque(600, 720))
+
+
+class GrilleOccupationTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.creneau = EmploiDuTemps.objects.filter(salle__isnull=False).order_by('pk').first()
+        cls.salle = cls.creneau.salle
+        cls.neuve = Salle.objects.create(
+            numero='N1', type_salle=cls.salle.type_salle, capacite=cls.salle.capacite,
+        )
+
+    def setUp(self):
+        cache.clear()
+        for cache_local in referentiel._caches.values():
+            cache_local.clear()
+        referentiel.warm_up()
+        patcher = mock.patch.object(disponibilites, '_grille', disponibilites.GrilleOccupation())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _libres(self):
+        c = self.creneau
+        return {s.pk for s in disponibilites.salles_libres(c.jour, c.heure_debut, c.heure_fin)}
+
+    def test_grille_actualisee_apres_modification_d_un_creneau(self):
+        libres = self._libres()
+        self.assertNotIn(self.salle.pk, libres)
+        self.assertIn(self.neuve.pk, libres)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creneau.salle = self.neuve
+            self.creneau.save()
+
+        libres = self._libres()
+        self.assertIn(self.salle.pk, libres)
+        self.assertNotIn(self.neuve.pk, libres)
+
+    def test_seules_les_salles_modifiees_rechargees(self):
+        self._libres()
+        with self.assertNumQueries(0):
+            self._libres()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.creneau.heure_fin = time(self.creneau.heure_fin.hour, 30)
+            self.creneau.save()
+        with mock.patch.object(
+            disponibilites.GrilleOccupation, '_charger', autospec=True, return_value={},
+        ) as charger:
+            disponibilites.get_grille()
+        charger.assert_called_once_with(mock.ANY, [self.salle.pk])
+
+    def test_invalidation_globale_recharge_tout(self):
+        self._libres()
+        with self.captureOnCommitCallbacks(execute=True):
+            agenda.invalider_tout()
+        with mock.patch.object(
+            disponibilites.GrilleOccupation, '_charger', autospec=True, return_value={},
+        ) as charger:
+            disponibilites.get_grille()
+        charger.assert_called_once_with(mock.ANY)
+
+    def test_plages_libres_de_la_salle(self):
+        c = self.creneau
+        plages = disponibilites.creneaux_libres(self.salle.pk, jours=[c.jour])[c.jour]
+        for debut, fin in plages:
+            self.assertTrue(fin <= c.heure_debut or debut >= c.heure_fin)
+        self.assertTrue(disponibilites.creneaux_libres(self.neuve.pk, jours=[c.jour])[c.jour])
@@ -0,0 +1,80 @@
+import threading
+
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, skipUnlessDBFeature
+
+from authentication.models import EleveProfile
+from pedagogie.models import Classe
+from pedagogie.services import effectifs
+
+from . import etablissement
+
+
+class CapaciteTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+
+    def setUp(self):
+        self.pleine, self.autre = Classe.objects.filter(annee_scolaire=self.seeder.annee)[:2]
+        Classe.objects.filter(pk=self.pleine.pk).update(capacite_max=self.pleine.effectif + 1)
+        self.eleves = list(EleveProfile.objects.filter(classe_actuelle=self.autre).order_by('pk'))
+
+    def test_derniere_place_prise_entre_controle_et_ecriture(self):
+        premier, second = self.eleves[:2]
+        # Les deux formulaires voient une place libre...
+        effectifs.verifier_place(self.pleine.pk, self.autre.pk)
+        effectifs.verifier_place(self.pleine.pk, self.autre.pk)
+        effectifs.affecter(premier, self.pleine)
+        # ... l'UPDATE conditionnel refuse la seconde écriture, sans rien modifier
+        with self.assertRaises(effectifs.ClasseComplete):
+            effectifs.affecter(second, self.pleine)
+        second.refresh_from_db()
+        self.assertEqual(second.classe_actuelle_id, self.autre.pk)
+        self.pleine.refresh_from_db()
+        self.assertEqual(self.pleine.effectif, self.pleine.capacite_max)
+        self.assertEqual(effectifs.reconcilier(classes=[self.pleine, self.autre]), [])
+
+    def test_clean_erreur_de_champ(self):
+        effectifs.affecter(self.eleves[0], self.pleine)
+        eleve = EleveProfile.objects.get(pk=self.eleves[1].pk)
+        eleve.classe_actuelle = self.pleine
+        with self.assertRaises(ValidationError) as ctx:
+            eleve.full_clean()
+        self.assertIn('classe_actuelle', ctx.exception.message_dict)
+
+
+@skipUnlessDBFeature('has_select_for_update')
+class CapaciteConcurrenceTests(TransactionTestCase):
+    """Inscriptions simultanées sur des connexions distinctes (verrous de ligne)."""
+
+    def test_une_seule_place(self):
+        seeder = etablissement()
+        pleine, autre = Classe.objects.filter(annee_scolaire=seeder.annee)[:2]
+        Classe.objects.filter(pk=pleine.pk).update(capacite_max=pleine.effectif + 1)
+        ids = list(EleveProfile.objects.filter(classe_actuelle=autre).values_list('pk', flat=True))
+        depart = threading.Barrier(len(ids))
+        resultats = []
+
+        def inscrire(eleve_id):
+            try:
+                depart.wait()
+                effectifs.affecter(EleveProfile.objects.get(pk=eleve_id), pleine.pk)
+                resultats.append(True)
+            except effectifs.ClasseComplete:
+                resultats.append(False)
+            finally:
+                connection.close()
+
+        fils = [threading.Thread(target=inscrire, args=(pk,)) for pk in ids]
+        for fil in fils:
+            fil.start()
+        for fil in fils:
+            fil.join()
+
+        self.assertEqual(resultats.count(True), 1)
+        pleine.refresh_from_db()
+        self.assertEqual(pleine.effectif, pleine.capacite_max)
+        self.assertEqual(EleveProfile.objects.filter(classe_actuelle=pleine).count(), pleine.effectif)
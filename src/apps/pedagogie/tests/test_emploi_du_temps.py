@@ -0,0 +1,54 @@
+from django.test import SimpleTestCase
+
+from pedagogie.services.emploi_du_temps import Creneau, Planning, detecter_conflits
+
+
+def creneau(id_, classe, enseignant, salle, debut, fin, jour='LUN'):
+    return Creneau(id_, classe, 1, enseignant, salle, jour, debut * 60, fin * 60)
+
+
+class ConflitsTests(SimpleTestCase):
+
+    def test_intervalles_semi_ouverts(self):
+        creneaux = [creneau(1, 1, 1, 1, 8, 10), creneau(2, 1, 1, 1, 10, 12)]
+        self.assertEqual(detecter_conflits(creneaux), [])
+
+    def test_chevauchement_par_ressource(self):
+        creneaux = [creneau(1, 1, 7, 1, 8, 10), creneau(2, 2, 7, 2, 9, 11)]
+        conflits = detecter_conflits(creneaux)
+        self.assertEqual([(c.ressource, c.ressource_id) for c in conflits], [('enseignant', 7)])
+
+    def test_jours_differents(self):
+        creneaux = [creneau(1, 1, 1, 1, 8, 10), creneau(2, 1, 1, 1, 8, 10, jour='MAR')]
+        self.assertEqual(detecter_conflits(creneaux), [])
+
+    def test_chaque_paire_une_fois(self):
+        # Trois créneaux dans la même salle qui se chevauchent deux à deux
+        creneaux = [creneau(i, i, i, 5, 8 + i, 12) for i in range(1, 4)]
+        paires = {(c.a.id, c.b.id) for c in detecter_conflits(creneaux)}
+        self.assertEqual(paires, {(1, 2), (1, 3), (2, 3)})
+
+    def test_long_creneau_trouve_par_le_planning(self):
+        # Un créneau long commencé bien avant reste trouvé malgré la recherche dichotomique
+        long_ = creneau(1, 1, 1, 1, 8, 16)
+        planning = Planning([long_, creneau(2, 2, 2, 1, 9, 10), creneau(3, 3, 3, 1, 16, 17)])
+        self.assertEqual({c.id for c in planning.occupants('salle', 1, 'LUN', 14 * 60, 15 * 60)}, {1})
+        self.assertTrue(planning.est_libre('salle', 1, 'LUN', 17 * 60, 18 * 60))
+
+    def test_planning_et_balayage_concordent(self):
+        creneaux = [
+            creneau(1, 1, 1, 1, 8, 10), creneau(2, 2, 1, 2, 9, 11),
+            creneau(3, 1, 2, 3, 10, 12), creneau(4, 3, 3, 1, 9, 13),
+        ]
+        planning = Planning(creneaux)
+        par_planning = {
+            frozenset((c.a.id, c.b.id, c.ressource)) for x in creneaux for c in planning.conflits(x)
+        }
+        par_balayage = {frozenset((c.a.id, c.b.id, c.ressource)) for c in detecter_conflits(creneaux)}
+        self.assertEqual(par_planning, par_balayage)
+
+    def test_retirer(self):
+        a, b = creneau(1, 1, 1, 1, 8, 10), creneau(2, 1, 2, 2, 9, 11)
+        planning = Planning([a, b])
+        planning.retirer(b)
+        self.assertEqual(planning.conflits(a), [])
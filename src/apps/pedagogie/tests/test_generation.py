@@ -0,0 +1,134 @@
+from collections import Counter
+
+from django.core.cache import cache
+from django.db.models import Count
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from authentication.models import EnseignantProfile
+from pedagogie import referentiel
+from pedagogie.models import EmploiDuTemps, VolumeHoraire
+from pedagogie.services import generation
+from pedagogie.services.emploi_du_temps import Creneau, conflits_annee, detecter_conflits
+
+from . import etablissement
+
+
+def sans_conflit(solution):
+    creneaux = [Creneau.depuis_instance(c, i) for i, c in enumerate(generation.vers_creneaux(solution))]
+    return detecter_conflits(creneaux) == []
+
+
+class SolveurTests(SimpleTestCase):
+
+    def probleme(self, **options):
+        # 4 classes, 5 matières de 4 h, une matière en laboratoire ; deux enseignants par matière
+        besoins = [
+            generation.Besoin(classe, matiere, 4, 'LABO' if matiere == 5 else '', 30)
+            for classe in range(1, 5) for matiere in range(1, 6)
+        ]
+        return generation.Probleme(
+            besoins=besoins,
+            competences={matiere: [10 * matiere, 10 * matiere + 1] for matiere in range(1, 6)},
+            salles={**{s: ('CLASSE', 40) for s in range(101, 105)}, 201: ('LABO', 35)},
+            salle_classe={classe: 100 + classe for classe in range(1, 5)},
+            **options,
+        )
+
+    def test_toutes_les_seances_placees(self):
+        probleme = self.probleme()
+        solution = generation.resoudre(probleme, seed=1)
+
+        self.assertTrue(solution.complete)
+        heures = Counter()
+        for seance in solution.seances:
+            heures[seance.besoin.classe_id, seance.besoin.matiere_id] += seance.duree
+        self.assertEqual(heures, {(b.classe_id, b.matiere_id): b.heures for b in probleme.besoins})
+        self.assertTrue(sans_conflit(solution))
+        self.assertEqual(
+            {s.salle_id for s in solution.seances if s.besoin.type_salle == 'LABO'}, {201},
+        )
+
+    def test_plages_bloquees_respectees(self):
+        bloques = {(None, None, 'MER', h) for h in range(14, 17)} | {('enseignant', 10, 'LUN', 8)}
+        solution = generation.resoudre(self.probleme(bloques=bloques), seed=1)
+
+        self.assertTrue(solution.complete)
+        self.assertTrue(sans_conflit(solution))
+        for seance in solution.seances:
+            occupees = {(seance.jour, h) for h in range(seance.debut, seance.debut + seance.duree)}
+            self.assertFalse(occupees & {('MER', h) for h in range(14, 17)})
+            if seance.enseignant_id == 10:
+                self.assertNotIn(('LUN', 8), occupees)
+
+    def test_seances_sans_enseignant_non_placees(self):
+        probleme = self.probleme()
+        probleme.competences.pop(3)
+        solution = generation.resoudre(probleme, seed=1)
+
+        self.assertFalse(solution.complete)
+        self.assertEqual({s.besoin.matiere_id for s in solution.non_placees}, {3})
+        self.assertTrue(sans_conflit(solution))
+
+
+# Les enseignants du jeu de données assurent déjà 22 à 24 h ailleurs
+@override_settings(EMPLOI_DU_TEMPS_CHARGE_MAX=40)
+class RegenerationPartielleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.annee = cls.seeder.annee
+        cls.classe = cls.seeder.classes[0]
+        # La matière de l'enseignant le plus pris ailleurs n'est confiée qu'à lui
+        pris = (
+            EmploiDuTemps.objects.exclude(classe=cls.classe)
+            .values('enseignant_id', 'matiere_id').annotate(n=Count('pk')).order_by('-n').first()
+        )
+        EnseignantProfile.matieres.through.objects.filter(matiere_id=pris['matiere_id']).exclude(
+            enseignantprofile_id=pris['enseignant_id'],
+        ).delete()
+        matieres = [pris['matiere_id']] + [
+            m.pk for m in cls.seeder.matieres if m.pk != pris['matiere_id']
+        ][:3]
+        VolumeHoraire.objects.bulk_create([
+            VolumeHoraire(classe=cls.classe, matiere_id=matiere_id, heures_par_semaine=6)
+            for matiere_id in matieres
+        ])
+
+    def setUp(self):
+        cache.clear()
+        for cache_local in referentiel._caches.values():
+            cache_local.clear()
+
+    def _autres(self):
+        return sorted(
+            EmploiDuTemps.objects.exclude(classe=self.classe)
+            .values_list('pk', 'classe_id', 'enseignant_id', 'salle_id', 'jour', 'heure_debut', 'heure_fin')
+        )
+
+    def test_creneaux_conserves_sans_conflit(self):
+        conserves = self._autres()
+        solution = generation.generer(self.annee, classes=[self.classe], seed=1)
+
+        self.assertTrue(solution.complete)
+        self.assertEqual(EmploiDuTemps.objects.filter(classe=self.classe).count(), len(solution.seances))
+        self.assertEqual(self._autres(), conserves)
+        regenere = set(EmploiDuTemps.objects.filter(classe=self.classe).values_list('pk', flat=True))
+        self.assertEqual(
+            [c for c in conflits_annee(self.annee) if {c.a.id, c.b.id} & regenere], [],
+        )
+
+    def test_conflit_avec_un_creneau_conserve_refuse(self):
+        solution = generation.resoudre(generation.probleme_depuis_base(self.annee, [self.classe]), seed=1)
+        # L'enseignant d'une séance est déjà pris à la même heure dans une autre classe
+        pris = EmploiDuTemps.objects.exclude(classe=self.classe).first()
+        seance = solution.seances[0]
+        seance.enseignant_id, seance.jour = pris.enseignant_id, pris.jour
+        seance.debut, seance.duree = pris.heure_debut.hour, 1
+        avant = list(EmploiDuTemps.objects.filter(classe=self.classe).values_list('pk', flat=True))
+
+        with self.assertRaises(ValueError):
+            generation.ecrire(solution, classes=[self.classe], annee=self.annee)
+        self.assertEqual(
+            list(EmploiDuTemps.objects.filter(classe=self.classe).values_list('pk', flat=True)), avant,
+        )
@@ -0,0 +1,70 @@
+import csv
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from pedagogie.models import Note
+from pedagogie.services.import_notes import importer_notes
+
+from . import etablissement
+
+
+class ImportNotesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.eleves = cls.seeder.eleves[:3]
+        cls.defauts = {
+            'matiere': cls.seeder.matieres[0],
+            'type_note': 'EXAMEN',
+            'periode': 'T2',
+            'date_evaluation': cls.seeder.annee.date_debut + timedelta(days=100),
+        }
+
+    def _fichier(self, lignes):
+        sortie = io.StringIO()
+        csv.writer(sortie, delimiter=';').writerows([['matricule', 'note', 'sur', 'date']] + lignes)
+        return io.BytesIO(sortie.getvalue().encode('utf-8'))
+
+    def _notes(self):
+        """Notes de l'évaluation importée (le seeder n'en crée pas de ce type)."""
+        return Note.objects.filter(eleve__in=self.eleves, type_note='EXAMEN', periode='T2')
+
+    def _importer(self, lignes, **options):
+        return importer_notes(self._fichier(lignes), nom='notes.csv', defauts=dict(self.defauts), **options)
+
+    def test_une_erreur_par_cellule(self):
+        a, b, c = (e.matricule for e in self.eleves)
+        rapport = self._importer([
+            [a, '12,5', '', ''],
+            [b, 'abc', '', '32/13/2020'],
+            ['INCONNU', '25', '', ''],
+            [c, '', '', ''],
+        ])
+        erreurs = {(e['ligne'], e['colonne'], e['valeur']) for e in rapport['erreurs']}
+        self.assertEqual(erreurs, {
+            (3, 'note', 'abc'),
+            (3, 'date', '32/13/2020'),
+            (4, 'matricule', 'INCONNU'),
+            (4, 'note', '25'),
+        })
+        self.assertEqual((rapport['lignes'], rapport['valides'], rapport['ignorees']), (4, 1, 1))
+        # Une erreur : rien n'est écrit
+        self.assertFalse(rapport['enregistre'])
+        self.assertFalse(self._notes().exists())
+
+    def test_partiel_enregistre_les_lignes_valides(self):
+        a, b, _c = (e.matricule for e in self.eleves)
+        rapport = self._importer([[a, '14', '', ''], [b, '-1', '', '']], partiel=True)
+        self.assertTrue(rapport['enregistre'])
+        self.assertEqual((rapport['crees'], len(rapport['erreurs'])), (1, 1))
+        self.assertEqual(self._notes().get().valeur, Decimal('14'))
+
+    def test_reimport_inchange(self):
+        a = self.eleves[0].matricule
+        self._importer([[a, '14', '', '']])
+        rapport = self._importer([[a, '14', '', '']])
+        self.assertEqual((rapport['crees'], rapport['mis_a_jour'], rapport['inchangees']), (0, 0, 1))
@@ -0,0 +1,86 @@
+import datetime
+from decimal import Decimal
+
+from django.test import TestCase
+from django.utils import timezone
+
+from administration.models import AnneeScolaire
+from pedagogie.models import MoyenneMatiere, Note
+from pedagogie.services import moyennes
+
+from . import etablissement
+
+
+def table():
+    """Contenu de MoyenneMatiere, comparable d'un calcul à l'autre."""
+    return sorted(MoyenneMatiere.objects.values_list(
+        'eleve_id', 'matiere_id', 'periode', 'annee_scolaire_id', 'classe_id',
+        'somme_points', 'somme_coefficients', 'nombre_notes', 'moyenne',
+    ))
+
+
+class MoyennesIncrementalesTests(TestCase):
+    """Les mises à jour relatives des signaux donnent la même table que reconstruire()."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(notes_par_matiere=2)
+        cls.annee = cls.seeder.annee
+        cls.note = Note.objects.filter(periode='T1').order_by('pk').first()
+
+    def assertIdentiqueAReconstruire(self):
+        incrementale = table()
+        moyennes.reconstruire()
+        self.assertEqual(incrementale, table())
+
+    def test_initiale(self):
+        self.assertIdentiqueAReconstruire()
+
+    def test_note_modifiee(self):
+        self.note.valeur, self.note.sur, self.note.coefficient = Decimal('7.5'), 10, Decimal('3')
+        self.note.save()
+        self.assertIdentiqueAReconstruire()
+
+    def test_note_deplacee_vers_une_autre_matiere(self):
+        autre = next(m for m in self.seeder.matieres if m.pk != self.note.matiere_id)
+        self.note.matiere = autre
+        self.note.save()
+        self.assertIdentiqueAReconstruire()
+
+    def test_note_deplacee_vers_une_autre_periode(self):
+        self.note.periode = 'T3'
+        self.note.save()
+        self.assertIdentiqueAReconstruire()
+
+    def test_suppression(self):
+        cle = {
+            'eleve_id': self.note.eleve_id, 'matiere_id': self.note.matiere_id,
+            'periode': self.note.periode,
+        }
+        self.note.delete()
+        self.assertIdentiqueAReconstruire()
+        # Dernière note de la ligne : la ligne disparaît
+        for note in Note.objects.filter(**cle):
+            note.delete()
+        self.assertFalse(MoyenneMatiere.objects.filter(**cle).exists())
+        self.assertIdentiqueAReconstruire()
+
+    def test_annee_archivee_conservee(self):
+        archivee = AnneeScolaire.objects.create(
+            nom='2010-2011', date_debut=datetime.date(2010, 9, 1),
+            date_fin=datetime.date(2011, 6, 30), est_active=False,
+        )
+        note = self.note
+        note.pk, note.annee_scolaire = None, archivee
+        note.save()
+        resume = MoyenneMatiere.objects.get(annee_scolaire=archivee)
+        self.assertEqual(resume.nombre_notes, 1)
+
+        # Archivage : notes supprimées sans signaux, résumés conservés
+        Note.objects.filter(annee_scolaire=archivee)._raw_delete('default')
+        AnneeScolaire.objects.filter(pk=archivee.pk).update(archivee_le=timezone.now())
+
+        self.assertIdentiqueAReconstruire()
+        self.assertEqual(
+            MoyenneMatiere.objects.get(annee_scolaire=archivee).somme_points, resume.somme_points,
+        )
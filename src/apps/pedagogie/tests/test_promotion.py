@@ -0,0 +1,87 @@
+from datetime import date
+
+from django.test import TestCase
+
+from administration.models import AnneeScolaire, Inscription
+from authentication.models import EleveProfile
+from pedagogie.models import Classe
+from pedagogie.services.bulletins import calculer_bulletins
+from pedagogie.services.promotion import Decision, appliquer_promotion, preparer_promotion
+
+from . import etablissement
+
+
+class PromotionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.annee = cls.seeder.annee
+        calculer_bulletins('T1', annee=cls.annee, classes=cls.seeder.classes[:2])
+        cls.suivante = AnneeScolaire.objects.create(
+            nom='suivante', date_debut=date(cls.annee.date_fin.year, 10, 1),
+            date_fin=date(cls.annee.date_fin.year + 1, 6, 30), est_active=False,
+        )
+        Classe.objects.bulk_create([
+            Classe(niveau=c.niveau, nom=c.nom, annee_scolaire=cls.suivante, capacite_max=10)
+            for c in cls.seeder.classes
+        ])
+        cls.destinations = {
+            (c.niveau, c.nom): c for c in Classe.objects.filter(annee_scolaire=cls.suivante)
+        }
+        cls.premiere, cls.seconde = cls.seeder.classes[:2]
+
+    def _eleves(self, classe):
+        return list(EleveProfile.objects.filter(classe_actuelle=classe).order_by('matricule'))
+
+    def _meme_classe(self, classe):
+        return self.destinations[classe.niveau, classe.nom]
+
+    def test_simulation_sans_ecriture(self):
+        redoublant, admis, autre = self._eleves(self.premiere)
+        plan, = preparer_promotion(
+            self.suivante, annee=self.annee, classes=[self.premiere],
+            derogations={redoublant.pk: Decision.REDOUBLEMENT, admis.pk: Decision.PASSAGE},
+        )
+
+        diff = dict(ligne.split(' : ', 1) for ligne in plan.diff())
+        self.assertEqual(len(diff), 3)
+        self.assertTrue(diff[redoublant.matricule].startswith(
+            f'{self.premiere.nom} → {self.premiere.nom} (REDOUBLEMENT, dérogation'
+        ))
+        self.assertTrue(diff[admis.matricule].startswith(
+            f'{self.premiere.nom} → {self.seconde.nom} (PASSAGE, dérogation'
+        ))
+        ligne = next(l for l in plan.lignes if l.eleve_id == autre.pk)
+        self.assertFalse(ligne.derogation)
+        self.assertEqual(ligne.decision, Decision.PASSAGE if ligne.moyenne >= 10 else Decision.REDOUBLEMENT)
+        self.assertIn(f'moyenne {ligne.moyenne}', diff[autre.matricule])
+        self.assertEqual(
+            [e.classe_actuelle_id for e in self._eleves(self.premiere)], [self.premiere.pk] * 3,
+        )
+        self.assertFalse(Inscription.objects.filter(annee_scolaire=self.suivante).exists())
+
+    def test_classe_complete_annulee_seule(self):
+        complete = self._meme_classe(self.seconde)
+        plans = preparer_promotion(
+            self.suivante, annee=self.annee, classes=[self.premiere, self.seconde],
+            derogations={
+                **{e.pk: Decision.REDOUBLEMENT for e in self._eleves(self.premiere)},
+                **{e.pk: (Decision.REDOUBLEMENT, complete.pk) for e in self._eleves(self.seconde)},
+            },
+        )
+        # Capacité réduite entre la préparation et l'application
+        Classe.objects.filter(pk=complete.pk).update(capacite_max=1)
+        restants = [e.pk for e in self._eleves(self.seconde)]
+
+        resultat = appliquer_promotion(plans, self.suivante)
+
+        self.assertEqual(resultat['eleves'], 3)
+        self.assertEqual(list(resultat['erreurs']), [self.seconde.pk])
+        promus = EleveProfile.objects.filter(classe_actuelle=self._meme_classe(self.premiere))
+        self.assertEqual(promus.count(), 3)
+        self.assertTrue(all(e.is_redoublant for e in promus))
+        self.assertEqual([e.pk for e in self._eleves(self.seconde)], restants)
+        self.assertFalse(Inscription.objects.filter(eleve_id__in=restants).exists())
+        complete.refresh_from_db()
+        self.assertEqual(complete.effectif, 0)
@@ -0,0 +1,65 @@
+from django.core.cache import cache
+from django.test import TestCase
+
+from authentication.models import EleveProfile
+from pedagogie import referentiel
+from pedagogie.models import Classe, Matiere
+from pedagogie.services import effectifs
+
+from . import etablissement
+
+
+class ReferentielTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.depart, cls.arrivee = cls.seeder.classes[:2]
+
+    def setUp(self):
+        self._recharger()
+
+    def _recharger(self):
+        cache.clear()
+        for cache_local in referentiel._caches.values():
+            cache_local.clear()
+        referentiel.warm_up()
+
+    def test_lectures_sans_requete(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(referentiel.get_classe(self.depart.pk).nom, self.depart.nom)
+            self.assertEqual(
+                set(referentiel.get_classe_map(self.seeder.annee)), {c.pk for c in self.seeder.classes},
+            )
+            matiere = self.seeder.matieres[0]
+            self.assertEqual(referentiel.get_matiere(matiere.pk).nom, matiere.nom)
+
+    def test_modification_visible_apres_commit(self):
+        matiere = Matiere.objects.get(pk=self.seeder.matieres[0].pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            matiere.nom = 'Renommée'
+            matiere.save()
+        self.assertEqual(referentiel.get_matiere(matiere.pk).nom, 'Renommée')
+
+    def test_effectif_suit_les_inscriptions(self):
+        eleve = EleveProfile.objects.filter(classe_actuelle=self.depart).first()
+        avant = referentiel.get_classe(self.arrivee.pk).nombre_eleves
+        with self.captureOnCommitCallbacks(execute=True):
+            effectifs.affecter(eleve, self.arrivee)
+        arrivee, depart = referentiel.get_classe(self.arrivee.pk), referentiel.get_classe(self.depart.pk)
+        self.assertEqual(arrivee.nombre_eleves, avant + 1)
+        self.assertEqual(arrivee.places_disponibles, arrivee.capacite_max - avant - 1)
+        self.assertEqual(
+            depart.nombre_eleves, EleveProfile.objects.filter(classe_actuelle=self.depart).count(),
+        )
+
+    def test_effectif_suit_la_reconciliation(self):
+        Classe.objects.filter(pk=self.depart.pk).update(effectif=0)
+        self._recharger()
+        self.assertEqual(referentiel.get_classe(self.depart.pk).nombre_eleves, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            effectifs.reconcilier(classes=[self.depart])
+        self.assertEqual(
+            referentiel.get_classe(self.depart.pk).nombre_eleves,
+            EleveProfile.objects.filter(classe_actuelle=self.depart).count(),
+        )
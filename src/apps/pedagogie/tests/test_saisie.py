@@ -0,0 +1,83 @@
+from datetime import timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from authentication.models import EnseignantProfile, User
+from pedagogie.models import Note
+from pedagogie.services.saisie import enregistrer_feuille
+
+from . import etablissement
+
+
+class FeuilleNotesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement()
+        cls.classe = cls.seeder.classes[0]
+        creneau = cls.seeder.slots_par_classe[cls.classe.pk][0]
+        cls.matiere = creneau.matiere
+        cls.enseignant = EnseignantProfile.objects.get(pk=creneau.enseignant_id)
+        # Même matière, aucun créneau dans la classe
+        cls.autre = EnseignantProfile.objects.filter(matieres=cls.matiere).exclude(
+            creneaux__classe=cls.classe,
+        ).first()
+        cls.eleves = [e for e in cls.seeder.eleves if e.classe_actuelle_id == cls.classe.pk]
+        cls.admin = User.objects.create_user(
+            username='admin', email='admin@test.local', password='x', role=User.RoleChoices.ADMIN,
+        )
+
+    def _feuille(self, valeur='12'):
+        return {
+            'classe': self.classe.pk,
+            'matiere': self.matiere.pk,
+            'type_note': 'EXAMEN',
+            'periode': 'T2',
+            'date_evaluation': str(self.seeder.annee.date_debut + timedelta(days=100)),
+            'notes': [{'eleve': eleve.pk, 'valeur': valeur} for eleve in self.eleves],
+        }
+
+    def _notes(self):
+        return Note.objects.filter(classe=self.classe, matiere=self.matiere, type_note='EXAMEN')
+
+    def _poster(self, user, feuille):
+        client = APIClient()
+        client.force_authenticate(user=user)
+        return client.post(reverse('pedagogie:feuille-notes'), feuille, format='json')
+
+    def test_correction_sans_enseignant_conserve_l_enseignant(self):
+        feuille = {
+            'classe': self.classe, 'matiere': self.matiere, 'type_note': 'EXAMEN', 'periode': 'T2',
+            'date_evaluation': self.seeder.annee.date_debut + timedelta(days=100),
+            'sur': Decimal('20'), 'coefficient': Decimal('1'),
+            'notes': [{'eleve': e.pk, 'valeur': Decimal('12'), 'appreciation': ''} for e in self.eleves],
+        }
+        enregistrer_feuille(feuille, enseignant=self.enseignant)
+        feuille['notes'][0]['valeur'] = Decimal('15')
+        resultat = enregistrer_feuille(feuille)
+
+        self.assertEqual(resultat['mis_a_jour'], len(self.eleves))
+        self.assertEqual(set(self._notes().values_list('enseignant_id', flat=True)), {self.enseignant.pk})
+        self.assertEqual(self._notes().get(eleve=self.eleves[0]).valeur, Decimal('15'))
+
+    def test_enseignant_de_la_classe(self):
+        reponse = self._poster(self.enseignant.user, self._feuille())
+        self.assertEqual(reponse.status_code, 201)
+        self.assertEqual(set(self._notes().values_list('enseignant_id', flat=True)), {self.enseignant.pk})
+
+    def test_enseignant_de_la_matiere_hors_de_la_classe(self):
+        self.assertIsNotNone(self.autre)
+        reponse = self._poster(self.autre.user, self._feuille())
+        self.assertEqual(reponse.status_code, 403)
+        self.assertFalse(self._notes().exists())
+
+    def test_administrateur(self):
+        self._poster(self.enseignant.user, self._feuille())
+        reponse = self._poster(self.admin, self._feuille(valeur='9'))
+        self.assertEqual(reponse.status_code, 200)
+        self.assertEqual(
+            set(self._notes().values_list('valeur', 'enseignant_id')), {(Decimal('9'), self.enseignant.pk)},
+        )
@@ -0,0 +1,75 @@
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from pedagogie.models import Note
+from pedagogie.services import saisie, statistiques
+
+from . import etablissement
+
+
+class StatistiquesCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=0)
+        cls.note = Note.objects.filter(periode='T1').order_by('pk').first()
+        cls.couple = (cls.note.classe_id, cls.note.matiere_id)
+
+    def setUp(self):
+        cache.clear()
+
+    def _stats(self, couple=None):
+        return statistiques.statistiques('T1', [couple or self.couple])[0]
+
+    def _noter(self, note, valeur):
+        with self.captureOnCommitCallbacks(execute=True):
+            note.valeur, note.sur, note.coefficient = Decimal(valeur), 20, Decimal('1')
+            note.save()
+
+    def test_lecture_depuis_le_cache(self):
+        avant = self._stats()
+        self.assertTrue(avant['effectif'])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._stats(), avant)
+
+    def test_modification_de_note_invalide(self):
+        self._stats()
+        self._noter(self.note, '20')
+        self.assertEqual(self._stats()['max'], 20.0)
+
+        self._noter(self.note, '0')
+        self.assertEqual(self._stats()['min'], 0.0)
+
+    def test_suppression_invalide(self):
+        effectif = self._stats()['effectif']
+        with self.captureOnCommitCallbacks(execute=True):
+            for note in Note.objects.filter(
+                eleve_id=self.note.eleve_id, matiere_id=self.note.matiere_id, periode='T1',
+            ):
+                note.delete()
+        self.assertEqual(self._stats()['effectif'], effectif - 1)
+
+    def test_autre_couple_reste_en_cache(self):
+        autre = Note.objects.filter(periode='T1').exclude(classe_id=self.note.classe_id).first()
+        self._stats()
+        self._noter(autre, '20')
+        with self.assertNumQueries(0):
+            self._stats()
+
+    def test_saisie_en_masse_invalide(self):
+        avant = self._stats()
+        eleves = Note.objects.filter(
+            classe_id=self.note.classe_id, matiere_id=self.note.matiere_id, periode='T1',
+        ).values_list('eleve_id', flat=True).distinct()
+        with self.captureOnCommitCallbacks(execute=True):
+            saisie.enregistrer_feuille({
+                'classe': self.note.classe, 'matiere': self.note.matiere,
+                'type_note': self.note.type_note, 'periode': 'T1',
+                'date_evaluation': self.note.date_evaluation, 'sur': 20, 'coefficient': Decimal('1'),
+                'notes': [{'eleve': pk, 'valeur': Decimal('3'), 'appreciation': ''} for pk in eleves],
+            })
+        apres = self._stats()
+        self.assertNotEqual(apres, avant)
+        self.assertEqual(apres, statistiques._calculer('T1', [self.couple])[self.couple])
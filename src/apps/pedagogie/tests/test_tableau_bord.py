@@ -0,0 +1,77 @@
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from authentication.models import ParentProfile, User
+from pedagogie import referentiel
+from pedagogie.models import EmploiDuTemps
+from pedagogie.services import tableau_bord
+
+from . import etablissement
+
+
+def _vider_caches():
+    cache.clear()
+    for cache_local in referentiel._caches.values():
+        cache_local.clear()
+
+
+class TableauBordTests(TestCase):
+    """Nombre de requêtes fixe, quel que soit le nombre de classes ou d'enfants."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = etablissement(jours_presence=5)
+        debut = cls.seeder.annee.date_debut
+        lundi = debut + timedelta(days=-debut.weekday() % 7)
+        cls.maintenant = timezone.make_aware(datetime.combine(lundi, time(10)))
+        user = User.objects.create_user(
+            username='parent-test', email='parent@test.local', password='x', role=User.RoleChoices.PARENT,
+        )
+        cls.parent = ParentProfile.objects.create(user=user)
+
+    def _requetes_a_froid(self, fonction):
+        _vider_caches()
+        with CaptureQueriesContext(connection) as requetes:
+            fonction()
+        return len(requetes)
+
+    def test_enseignant_requetes_independantes_du_nombre_de_classes(self):
+        lundi = EmploiDuTemps.objects.filter(jour='LUN')
+        moins, plus = lundi.values_list('enseignant_id', flat=True).distinct().order_by('enseignant_id')[:2]
+        # Le premier enseignant ne garde qu'une classe
+        creneau = lundi.filter(enseignant_id=moins).first()
+        EmploiDuTemps.objects.filter(enseignant_id=moins).exclude(classe_id=creneau.classe_id).delete()
+        self.assertGreater(
+            EmploiDuTemps.objects.filter(enseignant_id=plus).values('classe_id').distinct().count(), 1,
+        )
+
+        attendu = self._requetes_a_froid(
+            lambda: tableau_bord.tableau_enseignant(moins, self.maintenant)
+        )
+        _vider_caches()
+        with self.assertNumQueries(attendu):
+            document = tableau_bord.tableau_enseignant(plus, self.maintenant)
+        self.assertTrue(document['creneaux'])
+        # Relu depuis le cache
+        with self.assertNumQueries(0):
+            tableau_bord.tableau_enseignant(plus, self.maintenant)
+
+    def test_parent_requetes_independantes_du_nombre_d_enfants(self):
+        eleves = self.seeder.eleves
+        jour = self.maintenant.date()
+        self.parent.eleves.set(eleves[:1])
+        attendu = self._requetes_a_froid(lambda: tableau_bord.tableau_parent(self.parent.pk, jour))
+
+        # Cinq enfants dans cinq classes différentes
+        self.parent.eleves.set(eleves[::3][:5])
+        _vider_caches()
+        with self.assertNumQueries(attendu):
+            document = tableau_bord.tableau_parent(self.parent.pk, jour)
+        self.assertEqual(len(document['enfants']), 5)
+        with self.assertNumQueries(0):
+            tableau_bord.tableau_parent(self.parent.pk, jour)
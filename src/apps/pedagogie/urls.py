@@ -1,8 +1,52 @@
+"""
+URLs pour l'app pedagogie.
+À inclure dans le urls.py principal :
+  path('v1/pedagogie/', include('pedagogie.urls')),
+"""
 from django.urls import path
-from . import views
+from .views import (
+    AgendaIcalView,
+    AgendaView,
+    AppelView,
+    ArchiveBulletinsView,
+    ArchivePaiementsView,
+    ArchivesView,
+    DisponibilitesSalleView,
+    FeuilleNotesView,
+    ImportNotesView,
+    SallesDisponiblesView,
+    StatistiquesView,
+    TableauBordEnseignantView,
+    TableauBordParentView,
+)
 
-app_name = ""
+app_name = 'pedagogie'
 
 urlpatterns = [
-    # path(),
+    # ── Notes ────────────────────────────────────────────────────────────────
+    path('notes/feuille/',              FeuilleNotesView.as_view(),       name='feuille-notes'),
+    path('notes/import/',               ImportNotesView.as_view(),        name='import-notes'),
+
+    # ── Présences ────────────────────────────────────────────────────────────
+    path('presences/appel/',            AppelView.as_view(),              name='appel'),
+
+    # ── Statistiques ─────────────────────────────────────────────────────────
+    path('statistiques/',               StatistiquesView.as_view(),       name='statistiques'),
+
+    # ── Emplois du temps ─────────────────────────────────────────────────────
+    path('emploi-du-temps/<str:type_>/<int:pk>/',       AgendaView.as_view(),     name='agenda'),
+    path('emploi-du-temps/<str:type_>/<int:pk>/ical/',  AgendaIcalView.as_view(), name='agenda-ical'),
+
+    # ── Salles ───────────────────────────────────────────────────────────────
+    path('salles/disponibles/',              SallesDisponiblesView.as_view(),   name='salles-disponibles'),
+    path('salles/<int:pk>/disponibilites/',  DisponibilitesSalleView.as_view(), name='disponibilites-salle'),
+
+    # ── Tableaux de bord ─────────────────────────────────────────────────────
+    path('tableau-de-bord/enseignant/',      TableauBordEnseignantView.as_view(), name='tableau-enseignant'),
+    path('tableau-de-bord/parent/',          TableauBordParentView.as_view(),     name='tableau-parent'),
+
+    # ── Archives ─────────────────────────────────────────────────────────────
+    path('archives/',                                               ArchivesView.as_view(),          name='archives'),
+    path('archives/<int:annee_id>/eleves/<int:eleve_id>/bulletins/', ArchiveBulletinsView.as_view(),  name='archive-bulletins'),
+    path('archives/<int:annee_id>/eleves/<int:eleve_id>/paiements/', ArchivePaiementsView.as_view(),  name='archive-paiements'),
 ]
@@ -1,3 +1,570 @@
-from django.shortcuts import render
+"""
+Views de l'app pedagogie.
 
-# Create your views here.
+Endpoints :
+  POST /pedagogie/notes/feuille/
+      → saisie (ou correction) des notes d'une évaluation pour toute une classe
+  POST /pedagogie/notes/import/   (multipart : fichier XLSX ou CSV)
+      → import de notes depuis un tableur, erreurs par cellule
+  POST /pedagogie/presences/appel/
+      → appel d'une classe (exceptions seulement), retourne la feuille du jour
+  GET /pedagogie/statistiques/?periode=T1[&classe=<id>...][&matiere=<id>...]
+      → statistiques par classe et matière pour tout l'établissement (admin)
+  GET /pedagogie/emploi-du-temps/<classe|enseignant|salle>/<id>/
+      → emploi du temps hebdomadaire (ETag / If-None-Match)
+  GET /pedagogie/emploi-du-temps/<classe|enseignant|salle>/<id>/ical/[?jeton=...]
+      → flux iCalendar (ETag / If-None-Match)
+  GET /pedagogie/salles/disponibles/?jour=LUN|date=2025-10-06&debut=10:00&fin=12:00[&type=LABO]
+                                    [&capacite=30][&projecteur=true]...
+      → salles libres sur un créneau
+  GET /pedagogie/salles/<id>/disponibilites/[?duree=60]
+      → plages libres d'une salle sur la semaine
+  GET /pedagogie/tableau-de-bord/enseignant/[?enseignant=<id>]
+      → écran d'accueil de l'enseignant : créneaux du jour, appels, évaluations, moyennes
+  GET /pedagogie/tableau-de-bord/parent/[?parent=<id>]
+      → tous les enfants d'un parent : notes, absences du mois, factures, échéances
+  GET /pedagogie/archives/
+      → années archivées (admin)
+  GET /pedagogie/archives/<annee_id>/eleves/<eleve_id>/bulletins/
+  GET /pedagogie/archives/<annee_id>/eleves/<eleve_id>/paiements/
+      → bulletins (avec notes) et factures (avec paiements) d'une année archivée
+"""
+from django.http import Http404, HttpResponse
+from django.urls import reverse
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.authentication import CookieJWTAuthentication
+from core.archives import Archive, ArchiveError, archives_disponibles
+from core.permissions import IsAdmin, IsEnseignantOrAdmin
+
+from . import referentiel
+from .models import Note, Presence
+from .serializers import (
+    AppelSerializer, FeuilleNotesSerializer, ImportNotesSerializer, RechercheSallesSerializer,
+)
+from .services import agenda, tableau_bord
+from .services.appel import enregistrer_appel, presences_du_jour
+from .services.disponibilites import creneaux_libres, salles_libres
+from .services.import_notes import ImportNotesError, importer_notes
+from .services.saisie import enregistrer_feuille
+from .services.statistiques import statistiques_etablissement
+
+
+def _ids(request, param):
+    try:
+        return [int(v) for v in request.query_params.getlist(param)]
+    except ValueError:
+        return None
+
+
+# ─── Notes ────────────────────────────────────────────────────────────────────
+
+class FeuilleNotesView(APIView):
+    """
+    POST /pedagogie/notes/feuille/
+    Body: { "classe", "matiere", "type_note", "periode", "date_evaluation",
+            "sur"?, "coefficient"?, "notes": [{"eleve", "valeur", "appreciation"?}] }
+    Les notes existantes de la même évaluation sont mises à jour. Un
+    enseignant ne saisit que les matières qu'il enseigne dans la classe
+    (emploi du temps).
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def post(self, request):
+        serializer = FeuilleNotesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        feuille = serializer.validated_data
+
+        enseignant = getattr(request.user, 'enseignant_profile', None)
+        if enseignant is not None and not enseignant.matieres.filter(pk=feuille['matiere'].pk).exists():
+            return Response(
+                {'detail': "Vous n'enseignez pas cette matière."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+        if enseignant is not None and not enseignant.enseigne_dans(feuille['classe'], feuille['matiere']):
+            return Response(
+                {'detail': "Vous n'enseignez pas cette matière dans cette classe."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        resultat = enregistrer_feuille(feuille, enseignant=enseignant)
+        code = status.HTTP_201_CREATED if resultat['crees'] else status.HTTP_200_OK
+        return Response(resultat, status=code)
+
+
+class ImportNotesView(APIView):
+    """
+    POST /pedagogie/notes/import/   (multipart)
+    Champs : fichier, matiere?, type_note?, periode?, date_evaluation?, sur?,
+             coefficient?, partiel?, simulation?
+    Les champs servent de valeur par défaut aux colonnes absentes du fichier.
+    Rien n'est enregistré si une cellule est invalide, sauf avec partiel=true ;
+    simulation=true valide le fichier sans écrire.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def post(self, request):
+        serializer = ImportNotesSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        donnees = serializer.validated_data
+
+        enseignant = getattr(request.user, 'enseignant_profile', None)
+        matiere = donnees.get('matiere')
+        if (enseignant is not None and matiere is not None
+                and not enseignant.matieres.filter(pk=matiere.pk).exists()):
+            return Response(
+                {'detail': "Vous n'enseignez pas cette matière."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        defauts = {
+            champ: donnees.get(champ)
+            for champ in ('matiere', 'type_note', 'periode', 'date_evaluation', 'sur', 'coefficient')
+        }
+        try:
+            rapport = importer_notes(
+                donnees['fichier'],
+                defauts=defauts,
+                enseignant=enseignant,
+                partiel=donnees['partiel'],
+                simulation=donnees['simulation'],
+            )
+        except ImportNotesError as exc:
+            return Response({'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if rapport['erreurs'] and not rapport['enregistre']:
+            code = status.HTTP_400_BAD_REQUEST
+        elif rapport['crees']:
+            code = status.HTTP_201_CREATED
+        else:
+            code = status.HTTP_200_OK
+        return Response(rapport, status=code)
+
+
+# ─── Présences ────────────────────────────────────────────────────────────────
+
+class AppelView(APIView):
+    """
+    POST /pedagogie/presences/appel/
+    Body: { "classe", "date", "matiere"?, "exceptions": [{"eleve", "statut", "justification"?}] }
+    Tous les élèves de la classe sont enregistrés présents sauf les exceptions.
+    Un enseignant ne fait l'appel que des classes où il a un créneau (de la
+    matière si elle est précisée) ; l'appel de la journée est aussi ouvert
+    au professeur principal.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def post(self, request):
+        serializer = AppelSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        appel = serializer.validated_data
+
+        enseignant = getattr(request.user, 'enseignant_profile', None)
+        if enseignant is not None and not enseignant.enseigne_dans(appel['classe'], appel['matiere']):
+            return Response(
+                {'detail': "Vous n'enseignez pas dans cette classe."},
+                status=status.HTTP_403_FORBIDDEN,
+            )
+
+        enregistrer_appel(appel, utilisateur=request.user)
+        presences = presences_du_jour(appel['classe'], appel['date'], appel['matiere'])
+        resume = {statut: 0 for statut in Presence.StatutChoices.values}
+        for presence in presences:
+            resume[presence['statut']] += 1
+        return Response({
+            'classe': appel['classe'].pk,
+            'date': appel['date'],
+            'matiere': appel['matiere'].pk if appel['matiere'] else None,
+            'resume': resume,
+            'presences': presences,
+        })
+
+
+# ─── Statistiques ─────────────────────────────────────────────────────────────
+
+class StatistiquesView(APIView):
+    """
+    GET /pedagogie/statistiques/?periode=T1
+    Moyenne, médiane, écart-type, min/max, quartiles, taux de réussite et
+    histogramme de chaque couple (classe, matière) de l'année active.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        periode = request.query_params.get('periode')
+        if periode not in Note.PeriodeChoices.values:
+            return Response(
+                {'detail': 'Paramètre "periode" requis (T1, T2, T3, S1 ou S2).'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        classe_ids, matiere_ids = _ids(request, 'classe'), _ids(request, 'matiere')
+        if classe_ids is None or matiere_ids is None:
+            return Response(
+                {'detail': 'Les paramètres "classe" et "matiere" doivent être des identifiants.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        resultats = statistiques_etablissement(
+            periode, classe_ids=classe_ids, matiere_ids=matiere_ids,
+        )
+        for stats in resultats:
+            classe = referentiel.get_classe(stats['classe'])
+            matiere = referentiel.get_matiere(stats['matiere'])
+            stats['classe_nom'] = classe.nom if classe else None
+            stats['matiere_nom'] = matiere.nom if matiere else None
+        return Response({'periode': periode, 'count': len(resultats), 'results': resultats})
+
+
+# ─── Emplois du temps ─────────────────────────────────────────────────────────
+
+def _inchange(request, etag):
+    """True si le client possède déjà cette version (If-None-Match)."""
+    entete = request.headers.get('If-None-Match')
+    if not entete:
+        return False
+    etags = parse_etags(entete)
+    return '*' in etags or etag in etags
+
+
+def _non_modifie(etag):
+    reponse = HttpResponse(status=status.HTTP_304_NOT_MODIFIED)
+    reponse['ETag'] = etag
+    return reponse
+
+
+def _verifier_type(type_):
+    if type_ not in agenda.TYPES:
+        raise Http404
+
+
+class AgendaView(APIView):
+    """
+    GET /pedagogie/emploi-du-temps/<classe|enseignant|salle>/<id>/
+    Créneaux de la semaine par jour. Servi depuis le cache ; une requête
+    avec If-None-Match inchangé reçoit un 304 sans accès à la base. Le lien
+    d'abonnement iCalendar (`ical`) n'est fourni qu'aux utilisateurs qui y
+    ont droit (agenda.peut_s_abonner), null sinon.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, type_, pk):
+        _verifier_type(type_)
+        etag = agenda.etag_agenda(type_, pk)
+        if _inchange(request, etag):
+            return _non_modifie(etag)
+        document = dict(agenda.document_agenda(type_, pk))
+        document['ical'] = None
+        if agenda.peut_s_abonner(request.user, type_, pk):
+            document['ical'] = request.build_absolute_uri(
+                reverse('pedagogie:agenda-ical', args=[type_, pk])
+                + f'?jeton={agenda.jeton_abonnement(request.user, type_, pk)}'
+            )
+        reponse = Response(document)
+        reponse['ETag'] = etag
+        reponse['Cache-Control'] = 'private, no-cache'
+        return reponse
+
+
+class AgendaIcalView(APIView):
+    """
+    GET /pedagogie/emploi-du-temps/<classe|enseignant|salle>/<id>/ical/
+    Flux iCalendar (un événement hebdomadaire par créneau jusqu'à la fin
+    de l'année active). Accessible avec le cookie de session ou avec le
+    jeton d'abonnement signé fourni par AgendaView (clients calendrier),
+    tant qu'il n'a pas expiré ni été révoqué.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = []
+
+    def get(self, request, type_, pk):
+        _verifier_type(type_)
+        jeton = request.query_params.get('jeton')
+        if not (jeton and agenda.verifier_jeton(jeton, type_, pk)) and not request.user.is_authenticated:
+            return Response(
+                {'detail': "Authentification ou jeton d'abonnement requis."},
+                status=status.HTTP_401_UNAUTHORIZED,
+            )
+        etag = agenda.etag_agenda(type_, pk, format_='ics')
+        if _inchange(request, etag):
+            return _non_modifie(etag)
+        reponse = HttpResponse(agenda.ical_agenda(type_, pk), content_type='text/calendar; charset=utf-8')
+        reponse['ETag'] = etag
+        reponse['Cache-Control'] = 'private, no-cache'
+        reponse['Content-Disposition'] = f'inline; filename="emploi-du-temps-{type_}-{pk}.ics"'
+        return reponse
+
+
+# ─── Disponibilité des salles ─────────────────────────────────────────────────
+
+class SallesDisponiblesView(APIView):
+    """
+    GET /pedagogie/salles/disponibles/?jour=LUN&debut=10:00&fin=12:00
+    Salles actives libres sur le créneau, filtrées par type, capacité
+    minimale et équipements, par capacité croissante.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def get(self, request):
+        serializer = RechercheSallesSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        recherche = serializer.validated_data
+
+        salles = salles_libres(
+            recherche['jour'], recherche['debut'], recherche['fin'],
+            type_salle=recherche.get('type'),
+            capacite_min=recherche['capacite'],
+            equipements=recherche['equipements'],
+        )
+        return Response({
+            'jour': recherche['jour'],
+            'debut': recherche['debut'],
+            'fin': recherche['fin'],
+            'count': len(salles),
+            'results': [
+                {
+                    'id': salle.pk,
+                    'numero': salle.numero,
+                    'nom': salle.nom,
+                    'type': salle.type_salle,
+                    'capacite': salle.capacite,
+                    'batiment': salle.batiment,
+                    'projecteur': salle.a_projecteur,
+                    'climatisation': salle.a_climatisation,
+                    'tableau_numerique': salle.a_tableau_numerique,
+                }
+                for salle in salles
+            ],
+        })
+
+
+class DisponibilitesSalleView(APIView):
+    """
+    GET /pedagogie/salles/<id>/disponibilites/?duree=60
+    Plages libres de la salle pour chaque jour de la semaine type, pendant
+    les demi-journées de cours, d'au moins `duree` minutes.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def get(self, request, pk):
+        if referentiel.get_salle(pk) is None:
+            raise Http404
+        try:
+            duree = int(request.query_params.get('duree', 0))
+        except ValueError:
+            return Response(
+                {'detail': 'Le paramètre "duree" doit être un nombre de minutes.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        libres = creneaux_libres(pk, duree_min=duree)
+        return Response({
+            'salle': pk,
+            'jours': {
+                jour: [{'debut': f'{debut:%H:%M}', 'fin': f'{fin:%H:%M}'} for debut, fin in plages]
+                for jour, plages in libres.items()
+            },
+        })
+
+
+# ─── Tableaux de bord ─────────────────────────────────────────────────────────
+
+class TableauBordEnseignantView(APIView):
+    """
+    GET /pedagogie/tableau-de-bord/enseignant/
+    Écran d'accueil de l'enseignant connecté (un admin précise ?enseignant=<id>),
+    servi depuis le cache tant que ses classes n'ont pas changé.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsEnseignantOrAdmin]
+
+    def get(self, request):
+        enseignant = getattr(request.user, 'enseignant_profile', None)
+        if request.user.role == 'ADMIN':
+            try:
+                enseignant_id = int(request.query_params['enseignant'])
+            except (KeyError, ValueError):
+                return Response(
+                    {'detail': 'Paramètre "enseignant" requis.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        elif enseignant is None:
+            raise Http404
+        else:
+            enseignant_id = enseignant.pk
+        return Response(tableau_bord.tableau_enseignant(enseignant_id))
+
+
+class TableauBordParentView(APIView):
+    """
+    GET /pedagogie/tableau-de-bord/parent/
+    Vue d'ensemble de tous les enfants du parent connecté (un admin précise
+    ?parent=<id>), en un nombre fixe de requêtes quel que soit le nombre d'enfants.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if request.user.role == 'ADMIN':
+            try:
+                parent_id = int(request.query_params['parent'])
+            except (KeyError, ValueError):
+                return Response(
+                    {'detail': 'Paramètre "parent" requis.'},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        elif request.user.role == 'PARENT' and hasattr(request.user, 'parent_profile'):
+            parent_id = request.user.parent_profile.pk
+        else:
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        return Response(tableau_bord.tableau_parent(parent_id))
+
+
+# ─── Archives des années closes ───────────────────────────────────────────────
+
+def _peut_consulter(user, eleve_id, roles=('ADMIN',)):
+    """Rôles autorisés, l'élève lui-même ou l'un de ses parents."""
+    if user.role in roles:
+        return True
+    if user.role == 'ELEVE':
+        eleve = getattr(user, 'eleve_profile', None)
+        return eleve is not None and eleve.pk == eleve_id
+    if user.role == 'PARENT':
+        parent = getattr(user, 'parent_profile', None)
+        return parent is not None and parent.eleves.filter(pk=eleve_id).exists()
+    return False
+
+
+def _archive(annee_id):
+    try:
+        return Archive(annee_id)
+    except ArchiveError:
+        raise Http404
+
+
+class ArchivesView(APIView):
+    """
+    GET /pedagogie/archives/
+    Années archivées : tables, nombre de lignes et état de chaque archive.
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAdmin]
+
+    def get(self, request):
+        manifests = archives_disponibles()
+        return Response({
+            'count': len(manifests),
+            'results': [
+                {
+                    'annee': manifest['annee'],
+                    'etat': manifest['etat'],
+                    'cree_le': manifest['cree_le'],
+                    'tables': {label: entree['lignes'] for label, entree in manifest['tables'].items()},
+                }
+                for manifest in manifests
+            ],
+        })
+
+
+class ArchiveBulletinsView(APIView):
+    """
+    GET /pedagogie/archives/<annee_id>/eleves/<eleve_id>/bulletins/
+    Bulletins d'une année archivée avec le détail des notes, lus depuis
+    les fichiers de l'archive (lecture seule).
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, annee_id, eleve_id):
+        if not _peut_consulter(request.user, eleve_id):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        archive = _archive(annee_id)
+
+        notes = {}
+        for note in archive.lignes('pedagogie.Note', eleve_id):
+            matiere = referentiel.get_matiere(note['matiere_id'])
+            notes.setdefault(note['periode'], []).append({
+                'matiere': note['matiere_id'],
+                'matiere_nom': matiere.nom if matiere else None,
+                'type_note': note['type_note'],
+                'valeur': note['valeur'],
+                'sur': note['sur'],
+                'coefficient': note['coefficient'],
+                'date_evaluation': note['date_evaluation'],
+                'appreciation': note['appreciation'],
+            })
+        bulletins = [
+            {
+                'periode': bulletin['periode'],
+                'classe': bulletin['classe_id'],
+                'moyenne_generale': bulletin['moyenne_generale'],
+                'rang': bulletin['rang'],
+                'total_eleves': bulletin['total_eleves'],
+                'appreciation_generale': bulletin['appreciation_generale'],
+                'appreciation_prof_principal': bulletin['appreciation_prof_principal'],
+                'appreciation_directeur': bulletin['appreciation_directeur'],
+                'total_absences': bulletin['total_absences'],
+                'total_retards': bulletin['total_retards'],
+                'notes': sorted(
+                    notes.get(bulletin['periode'], []),
+                    key=lambda n: (n['matiere_nom'] or '', n['date_evaluation']),
+                ),
+            }
+            for bulletin in sorted(
+                archive.lignes('pedagogie.Bulletin', eleve_id), key=lambda b: b['periode'],
+            )
+        ]
+        return Response({'annee': archive.annee, 'eleve': eleve_id, 'bulletins': bulletins})
+
+
+class ArchivePaiementsView(APIView):
+    """
+    GET /pedagogie/archives/<annee_id>/eleves/<eleve_id>/paiements/
+    Factures d'une année archivée et leurs paiements (lecture seule).
+    """
+    authentication_classes = [CookieJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, annee_id, eleve_id):
+        if not _peut_consulter(request.user, eleve_id, roles=('ADMIN', 'COMPTABLE')):
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        archive = _archive(annee_id)
+
+        paiements = {}
+        for paiement in archive.lignes('finances.Paiement', eleve_id):
+            paiements.setdefault(paiement['facture_id'], []).append({
+                'numero_recu': paiement['numero_recu'],
+                'montant': paiement['montant'],
+                'mode_paiement': paiement['mode_paiement'],
+                'reference_transaction': paiement['reference_transaction'],
+                'date_paiement': paiement['date_paiement'],
+                'statut': paiement['statut'],
+            })
+        factures = [
+            {
+                'numero': facture['numero'],
+                'lignes': facture['lignes'],
+                'montant_total': facture['montant_total'],
+                'montant_paye': facture['montant_paye'],
+                'montant_restant': facture['montant_restant'],
+                'statut': facture['statut'],
+                'date_emission': facture['date_emission'],
+                'date_echeance': facture['date_echeance'],
+                'paiements': sorted(
+                    paiements.get(facture['id'], []), key=lambda p: p['date_paiement'],
+                ),
+            }
+            for facture in sorted(
+                archive.lignes('finances.Facture', eleve_id), key=lambda f: f['date_emission'],
+            )
+        ]
+        return Response({'annee': archive.annee, 'eleve': eleve_id, 'factures': factures})
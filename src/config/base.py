@@ -140,3 +140,40 @@ USE_TZ = True
 STATIC_URL = 'static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# ─────────────────────────────────────────────────────
+# Media (bulletins PDF, photos...)
+# ─────────────────────────────────────────────────────
+MEDIA_URL = 'media/'
+MEDIA_ROOT = Path(os.getenv('MEDIA_ROOT', BASE_DIR / 'media'))
+
+# ─────────────────────────────────────────────────────
+# Cache (mémoire locale ; Redis en production, voir settings.py)
+# ─────────────────────────────────────────────────────
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'lakoli',
+    }
+}
+
+# ─────────────────────────────────────────────────────
+# Sauvegardes (manage.py backup / restore)
+# ─────────────────────────────────────────────────────
+BACKUP_DIR = Path(os.getenv('BACKUP_DIR', BASE_DIR / 'backups'))
+
+# ─────────────────────────────────────────────────────
+# Archives des années closes (manage.py archiver_annee)
+# ─────────────────────────────────────────────────────
+ARCHIVE_DIR = Path(os.getenv('ARCHIVE_DIR', BASE_DIR / 'archives'))
+
+# ─────────────────────────────────────────────────────
+# Bulletins PDF (manage.py generer_bulletins_pdf)
+# ─────────────────────────────────────────────────────
+BULLETIN_ETABLISSEMENT = os.getenv('BULLETIN_ETABLISSEMENT', 'Lakoli')
+# Police TrueType optionnelle (chemin .ttf) ; Helvetica sinon
+BULLETIN_POLICE = os.getenv('BULLETIN_POLICE')
+
+# ─────────────────────────────────────────────────────
+# Notifications aux parents (EmailProvider en production, voir settings.py)
+# ─────────────────────────────────────────────────────
+NOTIFICATIONS_PROVIDER = 'communication.providers.FakeProvider'
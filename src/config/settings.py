@@ -21,6 +21,17 @@ DATABASES = {
     }
 }
 
+# ─────────────────────────────────────────────────────
+# Cache Redis (partagé entre workers Gunicorn et Celery)
+# ─────────────────────────────────────────────────────
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('REDIS_URL', 'redis://localhost:6379/0'),
+        'KEY_PREFIX': 'lakoli',
+    }
+}
+
 # ─────────────────────────────────────────────────────
 # Celery
 # ─────────────────────────────────────────────────────
@@ -30,6 +41,12 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = os.getenv('TIME_ZONE', 'Africa/Conakry')
+CELERY_BEAT_SCHEDULE = {
+    'digests-absences': {
+        'task': 'communication.tasks.envoyer_digests_absences',
+        'schedule': float(os.getenv('DIGESTS_ABSENCES_INTERVALLE', 30 * 60)),
+    },
+}
 
 # ─────────────────────────────────────────────────────
 # Email
@@ -40,6 +57,10 @@ EMAIL_PORT = int(os.getenv('EMAIL_PORT', 587))
 EMAIL_USE_TLS = os.getenv('EMAIL_USE_TLS', 'True') == 'True'
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD')
+DEFAULT_FROM_EMAIL = os.getenv('DEFAULT_FROM_EMAIL', EMAIL_HOST_USER or 'webmaster@localhost')
+
+# Notifications aux parents (communication.providers)
+NOTIFICATIONS_PROVIDER = os.getenv('NOTIFICATIONS_PROVIDER', 'communication.providers.EmailProvider')
 
 # ─────────────────────────────────────────────────────
 # Internationalisation
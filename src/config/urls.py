@@ -20,4 +20,5 @@ from django.urls import path, include
 urlpatterns = [
     path('admin/', admin.site.urls),
     path("v1/users/", include('authentication.urls')),
+    path("v1/pedagogie/", include('pedagogie.urls')),
 ]
@@ -0,0 +1,412 @@
+"""
+Archivage des années scolaires closes hors des tables vivantes.
+
+Format d'une archive (un répertoire ARCHIVE_DIR/annee_<id>/) :
+    manifest.json               → année, tables, colonnes, lignes, checksums, état
+    <app_label>.<model>.csv.gz  → en-tête (attnames) puis une ligne par
+                                  enregistrement, triées par élève ; NULL = \\N
+
+    manifest = archiver_annee(annee)        # export, vérification, suppression
+    Archive(annee.pk).lignes('pedagogie.note', eleve_id=12)
+
+Les notes, présences, factures et paiements de l'année sont exportés puis
+supprimés des tables vivantes ; les bulletins sont exportés sans être
+supprimés, pour que l'archive se suffise à elle-même. L'année est marquée
+(`AnneeScolaire.archivee_le`) : les reconstructions de MoyenneMatiere et
+d'AssiduiteMensuelle l'excluent.
+
+La suppression n'a lieu qu'après relecture de chaque fichier (checksum et
+nombre de lignes) et comparaison avec le nombre de lignes en base. Elle
+porte sur les identifiants lus dans l'archive, par paquets, chacun dans sa
+transaction, sans signaux : les résumés (MoyenneMatiere, AssiduiteMensuelle,
+Bulletin) gardent la trace de l'année. Une suppression interrompue se
+reprend avec `supprimer_archivees(dossier)`.
+
+Lecture par élève : l'export remet la compression à zéro (Z_FULL_FLUSH) au
+début d'un élève toutes les TAILLE_BLOC lignes environ et note dans le
+manifest (`blocs`) le premier élève et l'octet compressé de chaque point
+d'accès. `Archive.lignes` décompresse à partir du dernier point d'accès
+qui précède l'élève et s'arrête au premier élève suivant : seules ses
+lignes sont décodées, rien n'est gardé en mémoire entre deux lectures.
+"""
+import codecs
+import csv
+import datetime
+import gzip
+import io
+import json
+import zlib
+from bisect import bisect_right
+from contextlib import closing, contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection, models, transaction
+from django.utils import timezone
+
+from core.backup import _HashingWriter, _sha256
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 2
+NULL = '\\N'
+# Lignes au moins entre deux points d'accès d'un fichier (format 2)
+TAILLE_BLOC = 500
+TAILLE_LECTURE = 64 * 1024
+
+# (modèle, filtre sur l'année, supprimé des tables vivantes)
+TABLES = (
+    ('pedagogie.Bulletin', 'annee_scolaire', False),
+    ('pedagogie.Note', 'annee_scolaire', True),
+    ('pedagogie.Presence', 'classe__annee_scolaire', True),
+    ('finances.Facture', 'annee_scolaire', True),
+    ('finances.Paiement', 'facture__annee_scolaire', True),
+)
+# Les paiements avant leurs factures (clé étrangère).
+ORDRE_SUPPRESSION = ('finances.Paiement', 'finances.Facture', 'pedagogie.Note', 'pedagogie.Presence')
+
+
+class ArchiveError(Exception):
+    pass
+
+
+def get_archive_dir():
+    return Path(getattr(settings, 'ARCHIVE_DIR', settings.BASE_DIR / 'archives'))
+
+
+def dossier_annee(annee_id, racine=None):
+    return Path(racine or get_archive_dir()) / f'annee_{int(annee_id)}'
+
+
+def _fichier(label):
+    return f'{label.lower()}.csv.gz'
+
+
+def _queryset(label, filtre, annee):
+    model = apps.get_model(label)
+    return model._base_manager.filter(**{filtre: annee})
+
+
+# ─── Encodage ─────────────────────────────────────────────────────────────────
+
+def _encoder(champ, valeur):
+    if valeur is None:
+        return NULL
+    if isinstance(champ, models.JSONField):
+        return json.dumps(valeur, ensure_ascii=False, separators=(',', ':'))
+    if isinstance(valeur, (datetime.date, datetime.time)):
+        return valeur.isoformat()
+    return str(valeur)
+
+
+def _decoder(champ, valeur):
+    if valeur == NULL:
+        return None
+    if isinstance(champ, models.JSONField):
+        return json.loads(valeur)
+    return champ.to_python(valeur)
+
+
+# ─── Export ───────────────────────────────────────────────────────────────────
+
+@contextmanager
+def _instantane():
+    """
+    Transaction dont toutes les lectures voient le même état de la base.
+    PostgreSQL est en READ COMMITTED par défaut (un instantané par requête) :
+    la transaction passe en REPEATABLE READ avant sa première lecture. Dans
+    une transaction déjà ouverte, son niveau d'isolation s'applique.
+    SQLite lit toujours un seul instantané par transaction.
+    """
+    ouverte = connection.in_atomic_block
+    with transaction.atomic():
+        if connection.vendor == 'postgresql' and not ouverte:
+            with connection.cursor() as curseur:
+                curseur.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+        yield
+
+
+def _exporter_table(label, filtre, annee, dossier, chunk_size, compresslevel):
+    model = apps.get_model(label)
+    champs = model._meta.concrete_fields
+    colonnes = [f.attname for f in champs]
+    position = colonnes.index('eleve_id')
+    queryset = _queryset(label, filtre, annee).order_by('eleve_id', 'pk').values_list(*colonnes)
+
+    lignes, blocs, precedent, dans_bloc = 0, [], None, 0
+    with open(dossier / _fichier(label), 'wb') as brut:
+        empreinte = _HashingWriter(brut)
+        with gzip.GzipFile(fileobj=empreinte, mode='wb', compresslevel=compresslevel) as gz:
+            with io.TextIOWrapper(gz, encoding='utf-8', newline='') as sortie:
+                ecrivain = csv.writer(sortie)
+                ecrivain.writerow(colonnes)
+                for ligne in queryset.iterator(chunk_size=chunk_size):
+                    eleve_id = ligne[position]
+                    if (eleve_id is not None and eleve_id != precedent
+                            and (not blocs or dans_bloc >= TAILLE_BLOC)):
+                        # Point d'accès : le flux compressé repart de zéro à cet octet
+                        sortie.flush()
+                        gz.flush(zlib.Z_FULL_FLUSH)
+                        blocs.append([eleve_id, empreinte.size])
+                        dans_bloc = 0
+                    precedent = eleve_id
+                    ecrivain.writerow([_encoder(f, v) for f, v in zip(champs, ligne)])
+                    lignes += 1
+                    dans_bloc += 1
+    return {
+        'fichier': _fichier(label),
+        'colonnes': colonnes,
+        'lignes': lignes,
+        'blocs': blocs,
+        'octets': empreinte.size,
+        'sha256': empreinte.sha256.hexdigest(),
+    }
+
+
+def _iter_lignes(chemin):
+    """En-tête puis lignes brutes (chaînes) d'un fichier d'archive."""
+    with gzip.open(chemin, 'rt', encoding='utf-8', newline='') as f:
+        yield from csv.reader(f)
+
+
+def exporter_annee(annee, racine=None, chunk_size=2000, compresslevel=6):
+    """Exporte l'année dans un répertoire neuf ; retourne le manifest. Aucune suppression."""
+    if annee.est_active or annee.date_fin >= timezone.localdate():
+        raise ArchiveError(f"L'année {annee} n'est pas close.")
+    dossier = dossier_annee(annee.pk, racine)
+    if (dossier / MANIFEST).exists():
+        raise ArchiveError(f'Une archive existe déjà : {dossier}')
+    temporaire = dossier.with_name(dossier.name + '.tmp')
+    temporaire.mkdir(parents=True, exist_ok=True)
+
+    tables = {}
+    with _instantane():
+        for label, filtre, supprime in TABLES:
+            entree = _exporter_table(label, filtre, annee, temporaire, chunk_size, compresslevel)
+            entree['supprime'] = supprime
+            tables[label.lower()] = entree
+
+    manifest = {
+        'format': FORMAT_VERSION,
+        'annee': {
+            'id': annee.pk,
+            'libelle': str(annee),
+            'date_debut': annee.date_debut.isoformat(),
+            'date_fin': annee.date_fin.isoformat(),
+        },
+        'cree_le': timezone.now().isoformat(),
+        'etat': 'exporte',
+        'tables': tables,
+    }
+    (temporaire / MANIFEST).write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+    temporaire.rename(dossier)
+    return manifest
+
+
+# ─── Vérification ─────────────────────────────────────────────────────────────
+
+def lire_manifest(dossier):
+    chemin = Path(dossier) / MANIFEST
+    if not chemin.exists():
+        raise ArchiveError(f'Manifest introuvable dans {dossier}')
+    return json.loads(chemin.read_text())
+
+
+def _ecrire_manifest(dossier, manifest):
+    temporaire = Path(dossier) / (MANIFEST + '.tmp')
+    temporaire.write_text(json.dumps(manifest, ensure_ascii=False, indent=2))
+    temporaire.replace(Path(dossier) / MANIFEST)
+
+
+def verifier_archive(dossier, comparer_base=True):
+    """
+    Relit chaque fichier (checksum, nombre de lignes) et, si `comparer_base`
+    et tant que rien n'est supprimé, compare au nombre de lignes en base.
+    Retourne la liste des erreurs.
+    """
+    from administration.models import AnneeScolaire
+
+    dossier = Path(dossier)
+    manifest = lire_manifest(dossier)
+    annee = AnneeScolaire.objects.filter(pk=manifest['annee']['id']).first()
+    filtres = {label.lower(): filtre for label, filtre, _supprime in TABLES}
+    erreurs = []
+    for label, entree in manifest['tables'].items():
+        chemin = dossier / entree['fichier']
+        if not chemin.exists():
+            erreurs.append(f"{entree['fichier']} : fichier manquant")
+            continue
+        if _sha256(chemin) != entree['sha256']:
+            erreurs.append(f"{entree['fichier']} : checksum invalide")
+            continue
+        lignes = sum(1 for _ in _iter_lignes(chemin)) - 1
+        if lignes != entree['lignes']:
+            erreurs.append(f"{entree['fichier']} : {lignes} lignes au lieu de {entree['lignes']}")
+        if comparer_base and manifest['etat'] == 'exporte' and annee is not None:
+            en_base = _queryset(label, filtres[label], annee).count()
+            if en_base != entree['lignes']:
+                erreurs.append(f'{label} : {en_base} lignes en base, {entree["lignes"]} archivées')
+    return erreurs
+
+
+# ─── Suppression ──────────────────────────────────────────────────────────────
+
+def _ids_archives(dossier, entree):
+    lignes = _iter_lignes(Path(dossier) / entree['fichier'])
+    position = next(lignes).index('id')
+    for ligne in lignes:
+        yield int(ligne[position])
+
+
+def supprimer_archivees(dossier, batch_size=1000):
+    """
+    Supprime des tables vivantes les lignes présentes dans l'archive, par
+    paquets. Les lignes ajoutées après l'export ne sont pas touchées, ni les
+    lignes archivées qu'elles référencent encore (facture payée après
+    l'export) : celles-ci sont comptées dans `conservees` du manifest.
+    Retourne {label: lignes supprimées}.
+    """
+    from administration.models import AnneeScolaire
+
+    dossier = Path(dossier)
+    manifest = lire_manifest(dossier)
+    # Marquée avant la première suppression : une reconstruction des résumés
+    # ne doit jamais porter sur une année même partiellement supprimée.
+    AnneeScolaire.objects.filter(pk=manifest['annee']['id'], archivee_le__isnull=True).update(
+        archivee_le=timezone.now()
+    )
+    supprimees = {}
+    for label in ORDRE_SUPPRESSION:
+        entree = manifest['tables'][label.lower()]
+        model = apps.get_model(label)
+        total, conservees = 0, 0
+        ids = _ids_archives(dossier, entree)
+        while True:
+            paquet = [pk for _i, pk in zip(range(batch_size), ids)]
+            if not paquet:
+                break
+            with transaction.atomic():
+                queryset = model._base_manager.filter(pk__in=paquet)
+                for relation in model._meta.related_objects:
+                    queryset = queryset.exclude(**{f'{relation.name}__isnull': False})
+                # DELETE direct : ni signaux ni collecte des objets.
+                total += queryset._raw_delete(queryset.db)
+                if model._meta.related_objects:
+                    conservees += model._base_manager.filter(pk__in=paquet).count()
+        supprimees[label.lower()] = total
+        entree['supprimees'] = total
+        entree['conservees'] = conservees
+
+    manifest['etat'] = 'supprime'
+    manifest['supprime_le'] = timezone.now().isoformat()
+    _ecrire_manifest(dossier, manifest)
+    return supprimees
+
+
+def archiver_annee(annee, racine=None, supprimer=True, batch_size=1000, compresslevel=6):
+    """Export, vérification puis (si `supprimer`) suppression ; retourne le manifest."""
+    manifest = exporter_annee(annee, racine=racine, compresslevel=compresslevel)
+    dossier = dossier_annee(annee.pk, racine)
+    erreurs = verifier_archive(dossier)
+    if erreurs:
+        raise ArchiveError('Archive incohérente, rien n\'a été supprimé : ' + '; '.join(erreurs))
+    if supprimer:
+        supprimer_archivees(dossier, batch_size=batch_size)
+        manifest = lire_manifest(dossier)
+    return manifest
+
+
+# ─── Lecture ──────────────────────────────────────────────────────────────────
+
+def _lignes_depuis(chemin, octet):
+    """
+    Lignes de texte d'un fichier d'archive à partir de l'octet compressé
+    `octet` : un point d'accès (flux deflate brut) ou None pour le début du
+    fichier (en-tête gzip compris).
+    """
+    decompresseur = zlib.decompressobj(-zlib.MAX_WBITS if octet is not None else 16 + zlib.MAX_WBITS)
+    decodeur = codecs.getincrementaldecoder('utf-8')()
+    reste = ''
+    with open(chemin, 'rb') as f:
+        f.seek(octet or 0)
+        while not decompresseur.eof:
+            morceau = f.read(TAILLE_LECTURE)
+            if not morceau:
+                break
+            lignes = (reste + decodeur.decode(decompresseur.decompress(morceau))).split('\n')
+            reste = lignes.pop()
+            for ligne in lignes:
+                yield ligne + '\n'
+    reste += decodeur.decode(b'', final=True)
+    if reste:
+        yield reste
+
+
+class Archive:
+    """Accès en lecture seule à l'archive d'une année."""
+
+    def __init__(self, annee_id, racine=None):
+        self.dossier = dossier_annee(annee_id, racine)
+        self.manifest = lire_manifest(self.dossier)
+
+    @property
+    def annee(self):
+        return self.manifest['annee']
+
+    def lignes(self, label, eleve_id):
+        """Enregistrements de l'élève dans la table archivée `label` ('pedagogie.note', ...)."""
+        entree = self.manifest['tables'].get(label.lower())
+        if entree is None:
+            return []
+        blocs = entree.get('blocs')
+        if blocs is None:
+            # Archive au format 1 : lecture depuis le début du fichier
+            octet = None
+        else:
+            rang = bisect_right([premier for premier, _octet in blocs], eleve_id) - 1
+            if rang < 0:
+                return []
+            octet = blocs[rang][1]
+
+        model = apps.get_model(label)
+        colonnes = entree['colonnes']
+        champs = [next(f for f in model._meta.concrete_fields if f.attname == c) for c in colonnes]
+        position = colonnes.index('eleve_id')
+        enregistrements = []
+        with closing(_lignes_depuis(self.dossier / entree['fichier'], octet)) as source:
+            lignes = csv.reader(source)
+            if octet is None:
+                next(lignes, None)
+            for ligne in lignes:
+                if ligne[position] == NULL:
+                    continue
+                courant = int(ligne[position])
+                if courant > eleve_id:
+                    break
+                if courant == eleve_id:
+                    enregistrements.append(
+                        {c: _decoder(f, v) for c, f, v in zip(colonnes, champs, ligne)}
+                    )
+        return enregistrements
+
+
+def annees_archivees():
+    """[(id, date_debut, date_fin)] des années dont les lignes ont été supprimées."""
+    from administration.models import AnneeScolaire
+
+    return list(
+        AnneeScolaire.objects.filter(archivee_le__isnull=False)
+        .values_list('pk', 'date_debut', 'date_fin')
+    )
+
+
+def archives_disponibles(racine=None):
+    """Manifests des archives, de la plus récente à la plus ancienne."""
+    racine = Path(racine or get_archive_dir())
+    if not racine.exists():
+        return []
+    manifests = [
+        lire_manifest(dossier) for dossier in racine.iterdir()
+        if dossier.is_dir() and (dossier / MANIFEST).exists()
+    ]
+    return sorted(manifests, key=lambda m: m['annee']['date_debut'], reverse=True)
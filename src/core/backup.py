@@ -0,0 +1,452 @@
+"""
+Sauvegarde et restauration de la base, table par table.
+
+Format d'une sauvegarde (un répertoire) :
+    manifest.json                    → type, parent, watermark, fichiers, checksums
+    <app_label>.<model>.jsonl.gz     → une ligne d'en-tête (colonnes) puis une
+                                       ligne JSON (liste de valeurs) par enregistrement
+
+- Les tables sont exportées en parallèle par des processus (une table par tâche)
+  et les lignes sont lues par paquets via `iterator()` : rien n'est gardé en mémoire.
+- Sur PostgreSQL, tous les processus lisent le même instantané : le processus
+  principal ouvre une transaction REPEATABLE READ, exporte son instantané
+  (`pg_export_snapshot()`) et chaque processus l'adopte (`SET TRANSACTION
+  SNAPSHOT`). Sur un autre moteur (SQLite en développement), chaque table est
+  lue dans sa propre transaction : la sauvegarde n'est cohérente entre tables
+  que si la base n'est pas modifiée pendant l'export.
+- Une sauvegarde incrémentale ne contient, pour les modèles `TimeStampedModel`,
+  que les lignes modifiées depuis le watermark de la sauvegarde parente.
+  Les suppressions ne sont pas suivies : une restauration incrémentale
+  réapplique les lignes par upsert sur la clé primaire.
+- Les types de contenu et les permissions (NATURAL_KEYS) sont recréés par
+  `migrate` avec leurs propres clés primaires : ils sont rapprochés par clé
+  naturelle et les clés étrangères qui y pointent sont traduites.
+- Le SHA-256 de chaque fichier est calculé pendant l'écriture et vérifié
+  avant toute restauration.
+"""
+import base64
+import datetime
+import gzip
+import hashlib
+import io
+import json
+import logging
+import multiprocessing
+import os
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DEFAULT_DB_ALIAS, connection, connections, models, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.partitions import champs_conflit
+
+logger = logging.getLogger('core')
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+EXCLUDED_MODELS = {'sessions.session', 'admin.logentry'}
+# Tables remplies par `migrate` (post_migrate) : restaurées par clé naturelle,
+# dans cet ordre (une permission référence un type de contenu).
+NATURAL_KEYS = {
+    'contenttypes.contenttype': ('app_label', 'model'),
+    'auth.permission': ('content_type_id', 'codename'),
+}
+# Recouvrement entre deux incrémentales : une ligne modifiée pendant la
+# sauvegarde précédente est réexportée plutôt que perdue (l'upsert est idempotent).
+WATERMARK_OVERLAP = datetime.timedelta(minutes=5)
+
+
+class BackupError(Exception):
+    pass
+
+
+def get_backup_dir():
+    return Path(getattr(settings, 'BACKUP_DIR', settings.BASE_DIR / 'backups'))
+
+
+def backup_models():
+    """Modèles concrets sauvegardés, tables M2M comprises."""
+    return [
+        model for model in apps.get_models(include_auto_created=True)
+        if model._meta.managed
+        and not model._meta.proxy
+        and model._meta.label_lower not in EXCLUDED_MODELS
+    ]
+
+
+def _has_watermark(model):
+    try:
+        return isinstance(model._meta.get_field('updated_at'), models.DateTimeField)
+    except Exception:
+        return False
+
+
+# ─── Écriture ─────────────────────────────────────────────────────────────────
+
+class _HashingWriter(io.RawIOBase):
+    """Fichier binaire qui calcule le SHA-256 de ce qui y est écrit."""
+
+    def __init__(self, raw):
+        self.raw = raw
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, b):
+        self.sha256.update(b)
+        self.size += len(b)
+        return self.raw.write(b)
+
+
+class _Encoder(DjangoJSONEncoder):
+    def default(self, o):
+        if isinstance(o, (datetime.datetime, datetime.time)):
+            # DjangoJSONEncoder tronque aux millisecondes
+            return o.isoformat()
+        if isinstance(o, (bytes, memoryview)):
+            # BinaryField.to_python décode le base64 à la restauration
+            return base64.b64encode(bytes(o)).decode('ascii')
+        return super().default(o)
+
+
+@contextmanager
+def _snapshot():
+    """
+    Identifiant d'un instantané PostgreSQL exporté, valable tant que la
+    transaction de la connexion dédiée reste ouverte ; None ailleurs.
+    """
+    if connection.vendor != 'postgresql':
+        yield None
+        return
+    dedicated = connections.create_connection(DEFAULT_DB_ALIAS)
+    try:
+        dedicated.set_autocommit(False)
+        with dedicated.cursor() as cursor:
+            cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+            cursor.execute('SELECT pg_export_snapshot()')
+            yield cursor.fetchone()[0]
+    finally:
+        dedicated.close()
+
+
+def _dump_table(task):
+    """Exporte une table. Exécuté dans un processus du pool."""
+    label, directory, since, chunk_size, compresslevel, snapshot = task
+    with transaction.atomic():
+        if snapshot is not None:
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY')
+                cursor.execute('SET TRANSACTION SNAPSHOT %s', [snapshot])
+        result = _write_table(label, directory, since, chunk_size, compresslevel)
+    connections.close_all()
+    return result
+
+
+def _write_table(label, directory, since, chunk_size, compresslevel):
+    model = apps.get_model(label)
+    fields = [f.attname for f in model._meta.concrete_fields]
+    qs = model._base_manager.order_by('pk').values_list(*fields)
+    if since is not None and _has_watermark(model):
+        qs = qs.filter(updated_at__gte=parse_datetime(since))
+
+    filename = f'{model._meta.label_lower}.jsonl.gz'
+    start = time.perf_counter()
+    rows = 0
+    encoder = _Encoder(ensure_ascii=False, separators=(',', ':'))
+    with open(Path(directory) / filename, 'wb') as raw:
+        hashing = _HashingWriter(raw)
+        with gzip.GzipFile(fileobj=hashing, mode='wb', compresslevel=compresslevel) as gz:
+            with io.TextIOWrapper(gz, encoding='utf-8') as out:
+                out.write(encoder.encode({'model': label, 'fields': fields}) + '\n')
+                for row in qs.iterator(chunk_size=chunk_size):
+                    out.write(encoder.encode(row) + '\n')
+                    rows += 1
+    return {
+        'model': label,
+        'file': filename,
+        'rows': rows,
+        'bytes': hashing.size,
+        'sha256': hashing.sha256.hexdigest(),
+        'incremental': since is not None and _has_watermark(model),
+        'seconds': round(time.perf_counter() - start, 3),
+    }
+
+
+def _pool_initializer():
+    # Chaque processus ouvre ses propres connexions
+    import django
+    if not apps.ready:
+        django.setup()
+    connections.close_all()
+
+
+def create_backup(incremental=False, workers=None, chunk_size=2000,
+                  compresslevel=6, directory=None, models_labels=None):
+    """
+    Crée une sauvegarde complète ou incrémentale et retourne son manifest.
+    Une incrémentale prend pour parent la dernière sauvegarde valide.
+    """
+    root = Path(directory) if directory else get_backup_dir()
+    started_at = timezone.now()
+    parent = None
+    since = None
+    if incremental:
+        parent = latest_backup(root)
+        if parent is None:
+            raise BackupError('Aucune sauvegarde précédente : lancez une sauvegarde complète.')
+        manifest = read_manifest(parent)
+        since = (parse_datetime(manifest['watermark']) - WATERMARK_OVERLAP).isoformat()
+
+    kind = 'incr' if incremental else 'full'
+    target = root / f"{started_at.strftime('%Y%m%d_%H%M%S')}_{kind}"
+    target.mkdir(parents=True, exist_ok=False)
+
+    labels = models_labels or [m._meta.label for m in backup_models()]
+    workers = workers or min(len(labels), os.cpu_count() or 1)
+
+    # Les connexions ouvertes ne doivent pas être partagées avec les processus
+    # fils : le pool est créé avant la connexion qui détient l'instantané.
+    connections.close_all()
+    pool = None
+    if workers > 1:
+        method = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn'
+        pool = multiprocessing.get_context(method).Pool(workers, initializer=_pool_initializer)
+    try:
+        with _snapshot() as snapshot:
+            tasks = [(label, str(target), since, chunk_size, compresslevel, snapshot) for label in labels]
+            if pool is not None:
+                files = pool.map(_dump_table, tasks, chunksize=1)
+            else:
+                files = [_dump_table(task) for task in tasks]
+    finally:
+        if pool is not None:
+            pool.terminate()
+            pool.join()
+
+    manifest = {
+        'version': FORMAT_VERSION,
+        'type': kind,
+        'parent': parent.name if parent else None,
+        'created_at': started_at.isoformat(),
+        'watermark': started_at.isoformat(),
+        'since': since,
+        'database': connection.vendor,
+        'files': sorted(files, key=lambda f: f['model']),
+    }
+    (target / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    logger.info('Sauvegarde %s créée (%s tables)', target.name, len(files))
+    manifest['path'] = str(target)
+    return manifest
+
+
+# ─── Lecture / vérification ───────────────────────────────────────────────────
+
+def read_manifest(path):
+    manifest_path = Path(path) / MANIFEST
+    if not manifest_path.exists():
+        raise BackupError(f'Manifest introuvable dans {path}')
+    return json.loads(manifest_path.read_text())
+
+
+def latest_backup(root=None):
+    root = Path(root) if root else get_backup_dir()
+    if not root.exists():
+        return None
+    candidates = sorted(p for p in root.iterdir() if (p / MANIFEST).exists())
+    return candidates[-1] if candidates else None
+
+
+def backup_chain(path):
+    """Sauvegardes à appliquer dans l'ordre : la complète puis les incrémentales."""
+    path = Path(path)
+    chain = [path]
+    manifest = read_manifest(path)
+    while manifest['parent']:
+        path = path.parent / manifest['parent']
+        chain.append(path)
+        manifest = read_manifest(path)
+    return list(reversed(chain))
+
+
+def _sha256(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _iter_rows(path):
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        yield header
+        for line in f:
+            yield json.loads(line)
+
+
+def verify_backup(path, deep=False):
+    """
+    Vérifie les checksums (et, si `deep`, le nombre de lignes) d'une sauvegarde.
+    Retourne la liste des erreurs.
+    """
+    path = Path(path)
+    errors = []
+    for entry in read_manifest(path)['files']:
+        file_path = path / entry['file']
+        if not file_path.exists():
+            errors.append(f"{entry['file']}: fichier manquant")
+            continue
+        if _sha256(file_path) != entry['sha256']:
+            errors.append(f"{entry['file']}: checksum invalide")
+            continue
+        if deep:
+            rows = sum(1 for _ in _iter_rows(file_path)) - 1
+            if rows != entry['rows']:
+                errors.append(f"{entry['file']}: {rows} lignes au lieu de {entry['rows']}")
+    return errors
+
+
+# ─── Restauration ─────────────────────────────────────────────────────────────
+
+@contextmanager
+def _preserve_timestamps(model):
+    """Empêche auto_now/auto_now_add d'écraser les dates restaurées."""
+    patched = []
+    for field in model._meta.concrete_fields:
+        if getattr(field, 'auto_now', False) or getattr(field, 'auto_now_add', False):
+            patched.append((field, field.auto_now, field.auto_now_add))
+            field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, auto_now, auto_now_add in patched:
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _remapper(fields, remap):
+    """Convertisseurs des colonnes pointant vers une table à clé naturelle."""
+    return [
+        remap.get(f.related_model._meta.label_lower) if f.is_relation else None
+        for f in fields
+    ]
+
+
+def _load_natural(path, remap):
+    """
+    Rapproche les lignes d'une table NATURAL_KEYS de celles déjà en base
+    (créées au besoin) ; remplit remap[label] = {ancienne pk: pk actuelle}.
+    """
+    rows = _iter_rows(path)
+    header = next(rows)
+    model = apps.get_model(header['model'])
+    label = model._meta.label_lower
+    by_attname = {f.attname: f for f in model._meta.concrete_fields}
+    fields = [by_attname[name] for name in header['fields']]
+    mappers = _remapper(fields, remap)
+    pk_name = model._meta.pk.attname
+    mapping = remap.setdefault(label, {})
+    count = 0
+    for values in rows:
+        data = {
+            f.attname: (m.get(v, v) if m and v is not None else f.to_python(v) if v is not None else None)
+            for f, v, m in zip(fields, values, mappers)
+        }
+        old_pk = data.pop(pk_name)
+        key = {name: data.pop(name) for name in NATURAL_KEYS[label]}
+        obj, _created = model._base_manager.get_or_create(**key, defaults=data)
+        mapping[old_pk] = obj.pk
+        count += 1
+    return model, count
+
+
+def _load_file(path, batch_size, remap):
+    rows = _iter_rows(path)
+    header = next(rows)
+    model = apps.get_model(header['model'])
+    by_attname = {f.attname: f for f in model._meta.concrete_fields}
+    fields = [by_attname[name] for name in header['fields']]
+    mappers = _remapper(fields, remap)
+    # Table partitionnée : la clé unique inclut la clé de partition.
+    unique_fields = champs_conflit(model)
+    update_fields = [f.name for f in fields if f.name not in unique_fields]
+
+    def flush(batch):
+        if update_fields:
+            model._base_manager.bulk_create(
+                batch, update_conflicts=True,
+                unique_fields=unique_fields, update_fields=update_fields,
+            )
+        else:
+            model._base_manager.bulk_create(batch, ignore_conflicts=True)
+
+    count = 0
+    batch = []
+    with _preserve_timestamps(model):
+        for values in rows:
+            batch.append(model(**{
+                f.attname: m.get(v, v) if m and v is not None else f.to_python(v) if v is not None else None
+                for f, v, m in zip(fields, values, mappers)
+            }))
+            if len(batch) >= batch_size:
+                flush(batch)
+                count += len(batch)
+                batch = []
+        if batch:
+            flush(batch)
+            count += len(batch)
+    return model, count
+
+
+def restore_backup(path, batch_size=1000, verify=True):
+    """
+    Restaure une sauvegarde (et ses parentes si incrémentale) dans une
+    transaction unique. Les contraintes de clés étrangères sont vérifiées
+    une fois toutes les tables chargées, comme pour `loaddata`.
+    """
+    chain = backup_chain(path)
+    if verify:
+        for backup in chain:
+            errors = verify_backup(backup)
+            if errors:
+                raise BackupError(f'{backup.name} corrompue : ' + '; '.join(errors))
+
+    order = list(NATURAL_KEYS)
+    restored = {}
+    tables = set()
+    remap = {}
+    with transaction.atomic():
+        with connection.constraint_checks_disabled():
+            for backup in chain:
+                entries = sorted(
+                    read_manifest(backup)['files'],
+                    key=lambda e: order.index(e['model'].lower()) if e['model'].lower() in order else len(order),
+                )
+                for entry in entries:
+                    if entry['model'].lower() in NATURAL_KEYS:
+                        model, count = _load_natural(backup / entry['file'], remap)
+                    else:
+                        model, count = _load_file(backup / entry['file'], batch_size, remap)
+                    restored[entry['model']] = restored.get(entry['model'], 0) + count
+                    tables.add(model._meta.db_table)
+        connection.check_constraints(table_names=sorted(tables))
+        _reset_sequences(tables)
+    return restored
+
+
+def _reset_sequences(tables):
+    """Recale les séquences d'auto-incrément (PostgreSQL) après insertion des PK."""
+    table_models = [m for m in backup_models() if m._meta.db_table in tables]
+    statements = connection.ops.sequence_reset_sql(no_style(), table_models)
+    if statements:
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
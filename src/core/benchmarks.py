@@ -0,0 +1,206 @@
+"""
+Infrastructure de benchmarks de performance.
+
+Chaque app peut déclarer ses benchmarks dans un module `benchmarks.py`
+(découvert automatiquement, comme `admin.py`) :
+
+    from core.benchmarks import benchmark
+
+    @benchmark('pedagogie.notes_eleve', rounds=50)
+    def notes_eleve(ctx):
+        client = ctx.client_for(ctx.eleve.user)
+        return lambda: client.get('/v1/...')
+
+La fonction décorée prépare le scénario et retourne l'appel à mesurer.
+Les statistiques calculées reprennent celles de pytest-benchmark
+(min, max, moyenne, médiane, écart-type) et on y ajoute le nombre de
+requêtes SQL par appel, qui détecte les régressions N+1 quel que soit
+le matériel.
+"""
+import json
+import platform
+import statistics
+import subprocess
+import time
+from dataclasses import dataclass, field, asdict
+from datetime import datetime
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils.module_loading import autodiscover_modules
+
+BENCHMARKS = {}
+
+
+def benchmark(name, rounds=20, warmup=2):
+    """Enregistre un benchmark sous `name`."""
+    def decorator(func):
+        BENCHMARKS[name] = (func, rounds, warmup)
+        return func
+    return decorator
+
+
+def autodiscover():
+    autodiscover_modules('benchmarks')
+    return BENCHMARKS
+
+
+def get_results_dir():
+    return Path(getattr(settings, 'BENCHMARK_RESULTS_DIR', settings.BASE_DIR / 'benchmarks'))
+
+
+# ─── Contexte ─────────────────────────────────────────────────────────────────
+
+class BenchmarkContext:
+    """
+    Données partagées par les benchmarks, chargées une seule fois
+    depuis une base peuplée par `manage.py seed_data`.
+    """
+
+    def __init__(self):
+        from administration.models import AnneeScolaire
+        from authentication.models import User, EleveProfile, EnseignantProfile, ParentProfile
+
+        self.annee = AnneeScolaire.objects.filter(est_active=True).first()
+        self.eleve = EleveProfile.objects.select_related('user', 'classe_actuelle').filter(
+            classe_actuelle__isnull=False
+        ).first()
+        self.enseignant = EnseignantProfile.objects.select_related('user').filter(
+            creneaux__isnull=False
+        ).first()
+        self.parent = ParentProfile.objects.select_related('user').filter(
+            eleves__isnull=False
+        ).first()
+        if not (self.annee and self.eleve and self.enseignant and self.parent):
+            raise RuntimeError(
+                'Base vide : lancez `manage.py seed_data` avant les benchmarks.'
+            )
+        self.admin, _ = User.objects.get_or_create(
+            username='benchmark_admin',
+            defaults={
+                'email': 'benchmark_admin@seed.lakoli.local',
+                'role': User.RoleChoices.ADMIN,
+                'is_staff': True,
+            },
+        )
+        self.classe = self.eleve.classe_actuelle
+
+    def client_for(self, user):
+        """Client HTTP authentifié par cookie JWT comme le front."""
+        from django.test import Client
+        from authentication.services import generate_access_token, ACCESS_COOKIE
+
+        client = Client(HTTP_HOST='localhost')
+        client.cookies[ACCESS_COOKIE()] = generate_access_token(user)
+        return client
+
+
+# ─── Exécution ────────────────────────────────────────────────────────────────
+
+@dataclass
+class BenchmarkResult:
+    name: str
+    rounds: int
+    min: float
+    max: float
+    mean: float
+    median: float
+    stddev: float
+    queries: int
+    ops: float = field(init=False)
+
+    def __post_init__(self):
+        self.ops = 1 / self.mean if self.mean else 0.0
+
+
+def run_benchmark(name, func, rounds, warmup, ctx):
+    target = func(ctx)
+    for _ in range(warmup):
+        target()
+
+    with CaptureQueriesContext(connection) as queries:
+        target()
+    nb_queries = len(queries)
+
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        target()
+        timings.append(time.perf_counter() - start)
+
+    return BenchmarkResult(
+        name=name,
+        rounds=rounds,
+        min=min(timings),
+        max=max(timings),
+        mean=statistics.fmean(timings),
+        median=statistics.median(timings),
+        stddev=statistics.stdev(timings) if rounds > 1 else 0.0,
+        queries=nb_queries,
+    )
+
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True, cwd=settings.BASE_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def save_results(results, label=None):
+    """Écrit un fichier JSON horodaté et retourne son chemin."""
+    directory = get_results_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    now = datetime.now()
+    stem = now.strftime('%Y%m%d_%H%M%S') + (f'_{label}' if label else '')
+    path = directory / f'{stem}.json'
+    path.write_text(json.dumps({
+        'datetime': now.isoformat(),
+        'commit': _git_revision(),
+        'machine': {
+            'python': platform.python_version(),
+            'processor': platform.processor() or platform.machine(),
+            'database': connection.vendor,
+        },
+        'benchmarks': [asdict(r) for r in results],
+    }, indent=2))
+    return path
+
+
+def load_results(path):
+    data = json.loads(Path(path).read_text())
+    return {b['name']: b for b in data['benchmarks']}
+
+
+def latest_results_file(exclude=None):
+    files = sorted(get_results_dir().glob('*.json'))
+    files = [f for f in files if f != exclude]
+    return files[-1] if files else None
+
+
+def compare(results, reference, tolerance=0.20):
+    """
+    Compare aux résultats de référence.
+    Une régression = médiane plus lente de `tolerance` ou plus de requêtes SQL.
+    """
+    regressions = []
+    for result in results:
+        ref = reference.get(result.name)
+        if ref is None:
+            continue
+        ratio = result.median / ref['median'] if ref['median'] else 1.0
+        if ratio > 1 + tolerance:
+            regressions.append(
+                f"{result.name}: médiane {ref['median'] * 1000:.2f} ms → "
+                f"{result.median * 1000:.2f} ms (+{(ratio - 1) * 100:.0f}%)"
+            )
+        if result.queries > ref['queries']:
+            regressions.append(
+                f"{result.name}: {ref['queries']} → {result.queries} requêtes SQL"
+            )
+    return regressions
@@ -0,0 +1,109 @@
+"""
+Cache versionné à deux niveaux (processus + cache partagé).
+
+Chaque espace de noms (ex: 'annee_active') possède un numéro de version
+stocké dans le cache partagé (Redis en production). Invalider revient à
+incrémenter ce numéro : les anciennes entrées ne sont plus jamais lues et
+expirent d'elles-mêmes, sans suppression par motif.
+
+    from core.cache import bump_version, LocalCache
+
+    annees = LocalCache('annee_active')
+    annee = annees.get('active', loader=lambda: ...)   # 0 requête SQL si à jour
+    bump_version('annee_active')                        # après modification
+"""
+import threading
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+VERSION_PREFIX = 'version'
+DEFAULT_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(namespace):
+    return f'{VERSION_PREFIX}:{namespace}'
+
+
+def get_version(namespace):
+    """Version courante d'un espace de noms (initialisée si absente)."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Valeur initiale horodatée : si la clé a été évincée, on ne revient
+        # pas à une version déjà utilisée par des entrées encore présentes.
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def get_versions(namespaces):
+    """{namespace: version} en une lecture groupée du cache partagé."""
+    keys = {_version_key(ns): ns for ns in namespaces}
+    versions = {keys[k]: v for k, v in cache.get_many(list(keys)).items()}
+    for namespace in keys.values():
+        if namespace not in versions:
+            versions[namespace] = get_version(namespace)
+    return versions
+
+
+def _bump(namespace):
+    try:
+        cache.incr(_version_key(namespace))
+    except ValueError:
+        get_version(namespace)
+
+
+def bump_version(namespace, on_commit=True):
+    """
+    Invalide toutes les entrées d'un espace de noms.
+    Par défaut après le commit de la transaction en cours : un autre
+    processus ne peut pas recharger l'ancienne valeur sous la nouvelle version.
+    """
+    if on_commit:
+        transaction.on_commit(lambda: _bump(namespace))
+    else:
+        _bump(namespace)
+
+
+def versioned_key(namespace, *parts, version=None):
+    version = version if version is not None else get_version(namespace)
+    suffix = ':'.join(str(p) for p in parts)
+    return f'{namespace}:v{version}:{suffix}'
+
+
+class LocalCache:
+    """
+    Cache mémoire du processus adossé au cache partagé.
+
+    Une lecture coûte une lecture de version dans le cache partagé ; la
+    valeur est servie depuis la mémoire tant que la version n'a pas changé,
+    sinon depuis le cache partagé, et en dernier recours via `loader`.
+    """
+
+    def __init__(self, namespace, timeout=DEFAULT_TIMEOUT):
+        self.namespace = namespace
+        self.timeout = timeout
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, loader):
+        version = get_version(self.namespace)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        shared_key = versioned_key(self.namespace, key, version=version)
+        missing = object()
+        value = cache.get(shared_key, missing)
+        if value is missing:
+            value = loader()
+            cache.set(shared_key, value, self.timeout)
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,70 @@
+"""
+Archivage d'une année scolaire close (voir core/archives.py).
+
+Usage:
+    python manage.py archiver_annee 1                     # export, vérification, suppression
+    python manage.py archiver_annee 1 --sans-suppression  # export et vérification seulement
+    python manage.py archiver_annee 1 --verifier
+    python manage.py archiver_annee 1 --reprendre         # suppression interrompue
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from administration.models import AnneeScolaire
+from core.archives import (
+    ArchiveError, archiver_annee, dossier_annee, lire_manifest, supprimer_archivees,
+    verifier_archive,
+)
+
+
+class Command(BaseCommand):
+    help = "Archive les notes, présences, factures et paiements d'une année close"
+
+    def add_arguments(self, parser):
+        parser.add_argument('annee', type=int, help="ID de l'année scolaire")
+        parser.add_argument('--sans-suppression', action='store_true',
+                            help='Exporter sans supprimer les lignes des tables')
+        parser.add_argument('--verifier', action='store_true', help="Vérifier l'archive existante")
+        parser.add_argument('--reprendre', action='store_true',
+                            help="Supprimer les lignes d'une archive déjà exportée")
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--compresslevel', type=int, default=6, choices=range(1, 10))
+
+    def handle(self, *args, **options):
+        dossier = dossier_annee(options['annee'])
+        try:
+            if options['verifier']:
+                erreurs = verifier_archive(dossier)
+                for erreur in erreurs:
+                    self.stdout.write(self.style.ERROR(erreur))
+                if erreurs:
+                    raise CommandError(f'{len(erreurs)} erreur(s)')
+                self.stdout.write(self.style.SUCCESS('Archive valide.'))
+                return
+
+            if options['reprendre']:
+                erreurs = verifier_archive(dossier, comparer_base=False)
+                if erreurs:
+                    raise CommandError('; '.join(erreurs))
+                supprimer_archivees(dossier, batch_size=options['batch_size'])
+                manifest = lire_manifest(dossier)
+            else:
+                try:
+                    annee = AnneeScolaire.objects.get(pk=options['annee'])
+                except AnneeScolaire.DoesNotExist as exc:
+                    raise CommandError('Année scolaire introuvable') from exc
+                manifest = archiver_annee(
+                    annee,
+                    supprimer=not options['sans_suppression'],
+                    batch_size=options['batch_size'],
+                    compresslevel=options['compresslevel'],
+                )
+        except ArchiveError as exc:
+            raise CommandError(str(exc)) from exc
+
+        for label, entree in manifest['tables'].items():
+            supprimees = entree.get('supprimees')
+            suite = f', {supprimees} supprimées' if supprimees is not None else ''
+            if entree.get('conservees'):
+                suite += f", {entree['conservees']} conservées (référencées après l'export)"
+            self.stdout.write(f"{label:<20} {entree['lignes']:>8} lignes, {entree['octets']} octets{suite}")
+        self.stdout.write(self.style.SUCCESS(f"{manifest['annee']['libelle']} : {dossier} ({manifest['etat']})"))
@@ -0,0 +1,56 @@
+"""
+Sauvegarde de la base (voir core/backup.py).
+
+Usage:
+    python manage.py backup                      # sauvegarde complète
+    python manage.py backup --incremental        # lignes modifiées depuis la dernière
+    python manage.py backup --workers 4 --chunk-size 5000
+    python manage.py backup --verify backups/20260301_020000_full --deep
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import BackupError, create_backup, verify_backup
+
+
+class Command(BaseCommand):
+    help = 'Sauvegarde compressée, parallèle et incrémentale de la base'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--incremental', action='store_true')
+        parser.add_argument('--workers', type=int, help='Nombre de processus (défaut: nb de CPU)')
+        parser.add_argument('--chunk-size', type=int, default=2000)
+        parser.add_argument('--compresslevel', type=int, default=6, choices=range(1, 10))
+        parser.add_argument('--output', help='Répertoire racine (défaut: BACKUP_DIR)')
+        parser.add_argument('--verify', metavar='BACKUP', help='Vérifier une sauvegarde existante')
+        parser.add_argument('--deep', action='store_true', help='Avec --verify : recompter les lignes')
+
+    def handle(self, *args, **options):
+        if options['verify']:
+            try:
+                errors = verify_backup(options['verify'], deep=options['deep'])
+            except BackupError as exc:
+                raise CommandError(str(exc))
+            if errors:
+                for error in errors:
+                    self.stderr.write(self.style.ERROR(f'  {error}'))
+                raise CommandError(f'{len(errors)} erreur(s) dans la sauvegarde.')
+            self.stdout.write(self.style.SUCCESS('Sauvegarde intègre.'))
+            return
+
+        try:
+            manifest = create_backup(
+                incremental=options['incremental'],
+                workers=options['workers'],
+                chunk_size=options['chunk_size'],
+                compresslevel=options['compresslevel'],
+                directory=options['output'],
+            )
+        except BackupError as exc:
+            raise CommandError(str(exc))
+
+        rows = sum(f['rows'] for f in manifest['files'])
+        size = sum(f['bytes'] for f in manifest['files'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Sauvegarde {manifest['type']} : {manifest['path']} "
+            f"({len(manifest['files'])} tables, {rows} lignes, {size / 1024 / 1024:.1f} Mo)"
+        ))
@@ -0,0 +1,73 @@
+"""
+Lance les benchmarks déclarés dans les modules `benchmarks.py` des apps.
+
+Usage:
+    python manage.py benchmark                       # tous, compare au dernier résultat
+    python manage.py benchmark -k pedagogie          # filtre sur le nom
+    python manage.py benchmark --compare benchmarks/20260301_101500.json
+    python manage.py benchmark --label v1.2 --tolerance 0.3
+
+Les résultats sont enregistrés dans BENCHMARK_RESULTS_DIR (JSON horodaté).
+La commande échoue si une régression est détectée par rapport à la référence.
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.benchmarks import (
+    BenchmarkContext,
+    autodiscover,
+    compare,
+    latest_results_file,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+
+
+class Command(BaseCommand):
+    help = 'Exécute les benchmarks de performance et détecte les régressions'
+
+    def add_arguments(self, parser):
+        parser.add_argument('-k', dest='filter', help='Ne lancer que les benchmarks contenant ce texte')
+        parser.add_argument('--rounds', type=int, help='Forcer le nombre de mesures')
+        parser.add_argument('--compare', help='Fichier de résultats de référence')
+        parser.add_argument('--tolerance', type=float, default=0.20,
+                            help='Ralentissement toléré de la médiane (0.20 = 20%%)')
+        parser.add_argument('--label', help='Suffixe du fichier de résultats (ex: numéro de version)')
+        parser.add_argument('--no-save', action='store_true')
+
+    def handle(self, *args, **options):
+        benchmarks = {
+            name: entry for name, entry in sorted(autodiscover().items())
+            if not options['filter'] or options['filter'] in name
+        }
+        if not benchmarks:
+            raise CommandError('Aucun benchmark trouvé.')
+
+        try:
+            ctx = BenchmarkContext()
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+
+        results = []
+        self.stdout.write(f"{'benchmark':<45}{'médiane':>12}{'écart-type':>12}{'ops/s':>10}{'SQL':>6}")
+        for name, (func, rounds, warmup) in benchmarks.items():
+            result = run_benchmark(name, func, options['rounds'] or rounds, warmup, ctx)
+            results.append(result)
+            self.stdout.write(
+                f'{name:<45}{result.median * 1000:>10.2f}ms'
+                f'{result.stddev * 1000:>10.2f}ms{result.ops:>10.1f}{result.queries:>6}'
+            )
+
+        reference_file = options['compare'] or latest_results_file()
+        path = None if options['no_save'] else save_results(results, options['label'])
+        if path:
+            self.stdout.write(f'Résultats enregistrés : {path}')
+
+        if not reference_file:
+            return
+        regressions = compare(results, load_results(reference_file), options['tolerance'])
+        if regressions:
+            for line in regressions:
+                self.stderr.write(self.style.ERROR(f'  {line}'))
+            raise CommandError(f'{len(regressions)} régression(s) par rapport à {reference_file}')
+        self.stdout.write(self.style.SUCCESS(f'Aucune régression par rapport à {reference_file}'))
@@ -0,0 +1,51 @@
+"""
+Partitions PostgreSQL de Note et Presence pour une année scolaire (voir core/partitions.py).
+
+Usage:
+    python manage.py creer_partitions                 # année active et années suivantes
+    python manage.py creer_partitions --annee 3
+    python manage.py creer_partitions --liste
+"""
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from administration.models import AnneeScolaire
+from core import partitions
+
+
+class Command(BaseCommand):
+    help = "Crée les partitions des notes et des présences de l'année scolaire suivante"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--annee', type=int, action='append', dest='annees',
+                            help='ID d\'année scolaire (répétable)')
+        parser.add_argument('--liste', action='store_true', help='Affiche les partitions existantes')
+
+    def handle(self, *args, **options):
+        if not partitions.est_disponible():
+            self.stdout.write(self.style.WARNING(
+                f'Partitionnement non pris en charge par {connection.vendor} : rien à faire.'
+            ))
+            return
+
+        if options['liste']:
+            for table, partition, bornes, lignes in partitions.lister():
+                self.stdout.write(f'{table:<22} {partition:<34} {bornes:<60} ~{lignes} lignes')
+            return
+
+        if options['annees']:
+            annees = list(AnneeScolaire.objects.filter(pk__in=options['annees']))
+            if len(annees) != len(set(options['annees'])):
+                raise CommandError('Année scolaire introuvable')
+        else:
+            active = AnneeScolaire.get_annee_active()
+            if active is None:
+                raise CommandError('Aucune année scolaire active')
+            annees = list(AnneeScolaire.objects.filter(date_debut__gte=active.date_debut))
+
+        for annee in sorted(annees, key=lambda a: a.date_debut):
+            creees = partitions.creer_partitions(annee)
+            if creees:
+                self.stdout.write(self.style.SUCCESS(f"{annee} : {', '.join(creees)}"))
+            else:
+                self.stdout.write(f'{annee} : partitions déjà présentes')
@@ -0,0 +1,38 @@
+"""
+Restaure une sauvegarde créée par `manage.py backup`.
+
+Usage:
+    python manage.py restore backups/20260301_020000_full
+    python manage.py restore backups/20260308_020000_incr   # applique toute la chaîne
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from core.backup import BackupError, backup_chain, restore_backup
+
+
+class Command(BaseCommand):
+    help = 'Restaure une sauvegarde (checksums vérifiés, chargement par lots)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('backup', help='Répertoire de la sauvegarde')
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--no-verify', action='store_true', help='Ne pas vérifier les checksums')
+
+    def handle(self, *args, **options):
+        try:
+            chain = backup_chain(options['backup'])
+            self.stdout.write('Chaîne : ' + ' → '.join(p.name for p in chain))
+            restored = restore_backup(
+                options['backup'],
+                batch_size=options['batch_size'],
+                verify=not options['no_verify'],
+            )
+        except BackupError as exc:
+            raise CommandError(str(exc))
+
+        for label, count in sorted(restored.items()):
+            if count:
+                self.stdout.write(f'  {label:<45} {count:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'{sum(restored.values())} lignes restaurées.'
+        ))
@@ -0,0 +1,51 @@
+"""
+Peuple la base avec un établissement synthétique.
+
+Usage:
+    python manage.py seed_data
+    python manage.py seed_data --seed 7 --classes-par-niveau 6 --eleves-par-classe 50
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.seeding import SchoolSeeder, SeedConfig, SeedError
+
+
+class Command(BaseCommand):
+    help = "Génère un établissement complet (élèves, parents, notes, présences, factures)"
+
+    def add_arguments(self, parser):
+        defaults = SeedConfig()
+        parser.add_argument('--seed', type=int, default=defaults.seed)
+        parser.add_argument('--annee', type=int, default=defaults.annee_debut,
+                            help="Année de début de l'année scolaire (ex: 2025)")
+        parser.add_argument('--classes-par-niveau', type=int, default=defaults.classes_par_niveau)
+        parser.add_argument('--eleves-par-classe', type=int, default=defaults.eleves_par_classe)
+        parser.add_argument('--notes-par-matiere', type=int, default=defaults.notes_par_matiere,
+                            help='Notes par matière et par trimestre')
+        parser.add_argument('--jours-presence', type=int, default=defaults.jours_presence)
+        parser.add_argument('--batch-size', type=int, default=defaults.batch_size)
+
+    def handle(self, *args, **options):
+        config = SeedConfig(
+            seed=options['seed'],
+            annee_debut=options['annee'],
+            classes_par_niveau=options['classes_par_niveau'],
+            eleves_par_classe=options['eleves_par_classe'],
+            notes_par_matiere=options['notes_par_matiere'],
+            jours_presence=options['jours_presence'],
+            batch_size=options['batch_size'],
+        )
+        start = time.perf_counter()
+        try:
+            stats = SchoolSeeder(config).run()
+        except SeedError as exc:
+            raise CommandError(str(exc)) from exc
+        duration = time.perf_counter() - start
+
+        for key, count in stats.items():
+            self.stdout.write(f'  {key:<30} {count:>10}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Données générées en {duration:.1f}s (seed={config.seed}).'
+        ))
@@ -0,0 +1,268 @@
+"""
+Partitionnement natif PostgreSQL des tables qui grossissent d'année en année.
+
+    pedagogie.Note      → LIST (annee_scolaire_id) : une partition par année scolaire
+    pedagogie.Presence  → RANGE (date) : une partition par année scolaire civile,
+                          du 1er du mois PARTITION_MOIS_BASCULE (août par défaut)
+                          au même jour de l'année suivante
+
+Chaque table a aussi une partition par défaut : une écriture hors des
+partitions créées ne tombe jamais en erreur. `creer_partitions(annee)`
+crée les partitions d'une année (commande `creer_partitions`) et y déplace
+les lignes déjà rangées dans la partition par défaut.
+
+Les requêtes filtrées sur l'année (Note) ou sur une plage de dates
+(Presence) ne lisent que les partitions concernées ; leur coût ne dépend
+pas du volume des années passées.
+
+La clé primaire d'une table partitionnée inclut la clé de partition
+(id, annee_scolaire_id) : un upsert doit viser ces deux colonnes
+(`champs_conflit`). Sur un autre moteur (SQLite en développement et en
+test), toutes les fonctions sont sans effet et les tables restent simples.
+"""
+import re
+from datetime import date
+from typing import NamedTuple
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connection as default_connection
+
+MOIS_BASCULE = 8
+
+
+class Partitionnement(NamedTuple):
+    methode: str          # 'LIST' ou 'RANGE'
+    champ: str            # nom du champ Django de la clé de partition
+
+
+PARTITIONNEMENTS = {
+    'pedagogie.Note': Partitionnement('LIST', 'annee_scolaire'),
+    'pedagogie.Presence': Partitionnement('RANGE', 'date'),
+}
+
+
+def est_disponible(connection=None):
+    return (connection or default_connection).vendor == 'postgresql'
+
+
+def _q(connection, nom):
+    return connection.ops.quote_name(nom)
+
+
+def _mois_bascule():
+    return getattr(settings, 'PARTITION_MOIS_BASCULE', MOIS_BASCULE)
+
+
+# ─── Bornes ───────────────────────────────────────────────────────────────────
+
+def annee_civile(jour):
+    """Année de la partition de présence contenant `jour` (2025 pour le 3 mars 2026)."""
+    return jour.year if jour.month >= _mois_bascule() else jour.year - 1
+
+
+def partition_note(table, annee_id):
+    """(nom, clause FOR VALUES, condition SQL) de la partition de l'année `annee_id`."""
+    annee_id = int(annee_id)
+    return (
+        f'{table}_annee_{annee_id}',
+        f'FOR VALUES IN ({annee_id})',
+        f'"annee_scolaire_id" = {annee_id}',
+    )
+
+
+def partition_presence(table, annee):
+    debut = date(int(annee), _mois_bascule(), 1)
+    fin = date(int(annee) + 1, _mois_bascule(), 1)
+    return (
+        f'{table}_{int(annee)}',
+        f"FOR VALUES FROM ('{debut.isoformat()}') TO ('{fin.isoformat()}')",
+        f"\"date\" >= '{debut.isoformat()}' AND \"date\" < '{fin.isoformat()}'",
+    )
+
+
+def partitions_annee(annee_scolaire, Note=None, Presence=None):
+    """
+    Partitions d'une AnneeScolaire : [(table, nom, bornes, condition)].
+    Les modèles peuvent être passés explicitement (migrations).
+    """
+    Note = Note or apps.get_model('pedagogie', 'Note')
+    Presence = Presence or apps.get_model('pedagogie', 'Presence')
+    note, presence = Note._meta.db_table, Presence._meta.db_table
+    annees = sorted({annee_civile(annee_scolaire.date_debut), annee_civile(annee_scolaire.date_fin)})
+    return [(note, *partition_note(note, annee_scolaire.pk))] + [
+        (presence, *partition_presence(presence, annee)) for annee in annees
+    ]
+
+
+# ─── Introspection ────────────────────────────────────────────────────────────
+
+def est_partitionnee(table, connection=None):
+    connection = connection or default_connection
+    if not est_disponible(connection):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s)', [table],
+        )
+        return cursor.fetchone() is not None
+
+
+_conflits = {}
+
+
+def champs_conflit(model, connection=None):
+    """Colonnes uniques pour ON CONFLICT : la clé primaire, plus la clé de partition le cas échéant."""
+    connection = connection or default_connection
+    cle = (connection.alias, model._meta.label)
+    if cle not in _conflits:
+        spec = PARTITIONNEMENTS.get(model._meta.label)
+        champs = [model._meta.pk.name]
+        if spec and est_partitionnee(model._meta.db_table, connection):
+            champs.append(spec.champ)
+        _conflits[cle] = champs
+    return _conflits[cle]
+
+
+def lister(connection=None):
+    """[(table, partition, bornes, lignes estimées)] des tables partitionnées."""
+    connection = connection or default_connection
+    if not est_disponible(connection):
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute("""
+            SELECT parent.relname, enfant.relname,
+                   pg_get_expr(enfant.relpartbound, enfant.oid), enfant.reltuples::bigint
+            FROM pg_inherits
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            JOIN pg_class enfant ON enfant.oid = pg_inherits.inhrelid
+            WHERE parent.relkind = 'p' AND parent.relname = ANY(%s)
+            ORDER BY parent.relname, enfant.relname
+        """, [[apps.get_model(label)._meta.db_table for label in PARTITIONNEMENTS]])
+        return [(t, p, b, max(n, 0)) for t, p, b, n in cursor.fetchall()]
+
+
+# ─── Conversion d'une table ───────────────────────────────────────────────────
+
+def _definitions(cursor, table):
+    """Contraintes (unique, FK) et index hors contraintes de `table`, à recréer après copie."""
+    cursor.execute("""
+        SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint
+        WHERE conrelid = to_regclass(%s) AND contype IN ('u', 'f')
+        ORDER BY conname
+    """, [table])
+    contraintes = cursor.fetchall()
+    cursor.execute("""
+        SELECT pg_get_indexdef(ix.indexrelid) FROM pg_index ix
+        WHERE ix.indrelid = to_regclass(%s)
+          AND NOT EXISTS (SELECT 1 FROM pg_constraint c WHERE c.conindid = ix.indexrelid
+                          AND c.contype IN ('p', 'u', 'x'))
+    """, [table])
+    index = [ligne[0] for ligne in cursor.fetchall()]
+    return contraintes, index
+
+
+def _reconstruire(connection, table, partition_par=None, partitions=()):
+    """
+    Recrée `table` (partitionnée selon `partition_par` = (méthode, colonne),
+    ou simple si None) avec ses données, contraintes, index et séquence.
+    Doit s'exécuter dans une transaction : la table est verrouillée pendant la copie.
+    """
+    ancienne = f'{table}_avant_conversion'
+    q = lambda nom: _q(connection, nom)
+    with connection.cursor() as cursor:
+        contraintes, index = _definitions(cursor, table)
+        cursor.execute(f'ALTER TABLE {q(table)} RENAME TO {q(ancienne)}')
+        clause = f' PARTITION BY {partition_par[0]} ({q(partition_par[1])})' if partition_par else ''
+        cursor.execute(
+            f'CREATE TABLE {q(table)} (LIKE {q(ancienne)} INCLUDING DEFAULTS '
+            f'INCLUDING CONSTRAINTS INCLUDING IDENTITY){clause}'
+        )
+        if partition_par:
+            cursor.execute(f'CREATE TABLE {q(table + "_defaut")} PARTITION OF {q(table)} DEFAULT')
+            for nom, bornes, _condition in partitions:
+                cursor.execute(f'CREATE TABLE {q(nom)} PARTITION OF {q(table)} {bornes}')
+        cursor.execute(f'INSERT INTO {q(table)} SELECT * FROM {q(ancienne)}')
+        cursor.execute(
+            f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE(MAX(id), 1), MAX(id) IS NOT NULL) "
+            f'FROM {q(table)}',
+            [table],
+        )
+        # Supprime aussi les partitions de l'ancienne table et libère les noms d'index.
+        cursor.execute(f'DROP TABLE {q(ancienne)} CASCADE')
+
+        cle = ['id'] + ([partition_par[1]] if partition_par else [])
+        cursor.execute(
+            f'ALTER TABLE {q(table)} ADD CONSTRAINT {q(table + "_pkey")} '
+            f'PRIMARY KEY ({", ".join(q(c) for c in cle)})'
+        )
+        for nom, definition in contraintes:
+            cursor.execute(f'ALTER TABLE {q(table)} ADD CONSTRAINT {q(nom)} {definition}')
+        for definition in index:
+            cursor.execute(re.sub(r' ON (ONLY )?\S+ USING ', f' ON {q(table)} USING ', definition, count=1))
+    _conflits.clear()
+
+
+def partitionner(model, partitions=(), connection=None):
+    """Convertit la table du modèle en table partitionnée ; `partitions` : [(nom, bornes, condition)]."""
+    connection = connection or default_connection
+    table = model._meta.db_table
+    if not est_disponible(connection) or est_partitionnee(table, connection):
+        return False
+    spec = PARTITIONNEMENTS[model._meta.label]
+    colonne = model._meta.get_field(spec.champ).column
+    _reconstruire(connection, table, (spec.methode, colonne), partitions)
+    return True
+
+
+def departitionner(model, connection=None):
+    connection = connection or default_connection
+    table = model._meta.db_table
+    if not est_partitionnee(table, connection):
+        return False
+    _reconstruire(connection, table)
+    return True
+
+
+# ─── Partitions des nouvelles années ──────────────────────────────────────────
+
+def _existe(cursor, nom):
+    cursor.execute('SELECT to_regclass(%s) IS NOT NULL', [nom])
+    return cursor.fetchone()[0]
+
+
+def creer_partition(table, nom, bornes, condition, connection=None):
+    """
+    Crée la partition `nom` si elle n'existe pas. Les lignes de la partition
+    par défaut qu'elle doit contenir y sont d'abord déplacées, puis la
+    table est attachée (ATTACH refuse une partition par défaut en conflit).
+    """
+    connection = connection or default_connection
+    q = lambda n: _q(connection, n)
+    with connection.cursor() as cursor:
+        if _existe(cursor, nom):
+            return False
+        cursor.execute(f'CREATE TABLE {q(nom)} (LIKE {q(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        cursor.execute(
+            f'WITH deplacees AS (DELETE FROM {q(table + "_defaut")} WHERE {condition} RETURNING *) '
+            f'INSERT INTO {q(nom)} SELECT * FROM deplacees'
+        )
+        cursor.execute(f'ALTER TABLE {q(table)} ATTACH PARTITION {q(nom)} {bornes}')
+    return True
+
+
+def creer_partitions(annee_scolaire, connection=None):
+    """Partitions Note et Presence de l'année ; retourne les noms des partitions créées."""
+    from django.db import transaction
+
+    connection = connection or default_connection
+    if not est_disponible(connection):
+        return []
+    creees = []
+    for table, nom, bornes, condition in partitions_annee(annee_scolaire):
+        if not est_partitionnee(table, connection):
+            continue
+        with transaction.atomic(using=connection.alias):
+            if creer_partition(table, nom, bornes, condition, connection):
+                creees.append(nom)
+    return creees
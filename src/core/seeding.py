@@ -0,0 +1,516 @@
+"""
+Génération de données synthétiques à grande échelle.
+
+Construit un établissement complet (année scolaire, matières, salles,
+enseignants, classes, élèves, parents, notes, présences, factures et
+paiements) en passant exclusivement par `bulk_create`.
+
+Les signaux `post_save` ne sont donc pas déclenchés : les profils, les
+montants restants et les statuts des factures sont calculés ici, et les
+tables de synthèse (effectifs, MoyenneMatiere, AssiduiteMensuelle)
+reconstruites.
+
+Toutes les valeurs aléatoires proviennent d'un `random.Random(seed)` et
+les dates sont dérivées de l'année de départ : deux exécutions avec les
+mêmes paramètres produisent exactement les mêmes données. Les comptes
+générés ont donc les mêmes identifiants : une seconde exécution avec le
+même seed et la même année est refusée avant toute écriture (SeedError).
+"""
+import logging
+import random
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+logger = logging.getLogger('core')
+
+PRENOMS = [
+    'Mamadou', 'Fatoumata', 'Ibrahima', 'Mariama', 'Alpha', 'Aissatou',
+    'Ousmane', 'Kadiatou', 'Sekou', 'Hawa', 'Abdoulaye', 'Djenabou',
+    'Moussa', 'Fanta', 'Thierno', 'Binta', 'Lansana', 'Nènè', 'Boubacar',
+    'Saran', 'Amadou', 'Oumou', 'Mohamed', 'Aminata', 'Cellou', 'Kadia',
+]
+NOMS = [
+    'Diallo', 'Bah', 'Barry', 'Sow', 'Camara', 'Condé', 'Keita', 'Touré',
+    'Soumah', 'Sylla', 'Baldé', 'Kouyaté', 'Cissé', 'Bangoura', 'Kourouma',
+    'Beavogui', 'Traoré', 'Haba', 'Loua', 'Millimono', 'Fofana', 'Kaba',
+]
+MATIERES = [
+    ('MATH', 'Mathématiques', Decimal('4')),
+    ('FR', 'Français', Decimal('4')),
+    ('ANG', 'Anglais', Decimal('2')),
+    ('PC', 'Physique-Chimie', Decimal('3')),
+    ('SVT', 'Sciences de la vie et de la terre', Decimal('2')),
+    ('HG', 'Histoire-Géographie', Decimal('2')),
+    ('ECM', 'Éducation civique', Decimal('1')),
+    ('EPS', 'Éducation physique', Decimal('1')),
+]
+NIVEAUX = ['6EME', '5EME', '4EME', '3EME', '2NDE', '1ERE', 'TLE']
+LIBELLES_NIVEAUX = {
+    '6EME': '6ème', '5EME': '5ème', '4EME': '4ème', '3EME': '3ème',
+    '2NDE': 'Seconde', '1ERE': 'Première', 'TLE': 'Terminale',
+}
+JOURS = ['LUN', 'MAR', 'MER', 'JEU', 'VEN']
+HEURES = [(8, 10), (10, 12), (14, 16)]
+
+
+@dataclass
+class SeedConfig:
+    """Paramètres de génération"""
+    seed: int = 42
+    annee_debut: int = 2025
+    classes_par_niveau: int = 4
+    eleves_par_classe: int = 45
+    notes_par_matiere: int = 3
+    jours_presence: int = 120
+    taux_absence: float = 0.04
+    batch_size: int = 2000
+    password: str = 'lakoli-seed'
+
+
+class SeedError(Exception):
+    pass
+
+
+class SchoolSeeder:
+    """
+    Génère un établissement complet pour une année scolaire.
+
+    Usage:
+        SchoolSeeder(SeedConfig(seed=1, eleves_par_classe=50)).run()
+    """
+
+    def __init__(self, config=None):
+        self.config = config or SeedConfig()
+        self.rng = random.Random(self.config.seed)
+        self.stats = {}
+        # Un seul hachage pour tous les comptes : hacher des milliers de mots
+        # de passe dominerait sinon le temps de génération.
+        self.password_hash = make_password(self.config.password, salt=f'seed{self.config.seed}')
+
+    # ─── Orchestration ────────────────────────────────────────────────────────
+
+    @transaction.atomic
+    def run(self):
+        self._verifier_base()
+        self.annee = self._create_annee()
+        self.matieres = self._create_matieres()
+        self.salles = self._create_salles()
+        self.enseignants = self._create_enseignants()
+        self.classes = self._create_classes()
+        self.eleves = self._create_eleves()
+        self._create_parents()
+        self._create_emplois_du_temps()
+        self._create_notes()
+        self._create_presences()
+        self._create_factures_et_paiements()
+        return self.stats
+
+    def _verifier_base(self):
+        """Refuse une base contenant déjà les comptes de ce seed et de cette année."""
+        from authentication.models import User
+
+        # run() est atomique : les enseignants existent seulement si tout a été généré
+        if User.objects.filter(username__startswith=f"{self._tag('ens')}_").exists():
+            raise SeedError(
+                f'Données déjà générées avec seed={self.config.seed} et '
+                f'annee={self.config.annee_debut} : choisissez un autre --seed ou --annee, '
+                f'ou videz la base (manage.py flush).'
+            )
+
+    def _tag(self, prefix):
+        return f'{prefix}{self.config.annee_debut}s{self.config.seed}'
+
+    def _count(self, key, n):
+        self.stats[key] = self.stats.get(key, 0) + n
+        logger.info('seed: %s %s', n, key)
+
+    def _bulk(self, model, objs):
+        created = model.objects.bulk_create(objs, batch_size=self.config.batch_size)
+        self._count(model._meta.verbose_name_plural, len(created))
+        return created
+
+    def _nom_complet(self):
+        return self.rng.choice(PRENOMS), self.rng.choice(NOMS)
+
+    def _create_users(self, role, prefix, count):
+        """Crée `count` utilisateurs et les relit pour récupérer leurs PK."""
+        from authentication.models import User
+
+        tag = self._tag(prefix)
+        users = []
+        for i in range(count):
+            first_name, last_name = self._nom_complet()
+            username = f'{tag}_{i:05d}'
+            users.append(User(
+                username=username,
+                email=f'{username}@seed.lakoli.local',
+                first_name=first_name,
+                last_name=last_name,
+                role=role,
+                password=self.password_hash,
+                phone=f'+2246{self.rng.randint(20000000, 69999999)}',
+            ))
+        User.objects.bulk_create(users, batch_size=self.config.batch_size)
+        self._count('utilisateurs', count)
+        # bulk_create ne renvoie pas les PK sur tous les SGBD
+        return list(User.objects.filter(username__startswith=f'{tag}_').order_by('username'))
+
+    # ─── Référentiels ─────────────────────────────────────────────────────────
+
+    def _create_annee(self):
+        from administration.models import AnneeScolaire
+
+        y = self.config.annee_debut
+        annee, _ = AnneeScolaire.objects.update_or_create(
+            nom=f'{y}-{y + 1}',
+            defaults={
+                'date_debut': date(y, 10, 1),
+                'date_fin': date(y + 1, 6, 30),
+                'systeme_evaluation': 'TRIMESTRE',
+                'trimestre1_debut': date(y, 10, 1),
+                'trimestre1_fin': date(y, 12, 20),
+                'trimestre2_debut': date(y + 1, 1, 5),
+                'trimestre2_fin': date(y + 1, 3, 31),
+                'trimestre3_debut': date(y + 1, 4, 10),
+                'trimestre3_fin': date(y + 1, 6, 30),
+                'est_active': True,
+            },
+        )
+        self._count('années scolaires', 1)
+        return annee
+
+    def _create_matieres(self):
+        from pedagogie.models import Matiere
+
+        matieres = []
+        for code, nom, coef in MATIERES:
+            matiere, _ = Matiere.objects.get_or_create(
+                code=code, defaults={'nom': nom, 'coefficient': coef}
+            )
+            matieres.append(matiere)
+        self._count('matières', len(matieres))
+        return matieres
+
+    def _create_salles(self):
+        from administration.models import Salle
+
+        total = len(NIVEAUX) * self.config.classes_par_niveau
+        existing = set(Salle.objects.values_list('numero', flat=True))
+        salles = [
+            Salle(
+                numero=f'S{i + 1:03d}',
+                type_salle=Salle.TypeSalleChoices.CLASSE,
+                capacite=max(self.config.eleves_par_classe, 40),
+                batiment=f'Bâtiment {chr(65 + i // 10)}',
+                a_projecteur=self.rng.random() < 0.3,
+            )
+            for i in range(total)
+            if f'S{i + 1:03d}' not in existing
+        ]
+        self._bulk(Salle, salles)
+        return list(Salle.objects.filter(numero__startswith='S').order_by('numero')[:total])
+
+    def _create_enseignants(self):
+        from authentication.models import EnseignantProfile
+
+        par_matiere = max(2, self.config.classes_par_niveau)
+        users = self._create_users('ENSEIGNANT', 'ens', len(self.matieres) * par_matiere)
+        debut = date(self.config.annee_debut - 10, 9, 1)
+        self._bulk(EnseignantProfile, [
+            EnseignantProfile(
+                user=user,
+                specialite=self.matieres[i % len(self.matieres)].nom,
+                date_embauche=debut + timedelta(days=self.rng.randint(0, 3000)),
+            )
+            for i, user in enumerate(users)
+        ])
+        enseignants = list(
+            EnseignantProfile.objects.filter(user__in=users).order_by('user__username')
+        )
+        Through = EnseignantProfile.matieres.through
+        self._bulk(Through, [
+            Through(enseignantprofile_id=ens.pk, matiere_id=self.matieres[i % len(self.matieres)].pk)
+            for i, ens in enumerate(enseignants)
+        ])
+        self.enseignants_par_matiere = {}
+        for i, ens in enumerate(enseignants):
+            self.enseignants_par_matiere.setdefault(
+                self.matieres[i % len(self.matieres)].pk, []
+            ).append(ens)
+        return enseignants
+
+    def _create_classes(self):
+        from pedagogie.models import Classe
+
+        classes = []
+        for n, niveau in enumerate(NIVEAUX):
+            for k in range(self.config.classes_par_niveau):
+                index = n * self.config.classes_par_niveau + k
+                classes.append(Classe(
+                    niveau=niveau,
+                    nom=f'{LIBELLES_NIVEAUX[niveau]} {chr(65 + k)}',
+                    annee_scolaire=self.annee,
+                    capacite_max=min(100, self.config.eleves_par_classe + 5),
+                    salle=self.salles[index] if index < len(self.salles) else None,
+                    professeur_principal=self.enseignants[index % len(self.enseignants)],
+                ))
+        self._bulk(Classe, classes)
+        return list(Classe.objects.filter(annee_scolaire=self.annee).order_by('pk'))
+
+    # ─── Élèves et parents ────────────────────────────────────────────────────
+
+    def _create_eleves(self):
+        from authentication.models import EleveProfile
+
+        total = len(self.classes) * self.config.eleves_par_classe
+        users = self._create_users('ELEVE', 'el', total)
+        y = self.config.annee_debut
+        # Même format que core.utils.generate_matricule, sans requête par élève
+        last = EleveProfile.objects.filter(
+            matricule__startswith=f'{y}/'
+        ).order_by('-matricule').values_list('matricule', flat=True).first()
+        start = int(last.split('/')[1]) + 1 if last else 1
+
+        profiles = []
+        for i, user in enumerate(users):
+            first_name, last_name = self._nom_complet()
+            profiles.append(EleveProfile(
+                user=user,
+                matricule=f'{y}/{start + i:03d}/EL',
+                classe_actuelle=self.classes[i // self.config.eleves_par_classe],
+                contact_urgence_nom=f'{first_name} {user.last_name}',
+                contact_urgence_phone=user.phone,
+                contact_urgence_relation=self.rng.choice(['Père', 'Mère', 'Tuteur']),
+                is_redoublant=self.rng.random() < 0.08,
+                date_admission=date(y - self.rng.randint(0, 5), 10, 1),
+            ))
+        self._bulk(EleveProfile, profiles)
+        # bulk_create n'envoie pas post_save : compteurs Classe.effectif recalculés
+        from pedagogie.services.effectifs import reconcilier
+        reconcilier(self.classes)
+        return list(
+            EleveProfile.objects.filter(user__in=users)
+            .select_related('classe_actuelle')
+            .order_by('user__username')
+        )
+
+    def _create_parents(self):
+        from authentication.models import ParentProfile
+
+        # Fratries : un parent a entre un et trois enfants
+        groupes, i = [], 0
+        while i < len(self.eleves):
+            taille = self.rng.choice([1, 1, 1, 2, 2, 3])
+            groupes.append(self.eleves[i:i + taille])
+            i += taille
+
+        users = self._create_users('PARENT', 'par', len(groupes))
+        self._bulk(ParentProfile, [
+            ParentProfile(user=user, relation=self.rng.choice(['PERE', 'MERE', 'TUTEUR']))
+            for user in users
+        ])
+        parents = list(ParentProfile.objects.filter(user__in=users).order_by('user__username'))
+        Through = ParentProfile.eleves.through
+        self._bulk(Through, [
+            Through(parentprofile_id=parent.pk, eleveprofile_id=eleve.pk)
+            for parent, groupe in zip(parents, groupes)
+            for eleve in groupe
+        ])
+
+    # ─── Pédagogie ────────────────────────────────────────────────────────────
+
+    def _create_emplois_du_temps(self):
+        from datetime import time
+        from pedagogie.models import EmploiDuTemps
+
+        creneaux = [(jour, h) for jour in JOURS for h in HEURES]
+        occupes = set()  # (enseignant, jour, heure) déjà pris
+        slots = []
+        for c, classe in enumerate(self.classes):
+            for i, (jour, (debut, fin)) in enumerate(creneaux):
+                # Décalage par classe pour répartir les matières d'un même créneau
+                matiere = self.matieres[(i + c) % len(self.matieres)]
+                candidats = [
+                    e for e in self.enseignants_par_matiere[matiere.pk]
+                    if (e.pk, jour, debut) not in occupes
+                ]
+                if not candidats:
+                    continue
+                enseignant = candidats[0]
+                occupes.add((enseignant.pk, jour, debut))
+                slots.append(EmploiDuTemps(
+                    classe=classe,
+                    matiere=matiere,
+                    enseignant=enseignant,
+                    jour=jour,
+                    heure_debut=time(debut),
+                    heure_fin=time(fin),
+                    salle=classe.salle,
+                ))
+        self._bulk(EmploiDuTemps, slots)
+        self.slots_par_classe = {}
+        for slot in slots:
+            self.slots_par_classe.setdefault(slot.classe_id, []).append(slot)
+
+    def _periodes(self):
+        a = self.annee
+        return [
+            ('T1', a.trimestre1_debut, a.trimestre1_fin),
+            ('T2', a.trimestre2_debut, a.trimestre2_fin),
+            ('T3', a.trimestre3_debut, a.trimestre3_fin),
+        ]
+
+    def _create_notes(self):
+        from pedagogie.models import Note
+
+        types = ['INTERRO', 'DEVOIR', 'COMPOSITION']
+        enseignant_de = {
+            (slot.classe_id, slot.matiere_id): slot.enseignant_id
+            for slots in self.slots_par_classe.values()
+            for slot in slots
+        }
+        notes = []
+        for eleve in self.eleves:
+            classe_id = eleve.classe_actuelle_id
+            # Chaque élève a un « niveau » propre pour des moyennes réalistes
+            niveau = self.rng.gauss(11.5, 2.5)
+            for periode, debut, fin in self._periodes():
+                for matiere in self.matieres:
+                    for k in range(self.config.notes_par_matiere):
+                        valeur = min(20.0, max(0.0, self.rng.gauss(niveau, 3.0)))
+                        notes.append(Note(
+                            eleve_id=eleve.pk,
+                            matiere_id=matiere.pk,
+                            classe_id=classe_id,
+                            annee_scolaire_id=self.annee.pk,
+                            type_note=types[k % len(types)],
+                            periode=periode,
+                            valeur=Decimal(f'{valeur:.2f}'),
+                            coefficient=Decimal('2') if types[k % len(types)] == 'COMPOSITION' else Decimal('1'),
+                            enseignant_id=enseignant_de.get((classe_id, matiere.pk)),
+                            date_evaluation=debut + timedelta(
+                                days=self.rng.randint(0, (fin - debut).days)
+                            ),
+                        ))
+                if len(notes) >= self.config.batch_size * 5:
+                    self._bulk(Note, notes)
+                    notes = []
+        self._bulk(Note, notes)
+
+        # bulk_create n'envoie pas post_save : MoyenneMatiere est reconstruite ici.
+        from pedagogie.services import moyennes
+        self._count('moyennes par matière', moyennes.reconstruire(annee_scolaire_id=self.annee.pk))
+
+    def _create_presences(self):
+        from pedagogie.models import Presence
+
+        jours, jour = [], self.annee.date_debut
+        while len(jours) < self.config.jours_presence and jour <= self.annee.date_fin:
+            if jour.weekday() < 5:
+                jours.append(jour)
+            jour += timedelta(days=1)
+
+        presences = []
+        for eleve in self.eleves:
+            assiduite = self.rng.random()
+            for jour in jours:
+                tirage = self.rng.random()
+                if tirage < self.config.taux_absence * (0.5 + assiduite):
+                    statut = self.rng.choice(['ABSENT', 'ABSENT', 'ABSENT_J'])
+                elif tirage < self.config.taux_absence * 2:
+                    statut = 'RETARD'
+                else:
+                    statut = 'PRESENT'
+                presences.append(Presence(
+                    eleve_id=eleve.pk,
+                    classe_id=eleve.classe_actuelle_id,
+                    date=jour,
+                    statut=statut,
+                    notification_envoyee=statut == 'PRESENT',
+                ))
+            if len(presences) >= self.config.batch_size * 5:
+                self._bulk(Presence, presences)
+                presences = []
+        self._bulk(Presence, presences)
+
+        from pedagogie.services import assiduite
+        self._count('assiduités mensuelles', assiduite.reconstruire(
+            eleve_id__in=[eleve.pk for eleve in self.eleves],
+        ))
+
+    # ─── Finances ─────────────────────────────────────────────────────────────
+
+    def _create_factures_et_paiements(self):
+        from finances.models import FraisScolaire, Facture, Paiement
+        from finances.services import allouer_numeros
+
+        y = self.config.annee_debut
+        frais, _ = FraisScolaire.objects.get_or_create(
+            nom=f'Frais de scolarité {self.annee.nom}',
+            annee_scolaire=self.annee,
+            defaults={
+                'type_frais': 'SCOLARITE',
+                'montant': Decimal('1500000'),
+                'montant_par_niveau': {'2NDE': 1800000, '1ERE': 1800000, 'TLE': 2100000},
+                'date_limite_1ere_tranche': date(y, 10, 31),
+                'date_limite_2eme_tranche': date(y + 1, 1, 31),
+                'date_limite_3eme_tranche': date(y + 1, 4, 30),
+            },
+        )
+        self._count('frais scolaires', 1)
+
+        numeros = allouer_numeros(
+            Facture.PREFIXE_NUMERO, y, len(self.eleves), source=(Facture, 'numero')
+        )
+        factures, tranches = [], {}
+        for i, eleve in enumerate(self.eleves):
+            montant = frais.get_montant_pour_niveau(eleve.classe_actuelle.niveau)
+            tranches[eleve.pk] = self.rng.choice([0, 1, 1, 2, 3, 3])
+            paye = (montant / 3 * tranches[eleve.pk]).quantize(Decimal('1'))
+            restant = montant - paye
+            # Même logique que Facture.save(), non appelée par bulk_create
+            if restant <= 0:
+                statut = Facture.StatutChoices.PAYEE
+            elif paye > 0:
+                statut = Facture.StatutChoices.PARTIELLEMENT_PAYEE
+            else:
+                statut = Facture.StatutChoices.EMISE
+            factures.append(Facture(
+                numero=numeros[i],
+                eleve_id=eleve.pk,
+                annee_scolaire=self.annee,
+                lignes=[{'frais_id': frais.pk, 'designation': frais.nom, 'montant': float(montant)}],
+                montant_total=montant,
+                montant_paye=paye,
+                montant_restant=restant,
+                statut=statut,
+                date_emission=date(y, 10, 1),
+                date_echeance=date(y + 1, 4, 30),
+            ))
+        self._bulk(Facture, factures)
+
+        modes = ['ESPECES', 'ORANGE', 'MTN', 'VIREMENT']
+        echeances = [date(y, 10, 31), date(y + 1, 1, 31), date(y + 1, 4, 30)]
+        paiements = []
+        for facture in Facture.objects.filter(
+            annee_scolaire=self.annee, eleve_id__in=tranches
+        ).order_by('numero'):
+            for t in range(tranches[facture.eleve_id]):
+                paiements.append(Paiement(
+                    facture_id=facture.pk,
+                    eleve_id=facture.eleve_id,
+                    montant=(facture.montant_total / 3).quantize(Decimal('1')),
+                    mode_paiement=self.rng.choice(modes),
+                    statut=Paiement.StatutChoices.VALIDE,
+                    notes=f'Tranche {t + 1} (échéance {echeances[t]})',
+                ))
+        numeros = allouer_numeros(
+            Paiement.PREFIXE_NUMERO, y, len(paiements), source=(Paiement, 'numero_recu')
+        )
+        for paiement, numero in zip(paiements, numeros):
+            paiement.numero_recu = numero
+        self._bulk(Paiement, paiements)
@@ -0,0 +1,117 @@
+import json
+import shutil
+import tempfile
+from unittest import mock
+
+from django.test import TestCase
+
+from administration.models import AnneeScolaire
+from core.archives import (
+    MANIFEST, Archive, ArchiveError, archiver_annee, dossier_annee, lire_manifest,
+    supprimer_archivees, verifier_archive,
+)
+from core.seeding import SchoolSeeder, SeedConfig
+from finances.models import Facture, Paiement
+from pedagogie.models import MoyenneMatiere, Note, Presence
+from pedagogie.services import moyennes
+
+
+class ArchivesTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.seeder = SchoolSeeder(SeedConfig(
+            annee_debut=2020, classes_par_niveau=1, eleves_par_classe=2, jours_presence=5,
+        ))
+        cls.seeder.run()
+        cls.annee = cls.seeder.annee
+        AnneeScolaire.objects.filter(pk=cls.annee.pk).update(est_active=False)
+        cls.annee.refresh_from_db()
+
+    def setUp(self):
+        self.racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.racine, ignore_errors=True)
+
+    def _notes(self, eleve_id):
+        return sorted(
+            Note.objects.filter(eleve_id=eleve_id).values(
+                'id', 'matiere_id', 'periode', 'valeur', 'sur', 'coefficient', 'date_evaluation',
+            ),
+            key=lambda note: note['id'],
+        )
+
+    def test_aller_retour(self):
+        eleve_id = self.seeder.eleves[0].pk
+        avant = self._notes(eleve_id)
+        resumes = MoyenneMatiere.objects.filter(annee_scolaire=self.annee).count()
+        self.assertTrue(avant)
+
+        manifest = archiver_annee(self.annee, racine=self.racine)
+
+        self.assertEqual(manifest['etat'], 'supprime')
+        self.assertFalse(Note.objects.filter(annee_scolaire=self.annee).exists())
+        self.assertFalse(Presence.objects.filter(classe__annee_scolaire=self.annee).exists())
+        self.assertFalse(Facture.objects.filter(annee_scolaire=self.annee).exists())
+        self.assertEqual(verifier_archive(dossier_annee(self.annee.pk, self.racine), comparer_base=False), [])
+
+        archivees = Archive(self.annee.pk, racine=self.racine).lignes('pedagogie.Note', eleve_id)
+        self.assertEqual(
+            sorted(({k: n[k] for k in avant[0]} for n in archivees), key=lambda note: note['id']),
+            avant,
+        )
+        # Les résumés de l'année archivée survivent à une reconstruction
+        self.annee.refresh_from_db()
+        self.assertIsNotNone(self.annee.archivee_le)
+        moyennes.reconstruire()
+        self.assertEqual(MoyenneMatiere.objects.filter(annee_scolaire=self.annee).count(), resumes)
+
+    def test_lecture_par_points_d_acces(self):
+        par_eleve = {eleve.pk: self._notes(eleve.pk) for eleve in self.seeder.eleves}
+        with mock.patch('core.archives.TAILLE_BLOC', 5):
+            archiver_annee(self.annee, racine=self.racine)
+        dossier = dossier_annee(self.annee.pk, self.racine)
+        manifest = lire_manifest(dossier)
+        self.assertGreater(len(manifest['tables']['pedagogie.note']['blocs']), 1)
+
+        def lues(archive, eleve_id):
+            cles = par_eleve[eleve_id][0]
+            return sorted(
+                ({k: n[k] for k in cles} for n in archive.lignes('pedagogie.Note', eleve_id)),
+                key=lambda note: note['id'],
+            )
+
+        archive = Archive(self.annee.pk, racine=self.racine)
+        for eleve_id, notes in par_eleve.items():
+            self.assertEqual(lues(archive, eleve_id), notes)
+        self.assertEqual(archive.lignes('pedagogie.Note', 0), [])
+        self.assertEqual(archive.lignes('pedagogie.Note', max(par_eleve) + 1), [])
+
+        # Archive au format 1 (sans points d'accès) : lecture depuis le début
+        for entree in manifest['tables'].values():
+            del entree['blocs']
+        (dossier / MANIFEST).write_text(json.dumps(manifest))
+        archive = Archive(self.annee.pk, racine=self.racine)
+        for eleve_id, notes in par_eleve.items():
+            self.assertEqual(lues(archive, eleve_id), notes)
+
+    def test_annee_active_refusee(self):
+        AnneeScolaire.objects.filter(pk=self.annee.pk).update(est_active=True)
+        self.annee.refresh_from_db()
+        with self.assertRaises(ArchiveError):
+            archiver_annee(self.annee, racine=self.racine)
+
+    def test_facture_payee_apres_export_conservee(self):
+        archiver_annee(self.annee, racine=self.racine, supprimer=False)
+        facture = Facture.objects.filter(annee_scolaire=self.annee).exclude(
+            pk__in=Paiement.objects.values('facture_id'),
+        ).first()
+        paiement = Paiement.objects.filter(facture__annee_scolaire=self.annee).first()
+        paiement.pk, paiement.numero_recu, paiement.facture = None, '', facture
+        paiement.save()
+
+        dossier = dossier_annee(self.annee.pk, self.racine)
+        supprimer_archivees(dossier)
+
+        self.assertEqual(list(Facture.objects.filter(annee_scolaire=self.annee)), [facture])
+        self.assertEqual(list(Paiement.objects.filter(facture__annee_scolaire=self.annee)), [paiement])
+        self.assertEqual(lire_manifest(dossier)['tables']['finances.facture']['conservees'], 1)
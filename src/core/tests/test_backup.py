@@ -0,0 +1,92 @@
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth.models import Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from authentication.models import User
+from core.backup import NATURAL_KEYS, backup_models, create_backup, restore_backup, verify_backup
+from core.seeding import SchoolSeeder, SeedConfig
+from pedagogie.models import Note
+
+
+def lignes():
+    """{modèle: lignes triées par pk} des tables sauvegardées, hors clés naturelles."""
+    return {
+        model._meta.label_lower: list(
+            model._base_manager.order_by('pk').values_list(*[f.attname for f in model._meta.concrete_fields])
+        )
+        for model in backup_models()
+        if model._meta.label_lower not in NATURAL_KEYS
+        # Référence des permissions par pk : comparée par codename
+        and model is not User.user_permissions.through
+    }
+
+
+class BackupTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        SchoolSeeder(SeedConfig(classes_par_niveau=1, eleves_par_classe=2, jours_presence=3)).run()
+        cls.user = User.objects.filter(role=User.RoleChoices.ENSEIGNANT).order_by('pk').first()
+        cls.user.user_permissions.add(Permission.objects.get(codename='change_note'))
+
+    def setUp(self):
+        self.racine = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.racine, ignore_errors=True)
+
+    def _vider(self):
+        """Base vide : `flush` recrée types de contenu et permissions avec d'autres pk."""
+        call_command('flush', interactive=False, verbosity=0)
+        self.assertFalse(Note.objects.exists())
+
+    def _permissions(self):
+        return set(User.objects.get(pk=self.user.pk).user_permissions.values_list('codename', flat=True))
+
+    def test_restauration_complete_dans_une_base_vide(self):
+        avant = lignes()
+        ancien_type = ContentType.objects.get_for_model(Note).pk
+        manifest = create_backup(directory=self.racine, workers=1)
+        self.assertEqual(verify_backup(manifest['path'], deep=True), [])
+
+        self._vider()
+        # Type de contenu de Note (et ses permissions) recréé avec une autre pk
+        ContentType.objects.get_for_model(Note).delete()
+        ContentType.objects.clear_cache()
+        self.assertNotEqual(ContentType.objects.get_for_model(Note).pk, ancien_type)
+        restore_backup(manifest['path'])
+
+        self.assertEqual(lignes(), avant)
+        self.assertEqual(self._permissions(), {'change_note'})
+
+    def test_restauration_incrementale(self):
+        # Données générées avant le recouvrement de l'incrémentale
+        Note.objects.update(updated_at=timezone.now() - timedelta(hours=1))
+        complete = create_backup(directory=self.racine, workers=1)
+        note = Note.objects.order_by('pk').first()
+        note.valeur = Decimal('19.50')
+        note.save()
+        nouvelle = Note.objects.order_by('pk').last()
+        nouvelle.pk = None
+        nouvelle.save()
+        avant = lignes()
+
+        time.sleep(1)  # répertoires nommés à la seconde
+        incrementale = create_backup(incremental=True, directory=self.racine, workers=1)
+        self.assertEqual(incrementale['parent'], complete['path'].rsplit('/', 1)[-1])
+        notes = next(f for f in incrementale['files'] if f['model'] == 'pedagogie.Note')
+        self.assertTrue(notes['incremental'])
+        self.assertEqual(notes['rows'], 2)
+
+        self._vider()
+        restore_backup(incrementale['path'])
+        self.assertEqual(lignes(), avant)
+        self.assertEqual(Note.objects.get(pk=note.pk).valeur, Decimal('19.50'))
+        self.assertTrue(Note.objects.filter(pk=nouvelle.pk).exists())
+        self.assertEqual(self._permissions(), {'change_note'})
@@ -0,0 +1,60 @@
+import io
+from datetime import date
+from types import SimpleNamespace
+from unittest import skipIf
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from administration.models import AnneeScolaire
+from core import partitions
+from pedagogie.models import Note, Presence
+
+
+class BornesTests(SimpleTestCase):
+
+    def test_annee_civile_a_la_bascule(self):
+        self.assertEqual(partitions.annee_civile(date(2026, 3, 3)), 2025)
+        self.assertEqual(partitions.annee_civile(date(2025, 8, 1)), 2025)
+        self.assertEqual(partitions.annee_civile(date(2025, 7, 31)), 2024)
+        with override_settings(PARTITION_MOIS_BASCULE=9):
+            self.assertEqual(partitions.annee_civile(date(2025, 8, 31)), 2024)
+
+    def test_partitions_d_une_annee(self):
+        annee = SimpleNamespace(pk=4, date_debut=date(2025, 9, 1), date_fin=date(2026, 6, 30))
+        note, presence = Note._meta.db_table, Presence._meta.db_table
+        self.assertEqual(partitions.partitions_annee(annee), [
+            (note, f'{note}_annee_4', 'FOR VALUES IN (4)', '"annee_scolaire_id" = 4'),
+            (
+                presence, f'{presence}_2025',
+                "FOR VALUES FROM ('2025-08-01') TO ('2026-08-01')",
+                "\"date\" >= '2025-08-01' AND \"date\" < '2026-08-01'",
+            ),
+        ])
+
+
+@skipIf(partitions.est_disponible(), 'Comportement des moteurs sans partitionnement')
+class SansPartitionnementTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.annee = AnneeScolaire.objects.create(
+            nom='2030-2031', date_debut=date(2030, 9, 1), date_fin=date(2031, 6, 30), est_active=True,
+        )
+
+    def test_creer_partitions_sans_effet(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(partitions.creer_partitions(self.annee), [])
+            self.assertEqual(partitions.lister(), [])
+            self.assertFalse(partitions.est_partitionnee(Note._meta.db_table))
+        self.assertFalse(partitions.partitionner(Note))
+        self.assertFalse(partitions.departitionner(Presence))
+
+    def test_champs_conflit_cle_primaire_seule(self):
+        self.assertEqual(partitions.champs_conflit(Note), ['id'])
+        self.assertEqual(partitions.champs_conflit(Presence), ['id'])
+
+    def test_commande_sans_effet(self):
+        sortie = io.StringIO()
+        call_command('creer_partitions', stdout=sortie)
+        self.assertIn('rien à faire', sortie.getvalue())
@@ -0,0 +1,12 @@
+from django.test import TestCase
+
+from core.seeding import SchoolSeeder, SeedConfig, SeedError
+
+
+class SeedingTests(TestCase):
+
+    def test_second_passage_refuse(self):
+        config = SeedConfig(seed=3, classes_par_niveau=1, eleves_par_classe=1, jours_presence=1)
+        SchoolSeeder(config).run()
+        with self.assertRaises(SeedError):
+            SchoolSeeder(config).run()
@@ -0,0 +1,28 @@
+"""
+Sauvegarde de la base de données.
+
+Usage (depuis la racine du dépôt) :
+    python src/scripts/backup.py                  # complète
+    python src/scripts/backup.py --incremental    # à planifier (cron) entre deux complètes
+
+Raccourci vers `manage.py backup`, voir core/backup.py.
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.dev')
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('backup', *sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+"""
+Génère des données de test réalistes.
+
+Usage (depuis la racine du dépôt) :
+    python src/scripts/seed_data.py --seed 42 --eleves-par-classe 50
+
+Raccourci vers `manage.py seed_data`, voir core/seeding.py.
+"""
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+
+def main():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.dev')
+
+    import django
+    from django.core.management import call_command
+
+    django.setup()
+    call_command('seed_data', *sys.argv[1:])
+
+
+if __name__ == '__main__':
+    main()